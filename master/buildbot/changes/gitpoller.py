@@ -16,6 +16,7 @@
 from __future__ import annotations
 
 import contextlib
+import dataclasses
 import os
 import re
 from typing import TYPE_CHECKING
@@ -56,6 +57,100 @@ class GitError(Exception):
     """Raised when git exits with code 128."""
 
 
+@dataclasses.dataclass
+class GitCommitInfo:
+    revision: str
+    parents: list[str]
+    timestamp: int | None
+    author: str
+    committer: str
+    files: list[str]
+    comments: str
+
+
+class GitLogParser:
+    """Incrementally parses the output of ``git log -z`` produced with ``FORMAT``, ``-m``,
+    ``--first-parent`` and ``--name-only`` options.
+
+    Each commit is output as an empty token followed by the fields of ``FORMAT`` and then by
+    the list of changed files, all separated by NUL characters.
+    """
+
+    FORMAT = '%x00%H%x00%P%x00%ct%x00%aN <%aE>%x00%cN <%cE>%x00%s%n%b'
+    FIELD_COUNT = 6
+
+    def __init__(self, encoding: str, usetimestamps: bool = True) -> None:
+        self.encoding = encoding
+        self.usetimestamps = usetimestamps
+        self.commits: list[GitCommitInfo] = []
+        self._pending: list[bytes] = []
+        self._fields: list[bytes] | None = None
+        self._files: list[bytes] = []
+
+    def feed(self, data: bytes) -> None:
+        if b'\0' not in data:
+            self._pending.append(data)
+            return
+        self._pending.append(data)
+        tokens = b''.join(self._pending).split(b'\0')
+        self._pending = [tokens.pop()]
+        for token in tokens:
+            self._add_token(token)
+
+    def finish(self) -> list[GitCommitInfo]:
+        last = b''.join(self._pending)
+        self._pending = []
+        if last.strip():
+            self._add_token(last)
+        if self._fields is not None:
+            self._end_commit()
+        return self.commits
+
+    def _add_token(self, token: bytes) -> None:
+        if self._fields is None:
+            if token.strip():
+                raise ValueError(f'unexpected git log output: {token!r}')
+            self._fields = []
+        elif len(self._fields) < self.FIELD_COUNT:
+            self._fields.append(token)
+        elif not token:
+            self._end_commit()
+            self._fields = []
+        else:
+            if not self._files:
+                # the list of files is separated from the commit message by a newline
+                token = token.removeprefix(b'\n')
+            if token:
+                self._files.append(token)
+
+    def _end_commit(self) -> None:
+        assert self._fields is not None
+        if len(self._fields) < self.FIELD_COUNT:
+            raise ValueError(f'truncated git log output: {self._fields!r}')
+
+        revision, parents, timestamp, author, committer, comments = (
+            bytes2unicode(field, encoding=self.encoding) for field in self._fields
+        )
+        if not author:
+            raise OSError(f'could not get commit author for rev {revision}')
+        if not committer:
+            raise OSError(f'could not get commit committer for rev {revision}')
+
+        self.commits.append(
+            GitCommitInfo(
+                revision=revision,
+                parents=parents.split(),
+                timestamp=int(timestamp) if self.usetimestamps else None,
+                author=author,
+                committer=committer,
+                files=[bytes2unicode(file, encoding=self.encoding) for file in self._files],
+                comments=comments.strip(),
+            )
+        )
+        self._fields = None
+        self._files = []
+
+
 class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
     """This source will poll a remote git repo for changes and submit
     them to the change master."""
@@ -72,6 +167,7 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         "project",
         "pollAtLaunch",
         "buildPushesWithNoCommits",
+        "batch_commit_metadata",
         "pollRandomDelayMin",
         "pollRandomDelayMax",
         "_git_auth",
@@ -112,6 +208,7 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         pollRandomDelayMax: int = 0,
         auth_credentials: tuple[IRenderable | str, IRenderable | str] | None = None,
         git_credentials: GitCredentialOptions | None = None,
+        batch_commit_metadata: bool = False,
     ) -> None:
         if only_tags and (branch or branches):
             config.error("GitPoller: can't specify only_tags and branch/branches")
@@ -179,6 +276,7 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         pollRandomDelayMax: int = 0,
         auth_credentials: tuple[IRenderable | str, IRenderable | str] | None = None,
         git_credentials: GitCredentialOptions | None = None,
+        batch_commit_metadata: bool = False,
     ) -> InlineCallbacksType[None]:
         if name is None:
             name = repourl
@@ -198,6 +296,7 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         self.branches = branches
         self.encoding = encoding
         self.buildPushesWithNoCommits = buildPushesWithNoCommits
+        self.batch_commit_metadata = batch_commit_metadata
         self.gitbin = gitbin
         self.workdir = workdir
         self.usetimestamps = usetimestamps
@@ -547,6 +646,59 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         d = self._dovccmd('log', args, path=self.workdir)
         return d
 
+    @defer.inlineCallbacks
+    def _get_commit_info(self, rev: str, branch: str) -> InlineCallbacksType[GitCommitInfo]:
+        dl: defer.Deferred[Any] = defer.DeferredList(
+            [
+                self._get_commit_timestamp(rev),
+                self._get_commit_author(rev),
+                self._get_commit_committer(rev),
+                self._get_commit_files(rev),
+                self._get_commit_comments(rev),
+            ],
+            consumeErrors=True,
+        )
+
+        results = yield dl
+
+        # check for failures
+        failures = [r[1] for r in results if not r[0]]
+        if failures:
+            for failure in failures:
+                log.err(failure, f"while processing changes for {rev} {branch}")
+            # just fail on the first error; they're probably all related!
+            failures[0].raiseException()
+
+        timestamp, author, committer, files, comments = [r[1] for r in results]
+        return GitCommitInfo(
+            revision=rev,
+            parents=[],
+            timestamp=timestamp,
+            author=author,
+            committer=committer,
+            files=files,
+            comments=comments,
+        )
+
+    @async_to_deferred
+    async def _get_commits_info_batched(self, revs_args: list[str]) -> list[GitCommitInfo]:
+        """
+        Reads the metadata of all commits selected by revs_args with a single git log
+        invocation. Commits are returned in the order they are output by git, newest first.
+        """
+        parser = GitLogParser(self.encoding, usetimestamps=self.usetimestamps)
+        args = [
+            '-z',
+            '--first-parent',
+            '-m',
+            '--name-only',
+            f'--format={GitLogParser.FORMAT}',
+            *revs_args,
+            '--',
+        ]
+        await self._dovccmd('log', args, path=self.workdir, collect_stdout=parser.feed)
+        return parser.finish()
+
     @defer.inlineCallbacks
     def _process_changes(self, newRev: str, branch: str) -> InlineCallbacksType[None]:
         """
@@ -561,23 +713,29 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         if not self.lastRev:
             return
 
+        revs_args = [f'{newRev}'] + ['^' + rev for rev in sorted(self.lastRev.values())]
+
         # get the change list
-        revListArgs = (
-            ['--ignore-missing', '--first-parent']
-            + ['--format=%H', f'{newRev}']
-            + ['^' + rev for rev in sorted(self.lastRev.values())]
-            + ['--']
-        )
-        results = yield self._dovccmd('log', revListArgs, path=self.workdir)
+        commits: list[GitCommitInfo] | None = None
+        if self.batch_commit_metadata:
+            commits = yield self._get_commits_info_batched(['--ignore-missing', *revs_args])
+            revList = [commit.revision for commit in commits]
+        else:
+            revListArgs = ['--ignore-missing', '--first-parent', '--format=%H', *revs_args, '--']
+            results = yield self._dovccmd('log', revListArgs, path=self.workdir)
+            revList = results.split()
 
         # process oldest change first
-        revList = results.split()
         revList.reverse()
+        if commits is not None:
+            commits.reverse()
 
         if self.buildPushesWithNoCommits and not revList:
             existingRev = self.lastRev.get(branch)
             if existingRev != newRev:
                 revList = [newRev]
+                if commits is not None:
+                    commits = yield self._get_commits_info_batched(['--no-walk', newRev])
                 if existingRev is None:
                     # This branch was completely unknown, rebuild
                     log.msg(f'gitpoller: rebuilding {newRev} for new branch "{branch}"')
@@ -597,9 +755,11 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
 
         last_commit_id = None
         if self._codebase_id is not None and change_count:
-            rev = revList[0]
-            parent_hashes = yield self._get_commit_parent_hashes(rev)
-            parent_hash = parent_hashes.split()[0]
+            if commits is not None:
+                parent_hash = commits[0].parents[0]
+            else:
+                parent_hashes = yield self._get_commit_parent_hashes(revList[0])
+                parent_hash = parent_hashes.split()[0]
             last_commit = yield self.master.data.get((
                 'codebases',
                 self._codebase_id,
@@ -609,37 +769,19 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             if last_commit is not None:
                 last_commit_id = last_commit['commitid']
 
-        for rev in revList:
-            dl: defer.Deferred[Any] = defer.DeferredList(
-                [
-                    self._get_commit_timestamp(rev),
-                    self._get_commit_author(rev),
-                    self._get_commit_committer(rev),
-                    self._get_commit_files(rev),
-                    self._get_commit_comments(rev),
-                ],
-                consumeErrors=True,
-            )
-
-            results = yield dl
-
-            # check for failures
-            failures = [r[1] for r in results if not r[0]]
-            if failures:
-                for failure in failures:
-                    log.err(failure, f"while processing changes for {rev} {branch}")
-                # just fail on the first error; they're probably all related!
-                failures[0].raiseException()
-
-            timestamp, author, committer, files, comments = [r[1] for r in results]
+        for index, rev in enumerate(revList):
+            if commits is not None:
+                commit = commits[index]
+            else:
+                commit = yield self._get_commit_info(rev, branch)
 
             yield self.master.data.updates.addChange(
-                author=author,
-                committer=committer,
+                author=commit.author,
+                committer=commit.committer,
                 revision=bytes2unicode(rev, encoding=self.encoding),
-                files=files,
-                comments=comments,
-                when_timestamp=timestamp,
+                files=commit.files,
+                comments=commit.comments,
+                when_timestamp=commit.timestamp,
                 branch=bytes2unicode(self._removeHeads(branch)),
                 project=self.project,
                 repository=bytes2unicode(self.repourl, encoding=self.encoding),
@@ -650,10 +792,10 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             if self._codebase_id is not None:
                 last_commit_id = yield self.master.data.updates.add_commit(
                     codebaseid=self._codebase_id,
-                    author=author,
-                    committer=committer,
-                    comments=comments,
-                    when_timestamp=timestamp,
+                    author=commit.author,
+                    committer=commit.committer,
+                    comments=commit.comments,
+                    when_timestamp=commit.timestamp,
                     revision=bytes2unicode(rev, encoding=self.encoding),
                     parent_commitid=last_commit_id,
                 )
@@ -674,7 +816,12 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
         path: str | None = None,
         auth_files_path: str | None = None,
         initial_stdin: str | None = None,
+        collect_stdout: Callable[[bytes], None] | None = None,
     ) -> str:
+        """
+        Runs a git command and returns its stripped output. If collect_stdout is given, the
+        output is passed to it as it is received instead and an empty string is returned.
+        """
         full_args: list[str] = []
         full_env = os.environ.copy()
 
@@ -698,9 +845,15 @@ class GitPoller(base.ReconfigurablePollingChangeSource, StateMixin, GitMixin):
             path,
             env=full_env,
             initial_stdin=unicode2bytes(initial_stdin) if initial_stdin is not None else None,
+            collect_stdout=collect_stdout if collect_stdout is not None else True,
         )
-        assert isinstance(res, tuple) and len(res) == 3
-        (code, stdout_bytes, stderr_bytes) = res
+        if collect_stdout is not None:
+            assert isinstance(res, tuple) and len(res) == 2
+            (code, stderr_bytes) = res
+            stdout_bytes = b''
+        else:
+            assert isinstance(res, tuple) and len(res) == 3
+            (code, stdout_bytes, stderr_bytes) = res
         stdout = bytes2unicode(stdout_bytes, self.encoding)
         stderr = bytes2unicode(stderr_bytes, self.encoding)
         if code != 0:
@@ -41,6 +41,7 @@ from buildbot.config.errors import ConfigErrors
 from buildbot.config.errors import capture_config_errors
 from buildbot.config.errors import error
 from buildbot.db.compression import ZStdCompressor
+from buildbot.db.logstorage import LogStorage
 from buildbot.interfaces import IProperties
 from buildbot.interfaces import IRenderable
 from buildbot.process.codebase import Codebase
@@ -197,11 +198,16 @@ class MasterConfig(util.ComparableMixin):
         self.logEncoding = 'utf-8'
         self.logMaxSize = None
         self.logMaxTailSize = None
+        self.logWriteBufferSize = 64 * 1024
+        self.logWriteBufferDelay = 1.0
+        self.logStorage: LogStorage | None = None
+        self.logSearchIndex = False
         self.properties = properties.Properties()
         self.collapseRequests = None
         self.codebaseGenerator = None
         self.prioritizeBuilders = None
         self.select_next_worker = None
+        self.build_distribution_concurrency = 1
         self.multiMaster = False
         self.manhole = None
         self.protocols = {}
@@ -239,6 +245,7 @@ class MasterConfig(util.ComparableMixin):
         self.services = {}
 
     _known_config_keys = set([
+        "build_distribution_concurrency",
         "buildbotNetUsageData",
         "buildbotURL",
         "buildCacheSize",
@@ -257,6 +264,10 @@ class MasterConfig(util.ComparableMixin):
         "logEncoding",
         "logMaxSize",
         "logMaxTailSize",
+        "logSearchIndex",
+        "logStorage",
+        "logWriteBufferDelay",
+        "logWriteBufferSize",
         "manhole",
         "machines",
         "collapseRequests",
@@ -428,8 +439,11 @@ class MasterConfig(util.ComparableMixin):
             'logCompressionMethod',
             _default_log_compression_method(),
         )
-        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4', 'zstd', 'br'):
-            error("c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br' or 'zstd'")
+        if self.logCompressionMethod not in ('raw', 'bz2', 'gz', 'lz4', 'zstd', 'zstd_dict', 'br'):
+            error(
+                "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br', 'zstd' "
+                "or 'zstd_dict'"
+            )
 
         if self.logCompressionMethod == "lz4":
             try:
@@ -441,14 +455,14 @@ class MasterConfig(util.ComparableMixin):
                     "To set c['logCompressionMethod'] to 'lz4' "
                     "you must install the lz4 library ('pip install lz4')"
                 )
-        elif self.logCompressionMethod == "zstd":
+        elif self.logCompressionMethod in ("zstd", "zstd_dict"):
             try:
                 import zstandard  # noqa: PLC0415
 
                 _ = zstandard
             except ImportError:
                 error(
-                    "To set c['logCompressionMethod'] to 'zstd' "
+                    f"To set c['logCompressionMethod'] to '{self.logCompressionMethod}' "
                     "you must install the zstandard Buildbot extra ('pip install buildbot[zstd]')"
                 )
         elif self.logCompressionMethod == "br":
@@ -464,8 +478,33 @@ class MasterConfig(util.ComparableMixin):
 
         copy_int_param('logMaxSize')
         copy_int_param('logMaxTailSize')
+
+        log_write_buffer_size = config_dict.get('logWriteBufferSize', self.logWriteBufferSize)
+        if not isinstance(log_write_buffer_size, int) or log_write_buffer_size < 0:
+            error("c['logWriteBufferSize'] must be a non-negative integer")
+        else:
+            self.logWriteBufferSize = log_write_buffer_size
+
+        log_write_buffer_delay = config_dict.get('logWriteBufferDelay', self.logWriteBufferDelay)
+        if not isinstance(log_write_buffer_delay, (int, float)) or log_write_buffer_delay < 0:
+            error("c['logWriteBufferDelay'] must be a non-negative number")
+        else:
+            self.logWriteBufferDelay = log_write_buffer_delay
+
         copy_param('logEncoding')
 
+        log_storage = config_dict.get('logStorage')
+        if log_storage is not None and not isinstance(log_storage, LogStorage):
+            error("c['logStorage'] must be a LogStorage instance, e.g. FileLogStorage")
+        else:
+            self.logStorage = log_storage
+
+        log_search_index = config_dict.get('logSearchIndex', False)
+        if not isinstance(log_search_index, bool):
+            error("c['logSearchIndex'] must be a boolean")
+        else:
+            self.logSearchIndex = log_search_index
+
         properties = config_dict.get('properties', {})
         if not isinstance(properties, dict):
             error("c['properties'] must be a dictionary")
@@ -496,6 +535,15 @@ class MasterConfig(util.ComparableMixin):
         else:
             self.select_next_worker = select_next_worker
 
+        build_distribution_concurrency = config_dict.get("build_distribution_concurrency", 1)
+        if (
+            not isinstance(build_distribution_concurrency, int)
+            or build_distribution_concurrency < 1
+        ):
+            error("c['build_distribution_concurrency'] must be a positive integer")
+        else:
+            self.build_distribution_concurrency = build_distribution_concurrency
+
         protocols = config_dict.get('protocols', {})
         if isinstance(protocols, dict):
             for proto, options in protocols.items():
@@ -827,12 +875,15 @@ class MasterConfig(util.ComparableMixin):
             'debug',
             'default_page',
             'json_cache_seconds',
+            'json_streaming',
             'jsonp',
             'logRotateLength',
             'logfileName',
             'maxRotatedFiles',
+            'metrics_endpoint',
             'plugins',
             'port',
+            'rest_cache',
             'rest_minimum_version',
             'ui_default_config',
             'versions',
@@ -860,6 +911,18 @@ class MasterConfig(util.ComparableMixin):
                     cleaned_versions.append(v)
             www_cfg['versions'] = cleaned_versions
 
+        rest_cache = www_cfg.get('rest_cache')
+        if rest_cache is not None:
+            if not isinstance(rest_cache, dict) or set(rest_cache) - {
+                'resources',
+                'max_age',
+                'size',
+            }:
+                error(
+                    'Invalid www["rest_cache"] configuration should be a dictionary '
+                    'with optional "resources", "max_age" and "size" keys'
+                )
+
         cookie_expiration_time = www_cfg.get('cookie_expiration_time')
         if cookie_expiration_time is not None:
             if not isinstance(cookie_expiration_time, datetime.timedelta):
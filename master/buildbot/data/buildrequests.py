@@ -197,10 +197,15 @@ class BuildRequestsEndpoint(base.Endpoint):
         )
         results = []
         filters = resultSpec.popProperties() if hasattr(resultSpec, 'popProperties') else []
-        for br in buildrequests:
-            properties = yield _get_buildset_properties_filtered(
-                self.master, br.buildsetid, filters
+        buildsets_props = {}
+        if filters and buildrequests:
+            buildsets_props = yield self.master.db.buildsets.getBuildsetsProperties(
+                list({br.buildsetid for br in buildrequests})
             )
+        for br in buildrequests:
+            properties = None
+            if filters:
+                properties = _generate_filtered_properties(buildsets_props[br.buildsetid], filters)
             results.append(_db2data(br, properties))
         return results
 
@@ -199,13 +199,16 @@ class BuildsEndpoint(base.BuildNestingMixin, base.Endpoint):
         # returns properties' list
         filters = resultSpec.popProperties()
 
+        # Avoid to request DB for Build's properties if not specified
+        builds_props = {}
+        if filters and builds:
+            builds_props = yield self.master.db.builds.getBuildsProperties([b.id for b in builds])
+
         buildscol = []
         for b in builds:
             data = _db2data(b)
-            # Avoid to request DB for Build's properties if not specified
             if filters:
-                props = yield self.master.db.builds.getBuildProperties(data["buildid"])
-                filtered_properties = _generate_filtered_properties(props, filters)
+                filtered_properties = _generate_filtered_properties(builds_props[b.id], filters)
                 if filtered_properties:
                     data["properties"] = filtered_properties
 
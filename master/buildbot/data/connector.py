@@ -62,6 +62,7 @@ class DataConnector(service.AsyncService):
         'buildbot.data.steps',
         'buildbot.data.logs',
         'buildbot.data.logchunks',
+        'buildbot.data.log_search_hits',
         'buildbot.data.buildsets',
         'buildbot.data.changes',
         'buildbot.data.changesources',
@@ -0,0 +1,90 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+from buildbot.data import base
+from buildbot.data import exceptions
+from buildbot.data import types
+from buildbot.db.logsearch import LogSearchQueryError
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from buildbot.db.logsearch import LogSearchHitModel
+
+
+def _db2data(query: str, model: LogSearchHitModel) -> dict[str, Any]:
+    return {
+        'q': query,
+        'logid': model.logid,
+        'stepid': model.stepid,
+        'buildid': model.buildid,
+        'builderid': model.builderid,
+        'started_at': model.started_at,
+        'line': model.line,
+        'snippet': model.snippet,
+    }
+
+
+class LogSearchHitsEndpoint(base.Endpoint):
+    kind = base.EndpointKind.COLLECTION
+    pathPatterns = [
+        "/logs/search",
+    ]
+
+    # maximum number of hits returned when the request does not limit them
+    MAX_HITS = 1000
+
+    @async_to_deferred
+    async def get(self, result_spec: base.ResultSpec, kwargs: Any) -> list[dict[str, Any]]:
+        query = result_spec.popStringFilter('q')
+        if not query:
+            raise exceptions.InvalidQueryParameter("the query must be given in the 'q' parameter")
+        builderid = result_spec.popIntegerFilter('builderid')
+        since = result_spec.popOneFilter('started_at', 'ge')
+
+        # the limit can only be applied by the search if no other filtering follows
+        limit = self.MAX_HITS
+        if result_spec.limit is not None and not result_spec.filters and not result_spec.order:
+            limit = min(result_spec.limit + (result_spec.offset or 0), limit)
+
+        try:
+            hits = await self.master.db.logsearch.searchLogs(
+                query, builderid=builderid, since=since, limit=limit
+            )
+        except LogSearchQueryError as e:
+            raise exceptions.InvalidQueryParameter(str(e)) from e
+        return [_db2data(query, hit) for hit in hits]
+
+
+class LogSearchHit(base.ResourceType):
+    name = "log_search_hit"
+    plural = "log_search_hits"
+    endpoints = [LogSearchHitsEndpoint]
+
+    class EntityType(types.Entity):
+        q = types.String()
+        logid = types.Integer()
+        stepid = types.Integer()
+        buildid = types.Integer()
+        builderid = types.Integer()
+        started_at = types.NoneOk(types.DateTime())
+        line = types.Integer()
+        snippet = types.String()
+
+    entityType = EntityType(name)
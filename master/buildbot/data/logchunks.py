@@ -64,6 +64,7 @@ class LogChunkEndpointBase(base.BuildNestingMixin, base.Endpoint):
         log_dict = yield retriever.get_log_dict()
         if log_dict is None:
             return None, None, None
+        yield self.master.data.rtypes.log.flush_write_buffer(log_dict.id)
 
         # The following should be run sequentially instead of in gatherResults(), so that
         # they don't all start a query on step dict each.
@@ -118,6 +119,8 @@ class LogChunkEndpoint(LogChunkEndpointBase):
         logid = yield retriever.get_log_id()
         if logid is None:
             return None
+        # lines added to the log may not be in the database yet
+        yield self.master.data.rtypes.log.flush_write_buffer(logid)
 
         firstline = int(resultSpec.offset or 0)
         lastline = None if resultSpec.limit is None else firstline + int(resultSpec.limit) - 1
@@ -125,7 +128,9 @@ class LogChunkEndpoint(LogChunkEndpointBase):
 
         # get the number of lines, if necessary
         if lastline is None:
-            log_dict = yield retriever.get_log_dict()
+            # not using the retriever, as it may have fetched the log before
+            # the flush above
+            log_dict = yield self.master.db.logs.getLog(logid)
             if not log_dict:
                 return None
             lastline = int(max(0, log_dict.num_lines - 1))
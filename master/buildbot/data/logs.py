@@ -15,6 +15,7 @@
 
 from __future__ import annotations
 
+import time
 from typing import TYPE_CHECKING
 from typing import Any
 
@@ -23,13 +24,35 @@ from twisted.internet import defer
 from buildbot.data import base
 from buildbot.data import types
 from buildbot.db.logs import LogSlugExistsError
+from buildbot.process import metrics
 from buildbot.util import identifiers
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from buildbot.data.resultspec import ResultSpec
     from buildbot.db.logs import LogModel
     from buildbot.util.twisted import InlineCallbacksType
 
+_append_histogram = metrics.registry.histogram(
+    'buildbot_log_append_seconds',
+    'Time taken to append a chunk of content to a log',
+)
+_appended_lines_counter = metrics.registry.counter(
+    'buildbot_log_appended_lines_total',
+    'Number of lines appended to logs',
+)
+
+logs_field_map = {
+    'logid': 'logs.id',
+    'name': 'logs.name',
+    'slug': 'logs.slug',
+    'stepid': 'logs.stepid',
+    'complete': 'logs.complete',
+    'num_lines': 'logs.num_lines',
+    'type': 'logs.type',
+}
+
 
 class EndpointMixin:
     def db2data(self, model: LogModel) -> defer.Deferred[dict[str, Any]]:
@@ -95,7 +118,8 @@ class LogsEndpoint(EndpointMixin, base.BuildNestingMixin, base.Endpoint):
         step_dict = yield retriever.get_step_dict()
         if step_dict is None:
             return []
-        logs = yield self.master.db.logs.getLogs(stepid=step_dict.id)
+        resultSpec.fieldMapping = logs_field_map
+        logs = yield self.master.db.logs.getLogs(stepid=step_dict.id, resultSpec=resultSpec)
         results = []
         for dbdict in logs:
             results.append((yield self.db2data(dbdict)))
@@ -122,6 +146,28 @@ class Log(base.ResourceType):
 
     entityType = EntityType(name)
 
+    def __init__(self, master: Any) -> None:
+        super().__init__(master)
+        # flush functions of the logs of this master that have lines not
+        # written to the database yet, by logid
+        self._write_buffers: dict[int, Callable[[], defer.Deferred[None]]] = {}
+
+    def register_write_buffer(self, logid: int, flush: Callable[[], defer.Deferred[None]]) -> None:
+        self._write_buffers[logid] = flush
+
+    def unregister_write_buffer(self, logid: int) -> None:
+        self._write_buffers.pop(logid, None)
+
+    def flush_write_buffer(self, logid: int) -> defer.Deferred[None]:
+        """
+        Write the lines of the given log that are still buffered by this master
+        to the database, so that they can be read.
+        """
+        flush = self._write_buffers.get(logid)
+        if flush is None:
+            return defer.succeed(None)
+        return flush()
+
     @defer.inlineCallbacks
     def generateEvent(self, _id: int, event: str) -> InlineCallbacksType[None]:
         # get the build and munge the result for the notification
@@ -149,7 +195,10 @@ class Log(base.ResourceType):
     @base.updateMethod
     @defer.inlineCallbacks
     def appendLog(self, logid: int, content: str) -> InlineCallbacksType[None]:
+        start = time.monotonic()
         res = yield self.master.db.logs.appendLog(logid=logid, content=content)
+        _append_histogram.observe(time.monotonic() - start)
+        _appended_lines_counter.inc(content.count('\n'))
         self.generateEvent(logid, "append")
         return res
 
@@ -132,19 +132,11 @@ class Properties(base.ResourceType):
     def setBuildProperties(
         self, buildid: int, properties: IProperties
     ) -> InlineCallbacksType[None]:
-        to_update = {}
-        oldproperties = yield self.master.data.get(('builds', str(buildid), "properties"))
         properties_real = properties.getProperties()
         properties_dict = yield properties_real.render(properties_real.asDict())
-        for k, v in properties_dict.items():
-            if k in oldproperties and oldproperties[k] == v:
-                continue
-            to_update[k] = v
-
-        if to_update:
-            for k, v in to_update.items():
-                yield self.master.db.builds.setBuildProperty(buildid, k, v[0], v[1])
-            yield self.generateUpdateEvent(buildid, to_update)
+        updated = yield self.master.db.builds.setBuildProperties(buildid, properties_dict)
+        if updated:
+            yield self.generateUpdateEvent(buildid, updated)
 
     @base.updateMethod
     @defer.inlineCallbacks
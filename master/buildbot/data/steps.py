@@ -46,6 +46,20 @@ def _db2data(model: StepModel) -> dict[str, Any]:
     }
 
 
+steps_field_map = {
+    'stepid': 'steps.id',
+    'number': 'steps.number',
+    'name': 'steps.name',
+    'buildid': 'steps.buildid',
+    'started_at': 'steps.started_at',
+    'locks_acquired_at': 'steps.locks_acquired_at',
+    'complete_at': 'steps.complete_at',
+    'state_string': 'steps.state_string',
+    'results': 'steps.results',
+    'hidden': 'steps.hidden',
+}
+
+
 class StepEndpoint(base.BuildNestingMixin, base.Endpoint):
     kind = base.EndpointKind.SINGLE
     pathPatterns = [
@@ -92,7 +106,11 @@ class StepsEndpoint(base.BuildNestingMixin, base.Endpoint):
             buildid = yield self.getBuildid(kwargs)
             if buildid is None:
                 return None
-        steps = yield self.master.db.steps.getSteps(buildid=buildid)
+        complete = resultSpec.popBooleanFilter('complete')
+        resultSpec.fieldMapping = steps_field_map
+        steps = yield self.master.db.steps.getSteps(
+            buildid=buildid, complete=complete, resultSpec=resultSpec
+        )
         return [_db2data(model) for model in steps]
 
 
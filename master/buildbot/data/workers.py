@@ -46,6 +46,14 @@ def _db2data(model: WorkerModel) -> dict[str, Any]:
     }
 
 
+workers_field_map = {
+    'workerid': 'workers.id',
+    'name': 'workers.name',
+    'paused': 'workers.paused',
+    'graceful': 'workers.graceful',
+}
+
+
 class WorkerEndpoint(base.Endpoint):
     kind = base.EndpointKind.SINGLE
     pathPatterns = [
@@ -106,11 +114,13 @@ class WorkersEndpoint(base.Endpoint):
     ) -> InlineCallbacksType[list[dict[str, Any]]]:
         paused = resultSpec.popBooleanFilter('paused')
         graceful = resultSpec.popBooleanFilter('graceful')
+        resultSpec.fieldMapping = workers_field_map
         workers_dicts = yield self.master.db.workers.getWorkers(
             builderid=kwargs.get('builderid'),
             masterid=kwargs.get('masterid'),
             paused=paused,
             graceful=graceful,
+            resultSpec=resultSpec,
         )
         return [_db2data(w) for w in workers_dicts]
 
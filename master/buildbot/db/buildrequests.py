@@ -86,6 +86,13 @@ class BuildRequestModel:
         raise KeyError(key)
 
 
+@dataclass
+class UnclaimedBuildRequestsSummaryModel:
+    builderid: int
+    highest_priority: int
+    oldest_submitted_at: datetime.datetime
+
+
 @deprecate.deprecated(versions.Version("buildbot", 4, 1, 0), BuildRequestModel)
 class BrDict(BuildRequestModel):
     pass
@@ -196,6 +203,43 @@ class BuildRequestsConnectorComponent(base.DBConnectorComponent):
         res = yield self.db.pool.do(thd)
         return res
 
+    def get_unclaimed_buildrequests_summary(
+        self,
+    ) -> defer.Deferred[dict[int, UnclaimedBuildRequestsSummaryModel]]:
+        """
+        Return the highest priority and the oldest submission time of the
+        unclaimed build requests of every builder, keyed by builderid.
+        Builders without unclaimed build requests are omitted.
+        """
+
+        def thd(conn: sa.engine.Connection) -> dict[int, UnclaimedBuildRequestsSummaryModel]:
+            reqs_tbl = self.db.model.buildrequests
+            claims_tbl = self.db.model.buildrequest_claims
+
+            from_clause = reqs_tbl.outerjoin(claims_tbl, reqs_tbl.c.id == claims_tbl.c.brid)
+            q = (
+                sa
+                .select(
+                    reqs_tbl.c.builderid,
+                    sa.func.max(reqs_tbl.c.priority).label('highest_priority'),
+                    sa.func.min(reqs_tbl.c.submitted_at).label('oldest_submitted_at'),
+                )
+                .select_from(from_clause)
+                .where(claims_tbl.c.claimed_at == NULL)
+                .where(reqs_tbl.c.complete == 0)
+                .group_by(reqs_tbl.c.builderid)
+            )
+            return {
+                row.builderid: UnclaimedBuildRequestsSummaryModel(
+                    builderid=row.builderid,
+                    highest_priority=row.highest_priority,
+                    oldest_submitted_at=epoch2datetime(row.oldest_submitted_at),
+                )
+                for row in conn.execute(q).fetchall()
+            }
+
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def claimBuildRequests(
         self, brids: list[int], claimed_at: datetime.datetime | None = None
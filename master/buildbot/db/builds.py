@@ -335,6 +335,30 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    # returns a Deferred that returns a value
+    def getBuildsProperties(
+        self, buildids: Sequence[int]
+    ) -> defer.Deferred[dict[int, dict[str, tuple[Any, str]]]]:
+        """Get the properties of several builds at once, keyed by buildid"""
+
+        def thd(conn: sa.engine.Connection) -> dict[int, dict[str, tuple[Any, str]]]:
+            bp_tbl = self.db.model.build_properties
+            props: dict[int, dict[str, tuple[Any, str]]] = {buildid: {} for buildid in buildids}
+            # batch the buildids so that the parameter lists supported by the
+            # DBAPI aren't exhausted
+            for batch in self.doBatch(props.keys(), 100):
+                q = sa.select(
+                    bp_tbl.c.buildid,
+                    bp_tbl.c.name,
+                    bp_tbl.c.value,
+                    bp_tbl.c.source,
+                ).where(bp_tbl.c.buildid.in_(batch))
+                for row in conn.execute(q):
+                    props[row.buildid][row.name] = (json.loads(row.value), row.source)
+            return props
+
+        return self.db.pool.do(thd)
+
     @defer.inlineCallbacks
     def setBuildProperty(
         self, bid: int, name: str, value: Any, source: str
@@ -362,6 +386,60 @@ class BuildsConnectorComponent(base.DBConnectorComponent):
 
         yield self.db.pool.do_with_transaction(thd)
 
+    def setBuildProperties(
+        self, bid: int, properties: dict[str, tuple[Any, str]]
+    ) -> defer.Deferred[dict[str, tuple[Any, str]]]:
+        """Set several properties at once, in a single transaction. Only the
+        properties which are new or changed are written; they are returned."""
+
+        def thd(conn: sa.engine.Connection) -> dict[str, tuple[Any, str]]:
+            bp_tbl = self.db.model.build_properties
+            for name, (_, source) in properties.items():
+                self.checkLength(bp_tbl.c.name, name)
+                self.checkLength(bp_tbl.c.source, source)
+
+            q = sa.select(bp_tbl.c.name, bp_tbl.c.value, bp_tbl.c.source).where(
+                bp_tbl.c.buildid == bid
+            )
+            # compare decoded values, as equal values may have other encodings,
+            # such as dicts with their keys in another order
+            existing = {row.name: (json.loads(row.value), row.source) for row in conn.execute(q)}
+
+            changed: dict[str, tuple[Any, str]] = {}
+            inserts: list[dict[str, Any]] = []
+            updates: list[dict[str, Any]] = []
+            for name, (value, source) in properties.items():
+                value_js = json.dumps(value)
+                prop = existing.get(name)
+                if prop is None:
+                    inserts.append({
+                        "buildid": bid,
+                        "name": name,
+                        "value": value_js,
+                        "source": source,
+                    })
+                elif prop != (value, source):
+                    updates.append({"b_name": name, "b_value": value_js, "b_source": source})
+                else:
+                    continue
+                changed[name] = (value, source)
+
+            if inserts:
+                conn.execute(bp_tbl.insert(), inserts)
+            if updates:
+                update_q = (
+                    bp_tbl
+                    .update()
+                    .where(
+                        sa.and_(bp_tbl.c.buildid == bid, bp_tbl.c.name == sa.bindparam("b_name"))
+                    )
+                    .values(value=sa.bindparam("b_value"), source=sa.bindparam("b_source"))
+                )
+                conn.execute(update_q, updates)
+            return changed
+
+        return self.db.pool.do_with_transaction(thd)
+
     @defer.inlineCallbacks
     def add_build_locks_duration(self, buildid: int, duration_s: int) -> InlineCallbacksType[None]:
         def thd(conn: sa.engine.Connection) -> None:
@@ -35,6 +35,7 @@ from buildbot.warnings import warn_deprecated
 
 if TYPE_CHECKING:
     import datetime
+    from collections.abc import Sequence
 
     from buildbot.util.twisted import InlineCallbacksType
 
@@ -308,6 +309,30 @@ class BuildsetsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thd)
 
+    def getBuildsetsProperties(self, bsids: Sequence[int]) -> defer.Deferred[dict[int, BsProps]]:
+        """Get the properties of several buildsets at once, keyed by bsid"""
+
+        def thd(conn: sa.engine.Connection) -> dict[int, BsProps]:
+            bsp_tbl = self.db.model.buildset_properties
+            props: dict[int, BsProps] = {bsid: BsProps() for bsid in bsids}
+            # batch the bsids so that the parameter lists supported by the
+            # DBAPI aren't exhausted
+            for batch in self.doBatch(props.keys(), 100):
+                q = sa.select(
+                    bsp_tbl.c.buildsetid,
+                    bsp_tbl.c.property_name,
+                    bsp_tbl.c.property_value,
+                ).where(bsp_tbl.c.buildsetid.in_(batch))
+                for row in conn.execute(q):
+                    try:
+                        properties = json.loads(row.property_value)
+                        props[row.buildsetid][row.property_name] = tuple(properties)
+                    except ValueError:
+                        pass
+            return props
+
+        return self.db.pool.do(thd)
+
     def _thd_model_from_row(self, conn: sa.engine.Connection, row: Any) -> BuildSetModel:
         # get sourcestamps
         tbl = self.db.model.buildset_sourcestamps
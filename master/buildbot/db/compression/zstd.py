@@ -152,3 +152,123 @@ class ZStdCompressor(CompressorInterface):
                 compressor = self._compressor
                 self._compressor = None
                 ZStdCompressor._compressor_pool.release(compressor)
+
+
+class ZStdDictCompressor(CompressorInterface):
+    """
+    zstd compression using dictionaries trained on the logs of previous
+    builds. The id of the dictionary used to compress a chunk is stored in the
+    header of its zstd frame; chunks compressed without dictionary have the
+    dictionary id 0 and are plain zstd frames.
+    """
+
+    name = "zstd_dict"
+    available = HAS_ZSTD
+
+    COMPRESS_LEVEL = ZStdCompressor.COMPRESS_LEVEL
+
+    # ids below this value are reserved by the zstd format
+    DICTIONARY_ID_OFFSET = 32768
+
+    # trained dictionaries, by dictionary id. Dictionaries are immutable once
+    # trained, so they are shared by the whole process
+    _dictionaries: ClassVar[dict[int, zstandard.ZstdCompressionDict]] = {}
+    _pools: ClassVar[
+        dict[int, tuple[_Pool[zstandard.ZstdCompressor], _Pool[zstandard.ZstdDecompressor]]]
+    ] = {}
+    _lock = Lock()
+
+    @classmethod
+    def add_dictionary(cls, dict_id: int, data: bytes) -> None:
+        dictionary = zstandard.ZstdCompressionDict(data)
+        if dictionary.dict_id() != dict_id:
+            raise ValueError(f"zstd dictionary {dict_id} has unexpected id {dictionary.dict_id()}")
+        dictionary.precompute_compress(level=cls.COMPRESS_LEVEL)
+        with cls._lock:
+            cls._dictionaries[dict_id] = dictionary
+            cls._pools[dict_id] = (
+                _Pool(
+                    lambda: zstandard.ZstdCompressor(level=cls.COMPRESS_LEVEL, dict_data=dictionary)
+                ),
+                _Pool(lambda: zstandard.ZstdDecompressor(dict_data=dictionary)),
+            )
+
+    @classmethod
+    def remove_dictionary(cls, dict_id: int) -> None:
+        with cls._lock:
+            cls._dictionaries.pop(dict_id, None)
+            cls._pools.pop(dict_id, None)
+
+    @classmethod
+    def clear_dictionaries(cls) -> None:
+        with cls._lock:
+            cls._dictionaries.clear()
+            cls._pools.clear()
+
+    @classmethod
+    def has_dictionary(cls, dict_id: int) -> bool:
+        return dict_id == 0 or dict_id in cls._dictionaries
+
+    @staticmethod
+    def get_dictionary_id(data: bytes) -> int:
+        """Returns the id of the dictionary needed to decompress the given data"""
+        return zstandard.get_frame_parameters(data).dict_id
+
+    @classmethod
+    def train_dictionary(cls, dict_id: int, samples: list[bytes], dict_size: int) -> bytes:
+        """
+        Trains a dictionary of at most dict_size bytes from the given samples.
+        This is CPU intensive, it should not run in the reactor thread.
+        """
+        return zstandard.train_dictionary(
+            dict_size, samples, dict_id=dict_id, level=cls.COMPRESS_LEVEL
+        ).as_bytes()
+
+    @classmethod
+    def _get_pools(
+        cls, dict_id: int
+    ) -> tuple[_Pool[zstandard.ZstdCompressor], _Pool[zstandard.ZstdDecompressor]]:
+        if dict_id == 0:
+            return ZStdCompressor._compressor_pool, ZStdCompressor._decompressor_pool
+        try:
+            return cls._pools[dict_id]
+        except KeyError:
+            raise ValueError(f"zstd dictionary {dict_id} is not loaded") from None
+
+    @classmethod
+    def dumps(cls, data: bytes, dict_id: int = 0) -> bytes:
+        compressor_pool, _ = cls._get_pools(dict_id)
+        with compressor_pool.item() as compressor:
+            return compressor.compress(data)
+
+    @classmethod
+    def read(cls, data: bytes) -> bytes:
+        _, decompressor_pool = cls._get_pools(cls.get_dictionary_id(data))
+        # see ZStdCompressor.read for why decompressobj is used
+        with decompressor_pool.item() as decompressor:
+            decompress_obj = decompressor.decompressobj()
+            return decompress_obj.decompress(data) + decompress_obj.flush()
+
+    class CompressObj(CompressObjInterface):
+        def __init__(self, dict_id: int = 0) -> None:
+            self._compressor_pool, _ = ZStdDictCompressor._get_pools(dict_id)
+            self._compressor: zstandard.ZstdCompressor | None = None
+            self._compressobj: zstandard.ZstdCompressionObj | None = None
+
+        def compress(self, data: bytes) -> bytes:
+            if self._compressobj is None:
+                self._compressor = self._compressor_pool.acquire()
+                self._compressobj = self._compressor.compressobj()
+            return self._compressobj.compress(data)
+
+        def flush(self) -> bytes:
+            assert self._compressor is not None and self._compressobj is not None, (
+                "Programming error: Flush called without previous compress"
+            )
+            try:
+                return self._compressobj.flush(flush_mode=zstandard.COMPRESSOBJ_FLUSH_FINISH)
+            finally:
+                compressor = self._compressor
+                self._compressor = None
+                self._compressobj = None
+                self._compressor_pool.release(compressor)
@@ -38,6 +38,7 @@ from buildbot.db import codebases
 from buildbot.db import enginestrategy
 from buildbot.db import exceptions
 from buildbot.db import logs
+from buildbot.db import logsearch
 from buildbot.db import masters
 from buildbot.db import model
 from buildbot.db import pool
@@ -175,6 +176,8 @@ class DBConnector(service.ReconfigurableServiceMixin, service.AsyncMultiService)
         yield self.tags.setServiceParent(self)
         self.logs = logs.LogsConnectorComponent(self)
         yield self.logs.setServiceParent(self)
+        self.logsearch = logsearch.LogSearchConnectorComponent(self)
+        yield self.logsearch.setServiceParent(self)
         self.test_results = test_results.TestResultsConnectorComponent(self)
         yield self.test_results.setServiceParent(self)
         self.test_result_sets = test_result_sets.TestResultSetsConnectorComponent(self)
@@ -43,7 +43,9 @@ from buildbot.db.compression import CompressorInterface
 from buildbot.db.compression import GZipCompressor
 from buildbot.db.compression import LZ4Compressor
 from buildbot.db.compression import ZStdCompressor
+from buildbot.db.compression import ZStdDictCompressor
 from buildbot.db.compression.protocol import CompressObjInterface
+from buildbot.util import misc
 from buildbot.util.twisted import async_to_deferred
 from buildbot.warnings import warn_deprecated
 
@@ -59,6 +61,9 @@ if TYPE_CHECKING:
     from twisted.internet.interfaces import IReactorThreads
     from typing_extensions import ParamSpec
 
+    from buildbot.data.resultspec import ResultSpec
+    from buildbot.db.logstorage import LogStorage
+    from buildbot.util import lru
     from buildbot.util.twisted import InlineCallbacksType
 
     _P = ParamSpec('_P')
@@ -129,8 +134,33 @@ class LogsConnectorComponent(base.DBConnectorComponent):
     # note that MAX_CHUNK_SIZE is equal to BUFFER_SIZE in buildbot_worker.runprocess
     MAX_CHUNK_SIZE = 65536  # a chunk may not be bigger than this
     MAX_CHUNK_LINES = 1000  # a chunk may not have more lines than this
+    # default total size (in characters) of the decompressed chunks kept in the
+    # 'LogChunks' cache
+    DEFAULT_CHUNK_CACHE_SIZE = 16 * 1024 * 1024
+    # default number of logs whose location (log storage or logchunks table)
+    # is kept in the 'LogStorageLogs' cache
+    DEFAULT_LOG_STORAGE_CACHE_SIZE = 10000
+    # maximum number of threads running the blocking operations of the log
+    # storage, which mostly wait for the file system or the network
+    LOG_STORAGE_MAX_THREADS = 10
+
+    # Dictionaries of the 'zstd_dict' compression method are trained per
+    # builder and log name, from the chunks of the logs of the latest builds.
+    DICTIONARY_SIZE = 32 * 1024
+    DICTIONARY_SAMPLE_SIZE = 4096
+    DICTIONARY_TRAINING_BUILDS = 20
+    # a dictionary is trained only once there is enough content to train it
+    DICTIONARY_MIN_TRAINING_SIZE = 16 * DICTIONARY_SIZE
+    DICTIONARY_MAX_TRAINING_SIZE = 4 * 1024 * 1024
+    # a new version of a dictionary is trained when the latest one gets older
+    # than this, so that dictionaries follow the evolution of the logs
+    DICTIONARY_MAX_AGE = 7 * 24 * 3600
+    # delay before looking again for a newer dictionary, which may have been
+    # trained by another master, or before retrying a training which lacked content
+    DICTIONARY_REFRESH_INTERVAL = 3600
 
     NO_COMPRESSION_ID = 0
+    ZSTD_DICT_COMPRESSION_ID = 6
     COMPRESSION_BYID: dict[int, type[CompressorInterface]] = {
         NO_COMPRESSION_ID: RawCompressor,
         1: GZipCompressor,
@@ -138,6 +168,7 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         3: LZ4Compressor,
         4: ZStdCompressor,
         5: BrotliCompressor,
+        ZSTD_DICT_COMPRESSION_ID: ZStdDictCompressor,
     }
 
     COMPRESSION_MODE = {
@@ -159,16 +190,52 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             maxthreads=max_threads,
             name='DBLogCompression',
         )
+        # the log storage has a pool of its own, so that a slow storage does
+        # not hold the threads compressing the logs of the database
+        self._log_storage_pool = util.twisted.ThreadPool(
+            minthreads=0,
+            maxthreads=self.LOG_STORAGE_MAX_THREADS,
+            name='DBLogStorage',
+        )
+
+        # decompressed chunk text with the chunk's last line, by (logid, first_line)
+        self._chunk_cache: lru.SizedLRUCache[tuple[int, int], tuple[int, str]] = (
+            connector.master.caches.get_sized_cache(  # type: ignore[union-attr]
+                'LogChunks',
+                lambda chunk: len(chunk[1]),
+                self.DEFAULT_CHUNK_CACHE_SIZE,
+                group_fn=lambda key: key[0],
+            )
+        )
+        # whether the content of a log is in the configured log storage, by logid
+        self._log_in_storage: lru.SizedLRUCache[int, bool] = (
+            connector.master.caches.get_sized_cache(  # type: ignore[union-attr]
+                'LogStorageLogs',
+                lambda _: 1,
+                self.DEFAULT_LOG_STORAGE_CACHE_SIZE,
+            )
+        )
+
+        # (builderid, log name) of the logs being written, by logid
+        self._log_dictionary_keys: dict[int, tuple[int, str]] = {}
+        # id and creation time of the latest dictionary (0 if there is none yet),
+        # and time of the lookup, by (builderid, log name)
+        self._latest_dictionaries: dict[tuple[int, str], tuple[int, int, int]] = {}
+        self._dictionary_training_attempts: dict[tuple[int, str], int] = {}
+        # dictionary ids are only unique within a database
+        ZStdDictCompressor.clear_dictionaries()
 
     @defer.inlineCallbacks
     def startService(self) -> InlineCallbacksType[None]:
         yield super().startService()
         self._compression_pool.start()
+        self._log_storage_pool.start()
 
     @defer.inlineCallbacks
     def stopService(self) -> InlineCallbacksType[None]:
         yield super().stopService()
         self._compression_pool.stop()
+        self._log_storage_pool.stop()
 
     def _defer_to_compression_pool(
         self,
@@ -216,12 +283,20 @@ class LogsConnectorComponent(base.DBConnectorComponent):
         tbl = self.db.model.logs
         return self._getLog((tbl.c.slug == slug) & (tbl.c.stepid == stepid))
 
-    def getLogs(self, stepid: int | None = None) -> defer.Deferred[list[LogModel]]:
+    def getLogs(
+        self, stepid: int | None = None, resultSpec: ResultSpec | None = None
+    ) -> defer.Deferred[list[LogModel]]:
         def thdGetLogs(conn: sa.engine.Connection) -> list[LogModel]:
             tbl = self.db.model.logs
             q = tbl.select()
             if stepid is not None:
                 q = q.where(tbl.c.stepid == stepid)
+
+            if resultSpec is not None:
+                if not resultSpec.order:
+                    q = q.order_by(tbl.c.id)
+                return resultSpec.thd_execute(conn, q, self._model_from_row)  # type: ignore[return-value]
+
             q = q.order_by(tbl.c.id)
             res = conn.execute(q).mappings()
             return [self._model_from_row(row) for row in res.fetchall()]
@@ -239,9 +314,9 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             first_line: int,
             last_line: int | None,
             batch: int,
-        ) -> list[tuple[int, int, int, bytes]]:
+        ) -> list[tuple[int, int]]:
             tbl = self.db.model.logchunks
-            q = sa.select(tbl.c.first_line, tbl.c.last_line, tbl.c.content, tbl.c.compressed)
+            q = sa.select(tbl.c.first_line, tbl.c.last_line)
             q = q.where(tbl.c.logid == logid)
             if last_line is not None:
                 q = q.where(tbl.c.first_line <= last_line)
@@ -251,73 +326,113 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             if batch > 0:
                 q = q.limit(batch)
 
-            return [
-                (row.first_line, row.last_line, row.compressed, row.content)
-                for row in conn.execute(q)
-            ]
-
-        async def _iter_chunks_batched() -> AsyncGenerator[tuple[int, int, int, bytes], None]:
-            CHUNK_BATCH_SIZE = 100
-            batch_first_line = first_line
-            while chunks := await self.db.pool.do(
-                _thd_get_chunks,
-                batch_first_line,
-                last_line,
-                CHUNK_BATCH_SIZE,
-            ):
-                for chunk in chunks:
-                    yield chunk
-
-                _, chunk_last_line, _, _ = chunks[-1]
-                batch_first_line = max(batch_first_line, chunk_last_line) + 1
+            return [(row.first_line, row.last_line) for row in conn.execute(q)]
 
-        def _iter_uncompress_lines(
-            chunk_first_line: int,
-            compressed: int,
-            content: bytes,
-        ) -> Generator[str, None, None]:
-            # Retrieve associated "reader" and extract the data
-            # Note that row.content is stored as bytes, and our caller expects unicode
-            data = self._get_compressor(compressed).read(content)
-            # NOTE: we need a streaming decompression interface
-            with (
-                io.BytesIO(data) as data_buffer,
-                io.TextIOWrapper(
-                    data_buffer,
-                    encoding='utf-8',
-                ) as reader,
-            ):
+        def _thd_get_chunks_content(
+            conn: sa.engine.Connection,
+            first_lines: list[int],
+        ) -> dict[int, tuple[int, int, bytes]]:
+            tbl = self.db.model.logchunks
+            q = sa.select(tbl.c.first_line, tbl.c.last_line, tbl.c.compressed, tbl.c.content)
+            q = q.where(tbl.c.logid == logid)
+            q = q.where(tbl.c.first_line.in_(first_lines))
+            return {
+                row.first_line: (row.last_line, row.compressed, row.content)
+                for row in conn.execute(q)
+            }
+
+        def _thd_uncompress_chunks(chunks: list[tuple[int, bytes]]) -> list[str]:
+            texts: list[str] = []
+            for compressed, content in chunks:
+                # Retrieve associated "reader" and extract the data
+                # Note that row.content is stored as bytes, and our caller expects unicode
+                data = self._get_compressor(compressed).read(content)
                 # last line-ending is stripped from chunk on insert
                 # add it back here to simplify handling after
-                data_buffer.seek(0, os.SEEK_END)
-                data_buffer.write(b'\n')
-                data_buffer.seek(0, os.SEEK_SET)
+                with io.TextIOWrapper(io.BytesIO(data + b'\n'), encoding='utf-8') as reader:
+                    texts.append(reader.read())
+            return texts
 
-                line_idx = chunk_first_line
+        async def _get_chunks_text(chunks: list[tuple[int, int]]) -> list[str]:
+            """
+            Returns the text of the given chunks, decompressing only those which
+            are not in the cache. The returned list stops before the first
+            chunk which was modified since it was listed.
+            """
+            cache = self._chunk_cache
+            texts: list[str | None] = []
+            missing: list[int] = []
+            for chunk_first_line, chunk_last_line in chunks:
+                cached = cache.get((logid, chunk_first_line))
+                if cached is not None and cached[0] == chunk_last_line:
+                    texts.append(cached[1])
+                else:
+                    texts.append(None)
+                    missing.append(chunk_first_line)
+
+            if missing:
+                contents = await self.db.pool.do(_thd_get_chunks_content, missing)
+                to_uncompress: list[tuple[int, bytes]] = []
+                for idx, (chunk_first_line, chunk_last_line) in enumerate(chunks):
+                    if texts[idx] is not None:
+                        continue
+                    row = contents.get(chunk_first_line)
+                    if row is None or row[0] != chunk_last_line:
+                        # the chunk was merged by compressLog in the meantime
+                        del texts[idx:]
+                        break
+                    to_uncompress.append((row[1], row[2]))
 
-                # need to skip some lines
-                while line_idx < first_line and reader.readline():
-                    line_idx += 1
+                if not to_uncompress:
+                    return []
+                await self._load_dictionaries(to_uncompress)
+                uncompressed = iter(
+                    await self._defer_to_compression_pool(_thd_uncompress_chunks, to_uncompress)
+                )
+                for idx, (chunk_first_line, chunk_last_line) in enumerate(chunks[: len(texts)]):
+                    if texts[idx] is None:
+                        text = next(uncompressed)
+                        cache.put((logid, chunk_first_line), (chunk_last_line, text))
+                        texts[idx] = text
 
-                while (last_line is None or line_idx <= last_line) and (line := reader.readline()):
-                    yield line
-                    line_idx += 1
-
-        async for chunk_first_line, _, compressed, content in _iter_chunks_batched():
-            async with _AsyncIterOnPool(
-                partial(
-                    _iter_uncompress_lines,
-                    chunk_first_line=chunk_first_line,
-                    compressed=compressed,
-                    content=content,
-                ),
-                reactor=self.master.reactor,
-                provider_threadpool=self._compression_pool,
-                # disable limit as we process one chunk at a time
-                max_backlog=0,
-            ) as iterator:
-                async for line in iterator:
+            return texts  # type: ignore[return-value]
+
+        def _iter_lines(
+            text: str, chunk_first_line: int, first_line: int
+        ) -> Generator[str, None, None]:
+            pos = 0
+            line_idx = chunk_first_line
+
+            # need to skip some lines
+            while line_idx < first_line and pos < len(text):
+                pos = text.index('\n', pos) + 1
+                line_idx += 1
+
+            while (last_line is None or line_idx <= last_line) and pos < len(text):
+                end = text.index('\n', pos) + 1
+                yield text[pos:end]
+                pos = end
+                line_idx += 1
+
+        storage = await self._get_log_storage(logid)
+        if storage is not None:
+            async for line in storage.iter_lines(logid, first_line, last_line):
+                yield line
+            return
+
+        CHUNK_BATCH_SIZE = 100
+        next_line = first_line
+        while chunks := await self.db.pool.do(
+            _thd_get_chunks,
+            next_line,
+            last_line,
+            CHUNK_BATCH_SIZE,
+        ):
+            texts = await _get_chunks_text(chunks)
+            for (chunk_first_line, chunk_last_line), text in zip(chunks, texts):
+                for line in _iter_lines(text, chunk_first_line, next_line):
                     yield line
+                next_line = max(next_line, chunk_last_line + 1)
 
     @async_to_deferred
     async def getLogLines(self, logid: int, first_line: int, last_line: int) -> str:
@@ -357,19 +472,279 @@ class LogsConnectorComponent(base.DBConnectorComponent):
 
         return self.db.pool.do(thdAddLog)
 
+    def _get_configured_log_storage(self) -> LogStorage | None:
+        storage: LogStorage | None = self.master.config.logStorage
+        if storage is not None and storage.master is None:
+            storage.attach(
+                self.master,
+                self._log_storage_pool,
+                {name: compressor for name, (_, compressor) in self.COMPRESSION_MODE.items()},
+            )
+        return storage
+
+    async def _get_log_storage(self, logid: int, num_lines: int | None = None) -> LogStorage | None:
+        """
+        Returns the configured log storage if the content of the given log is
+        there rather than in the logchunks table, that is if the storage holds
+        the log, or if the log is still empty. Logs written before a storage
+        was configured stay in the logchunks table.
+        """
+        storage = self._get_configured_log_storage()
+        if storage is None:
+            return None
+
+        in_storage = self._log_in_storage.get(logid)
+        if in_storage is None:
+            in_storage = num_lines == 0 or await storage.has_log(logid)
+            # an empty log, which is not in the storage yet, may be written to
+            # it later, possibly by another master
+            if in_storage or num_lines is not None:
+                self._log_in_storage.put(logid, in_storage)
+        return storage if in_storage else None
+
+    def _truncate_line(self, logid: int, line: bytes) -> bytes:
+        log.msg(f'truncating long line for log {logid}')
+        line = line[: self.MAX_CHUNK_SIZE - 1]
+        while line:
+            try:
+                line.decode('utf-8')
+                break
+            except UnicodeDecodeError:
+                line = line[:-1]
+        return line + b'\n'
+
+    def _truncate_long_lines(self, logid: int, content: str) -> str:
+        # a character takes at most 4 bytes in utf-8
+        if len(content) * 4 <= self.MAX_CHUNK_SIZE:
+            return content
+        lines = content[:-1].split('\n')
+        for idx, line in enumerate(lines):
+            if len(line) * 4 >= self.MAX_CHUNK_SIZE:
+                line_bytes = (line + '\n').encode('utf-8')
+                if len(line_bytes) > self.MAX_CHUNK_SIZE:
+                    lines[idx] = self._truncate_line(logid, line_bytes)[:-1].decode('utf-8')
+        return '\n'.join(lines) + '\n'
+
     def _get_configured_compressor(self) -> tuple[int, type[CompressorInterface]]:
         compress_method: str = self.master.config.logCompressionMethod
         return self.COMPRESSION_MODE.get(compress_method, (self.NO_COMPRESSION_ID, RawCompressor))
 
+    async def _get_compress_obj(
+        self, logid: int, compressor: type[CompressorInterface]
+    ) -> CompressObjInterface:
+        if compressor is ZStdDictCompressor:
+            key = await self._get_log_dictionary_key(logid)
+            dict_id = 0 if key is None else (await self._get_latest_dictionary(key))[0]
+            return ZStdDictCompressor.CompressObj(dict_id)
+        return compressor.CompressObj()
+
+    async def _get_log_dictionary_key(self, logid: int) -> tuple[int, str] | None:
+        """Returns the builderid and the name of a log, which select its dictionaries"""
+        key = self._log_dictionary_keys.get(logid)
+        if key is not None:
+            return key
+
+        def thd(conn: sa.engine.Connection) -> tuple[int, str] | None:
+            model = self.db.model
+            q = (
+                sa
+                .select(model.builds.c.builderid, model.logs.c.name)
+                .select_from(
+                    model.logs.join(model.steps, model.steps.c.id == model.logs.c.stepid).join(
+                        model.builds, model.builds.c.id == model.steps.c.buildid
+                    )
+                )
+                .where(model.logs.c.id == logid)
+            )
+            row = conn.execute(q).fetchone()
+            return None if row is None else (row.builderid, row.name)
+
+        key = await self.db.pool.do(thd)
+        if key is not None:
+            self._log_dictionary_keys[logid] = key
+        return key
+
+    async def _get_latest_dictionary(self, key: tuple[int, str]) -> tuple[int, int]:
+        """
+        Returns the id and the creation time of the latest dictionary for the
+        given builderid and log name, or (0, 0) if there is none yet. The
+        dictionary is loaded, ready to be used.
+        """
+        now = int(self.master.reactor.seconds())
+        cached = self._latest_dictionaries.get(key)
+        if cached is not None and now - cached[2] < self.DICTIONARY_REFRESH_INTERVAL:
+            return cached[0], cached[1]
+
+        def thd(conn: sa.engine.Connection) -> tuple[int, int, bytes] | None:
+            tbl = self.db.model.logchunk_dictionaries
+            q = (
+                sa
+                .select(tbl.c.id, tbl.c.created_at, tbl.c.content)
+                .where(tbl.c.builderid == key[0])
+                .where(tbl.c.log_name == key[1])
+                .where(tbl.c.content.isnot(None))
+                .order_by(tbl.c.id.desc())
+                .limit(1)
+            )
+            row = conn.execute(q).fetchone()
+            return None if row is None else (row.id, row.created_at, row.content)
+
+        dict_id = created_at = 0
+        row = await self.db.pool.do(thd)
+        if row is not None:
+            dict_id = row[0] + ZStdDictCompressor.DICTIONARY_ID_OFFSET
+            created_at = row[1]
+            if not ZStdDictCompressor.has_dictionary(dict_id):
+                await self._defer_to_compression_pool(
+                    ZStdDictCompressor.add_dictionary, dict_id, row[2]
+                )
+        self._latest_dictionaries[key] = (dict_id, created_at, now)
+        return dict_id, created_at
+
+    async def _load_dictionaries(self, chunks: list[tuple[int, bytes]]) -> None:
+        """Loads the dictionaries needed to decompress the given (compressed, content) chunks"""
+        missing = {
+            ZStdDictCompressor.get_dictionary_id(content)
+            for compressed, content in chunks
+            if compressed == self.ZSTD_DICT_COMPRESSION_ID
+        }
+        missing = {dict_id for dict_id in missing if not ZStdDictCompressor.has_dictionary(dict_id)}
+        if not missing:
+            return
+
+        def thd(conn: sa.engine.Connection) -> list[tuple[int, bytes]]:
+            tbl = self.db.model.logchunk_dictionaries
+            q = sa.select(tbl.c.id, tbl.c.content).where(
+                tbl.c.id.in_([
+                    dict_id - ZStdDictCompressor.DICTIONARY_ID_OFFSET for dict_id in missing
+                ])
+            )
+            return [(row.id, row.content) for row in conn.execute(q) if row.content is not None]
+
+        for row_id, content in await self.db.pool.do(thd):
+            dict_id = row_id + ZStdDictCompressor.DICTIONARY_ID_OFFSET
+            await self._defer_to_compression_pool(
+                ZStdDictCompressor.add_dictionary, dict_id, content
+            )
+            missing.discard(dict_id)
+        if missing:
+            msg = f"zstd dictionaries {sorted(missing)} of log chunks are missing"
+            raise LogCompressionFormatUnavailableError(msg)
+
+    async def _maybe_train_dictionary(self, logid: int) -> None:
+        """
+        Trains a new dictionary for the builder and the name of the given log if
+        there is none yet, or if the latest one is too old.
+        """
+        key = await self._get_log_dictionary_key(logid)
+        if key is None:
+            return
+        now = int(self.master.reactor.seconds())
+        dict_id, created_at = await self._get_latest_dictionary(key)
+        if dict_id != 0 and now - created_at < self.DICTIONARY_MAX_AGE:
+            return
+        last_attempt = self._dictionary_training_attempts.get(key)
+        if last_attempt is not None and now - last_attempt < self.DICTIONARY_REFRESH_INTERVAL:
+            return
+        self._dictionary_training_attempts[key] = now
+
+        def _thd_get_training_chunks(conn: sa.engine.Connection) -> list[tuple[int, bytes]]:
+            model = self.db.model
+            q = (
+                sa
+                .select(model.builds.c.id)
+                .where(model.builds.c.builderid == key[0])
+                .order_by(model.builds.c.id.desc())
+                .limit(self.DICTIONARY_TRAINING_BUILDS)
+            )
+            buildids = [row.id for row in conn.execute(q)]
+            q = (
+                sa
+                .select(model.logs.c.id)
+                .select_from(model.logs.join(model.steps, model.steps.c.id == model.logs.c.stepid))
+                .where(model.steps.c.buildid.in_(buildids))
+                .where(model.logs.c.name == key[1])
+                .where(model.logs.c.type != 'd')
+                .order_by(model.logs.c.id.desc())
+            )
+            logids = [row.id for row in conn.execute(q)]
+
+            chunks: list[tuple[int, bytes]] = []
+            size = 0
+            for training_logid in logids:
+                q = (
+                    sa
+                    .select(model.logchunks.c.compressed, model.logchunks.c.content)
+                    .where(model.logchunks.c.logid == training_logid)
+                    .order_by(model.logchunks.c.first_line)
+                )
+                for row in conn.execute(q):
+                    chunks.append((row.compressed, row.content))
+                    size += len(row.content)
+                    if size >= self.DICTIONARY_MAX_TRAINING_SIZE:
+                        return chunks
+            return chunks
+
+        def _thd_get_samples(chunks: list[tuple[int, bytes]]) -> list[bytes]:
+            samples: list[bytes] = []
+            size = 0
+            for compressed, content in chunks:
+                data = self._get_compressor(compressed).read(content)
+                for pos in range(0, len(data), self.DICTIONARY_SAMPLE_SIZE):
+                    samples.append(data[pos : pos + self.DICTIONARY_SAMPLE_SIZE])
+                size += len(data)
+                if size >= self.DICTIONARY_MAX_TRAINING_SIZE:
+                    break
+            return samples
+
+        def _thd_reserve_dictionary(conn: sa.engine.Connection) -> int:
+            res = conn.execute(
+                self.db.model.logchunk_dictionaries.insert(),
+                {"builderid": key[0], "log_name": key[1], "created_at": now, "content": None},
+            )
+            conn.commit()
+            return res.inserted_primary_key[0]  # type: ignore[index]
+
+        def _thd_store_dictionary(conn: sa.engine.Connection, row_id: int, content: bytes) -> None:
+            tbl = self.db.model.logchunk_dictionaries
+            conn.execute(tbl.update().where(tbl.c.id == row_id).values(content=content))
+            conn.commit()
+
+        def _thd_delete_dictionary(conn: sa.engine.Connection, row_id: int) -> None:
+            tbl = self.db.model.logchunk_dictionaries
+            conn.execute(tbl.delete().where(tbl.c.id == row_id))
+            conn.commit()
+
+        chunks = await self.db.pool.do(_thd_get_training_chunks)
+        await self._load_dictionaries(chunks)
+        samples = await self._defer_to_compression_pool(_thd_get_samples, chunks)
+        if sum(len(sample) for sample in samples) < self.DICTIONARY_MIN_TRAINING_SIZE:
+            return
+
+        # the id of the row is the id of the dictionary, which is part of its content
+        row_id = await self.db.pool.do(_thd_reserve_dictionary)
+        dict_id = row_id + ZStdDictCompressor.DICTIONARY_ID_OFFSET
+        try:
+            content = await self._defer_to_compression_pool(
+                ZStdDictCompressor.train_dictionary, dict_id, samples, self.DICTIONARY_SIZE
+            )
+        except Exception as e:
+            log.err(e, f'while training zstd dictionary for builder {key[0]} log {key[1]!r}')
+            await self.db.pool.do(_thd_delete_dictionary, row_id)
+            return
+        await self.db.pool.do(_thd_store_dictionary, row_id, content)
+        await self._defer_to_compression_pool(ZStdDictCompressor.add_dictionary, dict_id, content)
+        self._latest_dictionaries[key] = (dict_id, now, now)
+
     @async_to_deferred
     async def appendLog(self, logid: int, content: str) -> tuple[int, int] | None:
-        def _thd_get_numlines(conn: sa.engine.Connection) -> int | None:
-            q = sa.select(self.db.model.logs.c.num_lines)
+        def _thd_get_numlines(conn: sa.engine.Connection) -> tuple[int, str] | None:
+            q = sa.select(self.db.model.logs.c.num_lines, self.db.model.logs.c.type)
             q = q.where(self.db.model.logs.c.id == logid)
             res = conn.execute(q)
-            num_lines = res.fetchone()
+            row = res.fetchone()
             res.close()
-            return num_lines[0] if num_lines else None
+            return (row.num_lines, row.type) if row else None
 
         def _thd_insert_chunk(
             conn: sa.engine.Connection,
@@ -427,26 +802,14 @@ class LogsConnectorComponent(base.DBConnectorComponent):
 
         def _thd_iter_chunk_compress(
             content: str,
+            compressor_id: int,
+            compress_obj: CompressObjInterface,
         ) -> Generator[tuple[bytes, int, int], None]:
             """
             Split content into chunk delimited by line-endings.
             Try our best to keep chunks smaller than MAX_CHUNK_SIZE
             """
 
-            def _truncate_line(line: bytes) -> bytes:
-                log.msg(f'truncating long line for log {logid}')
-                line = line[: self.MAX_CHUNK_SIZE - 1]
-                while line:
-                    try:
-                        line.decode('utf-8')
-                        break
-                    except UnicodeDecodeError:
-                        line = line[:-1]
-                return line + b'\n'
-
-            compressor_id, compressor = self._get_configured_compressor()
-            compress_obj = compressor.CompressObj()
-
             with io.StringIO(content) as buffer:
                 lines: list[bytes] = []
                 lines_size = 0
@@ -466,7 +829,9 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                         # check if compressed size is compliant with DB row limit
                         if len(compressed_chunk) > self.MAX_CHUNK_SIZE:
                             compressed = _thd_compress_chunk(
-                                compress_obj, compressor_id, [_truncate_line(line_bytes)]
+                                compress_obj,
+                                compressor_id,
+                                [self._truncate_line(logid, line_bytes)],
                             )
                         yield compressed
                     else:
@@ -477,10 +842,33 @@ class LogsConnectorComponent(base.DBConnectorComponent):
 
         assert content[-1] == '\n'
 
-        num_lines = await self.db.pool.do(_thd_get_numlines)
-        if num_lines is None:
+        log_info = await self.db.pool.do(_thd_get_numlines)
+        if log_info is None:
             # ignore a missing log
             return None
+        num_lines, log_type = log_info
+
+        storage = await self._get_log_storage(logid, num_lines)
+        if storage is not None:
+            # lines are limited to the same size as in the logchunks table
+            content = self._truncate_long_lines(logid, content)
+            last_line = num_lines + content.count('\n') - 1
+            try:
+                await storage.append_lines(logid, num_lines, content)
+                await self.db.pool.do(_thd_update_num_lines, last_line + 1)
+            except Exception:
+                # the lines are appended again from num_lines by the next call
+                try:
+                    await storage.discard_lines(logid, num_lines, content)
+                except Exception as e:
+                    log.err(e, f'while discarding lines of log {logid}')
+                raise
+            if self.master.config.logSearchIndex:
+                self.db.logsearch.addLines(logid, num_lines, content, log_type)
+            return num_lines, last_line
+
+        compressor_id, compressor = self._get_configured_compressor()
+        compress_obj = await self._get_compress_obj(logid, compressor)
 
         # Break the content up into chunks
         chunk_first_line = last_line = num_lines
@@ -488,6 +876,8 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             partial(
                 _thd_iter_chunk_compress,
                 content=content,
+                compressor_id=compressor_id,
+                compress_obj=compress_obj,
             ),
             reactor=self.master.reactor,
             provider_threadpool=self._compression_pool,
@@ -517,15 +907,21 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 chunk_first_line = last_line + 1
 
         await self.db.pool.do(_thd_update_num_lines, last_line + 1)
+        if self.master.config.logSearchIndex:
+            self.db.logsearch.addLines(logid, num_lines, content, log_type)
         return num_lines, last_line
 
-    def finishLog(self, logid: int) -> defer.Deferred[None]:
+    @async_to_deferred
+    async def finishLog(self, logid: int) -> None:
         def thdfinishLog(conn: sa.engine.Connection) -> None:
             tbl = self.db.model.logs
             q = tbl.update().where(tbl.c.id == logid)
             conn.execute(q.values(complete=1))
 
-        return self.db.pool.do_with_transaction(thdfinishLog)
+        self._log_dictionary_keys.pop(logid, None)
+        # the lines of a finished log can all be searched
+        await self.db.logsearch.flushLines(logid)
+        await self.db.pool.do_with_transaction(thdfinishLog)
 
     @async_to_deferred
     async def compressLog(self, logid: int, force: bool = False) -> int:
@@ -678,20 +1074,35 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             bytes_saved -= len(new_content)
             return new_content, bytes_saved
 
+        storage = await self._get_log_storage(logid)
+        if storage is not None:
+            _, compressor = self._get_configured_compressor()
+            bytes_saved = await storage.compress_log(logid, compressor)
+            self._invalidate_chunk_cache(logid)
+            return bytes_saved
+
+        compressed_id, compressor = self._get_configured_compressor()
+        if compressor is ZStdDictCompressor:
+            await self._maybe_train_dictionary(logid)
+        compress_obj = await self._get_compress_obj(logid, compressor)
+        self._log_dictionary_keys.pop(logid, None)
+
         chunk_groups = await self.db.pool.do(_thd_gather_chunks_to_process)
         if not chunk_groups:
             return 0
 
+        # the boundaries of the chunks are going to change
+        self._invalidate_chunk_cache(logid)
+
         total_bytes_saved: int = 0
 
-        compressed_id, compressor = self._get_configured_compressor()
-        compress_obj = compressor.CompressObj()
         for group_first_line, group_last_line in chunk_groups:
             compressed_chunks = await self.db.pool.do(
                 _thd_get_chunks_content,
                 first_line=group_first_line,
                 last_line=group_last_line,
             )
+            await self._load_dictionaries(compressed_chunks)
 
             new_content, bytes_saved = await self._defer_to_compression_pool(
                 _thd_recompress_chunks,
@@ -709,10 +1120,15 @@ class LogsConnectorComponent(base.DBConnectorComponent):
                 new_content=new_content,
             )
 
+        self._invalidate_chunk_cache(logid)
         return total_bytes_saved
 
-    def deleteOldLogChunks(self, older_than_timestamp: int) -> defer.Deferred[int]:
-        def thddeleteOldLogs(conn: sa.engine.Connection) -> int:
+    def _invalidate_chunk_cache(self, logid: int) -> None:
+        self._chunk_cache.pop_group(logid)
+
+    @async_to_deferred
+    async def deleteOldLogChunks(self, older_than_timestamp: int) -> int:
+        def thddeleteOldLogs(conn: sa.engine.Connection) -> tuple[int, list[int]]:
             model = self.db.model
             res = conn.execute(sa.select(sa.func.count(model.logchunks.c.logid)))
             count1 = res.fetchone()[0]  # type: ignore[index]
@@ -741,7 +1157,17 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             res.close()
 
             # UPDATE logs SET logs.type = 'd' WHERE logs.stepid <= stepid_max AND type != 'd';
+            deleted_logids: list[int] = []
             if stepid_max:
+                if storage is not None:
+                    # their content may be in the log storage, remember them
+                    res = conn.execute(
+                        sa.select(model.logs.c.id).where(
+                            sa.and_(model.logs.c.stepid <= stepid_max, model.logs.c.type != 'd')
+                        )
+                    )
+                    deleted_logids = [row.id for row in res]
+                    res.close()
                 res = conn.execute(
                     model.logs
                     .update()
@@ -772,9 +1198,47 @@ class LogsConnectorComponent(base.DBConnectorComponent):
             res = conn.execute(sa.select(sa.func.count(model.logchunks.c.logid)))
             count2 = res.fetchone()[0]  # type: ignore[index]
             res.close()
-            return count1 - count2
+            return count1 - count2, deleted_logids
+
+        def thd_delete_old_dictionaries(conn: sa.engine.Connection) -> list[int]:
+            # A dictionary is only used by the chunks written while it was the
+            # latest of its builder and log name, plus the time needed by the
+            # other masters to notice that it was replaced. Once it was replaced
+            # long enough ago, these chunks have been deleted.
+            tbl = self.db.model.logchunk_dictionaries
+            replaced_before = older_than_timestamp - self.DICTIONARY_REFRESH_INTERVAL
+            newest_by_key: dict[tuple[int, str], int] = {}
+            to_delete: list[int] = []
+            q = sa.select(tbl.c.id, tbl.c.builderid, tbl.c.log_name, tbl.c.created_at)
+            for row in conn.execute(q.order_by(tbl.c.id.desc())):
+                key = (row.builderid, row.log_name)
+                if key in newest_by_key and newest_by_key[key] < replaced_before:
+                    to_delete.append(row.id)
+                newest_by_key[key] = row.created_at
+            for ids in misc.chunkify_list(to_delete, 100):
+                conn.execute(tbl.delete().where(tbl.c.id.in_(ids)))
+            conn.commit()
+            return to_delete
 
-        return self.db.pool.do(thddeleteOldLogs)
+        storage = self._get_configured_log_storage()
+        try:
+            deleted, deleted_logids = await self.db.pool.do(thddeleteOldLogs)
+            await self.db.logsearch.pruneDeletedLogs()
+            for row_id in await self.db.pool.do(thd_delete_old_dictionaries):
+                ZStdDictCompressor.remove_dictionary(
+                    row_id + ZStdDictCompressor.DICTIONARY_ID_OFFSET
+                )
+            if storage is not None and deleted_logids:
+                deleted_items = await storage.delete_logs(deleted_logids)
+                log.msg(
+                    f'deleted {deleted_items} items of {len(deleted_logids)} logs '
+                    f'from the {storage.name} log storage'
+                )
+        finally:
+            # logs of any step may have been deleted
+            self._chunk_cache.clear()
+            self._log_in_storage.clear()
+        return deleted
 
     def _model_from_row(self, row: RowMapping) -> LogModel:
         return LogModel(
@@ -0,0 +1,299 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+"""
+Inverted index of the content of the logs.
+
+Lines are indexed by blocks of BLOCK_LINES lines: for each word of a block, the
+index records that it appears in this block of this log. The lines appended to a
+log are buffered, and indexed in the background each time a block is complete,
+and when the log is finished. Words are stored as
+31-bit hashes to keep the index compact. Searching selects the blocks which
+contain all the words of the query, then scans their lines for the query itself,
+which also eliminates the blocks selected because of hash collisions.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import sqlalchemy as sa
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.db import base
+from buildbot.util import misc
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+_WORD_RE = re.compile(r'\w+')
+
+
+class LogSearchQueryError(ValueError):
+    pass
+
+
+@dataclass
+class LogSearchHitModel:
+    logid: int
+    stepid: int
+    buildid: int
+    builderid: int
+    started_at: int | None
+    line: int
+    snippet: str
+
+
+@dataclass
+class _PendingLines:
+    first_line: int
+    log_type: str
+    contents: list[str]
+    num_lines: int = 0
+
+
+class LogSearchConnectorComponent(base.DBConnectorComponent):
+    BLOCK_LINES = 500
+    # shorter words and numbers are too common to be worth indexing, longer
+    # words are mostly encoded data
+    MIN_WORD_LENGTH = 3
+    MAX_WORD_LENGTH = 64
+    # number of characters of context around the match in the snippets
+    SNIPPET_CONTEXT = 80
+    CANDIDATE_BATCH = 100
+
+    def __init__(self, connector: base.DBConnector):
+        super().__init__(connector)
+        # lines not indexed yet, by logid
+        self._pending: dict[int, _PendingLines] = {}
+        # indexing a block after its beginning depends on what is indexed already
+        self._index_lock = defer.DeferredLock()
+
+    @defer.inlineCallbacks
+    def stopService(self) -> InlineCallbacksType[None]:
+        yield defer.gatherResults([self.flushLines(logid) for logid in list(self._pending)])
+        yield super().stopService()
+
+    def addLines(self, logid: int, first_line: int, content: str, log_type: str = 't') -> None:
+        """
+        Buffers the given lines for indexing, which start at line first_line of
+        the log and are terminated by a newline. The buffered lines are indexed
+        in the background once they complete a block.
+        """
+        pending = self._pending.get(logid)
+        if pending is not None and pending.first_line + pending.num_lines != first_line:
+            self.flushLines(logid)
+            pending = None
+        if pending is None:
+            pending = self._pending[logid] = _PendingLines(first_line, log_type, [])
+
+        pending.contents.append(content)
+        pending.num_lines += content.count('\n')
+        end_line = pending.first_line + pending.num_lines
+        if end_line // self.BLOCK_LINES > pending.first_line // self.BLOCK_LINES:
+            self.flushLines(logid)
+
+    def flushLines(self, logid: int) -> defer.Deferred[None]:
+        """
+        Indexes the buffered lines of the given log. Errors are logged, as
+        they must not fail the writing of the log.
+        """
+        pending = self._pending.pop(logid, None)
+        if pending is None:
+            return defer.succeed(None)
+        d = self._index_lock.run(
+            self.indexLines,
+            logid,
+            pending.first_line,
+            ''.join(pending.contents),
+            pending.log_type,
+        )
+        d.addErrback(log.err, f'while indexing lines of log {logid}')
+        self.db.run_db_task(d)
+        return d
+
+    def _iter_terms(self, text: str) -> Iterable[int]:
+        for word in _WORD_RE.findall(text.lower()):
+            if self.MIN_WORD_LENGTH <= len(word) <= self.MAX_WORD_LENGTH and not word.isdigit():
+                yield zlib.crc32(word.encode('utf-8')) & 0x7FFFFFFF
+
+    @async_to_deferred
+    async def indexLines(
+        self, logid: int, first_line: int, content: str, log_type: str = 't'
+    ) -> None:
+        """
+        Indexes the given lines, which start at line first_line of the log and
+        are terminated by a newline.
+        """
+
+        def thd(conn: sa.engine.Connection) -> None:
+            tbl = self.db.model.log_search_postings
+            lines = content.split('\n')[:-1]
+            if log_type == 's':
+                # strip the stream of each line
+                lines = [line[1:] for line in lines]
+
+            postings: dict[int, set[int]] = {}
+            pos = 0
+            line = first_line
+            while pos < len(lines):
+                block = line // self.BLOCK_LINES
+                count = (block + 1) * self.BLOCK_LINES - line
+                postings[block] = set(self._iter_terms('\n'.join(lines[pos : pos + count])))
+                pos += count
+                line += count
+
+            # the beginning of the first block was indexed by a previous call
+            first_block = first_line // self.BLOCK_LINES
+            if first_line % self.BLOCK_LINES and first_block in postings:
+                q = sa.select(tbl.c.term).where(tbl.c.logid == logid, tbl.c.block == first_block)
+                postings[first_block] -= {row.term for row in conn.execute(q)}
+
+            rows = [
+                {'logid': logid, 'block': block, 'term': term}
+                for block, terms in postings.items()
+                for term in terms
+            ]
+            for batch in misc.chunkify_list(rows, 1000):
+                conn.execute(tbl.insert(), batch)
+            conn.commit()
+
+        await self.db.pool.do(thd)
+
+    @async_to_deferred
+    async def searchLogs(
+        self,
+        query: str,
+        builderid: int | None = None,
+        since: int | None = None,
+        limit: int = 1000,
+    ) -> list[LogSearchHitModel]:
+        """
+        Returns the lines of the logs which contain the given query, ignoring
+        case, most recent logs first. Words at the beginning and the end of the
+        query only match whole words. Only the logs of the steps started
+        since the given timestamp are searched, if given.
+        """
+        terms = sorted(set(self._iter_terms(query)))
+        if not terms:
+            raise LogSearchQueryError(
+                f"query must contain a word of at least {self.MIN_WORD_LENGTH} characters "
+                "which is not a number"
+            )
+        pattern = re.escape(query)
+        if _WORD_RE.match(query[0]):
+            pattern = r'(?<!\w)' + pattern
+        if _WORD_RE.match(query[-1]):
+            pattern += r'(?!\w)'
+        matcher = re.compile(pattern, re.IGNORECASE)
+
+        def thd_get_candidates(
+            conn: sa.engine.Connection, offset: int
+        ) -> list[tuple[int, int, str, int, int, int, int | None]]:
+            model = self.db.model
+            tbl = model.log_search_postings
+            columns = (
+                tbl.c.logid,
+                tbl.c.block,
+                model.logs.c.type,
+                model.logs.c.stepid,
+                model.steps.c.buildid,
+                model.builds.c.builderid,
+                model.steps.c.started_at,
+            )
+            q = (
+                sa
+                .select(*columns)
+                .select_from(
+                    tbl
+                    .join(model.logs, model.logs.c.id == tbl.c.logid)
+                    .join(model.steps, model.steps.c.id == model.logs.c.stepid)
+                    .join(model.builds, model.builds.c.id == model.steps.c.buildid)
+                )
+                .where(tbl.c.term.in_(terms))
+                .where(model.logs.c.type != 'd')
+            )
+            if builderid is not None:
+                q = q.where(model.builds.c.builderid == builderid)
+            if since is not None:
+                q = q.where(model.steps.c.started_at >= since)
+            q = (
+                q
+                .group_by(*columns)
+                .having(sa.func.count(sa.distinct(tbl.c.term)) == len(terms))
+                .order_by(tbl.c.logid.desc(), tbl.c.block)
+                .limit(self.CANDIDATE_BATCH)
+                .offset(offset)
+            )
+            return [tuple(row) for row in conn.execute(q)]
+
+        hits: list[LogSearchHitModel] = []
+        offset = 0
+        while candidates := await self.db.pool.do(thd_get_candidates, offset):
+            offset += len(candidates)
+            for logid, block, log_type, stepid, buildid, cand_builderid, started_at in candidates:
+                line_number = block * self.BLOCK_LINES
+                async for line in self.db.logs.iter_log_lines(
+                    logid, line_number, line_number + self.BLOCK_LINES - 1
+                ):
+                    if log_type == 's':
+                        line = line[1:]
+                    match = matcher.search(line)
+                    if match is not None:
+                        start = max(match.start() - self.SNIPPET_CONTEXT, 0)
+                        end = match.end() + self.SNIPPET_CONTEXT
+                        hits.append(
+                            LogSearchHitModel(
+                                logid=logid,
+                                stepid=stepid,
+                                buildid=buildid,
+                                builderid=cand_builderid,
+                                started_at=started_at,
+                                line=line_number,
+                                snippet=line[start:end].rstrip('\n'),
+                            )
+                        )
+                        if len(hits) >= limit:
+                            return hits
+                    line_number += 1
+        return hits
+
+    @async_to_deferred
+    async def pruneDeletedLogs(self) -> None:
+        """Removes the deleted logs, i.e. the logs of type 'd', from the index"""
+
+        def thd(conn: sa.engine.Connection) -> None:
+            model = self.db.model
+            tbl = model.log_search_postings
+            if self.db._engine.dialect.name == 'sqlite':  # type: ignore[union-attr]
+                # sqlite does not support delete with a join
+                deleted_logids = sa.select(model.logs.c.id).where(model.logs.c.type == 'd')
+                q = tbl.delete().where(tbl.c.logid.in_(deleted_logids))
+            else:
+                q = tbl.delete()
+                q = q.where(model.logs.c.id == tbl.c.logid)
+                q = q.where(model.logs.c.type == 'd')
+            conn.execute(q)
+            conn.commit()
+
+        await self.db.pool.do(thd)
@@ -0,0 +1,249 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import bisect
+import os
+import shutil
+import struct
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import BinaryIO
+
+from buildbot.db.logstorage.protocol import LogStorage
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from twisted.python.threadpool import ThreadPool
+
+    from buildbot.db.compression.protocol import CompressorInterface
+
+
+# an index entry is written for each append: the number of its first line,
+# the number of the first line of the segment the lines were written to, and
+# the offset and the length of the lines in that (uncompressed) segment
+_INDEX_ENTRY = struct.Struct('<QQQQ')
+
+
+class FileLogStorage(LogStorage):
+    """
+    Stores the content of each log in a directory of its own, as append-only
+    segment files of utf-8 text named after their first line, together with
+    an index file locating the lines of each append in these segments.
+
+    Once a log is finished, ``compress_log`` compresses its segments, which
+    are then read whole.
+    """
+
+    name = 'file'
+
+    INDEX_NAME = 'index'
+    SEGMENT_SUFFIX = '.seg'
+
+    def __init__(self, basedir: str = 'logs', segment_size: int = 1024 * 1024) -> None:
+        super().__init__()
+        self.basedir = basedir
+        self.segment_size = segment_size
+        self._logs_dir = basedir
+
+    def attach(
+        self,
+        master: Any,
+        threadpool: ThreadPool,
+        compressors: dict[str, type[CompressorInterface]],
+    ) -> None:
+        super().attach(master, threadpool, compressors)
+        self._logs_dir = os.path.join(master.basedir, self.basedir)
+
+    def _log_dir(self, logid: int) -> str:
+        # avoid having too many entries in a single directory
+        return os.path.join(self._logs_dir, str(logid // 1000), str(logid))
+
+    def _segment_path(self, log_dir: str, segment: int) -> str:
+        return os.path.join(log_dir, f'{segment}{self.SEGMENT_SUFFIX}')
+
+    def _thd_read_index(self, log_dir: str) -> list[tuple[int, int, int, int]]:
+        try:
+            with open(os.path.join(log_dir, self.INDEX_NAME), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        # ignore a partially written entry
+        data = data[: len(data) - len(data) % _INDEX_ENTRY.size]
+        return list(_INDEX_ENTRY.iter_unpack(data))
+
+    def _thd_read_segment(self, log_dir: str, segment: int, start: int, end: int) -> str:
+        path = self._segment_path(log_dir, segment)
+        try:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                data = f.read(end - start)
+        except FileNotFoundError:
+            # the segment has been compressed
+            for name, compressor in self._compressors.items():
+                try:
+                    with open(f'{path}.{name}', 'rb') as f:
+                        data = compressor.read(f.read())[start:end]
+                    break
+                except FileNotFoundError:
+                    continue
+            else:
+                raise
+        return data.decode('utf-8')
+
+    async def has_log(self, logid: int) -> bool:
+        path = os.path.join(self._log_dir(logid), self.INDEX_NAME)
+        return await self._defer_to_thread(os.path.exists, path)
+
+    def _thd_drop_lines(
+        self, log_dir: str, index: BinaryIO, first_line: int
+    ) -> tuple[int, int] | None:
+        """
+        Removes the index entries of the lines from ``first_line``, as well as
+        any partially written entry, and truncates the last remaining segment
+        after its last indexed lines, dropping the bytes of failed appends.
+        Returns the last segment and the offset following these lines in it,
+        or None if a new segment must be started.
+        """
+        data = index.read()
+        entries = list(_INDEX_ENTRY.iter_unpack(data[: len(data) - len(data) % _INDEX_ENTRY.size]))
+        kept = bisect.bisect_left([e[0] for e in entries], first_line)
+        index.truncate(kept * _INDEX_ENTRY.size)
+        if not kept:
+            return None
+
+        _, segment, offset, length = entries[kept - 1]
+        path = self._segment_path(log_dir, segment)
+        try:
+            if os.path.getsize(path) > offset + length:
+                os.truncate(path, offset + length)
+        except FileNotFoundError:
+            # compressed, start a new segment
+            return None
+        if offset + length >= self.segment_size:
+            return None
+        return segment, offset + length
+
+    async def append_lines(self, logid: int, first_line: int, content: str) -> None:
+        def thd() -> None:
+            log_dir = self._log_dir(logid)
+            os.makedirs(log_dir, exist_ok=True)
+            data = content.encode('utf-8')
+
+            with open(os.path.join(log_dir, self.INDEX_NAME), 'ab+') as index:
+                index.seek(0)
+                segment, offset = self._thd_drop_lines(log_dir, index, first_line) or (
+                    first_line,
+                    0,
+                )
+
+                # write the lines before indexing them, so readers never find
+                # an index entry pointing past the end of its segment
+                with open(self._segment_path(log_dir, segment), 'ab' if offset else 'wb') as f:
+                    f.write(data)
+                index.seek(0, os.SEEK_END)
+                index.write(_INDEX_ENTRY.pack(first_line, segment, offset, len(data)))
+
+        await self._defer_to_thread(thd)
+
+    async def discard_lines(self, logid: int, first_line: int, content: str) -> None:
+        def thd() -> None:
+            log_dir = self._log_dir(logid)
+            try:
+                with open(os.path.join(log_dir, self.INDEX_NAME), 'rb+') as index:
+                    self._thd_drop_lines(log_dir, index, first_line)
+            except FileNotFoundError:
+                pass
+
+        await self._defer_to_thread(thd)
+
+    async def iter_lines(
+        self, logid: int, first_line: int, last_line: int | None
+    ) -> AsyncGenerator[str, None]:
+        log_dir = self._log_dir(logid)
+        index = await self._defer_to_thread(self._thd_read_index, log_dir)
+        if not index:
+            return
+
+        idx = max(0, bisect.bisect_right([e[0] for e in index], first_line) - 1)
+        while idx < len(index) and (last_line is None or index[idx][0] <= last_line):
+            line_idx, segment, start, length = index[idx]
+
+            # read the following appends to the same segment at once, up to
+            # the end of the requested lines
+            end = start + length
+            idx += 1
+            while (
+                idx < len(index)
+                and index[idx][1] == segment
+                and index[idx][2] == end
+                and (last_line is None or index[idx][0] <= last_line)
+            ):
+                end += index[idx][3]
+                idx += 1
+
+            text = await self._defer_to_thread(self._thd_read_segment, log_dir, segment, start, end)
+            pos = 0
+            while pos < len(text) and (last_line is None or line_idx <= last_line):
+                line_end = text.index('\n', pos) + 1
+                if line_idx >= first_line:
+                    yield text[pos:line_end]
+                pos = line_end
+                line_idx += 1
+
+    async def compress_log(self, logid: int, compressor: type[CompressorInterface]) -> int:
+        def thd() -> int:
+            log_dir = self._log_dir(logid)
+            bytes_saved = 0
+            for segment in sorted({e[1] for e in self._thd_read_index(log_dir)}):
+                path = self._segment_path(log_dir, segment)
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    # already compressed
+                    continue
+
+                compressed = compressor.dumps(data)
+                if len(compressed) >= len(data):
+                    continue
+
+                # readers fall back to the compressed segment once the
+                # uncompressed one is gone
+                compressed_path = f'{path}.{compressor.name}'
+                with open(compressed_path + '.tmp', 'wb') as f:
+                    f.write(compressed)
+                os.replace(compressed_path + '.tmp', compressed_path)
+                os.unlink(path)
+                bytes_saved += len(data) - len(compressed)
+            return bytes_saved
+
+        if compressor.name not in self._compressors:
+            return 0
+        return await self._defer_to_thread(thd)
+
+    async def delete_logs(self, logids: list[int]) -> int:
+        def thd() -> int:
+            deleted = 0
+            for logid in logids:
+                log_dir = self._log_dir(logid)
+                if os.path.isdir(log_dir):
+                    deleted += len(os.listdir(log_dir))
+                    shutil.rmtree(log_dir)
+            return deleted
+
+        return await self._defer_to_thread(thd)
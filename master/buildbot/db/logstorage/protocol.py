@@ -0,0 +1,115 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import TypeVar
+
+from twisted.internet import threads
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from typing import Callable
+    from typing import ClassVar
+
+    from twisted.internet.defer import Deferred
+    from twisted.python.threadpool import ThreadPool
+    from typing_extensions import ParamSpec
+
+    from buildbot.db.compression.protocol import CompressorInterface
+
+    _P = ParamSpec('_P')
+
+_T = TypeVar('_T')
+
+
+class LogStorage:
+    """
+    Base class of the storages keeping the content of logs outside of the
+    ``logchunks`` table. The database still holds the logs themselves,
+    including their number of lines.
+
+    Lines are always handled with their trailing newline. Blocking operations
+    must run in the thread pool given to ``attach``.
+    """
+
+    name: ClassVar[str]
+
+    def __init__(self) -> None:
+        self.master: Any = None
+        self._threadpool: ThreadPool | None = None
+        self._compressors: dict[str, type[CompressorInterface]] = {}
+
+    def attach(
+        self,
+        master: Any,
+        threadpool: ThreadPool,
+        compressors: dict[str, type[CompressorInterface]],
+    ) -> None:
+        """
+        Called by the logs connector before the storage is first used.
+        ``compressors`` gives the compressors that may be used by
+        ``compress_log``, by name.
+        """
+        self.master = master
+        self._threadpool = threadpool
+        self._compressors = compressors
+
+    def _defer_to_thread(
+        self, f: Callable[_P, _T], *args: _P.args, **kwargs: _P.kwargs
+    ) -> Deferred[_T]:
+        assert self._threadpool is not None, "the storage must be attached"
+        return threads.deferToThreadPool(self.master.reactor, self._threadpool, f, *args, **kwargs)
+
+    async def has_log(self, logid: int) -> bool:
+        """Returns whether this storage holds any line of the given log."""
+        raise NotImplementedError
+
+    async def append_lines(self, logid: int, first_line: int, content: str) -> None:
+        """
+        Stores the newline-terminated lines of ``content``, the first of which
+        is line ``first_line`` of the log.
+        """
+        raise NotImplementedError
+
+    async def discard_lines(self, logid: int, first_line: int, content: str) -> None:
+        """
+        Removes the lines stored by a call to ``append_lines`` with the same
+        arguments, whose lines could not be accounted for in the database.
+        Lines are appended again from ``first_line`` afterwards.
+        """
+        raise NotImplementedError
+
+    def iter_lines(
+        self, logid: int, first_line: int, last_line: int | None
+    ) -> AsyncGenerator[str, None]:
+        """Yields the lines of the log from ``first_line`` to ``last_line`` (inclusive)."""
+        raise NotImplementedError
+
+    async def compress_log(self, logid: int, compressor: type[CompressorInterface]) -> int:
+        """
+        Compresses the content of a finished log, and returns the number of
+        bytes saved.
+        """
+        raise NotImplementedError
+
+    async def delete_logs(self, logids: list[int]) -> int:
+        """
+        Deletes the content of the given logs, and returns the number of
+        deleted items (files, objects) of this storage.
+        """
+        raise NotImplementedError
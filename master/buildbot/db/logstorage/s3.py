@@ -0,0 +1,257 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+from buildbot.config.errors import error
+from buildbot.db.logstorage.protocol import LogStorage
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from twisted.python.threadpool import ThreadPool
+
+    from buildbot.db.compression.protocol import CompressorInterface
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+class _LogObject:
+    __slots__ = ('compression', 'first_line', 'key', 'last_line', 'size')
+
+    def __init__(
+        self, key: str, first_line: int, last_line: int, compression: str | None, size: int
+    ) -> None:
+        self.key = key
+        self.first_line = first_line
+        self.last_line = last_line
+        self.compression = compression
+        self.size = size
+
+
+class S3LogStorage(LogStorage):
+    """
+    Stores the content of logs in an S3-compatible object store. Object stores
+    do not support appending, so each append is stored as an object whose key
+    holds its line range; listing the objects of a log gives its index.
+
+    Once a log is finished, ``compress_log`` merges its objects into
+    compressed segments of about ``segment_size`` bytes.
+    """
+
+    name = 's3'
+
+    # keys are zero-padded so that they are listed in the order of their lines
+    KEY_FORMAT = '{prefix}{logid}/{first_line:010d}-{last_line:010d}'
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = 'logs/',
+        segment_size: int = 1024 * 1024,
+        client: Any = None,
+        **client_kwargs: Any,
+    ) -> None:
+        super().__init__()
+        if client is None and boto3 is None:
+            error("The python module 'boto3' is needed to use a S3LogStorage")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.segment_size = segment_size
+        self._client = client
+        self._client_kwargs = client_kwargs
+
+    def attach(
+        self,
+        master: Any,
+        threadpool: ThreadPool,
+        compressors: dict[str, type[CompressorInterface]],
+    ) -> None:
+        super().attach(master, threadpool, compressors)
+        if self._client is None:
+            self._client = boto3.client('s3', **self._client_kwargs)
+
+    def _key(
+        self, logid: int, first_line: int, last_line: int, compression: str | None = None
+    ) -> str:
+        key = self.KEY_FORMAT.format(
+            prefix=self.prefix, logid=logid, first_line=first_line, last_line=last_line
+        )
+        if compression is not None:
+            key += f'.{compression}'
+        return key
+
+    def _thd_list_objects(self, logid: int, max_keys: int | None = None) -> list[_LogObject]:
+        log_prefix = f'{self.prefix}{logid}/'
+        objects: list[_LogObject] = []
+        kwargs: dict[str, Any] = {'Bucket': self.bucket, 'Prefix': log_prefix}
+        if max_keys is not None:
+            kwargs['MaxKeys'] = max_keys
+        while True:
+            res = self._client.list_objects_v2(**kwargs)
+            for obj in res.get('Contents', []):
+                name, _, compression = obj['Key'][len(log_prefix) :].partition('.')
+                first_line, last_line = name.split('-')
+                objects.append(
+                    _LogObject(
+                        obj['Key'],
+                        int(first_line),
+                        int(last_line),
+                        compression or None,
+                        obj['Size'],
+                    )
+                )
+            if max_keys is not None or not res.get('IsTruncated'):
+                break
+            kwargs['ContinuationToken'] = res['NextContinuationToken']
+        # merged objects come first, so that the objects they replace are skipped
+        objects.sort(key=lambda o: (o.first_line, -o.last_line))
+        return objects
+
+    def _thd_get_object(self, obj: _LogObject) -> bytes | None:
+        try:
+            data = self._client.get_object(Bucket=self.bucket, Key=obj.key)['Body'].read()
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        if obj.compression is not None:
+            data = self._compressors[obj.compression].read(data)
+        return data
+
+    def _thd_delete_objects(self, objects: list[_LogObject]) -> None:
+        # at most 1000 keys can be deleted per request
+        for i in range(0, len(objects), 1000):
+            self._client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': o.key} for o in objects[i : i + 1000]]},
+            )
+
+    async def has_log(self, logid: int) -> bool:
+        return bool(await self._defer_to_thread(self._thd_list_objects, logid, max_keys=1))
+
+    async def append_lines(self, logid: int, first_line: int, content: str) -> None:
+        last_line = first_line + content.count('\n') - 1
+        await self._defer_to_thread(
+            self._client.put_object,
+            Bucket=self.bucket,
+            Key=self._key(logid, first_line, last_line),
+            Body=content.encode('utf-8'),
+        )
+
+    async def discard_lines(self, logid: int, first_line: int, content: str) -> None:
+        last_line = first_line + content.count('\n') - 1
+        await self._defer_to_thread(
+            self._client.delete_object,
+            Bucket=self.bucket,
+            Key=self._key(logid, first_line, last_line),
+        )
+
+    async def iter_lines(
+        self, logid: int, first_line: int, last_line: int | None
+    ) -> AsyncGenerator[str, None]:
+        next_line = first_line
+        while True:
+            objects = await self._defer_to_thread(self._thd_list_objects, logid)
+            for obj in objects:
+                if obj.last_line < next_line:
+                    continue
+                if last_line is not None and obj.first_line > last_line:
+                    return
+
+                data = await self._defer_to_thread(self._thd_get_object, obj)
+                if data is None:
+                    # merged by compress_log since the objects were listed
+                    break
+
+                text = data.decode('utf-8')
+                line_idx = obj.first_line
+                pos = 0
+                while pos < len(text) and (last_line is None or line_idx <= last_line):
+                    line_end = text.index('\n', pos) + 1
+                    if line_idx >= next_line:
+                        yield text[pos:line_end]
+                    pos = line_end
+                    line_idx += 1
+                next_line = max(next_line, line_idx)
+            else:
+                return
+
+    async def compress_log(self, logid: int, compressor: type[CompressorInterface]) -> int:
+        def thd() -> int:
+            groups: list[list[_LogObject]] = []
+            group_size = 0
+            for obj in self._thd_list_objects(logid):
+                if obj.compression is not None:
+                    continue
+                if (
+                    groups
+                    and groups[-1][-1].last_line + 1 == obj.first_line
+                    and group_size + obj.size <= self.segment_size
+                ):
+                    groups[-1].append(obj)
+                    group_size += obj.size
+                else:
+                    groups.append([obj])
+                    group_size = obj.size
+
+            bytes_saved = 0
+            for group in groups:
+                contents: list[bytes] = []
+                for obj in group:
+                    data = self._thd_get_object(obj)
+                    if data is None:
+                        # compressed concurrently
+                        return bytes_saved
+                    contents.append(data)
+                data = b''.join(contents)
+                compression: str | None = compressor.name
+                compressed = compressor.dumps(data)
+                if len(compressed) >= len(data):
+                    if len(group) == 1:
+                        continue
+                    compression = None
+                    compressed = data
+
+                # readers list the merged object before the ones it replaces
+                self._client.put_object(
+                    Bucket=self.bucket,
+                    Key=self._key(logid, group[0].first_line, group[-1].last_line, compression),
+                    Body=compressed,
+                )
+                self._thd_delete_objects(group)
+                bytes_saved += sum(o.size for o in group) - len(compressed)
+            return bytes_saved
+
+        if compressor.name not in self._compressors:
+            return 0
+        return await self._defer_to_thread(thd)
+
+    async def delete_logs(self, logids: list[int]) -> int:
+        def thd() -> int:
+            deleted = 0
+            for logid in logids:
+                objects = self._thd_list_objects(logid)
+                self._thd_delete_objects(objects)
+                deleted += len(objects)
+            return deleted
+
+        return await self._defer_to_thread(thd)
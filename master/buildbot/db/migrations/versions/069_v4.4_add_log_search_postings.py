@@ -0,0 +1,62 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+"""add log_search_postings table
+
+Revision ID: 069
+Revises: 068
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "069"
+down_revision = "068"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'log_search_postings',
+        sa.Column(
+            'logid',
+            sa.Integer,
+            sa.ForeignKey('logs.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('block', sa.Integer, nullable=False),
+        sa.Column('term', sa.Integer, nullable=False),
+        mysql_DEFAULT_CHARSET='utf8',
+    )
+
+    op.create_index(
+        'log_search_postings_term',
+        'log_search_postings',
+        ['term', 'logid'],
+    )
+    op.create_index(
+        'log_search_postings_logid',
+        'log_search_postings',
+        ['logid', 'block'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('log_search_postings_term')
+    op.drop_index('log_search_postings_logid')
+    op.drop_table('log_search_postings')
@@ -267,6 +267,39 @@ class Model(base.DBConnectorComponent):
         sa.Column('compressed', sa.SmallInteger, nullable=False),
     )
 
+    # zstd dictionaries trained on the logs having the same name in the builds
+    # of a builder, used by the 'zstd_dict' compression method. The id of the
+    # dictionary is stored in the content of the chunks compressed with it.
+    logchunk_dictionaries = sautils.Table(
+        'logchunk_dictionaries',
+        metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'builderid',
+            sa.Integer,
+            sa.ForeignKey('builders.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('log_name', sa.Text, nullable=False),
+        sa.Column('created_at', sa.Integer, nullable=False),
+        # NULL while the dictionary is being trained
+        sa.Column('content', sa.LargeBinary(65536), nullable=True),
+    )
+
+    # inverted index of the content of the logs: the words appearing in each
+    # block of lines of the logs, see LogSearchConnectorComponent
+    log_search_postings = sautils.Table(
+        'log_search_postings',
+        metadata,
+        sa.Column(
+            'logid', sa.Integer, sa.ForeignKey('logs.id', ondelete='CASCADE'), nullable=False
+        ),
+        # index of the block of lines, i.e. first line of the block / block size
+        sa.Column('block', sa.Integer, nullable=False),
+        # hash of the word
+        sa.Column('term', sa.Integer, nullable=False),
+    )
+
     # Tables related to buildsets
     # ---------------------------
 
@@ -1117,6 +1150,9 @@ class Model(base.DBConnectorComponent):
     sa.Index('logs_slug', logs.c.stepid, logs.c.slug, unique=True)
     sa.Index('logchunks_firstline', logchunks.c.logid, logchunks.c.first_line)
     sa.Index('logchunks_lastline', logchunks.c.logid, logchunks.c.last_line)
+    sa.Index('logchunk_dictionaries_builderid', logchunk_dictionaries.c.builderid)
+    sa.Index('log_search_postings_term', log_search_postings.c.term, log_search_postings.c.logid)
+    sa.Index('log_search_postings_logid', log_search_postings.c.logid, log_search_postings.c.block)
     sa.Index(
         'test_names_name', test_names.c.builderid, test_names.c.name, mysql_length={'name': 255}
     )
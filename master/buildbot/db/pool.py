@@ -54,6 +54,15 @@ if TYPE_CHECKING:
 debug = False
 _debug_id = 1
 
+_wait_histogram = metrics.registry.histogram(
+    'buildbot_db_pool_wait_seconds',
+    'Time database operations spent waiting for a thread of the pool',
+)
+_exec_histogram = metrics.registry.histogram(
+    'buildbot_db_pool_exec_seconds',
+    'Time spent executing database operations in the pool, including retries',
+)
+
 
 def timed_do_fn(f: Any) -> Any:
     """Decorate a do function to log before, after, and elapsed time,
@@ -196,6 +205,21 @@ class DBThreadPool:
     MAX_OPERATIONALERROR_TIME = 3600 * 24  # one day
 
     def __thd(
+        self,
+        queued_at: float,
+        with_engine: bool,
+        callable: Callable[Concatenate[sa.engine.Engine | sa.engine.Connection, _P], _T],
+        *args: _P.args,
+        **kwargs: _P.kwargs,
+    ) -> _T:
+        exec_start = time.monotonic()
+        _wait_histogram.observe(exec_start - queued_at)
+        try:
+            return self.__thd_retrying(with_engine, callable, *args, **kwargs)
+        finally:
+            _exec_histogram.observe(time.monotonic() - exec_start)
+
+    def __thd_retrying(
         self,
         with_engine: bool,
         callable: Callable[Concatenate[sa.engine.Engine | sa.engine.Connection, _P], _T],
@@ -288,6 +312,7 @@ class DBThreadPool:
             self.reactor,
             self._pool,
             self.__thd,  # type: ignore[arg-type]
+            time.monotonic(),
             False,
             callable,
             *args,
@@ -304,6 +329,7 @@ class DBThreadPool:
             self.reactor,
             self._pool,
             self.__thd,  # type: ignore[arg-type]
+            time.monotonic(),
             True,
             callable,
             *args,
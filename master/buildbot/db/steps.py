@@ -23,6 +23,7 @@ from typing import Any
 import sqlalchemy as sa
 from twisted.internet import defer
 
+from buildbot.db import NULL
 from buildbot.db import base
 from buildbot.util import epoch2datetime
 from buildbot.util.twisted import async_to_deferred
@@ -31,6 +32,8 @@ from buildbot.warnings import warn_deprecated
 if TYPE_CHECKING:
     import datetime
 
+    from buildbot.data.resultspec import ResultSpec
+
 
 @dataclass
 class UrlModel:
@@ -125,11 +128,27 @@ class StepsConnectorComponent(base.DBConnectorComponent):
 
         return await self.db.pool.do(thd)
 
-    def getSteps(self, buildid: int) -> defer.Deferred[list[StepModel]]:
+    def getSteps(
+        self,
+        buildid: int,
+        complete: bool | None = None,
+        resultSpec: ResultSpec | None = None,
+    ) -> defer.Deferred[list[StepModel]]:
         def thd(conn: sa.engine.Connection) -> list[StepModel]:
             tbl = self.db.model.steps
             q = tbl.select()
             q = q.where(tbl.c.buildid == buildid)
+            if complete is not None:
+                if complete:
+                    q = q.where(tbl.c.complete_at != NULL)
+                else:
+                    q = q.where(tbl.c.complete_at == NULL)
+
+            if resultSpec is not None:
+                if not resultSpec.order:
+                    q = q.order_by(tbl.c.number)
+                return resultSpec.thd_execute(conn, q, self._model_from_row)  # type: ignore[return-value]
+
             q = q.order_by(tbl.c.number)
             res = conn.execute(q)
             return [self._model_from_row(row) for row in res.fetchall()]
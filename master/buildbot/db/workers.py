@@ -23,11 +23,13 @@ from typing import Any
 import sqlalchemy as sa
 from twisted.internet import defer
 
+from buildbot.data.base import ListResult
 from buildbot.db import base
 from buildbot.util import identifiers
 from buildbot.warnings import warn_deprecated
 
 if TYPE_CHECKING:
+    from buildbot.data.resultspec import ResultSpec
     from buildbot.util.twisted import InlineCallbacksType
 
 
@@ -202,6 +204,7 @@ class WorkersConnectorComponent(base.DBConnectorComponent):
         builderid: int | None = None,
         paused: bool | None = None,
         graceful: bool | None = None,
+        resultSpec: ResultSpec | None = None,
     ) -> defer.Deferred[list[WorkerModel]]:
         def thd(conn: sa.engine.Connection) -> list[WorkerModel]:
             workers_tbl = self.db.model.workers
@@ -244,6 +247,63 @@ class WorkersConnectorComponent(base.DBConnectorComponent):
             if graceful is not None:
                 q = q.where(workers_tbl.c.graceful == int(graceful))
 
+            page_info = None
+            if resultSpec is not None and (
+                resultSpec.filters
+                or resultSpec.order
+                or resultSpec.offset is not None
+                or resultSpec.limit is not None
+            ):
+                # filter, sort and paginate the workers on their own table: the
+                # join above yields one row per configured builder, which would
+                # skew limit and offset
+                wq = sa.select(
+                    workers_tbl.c.id,
+                    workers_tbl.c.name,
+                    workers_tbl.c.paused,
+                    workers_tbl.c.graceful,
+                )
+                if _workerid is not None:
+                    wq = wq.where(workers_tbl.c.id == _workerid)
+                if _name is not None:
+                    wq = wq.where(workers_tbl.c.name == _name)
+                if masterid is not None or builderid is not None:
+                    cfg_q = sa.select(cfg_tbl.c.workerid).select_from(cfg_tbl.join(bm_tbl))
+                    if masterid is not None:
+                        cfg_q = cfg_q.where(bm_tbl.c.masterid == masterid)
+                    if builderid is not None:
+                        cfg_q = cfg_q.where(bm_tbl.c.builderid == builderid)
+                    wq = wq.where(workers_tbl.c.id.in_(cfg_q))
+                if paused is not None:
+                    wq = wq.where(workers_tbl.c.paused == int(paused))
+                if graceful is not None:
+                    wq = wq.where(workers_tbl.c.graceful == int(graceful))
+
+                order = resultSpec.order or ()
+                if not order:
+                    # keep pages stable when no order is requested
+                    wq = wq.order_by(workers_tbl.c.id)
+                offset = resultSpec.offset
+                limit = resultSpec.limit
+                wq, count_q = resultSpec.applyToSQLQuery(wq)
+                unmatched_order = resultSpec.order or ()
+
+                # join the page of workers as a derived table, and keep its
+                # order in the main query
+                page = wq.subquery('page')
+                q = q.join(page, workers_tbl.c.id == page.c.id)
+                order_by = []
+                for o in order:
+                    if o in unmatched_order:
+                        continue
+                    field = o.removeprefix('-')
+                    col = page.c[resultSpec.fieldMapping[field].split('.')[-1]]
+                    order_by.append(col.desc() if o.startswith('-') else col)
+                q = q.order_by(None).order_by(*order_by, workers_tbl.c.id)
+
+                if count_q is not None and (offset or limit):
+                    page_info = (offset, conn.execute(count_q).scalar(), limit)
+
             rv: dict[int, WorkerModel] = {}
             res = None
             lastId = None
@@ -286,7 +346,13 @@ class WorkersConnectorComponent(base.DBConnectorComponent):
                     continue
                 rv[row.workerid].connected_to.append(row.masterid)
 
-            return list(rv.values())
+            if page_info is None:
+                return list(rv.values())
+
+            offset, total, limit = page_info
+            return ListResult(  # type: ignore[return-value]
+                list(rv.values()), offset=offset, total=total, limit=limit
+            )
 
         return self.db.pool.do(thd)
 
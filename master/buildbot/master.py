@@ -45,6 +45,7 @@ from buildbot.process import debug
 from buildbot.process import metrics
 from buildbot.process.botmaster import BotMaster
 from buildbot.process.users.manager import UserManagerManager
+from buildbot.schedulers.dispatcher import ChangeDispatcher
 from buildbot.schedulers.manager import SchedulerManager
 from buildbot.secrets.manager import SecretManager
 from buildbot.util import check_functional_environment
@@ -180,6 +181,7 @@ class BuildMaster(service.ReconfigurableServiceMixin, service.MasterService):
 
         self.scheduler_manager = SchedulerManager()
         yield self.scheduler_manager.setServiceParent(self)
+        self.change_dispatcher = ChangeDispatcher(self)
 
         self.user_manager = UserManagerManager(self)
         yield self.user_manager.setServiceParent(self)
@@ -24,17 +24,31 @@ from twisted.internet import defer
 from twisted.python import log
 
 from buildbot.mq import base
+from buildbot.process import metrics
 from buildbot.util import service
 from buildbot.util import tuplematch
 
 if TYPE_CHECKING:
     from buildbot.config.master import MasterConfig
 
+_produced_counter = metrics.registry.counter(
+    'buildbot_mq_messages_produced_total',
+    'Number of messages produced, by the first element of their routing key',
+    ['kind'],
+)
+_fanout_histogram = metrics.registry.histogram(
+    'buildbot_mq_fanout_consumers',
+    'Number of consumers a produced message was delivered to',
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
 
 class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
     def __init__(self) -> None:
         super().__init__()
         self.qrefs: list[QueueRef] = []
+        # index of qrefs by filter, so that produce only visits matching consumers
+        self.qref_index: tuplematch.TupleMatchIndex[QueueRef] = tuplematch.TupleMatchIndex()
         self.persistent_qrefs: dict[str, PersistentQueueRef] = {}
         self.debug = False
 
@@ -45,9 +59,12 @@ class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
     def produce(self, routingKey: tuple[str, ...], data: dict[str, Any]) -> None:
         if self.debug:
             log.msg(f"MSG: {routingKey}\n{pprint.pformat(data)}")
-        for qref in self.qrefs:
-            if tuplematch.matchTuple(routingKey, qref.filter):
-                self.invokeQref(qref, routingKey, data)
+        consumers = 0
+        for qref in self.qref_index.match(routingKey):
+            self.invokeQref(qref, routingKey, data)
+            consumers += 1
+        _produced_counter.labels(routingKey[0] if routingKey else '').inc()
+        _fanout_histogram.observe(consumers)
 
     def startConsuming(  # type: ignore[override]
         self,
@@ -66,11 +83,13 @@ class SimpleMQ(service.ReconfigurableServiceMixin, base.MQBase):
             else:
                 new_pqref = PersistentQueueRef(self, callback, filter)
                 self.qrefs.append(new_pqref)
+                self.qref_index.add(filter, new_pqref)
                 self.persistent_qrefs[persistent_name] = new_pqref
                 qref = new_pqref
         else:
             qref = QueueRef(self, callback, filter)
             self.qrefs.append(qref)
+            self.qref_index.add(filter, qref)
         return defer.succeed(qref)
 
 
@@ -89,10 +108,8 @@ class QueueRef(base.QueueRef):
 
     def stopConsuming(self) -> None:
         self.callback = None
-        try:
+        if self.mq.qref_index.remove(self.filter, self):
             self.mq.qrefs.remove(self)
-        except ValueError:
-            pass
 
 
 class PersistentQueueRef(QueueRef):
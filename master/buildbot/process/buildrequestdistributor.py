@@ -18,7 +18,7 @@ from __future__ import annotations
 import copy
 import math
 import random
-from datetime import datetime
+import time
 from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
@@ -40,12 +40,173 @@ from buildbot.util.twisted import async_to_deferred
 if TYPE_CHECKING:
     from twisted.internet.defer import Deferred
 
+    from buildbot.db.buildrequests import UnclaimedBuildRequestsSummaryModel
     from buildbot.master import BuildMaster
+    from buildbot.mq.base import QueueRef
     from buildbot.process.botmaster import BotMaster
     from buildbot.process.builder import Builder
     from buildbot.process.workerforbuilder import AbstractWorkerForBuilder
     from buildbot.util.twisted import InlineCallbacksType
 
+_activity_loop_histogram = metrics.registry.histogram(
+    'buildbot_brd_activity_loop_seconds',
+    'Duration of the build request distributor activity loops',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+_builders_examined_counter = metrics.registry.counter(
+    'buildbot_brd_builders_examined_total',
+    'Number of builders the build request distributor tried to start builds on',
+)
+
+
+class PendingBuildRequests:
+    """
+    In-memory index of the unclaimed build requests of each builder.
+
+    A builder's requests are fetched from the database the first time they are
+    needed, and then kept up to date from the buildrequests messages.  Since
+    another master may claim requests without this master seeing a message,
+    a builder is fetched again once C{resync_interval} seconds have passed
+    since its last fetch, or after L{invalidate} was called for it.
+
+    It also caches the per-builder summary of the unclaimed build requests
+    used to sort builders.  The summary is dropped on every buildrequests
+    message, so it is only reused by distribution passes that happen while
+    no build request changed state.
+    """
+
+    resync_interval = 60
+
+    # messages sent through another master's MQ, e.g. wamp, carry these as
+    # epoch timestamps
+    datetime_fields = ('submitted_at', 'claimed_at', 'complete_at')
+
+    def __init__(self, master: BuildMaster) -> None:
+        self.master = master
+        # builderid -> buildrequestid -> brdict
+        self._brdicts: dict[int, dict[int, dict[str, Any]]] = {}
+        self._synced_at: dict[int, float] = {}
+        # messages received while a builder is being fetched, replayed
+        # once the fetch completes
+        self._fetching: dict[int, list[tuple[str, dict[str, Any]]]] = {}
+        self._fetch_locks: dict[int, defer.DeferredLock] = {}
+        self._consumers: list[QueueRef] = []
+        self._summary: dict[int, UnclaimedBuildRequestsSummaryModel] | None = None
+        self._summary_synced_at: float = 0
+        # incremented whenever the summary is invalidated, so that a fetch
+        # racing with a message does not store a stale summary
+        self._summary_generation = 0
+
+    @property
+    def active(self) -> bool:
+        return bool(self._consumers)
+
+    @async_to_deferred
+    async def start_consuming(self) -> None:
+        for event in ('new', 'unclaimed', 'claimed', 'complete'):
+            qref = await self.master.mq.startConsuming(
+                self._buildrequest_event, ('buildrequests', None, event)
+            )
+            self._consumers.append(qref)
+
+    def stop_consuming(self) -> None:
+        for qref in self._consumers:
+            qref.stopConsuming()
+        self._consumers = []
+        self._brdicts.clear()
+        self._synced_at.clear()
+        self._invalidate_summary()
+
+    def _buildrequest_event(self, key: tuple[str, ...], msg: dict[str, Any]) -> None:
+        self._invalidate_summary()
+        builderid = msg['builderid']
+        if builderid in self._fetching:
+            self._fetching[builderid].append((key[2], msg))
+        elif builderid in self._brdicts:
+            self._apply_event(self._brdicts[builderid], key[2], msg)
+
+    def _apply_event(
+        self, brdicts: dict[int, dict[str, Any]], event: str, msg: dict[str, Any]
+    ) -> None:
+        brid = msg['buildrequestid']
+        if event in ('new', 'unclaimed') and not msg['claimed'] and not msg['complete']:
+            brdict = dict(msg)
+            for field in self.datetime_fields:
+                if isinstance(brdict.get(field), (int, float)):
+                    brdict[field] = epoch2datetime(brdict[field])
+            brdicts[brid] = brdict
+        else:
+            brdicts.pop(brid, None)
+
+    def remove(self, builderid: int, brids: list[int]) -> None:
+        # drop requests that this master has just claimed
+        self._invalidate_summary()
+        brdicts = self._brdicts.get(builderid)
+        if brdicts is not None:
+            for brid in brids:
+                brdicts.pop(brid, None)
+
+    def invalidate(self, builderid: int) -> None:
+        # the index for this builder cannot be trusted anymore, e.g. because
+        # another master claimed one of its requests
+        self._synced_at.pop(builderid, None)
+        self._invalidate_summary()
+
+    def _invalidate_summary(self) -> None:
+        self._summary = None
+        self._summary_generation += 1
+
+    def _is_synced(self, builderid: int) -> bool:
+        synced_at = self._synced_at.get(builderid)
+        if synced_at is None:
+            return False
+        return self.master.reactor.seconds() - synced_at < self.resync_interval
+
+    @async_to_deferred
+    async def get_unclaimed_brdicts(self, builderid: int) -> list[dict[str, Any]]:
+        """
+        Return the unclaimed brdicts of the given builder, oldest first
+        """
+        if not self._is_synced(builderid):
+            lock = self._fetch_locks.setdefault(builderid, defer.DeferredLock())
+            async with lock:
+                if not self._is_synced(builderid):
+                    await self._fetch(builderid)
+        return sorted(self._brdicts[builderid].values(), key=lambda brd: brd['buildrequestid'])
+
+    @async_to_deferred
+    async def get_unclaimed_summary(self) -> dict[int, UnclaimedBuildRequestsSummaryModel]:
+        """
+        Return the highest priority and oldest submission time of the
+        unclaimed build requests of every builder, keyed by builderid
+        """
+        now = self.master.reactor.seconds()
+        if self._summary is not None and now - self._summary_synced_at < self.resync_interval:
+            return self._summary
+
+        generation = self._summary_generation
+        summary = await self.master.db.buildrequests.get_unclaimed_buildrequests_summary()
+        if generation == self._summary_generation:
+            self._summary = summary
+            self._summary_synced_at = now
+        return summary
+
+    async def _fetch(self, builderid: int) -> None:
+        self._fetching[builderid] = []
+        try:
+            synced_at = self.master.reactor.seconds()
+            brdicts = await self.master.data.get(
+                ('builders', builderid, 'buildrequests'),
+                [resultspec.Filter('claimed', 'eq', [False])],
+            )
+            pending = {brd['buildrequestid']: brd for brd in brdicts}
+            for event, msg in self._fetching[builderid]:
+                self._apply_event(pending, event, msg)
+        finally:
+            del self._fetching[builderid]
+        self._brdicts[builderid] = pending
+        self._synced_at[builderid] = synced_at
+
 
 class BuildChooserBase:
     #
@@ -70,6 +231,11 @@ class BuildChooserBase:
         self.master = master
         self.breqCache: dict[int, BuildRequest] = {}
         self.unclaimedBrdicts: list[dict[str, Any]] | None = None
+        self._unclaimedBrdictsById: dict[int, dict[str, Any]] = {}
+        self._buildernames: dict[int, str] = {}
+        # set by the BuildRequestDistributor when it maintains an index of
+        # the unclaimed build requests
+        self.pending_buildrequests: PendingBuildRequests | None = None
 
     @defer.inlineCallbacks
     def chooseNextBuild(
@@ -99,14 +265,19 @@ class BuildChooserBase:
         # exists, this function does nothing. If a refetch is desired, set
         # the self.unclaimedBrdicts to None before calling."""
         if self.unclaimedBrdicts is None:
-            # TODO: use order of the DATA API
-            brdicts = yield self.master.data.get(
-                ('builders', (yield self.bldr.getBuilderId()), 'buildrequests'),
-                [resultspec.Filter('claimed', 'eq', [False])],
-            )
-            # sort by buildrequestid, so the first is the oldest
-            brdicts.sort(key=lambda brd: brd['buildrequestid'])
+            builderid = yield self.bldr.getBuilderId()
+            if self.pending_buildrequests is not None and self.pending_buildrequests.active:
+                brdicts = yield self.pending_buildrequests.get_unclaimed_brdicts(builderid)
+            else:
+                # TODO: use order of the DATA API
+                brdicts = yield self.master.data.get(
+                    ('builders', builderid, 'buildrequests'),
+                    [resultspec.Filter('claimed', 'eq', [False])],
+                )
+                # sort by buildrequestid, so the first is the oldest
+                brdicts.sort(key=lambda brd: brd['buildrequestid'])
             self.unclaimedBrdicts = brdicts
+            self._unclaimedBrdictsById = {brd['buildrequestid']: brd for brd in brdicts}
         return self.unclaimedBrdicts
 
     @defer.inlineCallbacks
@@ -118,17 +289,20 @@ class BuildChooserBase:
 
         breq = self.breqCache.get(brdict['buildrequestid'])
         if not breq:
-            builder = yield self.master.data.get(
-                ('builders', brdict['builderid']), [resultspec.ResultSpec(fields=['name'])]
-            )
-            if not builder:
-                return None
+            buildername = self._buildernames.get(brdict['builderid'])
+            if buildername is None:
+                builder = yield self.master.data.get(
+                    ('builders', brdict['builderid']), [resultspec.ResultSpec(fields=['name'])]
+                )
+                if not builder:
+                    return None
+                buildername = self._buildernames[brdict['builderid']] = builder['name']
 
             model = BuildRequestModel(
                 buildrequestid=brdict['buildrequestid'],
                 buildsetid=brdict['buildsetid'],
                 builderid=brdict['builderid'],
-                buildername=builder['name'],
+                buildername=buildername,
                 submitted_at=brdict['submitted_at'],
             )
             if 'complete_at' in brdict:
@@ -158,11 +332,7 @@ class BuildChooserBase:
         if breq is None:
             return None
 
-        brid = breq.id
-        for brdict in self.unclaimedBrdicts or []:
-            if brid == brdict['buildrequestid']:
-                return brdict
-        return None
+        return self._unclaimedBrdictsById.get(breq.id)
 
     def _removeBuildRequest(self, breq: BuildRequest | None) -> None:
         # Remove a BuildrRequest object (and its brdict)
@@ -171,7 +341,7 @@ class BuildChooserBase:
         if breq is None:
             return
 
-        brdict = self._getBrdictForBuildRequest(breq)
+        brdict = self._unclaimedBrdictsById.pop(breq.id, None)
         if brdict is not None and self.unclaimedBrdicts is not None:
             self.unclaimedBrdicts.remove(brdict)
 
@@ -284,8 +454,8 @@ class BasicBuildChooser(BuildChooserBase):
                 log.err(Failure(), f"from _getNextUnclaimedBuildRequest for builder '{self.bldr}'")
                 nextBreq = None
         else:
-            # otherwise just return the build with highest priority
-            brdict = sorted(self.unclaimedBrdicts, key=lambda b: b['priority'], reverse=True)[0]
+            # otherwise just return the oldest build with highest priority
+            brdict = max(self.unclaimedBrdicts, key=lambda b: b['priority'])
             nextBreq = yield self._getBuildRequestForBrdict(brdict)
 
         return nextBreq
@@ -355,6 +525,12 @@ class BuildRequestDistributor(service.AsyncMultiService):
 
         self._deferwaiter: deferwaiter.DeferWaiter[None] = deferwaiter.DeferWaiter()
         self._activity_loop_deferred: Deferred[None] | None = None
+        # fired to wake up the concurrent activity loop
+        self._activity_wakeup: Deferred[None] | None = None
+
+        # index of the unclaimed build requests of each builder, shared by the
+        # build choosers
+        self.pending_buildrequests: PendingBuildRequests | None = None
 
         # Use in Master clean shutdown
         # this flag will allow the distributor to still
@@ -365,6 +541,12 @@ class BuildRequestDistributor(service.AsyncMultiService):
     def can_distribute(self) -> bool:
         return bool(self.running) or self.distribute_only_waited_childs
 
+    @defer.inlineCallbacks
+    def startService(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        yield super().startService()
+        self.pending_buildrequests = PendingBuildRequests(self.master)
+        yield self.pending_buildrequests.start_consuming()
+
     @defer.inlineCallbacks
     def stopService(self) -> InlineCallbacksType[None]:
         # Lots of stuff happens asynchronously here, so we need to let it all
@@ -379,6 +561,10 @@ class BuildRequestDistributor(service.AsyncMultiService):
         # TEST-TODO: this behavior is not asserted in any way.
         yield self._deferwaiter.wait()
 
+        if self.pending_buildrequests is not None:
+            self.pending_buildrequests.stop_consuming()
+            self.pending_buildrequests = None
+
     @async_to_deferred
     async def maybeStartBuildsOn(self, new_builders: list[str]) -> None:
         """
@@ -422,6 +608,8 @@ class BuildRequestDistributor(service.AsyncMultiService):
                 # working on that.
                 if not self.active:
                     self._activity_loop_deferred = defer.ensureDeferred(self._activityLoop())
+                else:
+                    self._wakeActivityLoop()
         except Exception:  # pragma: no cover
             log.err(Failure(), f"while attempting to start builds on {self.name}")
 
@@ -432,22 +620,23 @@ class BuildRequestDistributor(service.AsyncMultiService):
         timer = metrics.Timer("BuildRequestDistributor._defaultSorter()")
         timer.start()
 
+        # fetch the pending build requests of all builders at once, rather
+        # than querying them builder by builder
+        if self.pending_buildrequests is not None and self.pending_buildrequests.active:
+            summary = yield self.pending_buildrequests.get_unclaimed_summary()
+        else:
+            summary = yield master.db.buildrequests.get_unclaimed_buildrequests_summary()
+
         @defer.inlineCallbacks
         def key(bldr: Builder) -> InlineCallbacksType[tuple[float, float, str | None]]:
-            # Sort primarily highest priority of build requests
-            priority = yield bldr.get_highest_priority()
-            if priority is None:
-                # for builders that do not have pending buildrequest, we just use large number
-                priority = -math.inf
-            # Break ties using the time of oldest build request
-            time = yield bldr.getOldestRequestTime()
-            if time is None:
-                # for builders that do not have pending buildrequest, we just use large number
-                time = math.inf
-            else:
-                if isinstance(time, datetime):
-                    time = time.timestamp()
-            return (-priority, time, bldr.name)
+            builderid = yield bldr.getBuilderId()
+            pending = summary.get(builderid)
+            if pending is None:
+                # builders that do not have pending buildrequests go last
+                return (math.inf, math.inf, bldr.name)
+            # Sort primarily highest priority of build requests, and break
+            # ties using the time of oldest build request
+            return (-pending.highest_priority, pending.oldest_submitted_at.timestamp(), bldr.name)
 
         yield async_sort(builders, key)
 
@@ -483,7 +672,18 @@ class BuildRequestDistributor(service.AsyncMultiService):
     @metrics.timeMethod('BuildRequestDistributor._activityLoop()')
     async def _activityLoop(self) -> None:
         self.active = True
+        loop_start = time.monotonic()
+
+        concurrency = self.master.config.build_distribution_concurrency
+        if concurrency > 1:
+            await self._activityLoopConcurrently(concurrency)
+        else:
+            await self._activityLoopSequentially()
+
+        _activity_loop_histogram.observe(time.monotonic() - loop_start)
+        self.active = False
 
+    async def _activityLoopSequentially(self) -> None:
         pending_builders: list[str] = []
         while True:
             async with self.activity_lock:
@@ -502,6 +702,7 @@ class BuildRequestDistributor(service.AsyncMultiService):
                         self._pending_builders = []
 
                 bldr_name = pending_builders.pop(0)
+                _builders_examined_counter.inc()
 
                 # get the actual builder object
                 bldr = self.botmaster.builders.get(bldr_name)
@@ -511,7 +712,77 @@ class BuildRequestDistributor(service.AsyncMultiService):
                 except Exception:
                     log.err(Failure(), f"from maybeStartBuild for builder '{bldr_name}'")
 
-        self.active = False
+    async def _activityLoopConcurrently(self, concurrency: int) -> None:
+        # Examine up to `concurrency` builders at once. A builder is started as
+        # soon as a slot is free, rather than waiting for the whole list of
+        # pending builders to be processed, so a slow builder only delays the
+        # builders that share its workers.
+        running: dict[str, Builder] = {}
+
+        async def examine(bldr: Builder) -> None:
+            try:
+                await self._maybeStartBuildsOnBuilder(bldr)
+            except Exception:
+                log.err(Failure(), f"from maybeStartBuild for builder '{bldr.name}'")
+            finally:
+                del running[bldr.name]  # type: ignore[arg-type]
+                self._wakeActivityLoop()
+
+        while True:
+            self._activity_wakeup = defer.Deferred()
+            async with self.activity_lock:
+                if not self.can_distribute:
+                    break
+
+                async with self.pending_builders_lock:
+                    started = self._takeStartableBuilders(running, concurrency)
+                for bldr in started:
+                    assert bldr.name is not None
+                    running[bldr.name] = bldr
+                    _builders_examined_counter.inc()
+                    # let stopService wait for the builders being examined
+                    self._deferwaiter.add(defer.ensureDeferred(examine(bldr)))
+
+                if not running and not self._pending_builders:
+                    break
+
+            # wait until a builder is done, or new builders are pending
+            await self._activity_wakeup
+        self._activity_wakeup = None
+
+    def _takeStartableBuilders(
+        self, running: dict[str, Builder], concurrency: int
+    ) -> list[Builder]:
+        # Remove from the pending builders, in priority order, those that can be
+        # examined now. Builders that share a worker compete for the same worker
+        # slots and are examined one after another, in priority order: a
+        # builder waits while a builder sharing one of its workers is running or
+        # is ahead of it in the pending list.
+        def workers_of(bldr: Builder) -> set[str]:
+            return set(bldr.config.workernames) if bldr.config is not None else set()
+
+        claimed: set[str] = set()
+        for running_bldr in running.values():
+            claimed |= workers_of(running_bldr)
+
+        started: list[Builder] = []
+        remaining: list[str] = []
+        for name in self._pending_builders:
+            bldr = self.botmaster.builders.get(name)
+            if bldr is None:
+                continue
+            workers = workers_of(bldr)
+            if name in running or workers & claimed or len(running) + len(started) >= concurrency:
+                remaining.append(name)
+            else:
+                started.append(bldr)
+            claimed |= workers
+        self._pending_builders = remaining
+        return started
+
+    def _wakeActivityLoop(self) -> None:
+        if self._activity_wakeup is not None and not self._activity_wakeup.called:
+            self._activity_wakeup.callback(None)
 
     async def _maybeStartBuildsOnBuilder(self, bldr: Builder) -> None:
         # create a chooser to give us our next builds
@@ -554,13 +825,16 @@ class BuildRequestDistributor(service.AsyncMultiService):
                 await self.master.data.updates.claimBuildRequests(brids, claimed_at=claimed_at)
             ):
                 # some brids were already claimed, so start over
+                self._invalidate_pending_buildrequests(breqs)
                 bc = self.createBuildChooser(bldr, self.master)
                 continue
+            self._remove_pending_buildrequests(breqs)
 
             buildStarted = await bldr.maybeStartBuild(worker, breqs)
             if not buildStarted:
                 await self.master.data.updates.unclaimBuildRequests(brids)
                 self._remove_in_progress_brids(brids)
+                self._invalidate_pending_buildrequests(breqs)
 
                 # try starting builds again.  If we still have a working worker,
                 # then this may re-claim the same buildrequests
@@ -574,9 +848,21 @@ class BuildRequestDistributor(service.AsyncMultiService):
         for brid in brids:
             self.master.botmaster.remove_in_progress_buildrequest(brid)
 
+    def _remove_pending_buildrequests(self, breqs: list[BuildRequest]) -> None:
+        if self.pending_buildrequests is not None:
+            for br in breqs:
+                self.pending_buildrequests.remove(br.builderid, [br.id])
+
+    def _invalidate_pending_buildrequests(self, breqs: list[BuildRequest]) -> None:
+        if self.pending_buildrequests is not None:
+            for builderid in set(br.builderid for br in breqs):
+                self.pending_buildrequests.invalidate(builderid)
+
     def createBuildChooser(self, bldr: Builder, master: BuildMaster) -> BuildChooserBase:
         # just instantiate the build chooser requested
-        return self.BuildChooser(bldr, master)
+        bc = self.BuildChooser(bldr, master)
+        bc.pending_buildrequests = self.pending_buildrequests
+        return bc
 
     @async_to_deferred
     async def _waitForFinish(self) -> None:
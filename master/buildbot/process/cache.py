@@ -46,6 +46,7 @@ class CacheManager(service.ReconfigurableServiceMixin, service.AsyncService):
         self.setName('caches')
         self.config: dict[str, int] = {}
         self._caches: dict[str, lru.AsyncLRUCache[Any, Any]] = {}
+        self._sized_caches: dict[str, tuple[lru.SizedLRUCache[Any, Any], int]] = {}
 
     def get_cache(
         self, cache_name: str, miss_fn: Callable[..., Any]
@@ -70,15 +71,53 @@ class CacheManager(service.ReconfigurableServiceMixin, service.AsyncService):
             c = self._caches[cache_name] = lru.AsyncLRUCache(miss_fn, max_size)
             return c
 
+    def get_sized_cache(
+        self,
+        cache_name: str,
+        size_fn: Callable[[Any], int],
+        default_max_size: int,
+        group_fn: Callable[[Any], Any] | None = None,
+    ) -> lru.SizedLRUCache[Any, Any]:
+        """
+        Get an L{SizedLRUCache} object with the given name, creating it if it
+        does not exist.  The configured size of such a cache is the maximum
+        total size of its values, as given by C{size_fn}, instead of a number
+        of values.
+
+        @param cache_name: name of the cache
+        @param size_fn: function returning the size of a cached value
+        @param default_max_size: maximum size used when none is configured
+        @param group_fn: optional function returning the group of a key, see
+        L{SizedLRUCache}
+        @returns: L{SizedLRUCache} instance
+        """
+        try:
+            return self._sized_caches[cache_name][0]
+        except KeyError:
+            max_size = self.config.get(cache_name, default_max_size)
+            c: lru.SizedLRUCache[Any, Any] = lru.SizedLRUCache(size_fn, max_size, group_fn=group_fn)
+            self._sized_caches[cache_name] = (c, default_max_size)
+            return c
+
     def reconfigServiceWithBuildbotConfig(self, new_config: MasterConfig) -> Deferred[None]:
         self.config = new_config.caches
         for name, cache in self._caches.items():
             cache.set_max_size(new_config.caches.get(name, self.DEFAULT_CACHE_SIZE))
+        for name, (sized_cache, default_max_size) in self._sized_caches.items():
+            sized_cache.set_max_size(new_config.caches.get(name, default_max_size))
 
         return super().reconfigServiceWithBuildbotConfig(new_config)
 
     def get_metrics(self) -> dict[str, dict[str, int]]:
-        return {
+        metrics = {
             n: {'hits': c.hits, 'refhits': c.refhits, 'misses': c.misses, 'max_size': c.max_size}
             for n, c in self._caches.items()
         }
+        for n, (sc, _) in self._sized_caches.items():
+            metrics[n] = {
+                'hits': sc.hits,
+                'misses': sc.misses,
+                'size': sc.size,
+                'max_size': sc.max_size,
+            }
+        return metrics
@@ -27,6 +27,9 @@ from buildbot import util
 from buildbot.util import lineboundaries
 
 if TYPE_CHECKING:
+    from twisted.internet.interfaces import IDelayedCall
+    from twisted.python.failure import Failure
+
     from buildbot.util.twisted import InlineCallbacksType
 
 
@@ -54,6 +57,14 @@ class Log:
         self.lock = defer.DeferredLock()
         self.decoder = decoder
 
+        # lines that have been added, but not yet written to the database
+        self._write_buffer: list[str] = []
+        self._write_buffer_size = 0
+        self._write_timer: IDelayedCall | None = None
+        # failure of a flush started by the timer, reported to the next
+        # caller that adds lines, flushes or finishes the log
+        self._write_failure: Failure | None = None
+
     @staticmethod
     def _decoderFromString(cfg: str | bytes | Callable[[bytes], str]) -> Callable[[bytes], str]:
         """
@@ -86,13 +97,64 @@ class Log:
 
     # adding lines
 
-    @defer.inlineCallbacks
-    def addRawLines(self, lines: str) -> InlineCallbacksType[None]:
+    def addRawLines(self, lines: str) -> defer.Deferred[None]:
         # used by subclasses to add lines that are already appropriately
         # formatted for the log type, and newline-terminated
         assert lines[-1] == '\n'
         assert not self.finished
-        yield self.lock.run(lambda: self.master.data.updates.appendLog(self.logid, lines))
+
+        # Lines are buffered and written with a single appendLog call once
+        # enough of them accumulated or after a delay, as each appendLog is a
+        # database transaction. Readers of the log flush the buffer through
+        # the log resource type before querying the database.
+        if not self._write_buffer:
+            self.master.data.rtypes.log.register_write_buffer(self.logid, self._flush_write_buffer)
+        self._write_buffer.append(lines)
+        self._write_buffer_size += len(lines)
+
+        if (
+            self._write_failure is None
+            and self._write_buffer_size >= self.master.config.logWriteBufferSize
+        ):
+            return self._flush_write_buffer()
+        if self._write_timer is None:
+            self._write_timer = self.master.reactor.callLater(
+                self.master.config.logWriteBufferDelay, self._on_write_timer
+            )
+        if self._write_failure is not None:
+            # the lines stay buffered, but the caller is told about the
+            # failure of the flush started by the timer
+            return self._pop_write_failure()
+        return defer.succeed(None)
+
+    def _on_write_timer(self) -> None:
+        self._write_timer = None
+        d = self._flush_write_buffer()
+
+        @d.addErrback
+        def store_failure(failure: Failure) -> None:
+            self._write_failure = failure
+
+    def _pop_write_failure(self) -> defer.Deferred[None]:
+        failure = self._write_failure
+        assert failure is not None
+        self._write_failure = None
+        return defer.fail(failure)
+
+    def _flush_write_buffer(self) -> defer.Deferred[None]:
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+            self._write_timer = None
+        if not self._write_buffer:
+            # an earlier flush may still be in progress, wait for it
+            return self.lock.run(defer.succeed, None)
+
+        lines = ''.join(self._write_buffer)
+        self._write_buffer = []
+        self._write_buffer_size = 0
+        self.master.data.rtypes.log.unregister_write_buffer(self.logid)
+        # the lock keeps the appendLog calls in the order of the flushes
+        return self.lock.run(lambda: self.master.data.updates.appendLog(self.logid, lines))
 
     # completion
 
@@ -100,7 +162,9 @@ class Log:
         return self._had_errors
 
     def flush(self) -> defer.Deferred[None]:
-        return defer.succeed(None)
+        if self._write_failure is not None:
+            return self._pop_write_failure()
+        return self._flush_write_buffer()
 
     @defer.inlineCallbacks
     def finish(self) -> InlineCallbacksType[None]:
@@ -108,6 +172,8 @@ class Log:
         assert not self.finished
         self._finishing = True
 
+        yield self.flush()
+
         def fToRun() -> defer.Deferred[None]:
             self.finished = True
             return self.master.data.updates.finishLog(self.logid)
@@ -157,6 +223,7 @@ class PlainLog(Log):
         if lines is not None:
             self.subPoint.deliver(None, lines)
             yield self.addRawLines(lines)
+        yield super().flush()
 
     @defer.inlineCallbacks
     def finish(self) -> InlineCallbacksType[None]:
@@ -248,7 +315,7 @@ class StreamLog(Log):
             lines = lbf.flush()
             if lines is not None:
                 self._on_whole_lines(stream, lines)
-        return defer.succeed(None)
+        return super().flush()
 
     @defer.inlineCallbacks
     def finish(self) -> InlineCallbacksType[None]:
@@ -30,17 +30,29 @@ Basic architecture:
           ||
           \/
     MetricWatcher
+
+Metrics that are updated on hot paths use the in-memory MetricsRegistry
+instead, which is exposed in the Prometheus text format.
 """
 
 from __future__ import annotations
 
+import bisect
+import contextlib
 import gc
+import math
 import os
+import re
 import sys
+import threading
+import time
 from collections import defaultdict
 from collections import deque
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import ClassVar
+from typing import Generic
+from typing import TypeVar
 from typing import cast
 
 from twisted.application import service
@@ -53,6 +65,8 @@ from buildbot.util import service as util_service
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from collections.abc import Iterator
+    from collections.abc import Sequence
 
     from twisted.internet.base import ReactorBase
     from twisted.internet.interfaces import IReactorTime
@@ -71,6 +85,10 @@ except ImportError:
 class MetricEvent:
     @classmethod
     def log(cls, *args: Any, **kwargs: Any) -> None:
+        # only MetricLogObserver consumes these events, so don't pay for the
+        # log observers when none is enabled
+        if not MetricLogObserver.enabled_count:
+            return
         log.msg(metric=cls(*args, **kwargs))
 
 
@@ -406,6 +424,9 @@ def periodicCheck(_reactor: ReactorBase = reactor) -> None:  # type: ignore[assi
 class MetricLogObserver(util_service.ReconfigurableServiceMixin, service.MultiService):
     _reactor: IReactorTime = cast("IReactorTime", reactor)
 
+    # number of enabled observers in this process
+    enabled_count: ClassVar[int] = 0
+
     def __init__(self) -> None:
         super().__init__()
         self.setName('metrics')
@@ -471,6 +492,7 @@ class MetricLogObserver(util_service.ReconfigurableServiceMixin, service.MultiSe
             return
         log.addObserver(self.emit)
         self.enabled = True
+        MetricLogObserver.enabled_count += 1
 
     def disable(self) -> None:
         if not self.enabled:
@@ -486,6 +508,7 @@ class MetricLogObserver(util_service.ReconfigurableServiceMixin, service.MultiSe
 
         log.removeObserver(self.emit)
         self.enabled = False
+        MetricLogObserver.enabled_count -= 1
 
     def registerHandler(
         self, interface: type[MetricEvent], handler: MetricHandler
@@ -527,3 +550,318 @@ class MetricLogObserver(util_service.ReconfigurableServiceMixin, service.MultiSe
                     log.msg(line)
         except Exception:
             log.err(None, "generating metric report")
+
+
+# The registry below keeps metrics in memory and is updated directly by the
+# instrumented code, without going through the twisted log observers.  It is
+# exposed in the Prometheus text format by the www service, see
+# buildbot.www.metrics.
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_METRIC_NAME_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*$')
+_LABEL_NAME_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels: Sequence[tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    inner = ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels)
+    return '{' + inner + '}'
+
+
+class CounterValue:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("counters can only be incremented by non-negative amounts")
+        with self._lock:
+            self.value += amount
+
+
+class GaugeValue:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value: float = 0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ('_lock', 'bucket_counts', 'sum', 'upper_bounds')
+
+    def __init__(self, upper_bounds: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self.upper_bounds = upper_bounds
+        # the last slot counts the observations above the highest bound
+        self.bucket_counts: list[int] = [0] * (len(upper_bounds) + 1)
+        self.sum: float = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.bucket_counts)
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.bucket_counts[i] += 1
+            self.sum += value
+
+    @contextlib.contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start)
+
+    def cumulative_counts(self) -> list[int]:
+        with self._lock:
+            counts = list(self.bucket_counts)
+        total = 0
+        cumulative = []
+        for c in counts:
+            total += c
+            cumulative.append(total)
+        return cumulative
+
+
+_V = TypeVar('_V', CounterValue, GaugeValue, HistogramValue)
+
+
+class Metric(Generic[_V]):
+    type_name: ClassVar[str]
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        if not _METRIC_NAME_RE.match(name):
+            raise ValueError(f"invalid metric name {name!r}")
+        for labelname in labelnames:
+            if not _LABEL_NAME_RE.match(labelname) or labelname.startswith('__'):
+                raise ValueError(f"invalid label name {labelname!r} for metric {name!r}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], _V] = {}
+        self._unlabelled: _V | None = None
+        if not self.labelnames:
+            self._unlabelled = self._values[()] = self._new_value()
+
+    def _new_value(self) -> _V:
+        raise NotImplementedError
+
+    def labels(self, *labelvalues: str) -> _V:
+        value = self._values.get(labelvalues)
+        if value is not None:
+            return value
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(
+                f"metric {self.name!r} expects labels {self.labelnames!r}, got {labelvalues!r}"
+            )
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            return self._values.setdefault(key, self._new_value())
+
+    def _get_unlabelled(self) -> _V:
+        if self._unlabelled is None:
+            raise ValueError(f"metric {self.name!r} has labels, use labels() to select a value")
+        return self._unlabelled
+
+    def _sorted_values(self) -> list[tuple[tuple[tuple[str, str], ...], _V]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(tuple(zip(self.labelnames, key)), value) for key, value in items]
+
+    def samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for labels, value in self._sorted_values():
+            yield self.name, labels, value.value  # type: ignore[attr-defined]
+
+    def expose(self) -> str:
+        documentation = self.documentation.replace('\\', r'\\').replace('\n', r'\n')
+        lines = [
+            f'# HELP {self.name} {documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric[CounterValue]):
+    type_name = 'counter'
+
+    def _new_value(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self._get_unlabelled().inc(amount)
+
+
+class Gauge(Metric[GaugeValue]):
+    type_name = 'gauge'
+
+    def _new_value(self) -> GaugeValue:
+        return GaugeValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self._get_unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._get_unlabelled().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._get_unlabelled().set(value)
+
+
+class Histogram(Metric[HistogramValue]):
+    type_name = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        upper_bounds = tuple(float(b) for b in buckets if b != math.inf)
+        if not upper_bounds or list(upper_bounds) != sorted(set(upper_bounds)):
+            raise ValueError(f"buckets of histogram {name!r} must be sorted and unique")
+        if 'le' in labelnames:
+            raise ValueError(f"histogram {name!r} cannot use the reserved label 'le'")
+        self.upper_bounds = upper_bounds
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self) -> HistogramValue:
+        return HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._get_unlabelled().observe(value)
+
+    def time(self) -> contextlib.AbstractContextManager[None]:
+        return self._get_unlabelled().time()
+
+    def samples(self) -> Iterator[tuple[str, tuple[tuple[str, str], ...], float]]:
+        bounds = [_format_value(b) for b in self.upper_bounds] + ['+Inf']
+        for labels, value in self._sorted_values():
+            cumulative = value.cumulative_counts()
+            for bound, count in zip(bounds, cumulative):
+                yield f'{self.name}_bucket', (*labels, ('le', bound)), count
+            yield f'{self.name}_sum', labels, value.sum
+            yield f'{self.name}_count', labels, cumulative[-1]
+
+
+_M = TypeVar('_M', bound=Metric)
+
+
+class MetricsRegistry:
+    """
+    In-memory registry of counters, gauges and histograms.
+
+    Metrics are created on first use and shared by every caller asking for
+    the same name, so that modules can declare their metrics at import time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+
+    def _get_or_create(self, cls: type[_M], name: str, *args: Any) -> _M:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args)
+        if type(metric) is not cls:
+            raise ValueError(f"metric {name!r} is already registered as a {metric.type_name}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = self._get_or_create(Counter, name, documentation, labelnames)
+        self._check_labelnames(metric, labelnames)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = self._get_or_create(Gauge, name, documentation, labelnames)
+        self._check_labelnames(metric, labelnames)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+        self._check_labelnames(metric, labelnames)
+        if metric.upper_bounds != tuple(float(b) for b in buckets if b != math.inf):
+            raise ValueError(f"histogram {name!r} is already registered with other buckets")
+        return metric
+
+    def _check_labelnames(self, metric: Metric, labelnames: Sequence[str]) -> None:
+        if metric.labelnames != tuple(labelnames):
+            raise ValueError(
+                f"metric {metric.name!r} is already registered with labels {metric.labelnames!r}"
+            )
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def expose(self) -> str:
+        """Render all the metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        return ''.join(metric.expose() for _, metric in metrics)
+
+
+# the registry used by the buildbot master and exposed by the www service
+registry = MetricsRegistry()
@@ -31,6 +31,7 @@ from buildbot import config
 from buildbot import util
 from buildbot.interfaces import IProperties
 from buildbot.interfaces import IRenderable
+from buildbot.secrets.redactor import SecretRedactor
 from buildbot.util import flatten
 
 if TYPE_CHECKING:
@@ -67,7 +68,7 @@ class Properties(util.ComparableMixin):
         # persisted if a build is rebuilt
         self.runtime: set[str] = set()
         self.build: Any = None  # will be set by the Build when starting
-        self._used_secrets: dict[str, str] = {}
+        self.secrets_redactor = SecretRedactor()
         if kwargs:
             self.update(kwargs, "TEST")
         self._master: Any = None
@@ -220,16 +221,13 @@ class Properties(util.ComparableMixin):
     # so we have the renderable record here which secrets are used that we must remove
     def useSecret(self, secret_value: str, secret_name: str) -> None:
         if secret_value.strip():
-            self._used_secrets[secret_value] = "<" + secret_name + ">"
+            self.secrets_redactor.add(secret_value, "<" + secret_name + ">")
 
     # This method shall then be called to remove secrets from any text that could be logged
-    # somewhere and that could contain secrets
+    # somewhere and that could contain secrets.  Streams of text received by chunks shall
+    # use secrets_redactor.stream() instead.
     def cleanupTextFromSecrets(self, text: str) -> str:
-        # Better be correct and inefficient than efficient and wrong
-        secrets = self._used_secrets
-        for k in sorted(secrets, key=len, reverse=True):
-            text = text.replace(k, secrets[k])
-        return text
+        return self.secrets_redactor.redact(text)
 
 
 class PropertiesMixin:
@@ -42,6 +42,7 @@ if TYPE_CHECKING:
     from buildbot.process.buildstep import BuildStep
     from buildbot.process.log import Log
     from buildbot.process.log import StreamLog
+    from buildbot.secrets.redactor import SecretRedactorStream
     from buildbot.worker.base import AbstractWorker
     from buildbot.worker.protocols.base import Connection
 
@@ -108,6 +109,8 @@ class RemoteCommand(base.RemoteCommandImpl):
             str,
             LineBoundaryFinder,
         ] = defaultdict(LineBoundaryFinder)
+        # secrets are redacted from each stream of lines
+        self._redactor_streams: dict[str, SecretRedactorStream] = {}
 
         self._logger = Logger()
         self._update_logger_ns()
@@ -404,6 +407,13 @@ class RemoteCommand(base.RemoteCommandImpl):
         if self.stdioLogName is not None and self.stdioLogName in self.logs:
             await self.logs[self.stdioLogName].add_header_lines(data)
 
+    def _add_lines(self, key: str, data: str, is_flushed: bool) -> defer.Deferred[None]:
+        if key == 'stdout':
+            return self.add_stdout_lines(data, is_flushed)
+        if key == 'stderr':
+            return self.add_stderr_lines(data, is_flushed)
+        return self.add_header_lines(data)
+
     @util.deferredLocked('loglock')
     @async_to_deferred
     async def addToLog(self, logname: str, data: str) -> None:
@@ -422,22 +432,29 @@ class RemoteCommand(base.RemoteCommandImpl):
     @metrics.countMethod('RemoteCommand.remoteUpdate()')
     @async_to_deferred
     async def remoteUpdate(self, key: str, value: Any, is_flushed: bool) -> None:
-        def cleanup(data: str) -> str:
+        def cleanup(stream: str, data: str) -> str:
             if self.step is None or self.step.build is None:
                 return data
-            return self.step.build.properties.cleanupTextFromSecrets(data)
+            redactor_stream = self._redactor_streams.get(stream)
+            if redactor_stream is None:
+                redactor = self.step.build.properties.secrets_redactor
+                redactor_stream = self._redactor_streams[stream] = redactor.stream()
+            data = redactor_stream.append(data)
+            if is_flushed:
+                data += redactor_stream.flush()
+            return data
 
         if self.debug:
             self._logger.info(f"Update[{key}]: {value}")
-        if key == "stdout":
-            await self.add_stdout_lines(cleanup(value), is_flushed)
-        if key == "stderr":
-            await self.add_stderr_lines(cleanup(value), is_flushed)
-        if key == "header":
-            await self.add_header_lines(cleanup(value))
+        if key in ('stdout', 'stderr', 'header'):
+            data = cleanup(key, value)
+            if data:
+                await self._add_lines(key, data, is_flushed)
         if key == "log":
             logname, data = value
-            await self.addToLog(logname, cleanup(data))
+            data = cleanup(logname, data)
+            if data:
+                await self.addToLog(logname, data)
         if key == "rc":
             rc = self.rc = value
             self._logger.info(f"{self} rc={rc}")
@@ -469,6 +486,16 @@ class RemoteCommand(base.RemoteCommandImpl):
                 if whole_line is not None:
                     await self.remoteUpdate("log", value, True)
 
+        # lines kept because they could contain the beginning of a secret
+        for key, redactor_stream in self._redactor_streams.items():
+            data = redactor_stream.flush()
+            if not data:
+                continue
+            if key in ['stdout', 'stderr', 'header']:
+                await self._add_lines(key, data, False)
+            else:
+                await self.addToLog(key, data)
+
         async with self.loglock:
             for name, loog in self.logs.items():
                 if self._closeWhenFinished[name]:
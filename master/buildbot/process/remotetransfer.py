@@ -19,25 +19,162 @@ module for regrouping all FileWriterImpl and FileReaderImpl away from steps
 
 from __future__ import annotations
 
+import bz2
+import functools
+import hashlib
 import os
 import shutil
 import tarfile
 import tempfile
+import zlib
 from io import BytesIO
 from typing import IO
-from typing import Literal
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import cast
+
+from twisted.internet import defer
+from twisted.internet import threads
 
 from buildbot.util import bytes2unicode
+from buildbot.util import twisted as util_twisted
 from buildbot.util import unicode2bytes
 from buildbot.worker.protocols import base
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from twisted.internet.interfaces import IReactorFromThreads
+
+
+class _IOThread:
+    """
+    Runs the blocking operations of a writer, in order, in a thread dedicated
+    to that writer.
+
+    The thread is started on the first operation and stopped as soon as it is
+    idle once the writer has been closed, so that a finished transfer does not
+    hold on to it.
+
+    Operations queued with ``wait=False`` return immediately as long as no more
+    than ``max_in_flight`` bytes wait for the disk; past that, the caller gets
+    the Deferred of the operation, which slows the worker down to the pace of
+    the disk.  Once an operation fails, the following ones fail with the same
+    error, which is reported to the next caller that waits.
+    """
+
+    def __init__(self, reactor: IReactorFromThreads | None, max_in_flight: int) -> None:
+        if reactor is None:
+            from twisted.internet import reactor as global_reactor  # noqa: PLC0415
+
+            reactor = cast("IReactorFromThreads", global_reactor)
+        self._reactor = reactor
+        self._pool: util_twisted.ThreadPool | None = None
+        self._pending = 0
+        self._closed = False
+        self._error: BaseException | None = None
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    def submit(
+        self,
+        fn: Callable[..., None],
+        *args: Any,
+        size: int = 0,
+        wait: bool = True,
+        cleanup: bool = False,
+        close: bool = False,
+    ) -> defer.Deferred[None]:
+        if close:
+            self._closed = True
+        if self._pool is None:
+            # looked up at call time, so that tests can replace the class
+            self._pool = util_twisted.ThreadPool(
+                minthreads=0, maxthreads=1, name='buildbot-transfer-io'
+            )
+            self._pool.start()
+        self._pending += 1
+        self.in_flight += size
+        d = threads.deferToThreadPool(
+            self._reactor,
+            self._pool,
+            self._run,
+            fn,
+            args,
+            cleanup,
+        )
+
+        @d.addBoth
+        def done(res: Any) -> Any:
+            self._pending -= 1
+            self.in_flight -= size
+            if self._closed and self._pending == 0 and self._pool is not None:
+                self._pool.stop()
+                self._pool = None
+            return res
+
+        if wait or self.in_flight > self.max_in_flight:
+            return d
+        # the error will be raised again by the next operation
+        d.addErrback(lambda _: None)
+        return defer.succeed(None)
+
+    def _run(self, fn: Callable[..., None], args: tuple[Any, ...], cleanup: bool) -> None:
+        if self._error is not None and not cleanup:
+            raise self._error
+        try:
+            fn(*args)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            raise
+
+
+def file_digest(path: str) -> str:
+    """
+    Return the hex sha256 digest of the content of path.
+
+    This reads the whole file, so it should run in a thread. The digest is
+    remembered as long as the size and modification time of the file do not
+    change.
+    """
+    st = os.stat(path)
+    return _file_digest(path, st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+@functools.lru_cache(maxsize=256)
+def _file_digest(path: str, size: int, mtime_ns: int, ino: int) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
 
 class FileWriter(base.FileWriterImpl):
     """
     Helper class that acts as a file-object with write access
+
+    The disk operations do not run in the reactor thread: they are queued, in
+    order, to a thread dedicated to the writer.
     """
 
-    def __init__(self, destfile: str, maxsize: int | None, mode: int | None) -> None:
+    # bytes received from the worker that may wait for the disk before
+    # remote_write stops returning immediately
+    MAX_IN_FLIGHT = 4 * 1024 * 1024
+
+    def __init__(
+        self,
+        destfile: str,
+        maxsize: int | None,
+        mode: int | None,
+        reactor: IReactorFromThreads | None = None,
+    ) -> None:
         # Create missing directories.
         destfile = os.path.abspath(destfile)
         dirname = os.path.dirname(destfile)
@@ -49,8 +186,10 @@ class FileWriter(base.FileWriterImpl):
         fd, self.tmpname = tempfile.mkstemp(dir=dirname, prefix='buildbot-transfer-')
         self.fp: IO[bytes] | None = os.fdopen(fd, 'wb')
         self.remaining = maxsize
+        self.transferred = 0
+        self._io = _IOThread(reactor, self.MAX_IN_FLIGHT)
 
-    def remote_write(self, data: str | bytes) -> None:  # type: ignore[override]
+    def remote_write(self, data: str | bytes) -> defer.Deferred[None]:
         """
         Called from remote worker to write L{data} to L{fp} within boundaries
         of L{maxsize}
@@ -62,18 +201,23 @@ class FileWriter(base.FileWriterImpl):
         if self.remaining is not None:
             if len(data) > self.remaining:
                 data = data[: self.remaining]
-            self.fp.write(data)  # type: ignore[union-attr]
             self.remaining = self.remaining - len(data)
-        else:
-            self.fp.write(data)  # type: ignore[union-attr]
+        self.transferred += len(data)
+        return self._io.submit(self._write, data, size=len(data), wait=False)
 
-    def remote_utime(self, accessed_modified: tuple[float, float]) -> None:  # type: ignore[override]
-        os.utime(self.destfile, accessed_modified)
+    def _write(self, data: bytes) -> None:
+        self.fp.write(data)  # type: ignore[union-attr]
 
-    def remote_close(self) -> None:  # type: ignore[override]
+    def remote_utime(self, accessed_modified: tuple[float, float]) -> defer.Deferred[None]:
+        return self._io.submit(os.utime, self.destfile, accessed_modified)
+
+    def remote_close(self) -> defer.Deferred[None]:
         """
         Called by remote worker to state that no more data will be transferred
         """
+        return self._io.submit(self._close, close=True)
+
+    def _close(self) -> None:
         self.fp.close()  # type: ignore[union-attr]
         self.fp = None
         # on windows, os.rename does not automatically unlink, so do it
@@ -85,64 +229,248 @@ class FileWriter(base.FileWriterImpl):
         if self.mode is not None:
             os.chmod(self.destfile, self.mode)
 
-    def cancel(self) -> None:
+    def cancel(self) -> defer.Deferred[None]:
+        return self._io.submit(self._cancel, cleanup=True, close=True)
+
+    def _cancel(self) -> None:
         # unclean shutdown, the file is probably truncated, so delete it
         # altogether rather than deliver a corrupted file
         fp = getattr(self, "fp", None)
         if fp:
             fp.close()
-            self.purge()
+            self._purge()
 
-    def purge(self) -> None:
+    def purge(self) -> defer.Deferred[None]:
+        return self._io.submit(self._purge, cleanup=True)
+
+    def _purge(self) -> None:
         if self.destfile and os.path.exists(self.destfile):
             os.unlink(self.destfile)
         if self.tmpname and os.path.exists(self.tmpname):
             os.unlink(self.tmpname)
 
 
+class TarStreamExtractor:
+    """
+    Extracts a tar archive while it is received, without storing it.
+
+    Data is pushed with feed(): every member is extracted as soon as its
+    headers are complete, and the content of regular files is written to disk
+    as it arrives.  finish() applies the attributes of the directories, like
+    TarFile.extractall(), and fails if the archive is truncated.
+    """
+
+    def __init__(self, destroot: str, compress: str | None) -> None:
+        self.destroot = destroot
+        self._decompress: Callable[[bytes], bytes] | None = None
+        self._decompressor_eof: Callable[[], bool] | None = None
+        if compress == 'gz':
+            gz = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self._decompress = gz.decompress
+            self._decompressor_eof = lambda: gz.eof
+        elif compress == 'bz2':
+            bz = bz2.BZ2Decompressor()
+            self._decompress = bz.decompress
+            self._decompressor_eof = lambda: bz.eof
+        elif compress == 'zstd':
+            zst = zstandard.ZstdDecompressor().decompressobj()
+            self._decompress = zst.decompress
+            self._decompressor_eof = lambda: zst.eof
+
+        self._buffer = bytearray()
+        self._pos = 0
+        # regular file being written, and the bytes it still expects
+        self._file: IO[bytes] | None = None
+        self._file_member: tarfile.TarInfo | None = None
+        self._file_archive: tarfile.TarFile | None = None
+        self._file_remaining = 0
+        self._skip = 0
+        self._directories: list[tuple[tarfile.TarFile, tarfile.TarInfo]] = []
+        self.done = False
+
+    def feed(self, data: bytes) -> None:
+        if self._decompress is not None:
+            data = self._decompress(data)
+        if not self.done:
+            self._buffer += data
+            self._process()
+
+    def finish(self) -> None:
+        if self._decompressor_eof is not None and not self._decompressor_eof():
+            raise tarfile.ReadError("unexpected end of compressed data")
+        # like tarfile, accept an archive without end-of-archive blocks, as
+        # long as it does not end within a member
+        pending = self._file is not None or self._skip or len(self._buffer) > self._pos
+        if not self.done and pending:
+            raise tarfile.ReadError("unexpected end of data")
+
+        # Set correct owner, mtime and filemode on directories, deepest first
+        self._directories.sort(key=lambda d: d[1].name, reverse=True)
+        for archive, member in self._directories:
+            self._set_attrs(archive, member, os.path.join(self.destroot, member.name))
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _process(self) -> None:
+        while not self.done:
+            available = len(self._buffer) - self._pos
+            if self._file is not None:
+                if not self._write_file_data(available):
+                    break
+            elif self._skip:
+                n = min(self._skip, available)
+                self._pos += n
+                self._skip -= n
+                if self._skip:
+                    break
+            elif not self._extract_next_member():
+                break
+
+        if self._pos > len(self._buffer) // 2:
+            del self._buffer[: self._pos]
+            self._pos = 0
+
+    def _write_file_data(self, available: int) -> bool:
+        assert self._file is not None
+        assert self._file_member is not None and self._file_archive is not None
+        n = min(self._file_remaining, available)
+        if n:
+            self._file.write(self._buffer[self._pos : self._pos + n])
+            self._pos += n
+            self._file_remaining -= n
+        if self._file_remaining:
+            return False
+        self._file.close()
+        self._file = None
+        self._skip = _padding(self._file_member.size)
+        member, self._file_member = self._file_member, None
+        self._set_attrs(self._file_archive, member, os.path.join(self.destroot, member.name))
+        return True
+
+    def _extract_next_member(self) -> bool:
+        # find the end of the headers of the next member, including the
+        # extended headers that precede it
+        end = self._pos
+        while True:
+            if len(self._buffer) < end + tarfile.BLOCKSIZE:
+                return False
+            block = bytes(self._buffer[end : end + tarfile.BLOCKSIZE])
+            if block == tarfile.NUL * tarfile.BLOCKSIZE:
+                self.done = True
+                return False
+            try:
+                info = tarfile.TarInfo.frombuf(block, tarfile.ENCODING, 'surrogateescape')
+            except tarfile.HeaderError as e:
+                raise tarfile.ReadError(str(e)) from e
+            end += tarfile.BLOCKSIZE
+            if info.type not in _EXTENDED_HEADER_TYPES:
+                break
+            end += info.size + _padding(info.size)
+
+        # let tarfile interpret the headers
+        headers = bytes(self._buffer[self._pos : end])
+        self._pos = end
+        archive = tarfile.open(fileobj=BytesIO(headers), mode='r:')
+        member = archive.next()
+        assert member is not None
+        if member.type == tarfile.GNUTYPE_SPARSE or member.sparse is not None:
+            raise tarfile.ReadError(f"{member.name}: sparse files are not supported")
+        has_data = member.isreg() or member.type not in tarfile.SUPPORTED_TYPES
+
+        if hasattr(tarfile, 'data_filter'):
+            member = tarfile.data_filter(member, self.destroot)
+            extract_kwargs: dict[str, Any] = {'filter': 'fully_trusted'}
+        else:
+            extract_kwargs = {}
+        path = os.path.join(self.destroot, member.name)
+
+        if has_data:
+            dirname = os.path.dirname(path)
+            if dirname and not os.path.exists(dirname):
+                os.makedirs(dirname)
+            self._file = open(path, 'wb')
+            self._file_member = member
+            self._file_archive = archive
+            self._file_remaining = member.size
+        else:
+            if member.isdir():
+                self._directories.append((archive, member))
+            archive.extract(member, self.destroot, set_attrs=not member.isdir(), **extract_kwargs)
+        return True
+
+    def _set_attrs(self, archive: tarfile.TarFile, member: tarfile.TarInfo, path: str) -> None:
+        # same as TarFile.extract(): failing to set an attribute is not fatal
+        try:
+            archive.chown(member, path, False)
+            archive.chmod(member, path)
+            archive.utime(member, path)
+        except tarfile.ExtractError:
+            pass
+
+
+_EXTENDED_HEADER_TYPES = (
+    tarfile.GNUTYPE_LONGNAME,
+    tarfile.GNUTYPE_LONGLINK,
+    tarfile.XHDTYPE,
+    tarfile.XGLTYPE,
+    tarfile.SOLARIS_XHDTYPE,
+)
+
+
+def _padding(size: int) -> int:
+    return -size % tarfile.BLOCKSIZE
+
+
 class DirectoryWriter(FileWriter):
     """
-    A DirectoryWriter is implemented as a FileWriter, with an added post-processing
-    step to unpack the archive, once the transfer has completed.
+    A DirectoryWriter unpacks the archive sent by the worker into destroot
+    while it is received, in the thread dedicated to the writer.
     """
 
     def __init__(
-        self, destroot: str, maxsize: int | None, compress: str | None, mode: int | None
+        self,
+        destroot: str,
+        maxsize: int | None,
+        compress: str | None,
+        mode: int | None,
+        reactor: IReactorFromThreads | None = None,
     ) -> None:
         self.destroot = destroot
         self.compress = compress
+        self.destfile = None  # type: ignore[assignment]
+        self.tmpname = None  # type: ignore[assignment]
+        self.mode = mode
+        self.fp = None
+        self.remaining = maxsize
+        self.transferred = 0
+        self._io = _IOThread(reactor, self.MAX_IN_FLIGHT)
+        self._extractor = TarStreamExtractor(destroot, compress)
+        self._unpacked = False
 
-        self.fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        os.close(self.fd)
-
-        super().__init__(self.tarname, maxsize, mode)
+    def _write(self, data: bytes) -> None:
+        self._extractor.feed(data)
 
-    def remote_unpack(self) -> None:  # type: ignore[override]
+    def remote_unpack(self) -> defer.Deferred[None]:
         """
         Called by remote worker to state that no more data will be transferred
         """
-        # Make sure remote_close is called, otherwise atomic rename won't happen
-        self.remote_close()
-
-        # Map configured compression to a TarFile setting
-        tar_mode: Literal['r|bz2', 'r|gz', 'r']
-        if self.compress == 'bz2':
-            tar_mode = 'r|bz2'
-        elif self.compress == 'gz':
-            tar_mode = 'r|gz'
-        else:
-            tar_mode = 'r'
-
-        # Unpack archive and clean up after self
-        with tarfile.open(name=self.tarname, mode=tar_mode) as archive:
-            if hasattr(tarfile, 'data_filter'):
-                archive.extractall(path=self.destroot, filter='data')
-            else:
-                archive.extractall(path=self.destroot)
-        os.remove(self.tarname)
-
-    def purge(self) -> None:
-        super().purge()
+        return self.remote_close()
+
+    def _close(self) -> None:
+        self._extractor.finish()
+        self._unpacked = True
+
+    def _cancel(self) -> None:
+        # an archive that was not completely unpacked is not delivered
+        if not self._unpacked:
+            self._extractor.abort()
+            self._purge()
+
+    def _purge(self) -> None:
+        self._extractor.abort()
         if os.path.isdir(self.destroot):
             shutil.rmtree(self.destroot)
 
@@ -24,7 +24,6 @@ from zope.interface import implementer
 
 from buildbot import config
 from buildbot import interfaces
-from buildbot.changes import changes
 from buildbot.process.properties import Properties
 from buildbot.util.service import ClusteredBuildbotService
 from buildbot.util.state import StateMixin
@@ -208,11 +207,11 @@ class BaseScheduler(ClusteredBuildbotService, StateMixin):
     ) -> InlineCallbacksType[None]:
         assert fileIsImportant is None or callable(fileIsImportant)
 
-        # register for changes with the data API
+        # register for the changes accepted by change_filter
         assert not self._change_consumer
-        self._change_consumer = yield self.master.mq.startConsuming(
-            lambda k, m: self._changeCallback(k, m, fileIsImportant, change_filter, onlyImportant),
-            ('changes', None, 'new'),
+        self._change_consumer = yield self.master.change_dispatcher.startConsuming(
+            lambda change: self._changeCallback(change, fileIsImportant, onlyImportant),
+            change_filter,
         )
 
     @defer.inlineCallbacks
@@ -222,27 +221,17 @@ class BaseScheduler(ClusteredBuildbotService, StateMixin):
             self._enabledCallback, ('schedulers', str(self.serviceid), 'updated')
         )
 
-    @defer.inlineCallbacks
     def _changeCallback(
         self,
-        key: tuple[str, ...],
-        msg: dict[str, Any],
+        change: Change,
         fileIsImportant: Callable[[Change], bool] | None,
-        change_filter: ChangeFilter | None,
         onlyImportant: bool,
-    ) -> InlineCallbacksType[None]:
+    ) -> None:
         # ignore changes delivered while we're not running
         if not self._change_consumer:
             return
 
-        # get a change object, since the API requires it
-        chdict = yield self.master.db.changes.getChange(msg['changeid'])
-        change = yield changes.Change.fromChdict(self.master, chdict)
-
-        # filter it
-        if change_filter and not change_filter.filter_change(change):
-            return
-
+        # the change was already accepted by the change filter
         if change.codebase not in self.codebases:
             log.msg(
                 format='change contains codebase %(codebase)s that is '
@@ -679,11 +668,11 @@ class ReconfigurableBaseScheduler(ClusteredBuildbotService, StateMixin):
     ) -> InlineCallbacksType[None]:
         assert fileIsImportant is None or callable(fileIsImportant)
 
-        # register for changes with the data API
+        # register for the changes accepted by change_filter
         assert not self._change_consumer
-        self._change_consumer = yield self.master.mq.startConsuming(
-            lambda k, m: self._changeCallback(k, m, fileIsImportant, change_filter, onlyImportant),
-            ('changes', None, 'new'),
+        self._change_consumer = yield self.master.change_dispatcher.startConsuming(
+            lambda change: self._changeCallback(change, fileIsImportant, onlyImportant),
+            change_filter,
         )
 
     @defer.inlineCallbacks
@@ -693,27 +682,17 @@ class ReconfigurableBaseScheduler(ClusteredBuildbotService, StateMixin):
             self._enabledCallback, ('schedulers', str(self.serviceid), 'updated')
         )
 
-    @defer.inlineCallbacks
     def _changeCallback(
         self,
-        key: tuple[str, ...],
-        msg: dict[str, Any],
+        change: Change,
         fileIsImportant: Callable[[Change], bool] | None,
-        change_filter: ChangeFilter | None,
         onlyImportant: bool,
-    ) -> InlineCallbacksType[None]:
+    ) -> None:
         # ignore changes delivered while we're not running
         if not self._change_consumer:
             return
 
-        # get a change object, since the API requires it
-        chdict = yield self.master.db.changes.getChange(msg['changeid'])
-        change = yield changes.Change.fromChdict(self.master, chdict)
-
-        # filter it
-        if change_filter and not change_filter.filter_change(change):
-            return
-
+        # the change was already accepted by the change filter
         if change.codebase not in self.codebases:
             log.msg(
                 format='change contains codebase %(codebase)s that is '
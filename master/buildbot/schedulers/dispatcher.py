@@ -0,0 +1,155 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING
+from typing import Any
+
+from twisted.internet import defer
+from twisted.python import log
+
+from buildbot.changes import changes
+from buildbot.changes.filter import ChangeFilter
+from buildbot.util.ssfilter import _FilterExactMatch
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from buildbot.changes.changes import Change
+    from buildbot.mq.base import QueueRef
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class ChangeConsumer:
+    def __init__(
+        self,
+        dispatcher: ChangeDispatcher,
+        callback: Callable[[Change], Any],
+        change_filter: ChangeFilter | None,
+        order: int,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.callback = callback
+        self.change_filter = change_filter
+        self.order = order
+        # the sets of consumers of the dispatcher containing this one
+        self.buckets: list[dict[ChangeConsumer, None]] = []
+
+    def stopConsuming(self) -> None:
+        self.dispatcher._remove_consumer(self)
+
+
+class ChangeDispatcher:
+    """
+    I receive the new changes for all the schedulers of a master.  Each change
+    is loaded only once, and given to the schedulers whose change filter
+    accepts it.
+
+    The change filters which only accept a list of values for one of
+    C{INDEXED_ATTRIBUTES} are indexed by these values, so that they are not
+    even evaluated for the changes having other values.
+    """
+
+    INDEXED_ATTRIBUTES = ('branch', 'repository', 'project', 'codebase')
+
+    def __init__(self, master: Any) -> None:
+        self.master = master
+        self._unindexed: dict[ChangeConsumer, None] = {}
+        self._index: dict[str, dict[Any, dict[ChangeConsumer, None]]] = {
+            attr: {} for attr in self.INDEXED_ATTRIBUTES
+        }
+        self._count = 0
+        self._order = itertools.count()
+        self._mq_consumer: QueueRef | None = None
+        self._mq_lock = defer.DeferredLock()
+
+    def _get_indexed_values(
+        self, change_filter: ChangeFilter | None
+    ) -> tuple[str, list[Any]] | None:
+        if not isinstance(change_filter, ChangeFilter):
+            return None
+        for attr in self.INDEXED_ATTRIBUTES:
+            for f in change_filter.filters:
+                if isinstance(f, _FilterExactMatch) and f.prop == attr:
+                    return attr, list(f.values)
+        return None
+
+    @async_to_deferred
+    async def startConsuming(
+        self, callback: Callable[[Change], Any], change_filter: ChangeFilter | None = None
+    ) -> ChangeConsumer:
+        consumer = ChangeConsumer(self, callback, change_filter, next(self._order))
+        indexed = self._get_indexed_values(change_filter)
+        if indexed is None:
+            consumer.buckets.append(self._unindexed)
+        else:
+            attr, values = indexed
+            # a value may be repeated in the filter
+            for value in dict.fromkeys(values):
+                consumer.buckets.append(self._index[attr].setdefault(value, {}))
+        for bucket in consumer.buckets:
+            bucket[consumer] = None
+        self._count += 1
+
+        async with self._mq_lock:
+            if self._mq_consumer is None and self._count:
+                self._mq_consumer = await self.master.mq.startConsuming(
+                    self._on_change, ('changes', None, 'new')
+                )
+        return consumer
+
+    def _remove_consumer(self, consumer: ChangeConsumer) -> None:
+        if not consumer.buckets:
+            return
+        for bucket in consumer.buckets:
+            bucket.pop(consumer, None)
+        consumer.buckets = []
+        self._count -= 1
+
+        if not self._count and self._mq_consumer is not None:
+            self._mq_consumer.stopConsuming()
+            self._mq_consumer = None
+
+    def _get_consumers(self, change: Change) -> list[ChangeConsumer]:
+        consumers = list(self._unindexed)
+        for attr, values in self._index.items():
+            bucket = values.get(getattr(change, attr, ''))
+            if bucket:
+                consumers.extend(bucket)
+        # keep the order in which the schedulers started consuming
+        consumers.sort(key=lambda consumer: consumer.order)
+        return consumers
+
+    @defer.inlineCallbacks
+    def _on_change(self, key: tuple[str, ...], msg: dict[str, Any]) -> InlineCallbacksType[None]:
+        if not self._count:
+            return
+
+        chdict = yield self.master.db.changes.getChange(msg['changeid'])
+        change = yield changes.Change.fromChdict(self.master, chdict)
+
+        for consumer in self._get_consumers(change):
+            # a consumer may be stopped by the consumers before it
+            if not consumer.buckets:
+                continue
+            try:
+                if consumer.change_filter and not consumer.change_filter.filter_change(change):
+                    continue
+                consumer.callback(change)
+            except Exception as e:
+                log.err(e, f'while dispatching {change}')
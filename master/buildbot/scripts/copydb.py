@@ -348,6 +348,8 @@ def _copy_database_with_db(
         "steps",
         "logs",
         "logchunks",
+        "logchunk_dictionaries",
+        "log_search_postings",
         "schedulers",
         "scheduler_masters",
         "scheduler_changes",
@@ -0,0 +1,205 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class SecretRedactor:
+    """
+    I replace the values of the secrets used by a build by their names in any
+    text that could be logged.
+
+    The secrets are compiled when they change.  With many secrets, the
+    texts are first filtered by sampling their substrings of C{GRAM_LENGTH}
+    characters every few characters: each occurrence of a long enough secret
+    contains one of the samples, so only the secrets containing one of them
+    are searched.  The text covered by overlapping occurrences of several
+    secrets is hidden entirely.
+    """
+
+    GRAM_LENGTH = 4
+    # shorter secrets are always searched
+    MIN_FILTERED_LENGTH = 2 * GRAM_LENGTH
+    # the filter is only used if it is faster than searching each secret:
+    # its cost depends on the number of samples, and searching the secrets on
+    # their number
+    FILTER_THRESHOLD = 400
+
+    def __init__(self) -> None:
+        self._replacements: dict[str, str] = {}
+        self._secrets: tuple[str, ...] = ()
+        # secrets which can start in a text ending with a newline, and end in
+        # the next one
+        self._multiline_secrets: tuple[str, ...] = ()
+        # secrets searched without filtering, and index of the substrings of
+        # the other ones
+        self._unfiltered_secrets: tuple[str, ...] = ()
+        self._gram_index: dict[tuple[str, ...], list[str]] = {}
+        self._sampling_step = 0
+        self._filter_compiled = True
+
+    def __len__(self) -> int:
+        return len(self._replacements)
+
+    def add(self, value: str, replacement: str) -> None:
+        if self._replacements.get(value) == replacement:
+            return
+        self._replacements[value] = replacement
+        self._secrets = tuple(sorted(self._replacements, key=len, reverse=True))
+        self._multiline_secrets = tuple(s for s in self._secrets if '\n' in s[:-1])
+        # the filter is compiled on the next redaction, so that adding many
+        # secrets only compiles it once
+        self._filter_compiled = False
+
+    def _compile_filter(self) -> None:
+        self._filter_compiled = True
+        self._unfiltered_secrets = self._secrets
+        self._gram_index = {}
+        self._sampling_step = 0
+        filtered = [s for s in self._secrets if len(s) >= self.MIN_FILTERED_LENGTH]
+        if not filtered:
+            return
+        # the samples are taken often enough for any occurrence of the
+        # shortest filtered secret to contain one of them
+        step = len(filtered[-1]) - self.GRAM_LENGTH + 1
+        if len(filtered) * step < self.FILTER_THRESHOLD:
+            return
+
+        for secret in filtered:
+            for i in range(len(secret) - self.GRAM_LENGTH + 1):
+                gram = tuple(secret[i : i + self.GRAM_LENGTH])
+                secrets = self._gram_index.setdefault(gram, [])
+                if not secrets or secrets[-1] != secret:
+                    secrets.append(secret)
+        self._unfiltered_secrets = self._secrets[len(filtered) :]
+        self._sampling_step = step
+
+    def _find_candidates(self, text: str) -> Iterable[str]:
+        if not self._filter_compiled:
+            self._compile_filter()
+        step = self._sampling_step
+        if not step:
+            return self._secrets
+        samples = self._gram_index.keys() & zip(*(text[i::step] for i in range(self.GRAM_LENGTH)))
+        if not samples:
+            return self._unfiltered_secrets
+        candidates = set(self._unfiltered_secrets)
+        for gram in samples:
+            candidates.update(self._gram_index[gram])
+        return candidates
+
+    def redact(self, text: str) -> str:
+        if not self._secrets:
+            return text
+        spans = self._find_spans(text)
+        if not spans:
+            return text
+        return self._replace_spans(text, spans)
+
+    def stream(self) -> SecretRedactorStream:
+        return SecretRedactorStream(self)
+
+    def _find_spans(self, text: str) -> list[tuple[int, int, str]]:
+        spans: list[tuple[int, int, str]] = []
+        for secret in self._find_candidates(text):
+            start = text.find(secret)
+            while start >= 0:
+                spans.append((start, start + len(secret), secret))
+                start = text.find(secret, start + 1)
+        # for occurrences starting at the same position, the longest secret
+        # comes first, and the others are hidden by it
+        spans.sort(key=lambda span: (span[0], -span[1]))
+        return spans
+
+    def _replace_spans(self, text: str, spans: list[tuple[int, int, str]]) -> str:
+        pieces: list[str] = []
+        end = 0
+        for start, stop, secret in spans:
+            if stop <= end:
+                # already hidden by a previous occurrence
+                continue
+            if start >= end:
+                pieces.append(text[end:start])
+            pieces.append(self._replacements[secret])
+            end = stop
+        pieces.append(text[end:])
+        return ''.join(pieces)
+
+    def _find_partial_secret(self, text: str) -> int | None:
+        """
+        Return the position of the first character of the end of C{text}
+        which is the beginning of a secret, or None.
+        """
+        secrets = self._multiline_secrets if text.endswith('\n') else self._secrets
+        length = len(text)
+        position = None
+        for secret in secrets:
+            first = secret[0]
+            start = text.find(first, max(length - len(secret) + 1, 0))
+            while start >= 0 and (position is None or start < position):
+                if secret.startswith(text[start:]):
+                    position = start
+                    break
+                start = text.find(first, start + 1)
+        return position
+
+
+class SecretRedactorStream:
+    """
+    I redact a stream of text received by chunks, so that secrets split
+    between two chunks are redacted too.
+
+    The end of a chunk which could be the beginning of a secret is kept until
+    the next chunk, or until the stream is flushed.  Text is only kept by whole
+    lines, so that the redacted chunks are still made of whole lines.
+    """
+
+    def __init__(self, redactor: SecretRedactor) -> None:
+        self._redactor = redactor
+        self._pending = ''
+
+    def append(self, text: str) -> str:
+        if self._pending:
+            text = self._pending + text
+            self._pending = ''
+        redactor = self._redactor
+        if not redactor._secrets:
+            return text
+
+        spans = redactor._find_spans(text)
+        position = redactor._find_partial_secret(text)
+        if position is not None:
+            cut = text.rfind('\n', 0, position) + 1
+            # never cut through an occurrence of a secret
+            for start, stop, _ in reversed(spans):
+                if start < cut < stop:
+                    cut = text.rfind('\n', 0, start) + 1
+            self._pending = text[cut:]
+            text = text[:cut]
+            spans = [span for span in spans if span[1] <= cut]
+
+        if not spans:
+            return text
+        return redactor._replace_spans(text, spans)
+
+    def flush(self) -> str:
+        text = self._pending
+        self._pending = ''
+        return self._redactor.redact(text)
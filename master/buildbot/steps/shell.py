@@ -434,7 +434,12 @@ class WarningCountingShellCommand(buildstep.ShellMixin, CompositeStepMixin, buil
                 # This avoids loading the entire file into the master's memory.
                 upload_args = {
                     'workdir': self.workdir,
-                    'writer': remotetransfer.FileWriter(tmpname, maxsize=None, mode=None),
+                    'writer': remotetransfer.FileWriter(
+                        tmpname,
+                        maxsize=None,
+                        mode=None,
+                        reactor=self.master.reactor,  # type: ignore[union-attr]
+                    ),
                     'maxsize': None,
                     'blocksize': 32 * 1024,
                 }
@@ -15,6 +15,7 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import stat
@@ -22,18 +23,21 @@ from typing import TYPE_CHECKING
 from typing import Any
 
 from twisted.internet import defer
+from twisted.internet import threads
 from twisted.python import log
 
 from buildbot import config
 from buildbot.interfaces import WorkerSetupError
 from buildbot.process import remotecommand
 from buildbot.process import remotetransfer
+from buildbot.process.buildstep import CANCELLED
 from buildbot.process.buildstep import FAILURE
 from buildbot.process.buildstep import SKIPPED
 from buildbot.process.buildstep import SUCCESS
 from buildbot.process.buildstep import BuildStep
 from buildbot.steps.worker import CompositeStepMixin
 from buildbot.util import flatten
+from buildbot.util import unicode2bytes
 
 if TYPE_CHECKING:
     from buildbot.util.twisted import InlineCallbacksType
@@ -47,6 +51,16 @@ def makeStatusRemoteCommand(
     return self
 
 
+def _check_compress(compress: str | None) -> None:
+    if compress not in (None, 'gz', 'bz2', 'zstd'):
+        config.error("'compress' must be one of None, 'gz', 'bz2' or 'zstd'")
+    elif compress == 'zstd' and remotetransfer.zstandard is None:
+        config.error(
+            "To set 'compress' to 'zstd' "
+            "you must install the zstandard Buildbot extra ('pip install buildbot[zstd]')"
+        )
+
+
 class _TransferBuildStep(BuildStep):
     """
     Base class for FileUpload and FileDownload to factor out common
@@ -75,14 +89,19 @@ class _TransferBuildStep(BuildStep):
             yield self.runCommand(cmd)
         finally:
             if writer:
-                writer.cancel()
+                yield writer.cancel()
 
         cmd_res = cmd.results()
         if cmd_res >= FAILURE:
             if writer:
-                writer.purge()
+                yield writer.purge()
         return cmd_res
 
+    def checkWorkerSupportsCompress(self, compress: str | None) -> None:
+        if compress == 'zstd' and self.workerVersionIsOlderThan('uploadDirectory', '3.4'):
+            message = "worker is too old, does not support zstd compression"
+            raise WorkerSetupError(message)
+
     @defer.inlineCallbacks
     def interrupt(self, reason: Any) -> InlineCallbacksType[None]:
         yield self.addCompleteLog('interrupt', str(reason))
@@ -160,7 +179,12 @@ class FileUpload(_TransferBuildStep):
             yield self.addURL(urlText, self.url)
 
         # we use maxsize to limit the amount of data on both sides
-        fileWriter = remotetransfer.FileWriter(masterdest, self.maxsize, self.mode)
+        fileWriter = remotetransfer.FileWriter(
+            masterdest,
+            self.maxsize,
+            self.mode,
+            reactor=self.master.reactor,  # type: ignore[union-attr]
+        )
 
         if self.keepstamp and self.workerVersionIsOlderThan("uploadFile", "2.13"):
             m = (
@@ -218,8 +242,7 @@ class DirectoryUpload(_TransferBuildStep):
         self.masterdest = masterdest
         self.maxsize = maxsize
         self.blocksize = blocksize
-        if compress not in (None, 'gz', 'bz2'):
-            config.error("'compress' must be one of None, 'gz', or 'bz2'")
+        _check_compress(compress)
         self.compress = compress
         self.url = url
         self.urlText = urlText
@@ -227,6 +250,7 @@ class DirectoryUpload(_TransferBuildStep):
     @defer.inlineCallbacks
     def run(self) -> InlineCallbacksType[int]:
         self.checkWorkerHasCommand("uploadDirectory")
+        self.checkWorkerSupportsCompress(self.compress)
         self.stdio_log = yield self.addLog("stdio")
 
         source = self.workersrc
@@ -248,7 +272,13 @@ class DirectoryUpload(_TransferBuildStep):
             yield self.addURL(urlText, self.url)
 
         # we use maxsize to limit the amount of data on both sides
-        dirWriter = remotetransfer.DirectoryWriter(masterdest, self.maxsize, self.compress, 0o600)
+        dirWriter = remotetransfer.DirectoryWriter(
+            masterdest,
+            self.maxsize,
+            self.compress,
+            0o600,
+            reactor=self.master.reactor,  # type: ignore[union-attr]
+        )
 
         # default arguments
         args: dict[str, Any] = {
@@ -288,6 +318,7 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         keepstamp: bool = False,
         url: str | None = None,
         urlText: str | None = None,
+        max_concurrent_uploads: int = 1,
         **buildstep_kwargs: Any,
     ) -> None:
         # Emulate that first two arguments are positional.
@@ -303,16 +334,56 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         if not isinstance(mode, (int, type(None))):
             config.error('mode must be an integer or None')
         self.mode = mode
-        if compress not in (None, 'gz', 'bz2'):
-            config.error("'compress' must be one of None, 'gz', or 'bz2'")
+        _check_compress(compress)
         self.compress = compress
         self.glob = glob
         self.keepstamp = keepstamp
         self.url = url
         self.urlText = urlText
+        if not isinstance(max_concurrent_uploads, int) or max_concurrent_uploads < 1:
+            config.error('max_concurrent_uploads must be a positive integer')
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self._running_cmds: set[remotecommand.RemoteCommand] = set()
+        self._transferred = 0
+
+    @defer.inlineCallbacks
+    def runCommand(self, command: remotecommand.RemoteCommand) -> InlineCallbacksType[int]:
+        # several uploads may run at the same time, while self.cmd only
+        # holds the command that was started last
+        self._running_cmds.add(command)
+        try:
+            return (yield super().runCommand(command))
+        finally:
+            self._running_cmds.discard(command)
+
+    @defer.inlineCallbacks
+    def runTransferCommand(
+        self,
+        cmd: remotecommand.RemoteCommand,
+        writer: remotetransfer.FileWriter | None = None,
+    ) -> InlineCallbacksType[int]:
+        try:
+            return (yield super().runTransferCommand(cmd, writer))
+        finally:
+            if writer:
+                self._transferred += writer.transferred
+
+    @defer.inlineCallbacks
+    def interrupt(self, reason: Any) -> InlineCallbacksType[None]:
+        # no new upload is started
+        self.stopped = True
+        yield self.addCompleteLog('interrupt', str(reason))
+        yield defer.DeferredList(
+            [cmd.interrupt(reason) for cmd in list(self._running_cmds)], consumeErrors=True
+        )
 
     def uploadFile(self, source: str, masterdest: str) -> Any:
-        fileWriter = remotetransfer.FileWriter(masterdest, self.maxsize, self.mode)
+        fileWriter = remotetransfer.FileWriter(
+            masterdest,
+            self.maxsize,
+            self.mode,
+            reactor=self.master.reactor,  # type: ignore[union-attr]
+        )
 
         args: dict[str, Any] = {
             'workdir': self.workdir,
@@ -331,7 +402,13 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         return self.runTransferCommand(cmd, fileWriter)
 
     def uploadDirectory(self, source: str, masterdest: str) -> Any:
-        dirWriter = remotetransfer.DirectoryWriter(masterdest, self.maxsize, self.compress, 0o600)
+        dirWriter = remotetransfer.DirectoryWriter(
+            masterdest,
+            self.maxsize,
+            self.compress,
+            0o600,
+            reactor=self.master.reactor,  # type: ignore[union-attr]
+        )
 
         args: dict[str, Any] = {
             'workdir': self.workdir,
@@ -391,6 +468,7 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
     @defer.inlineCallbacks
     def run(self) -> InlineCallbacksType[int]:
         self.checkWorkerHasCommand("uploadDirectory")
+        self.checkWorkerSupportsCompress(self.compress)
         self.checkWorkerHasCommand("uploadFile")
         self.checkWorkerHasCommand("stat")
         self.stdio_log = yield self.addLog("stdio")
@@ -429,17 +507,59 @@ class MultipleFileUpload(_TransferBuildStep, CompositeStepMixin):
         if not sources:
             result = SKIPPED
         else:
-            result = SUCCESS
-            for source in sources:
-                result_single = yield self.startUpload(source, masterdest)
-                if result_single == FAILURE:
-                    result = FAILURE
-                    break
+            result = yield self.uploadAll(sources, masterdest)
 
         yield self.allUploadsDone(result, sources, masterdest)
 
         return result
 
+    @defer.inlineCallbacks
+    def uploadAll(self, sources: list[str], masterdest: str) -> InlineCallbacksType[int]:
+        # Run up to max_concurrent_uploads uploads at the same time, so that
+        # many small files do not each wait for the round trips of the
+        # previous one. No new upload is started after one has failed, or once
+        # the step is interrupted.
+        reactor = self.master.reactor  # type: ignore[union-attr]
+        sem = defer.DeferredSemaphore(self.max_concurrent_uploads)
+        started = reactor.seconds()
+        uploaded = 0
+        failed = False
+
+        @defer.inlineCallbacks
+        def upload(source: str) -> InlineCallbacksType[int]:
+            nonlocal uploaded, failed
+            if self.stopped:
+                return CANCELLED
+            if failed:
+                return SKIPPED
+            try:
+                result = yield self.startUpload(source, masterdest)
+            except Exception:
+                failed = True
+                raise
+            if result == FAILURE:
+                failed = True
+            elif result == SUCCESS:
+                uploaded += 1
+            return result
+
+        results = yield defer.DeferredList(
+            [sem.run(upload, source) for source in sources], consumeErrors=True
+        )
+
+        elapsed = reactor.seconds() - started
+        msg = f"uploaded {uploaded} of {len(sources)} files, {self._transferred} bytes"
+        if elapsed > 0:
+            msg += f" in {elapsed:.2f} seconds ({self._transferred / elapsed:.0f} bytes/s)"
+        yield self.stdio_log.addHeader(msg + "\n")
+
+        for success, value in results:
+            if not success:
+                value.raiseException()
+        if failed:
+            return FAILURE
+        return CANCELLED if self.stopped else SUCCESS
+
 
 class FileDownload(_TransferBuildStep):
     name = 'download'
@@ -454,6 +574,7 @@ class FileDownload(_TransferBuildStep):
         maxsize: int | None = None,
         blocksize: int = 16 * 1024,
         mode: int | None = None,
+        use_worker_cache: bool = False,
         **buildstep_kwargs: Any,
     ) -> None:
         # Emulate that first two arguments are positional.
@@ -469,6 +590,7 @@ class FileDownload(_TransferBuildStep):
         if not isinstance(mode, (int, type(None))):
             config.error('mode must be an integer or None')
         self.mode = mode
+        self.use_worker_cache = use_worker_cache
 
     @defer.inlineCallbacks
     def run(self) -> InlineCallbacksType[int]:
@@ -502,6 +624,12 @@ class FileDownload(_TransferBuildStep):
             'mode': self.mode,
         }
 
+        if self.use_worker_cache and not self.workerVersionIsOlderThan('downloadFile', '3.5'):
+            reactor = self.master.reactor  # type: ignore[union-attr]
+            args['digest'] = yield threads.deferToThreadPool(
+                reactor, reactor.getThreadPool(), remotetransfer.file_digest, source
+            )
+
         if self.workerVersionIsOlderThan('downloadFile', '3.0'):
             args['slavedest'] = workerdest
         else:
@@ -525,6 +653,7 @@ class StringDownload(_TransferBuildStep):
         maxsize: int | None = None,
         blocksize: int = 16 * 1024,
         mode: int | None = None,
+        use_worker_cache: bool = False,
         **buildstep_kwargs: Any,
     ) -> None:
         # Emulate that first two arguments are positional.
@@ -540,6 +669,7 @@ class StringDownload(_TransferBuildStep):
         if not isinstance(mode, (int, type(None))):
             config.error(f"StringDownload step's mode must be an integer or None, got '{mode}'")
         self.mode = mode
+        self.use_worker_cache = use_worker_cache
 
     @defer.inlineCallbacks
     def run(self) -> InlineCallbacksType[int]:
@@ -566,6 +696,9 @@ class StringDownload(_TransferBuildStep):
             'mode': self.mode,
         }
 
+        if self.use_worker_cache and not self.workerVersionIsOlderThan('downloadFile', '3.5'):
+            args['digest'] = hashlib.sha256(unicode2bytes(self.s)).hexdigest()
+
         if self.workerVersionIsOlderThan('downloadFile', '3.0'):
             args['slavedest'] = workerdest
         else:
@@ -0,0 +1,105 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from twisted.internet import defer
+
+from buildbot.process import buildrequestdistributor
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from buildbot.process.builder import Builder
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class BuildDistributionLatency(TestReactorMixin, benchmark.BenchmarkTestCase):
+    BUILDER_COUNT = 500
+    CONCURRENCIES = [1, 4, 16, 64]
+    # simulated time taken by a builder to look for and start its builds;
+    # every SLOW_EVERY-th builder waits for a latent worker to substantiate
+    START_TIME = 0.01
+    SLOW_START_TIME = 5
+    SLOW_EVERY = 50
+
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        super().setUp()
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantData=True, wantDb=True)
+        self.master.config.prioritizeBuilders = lambda master, builders: builders
+
+        self.botmaster = mock.Mock(name='botmaster')
+        self.botmaster.master = self.master
+        self.botmaster.builders = {}
+        self.buildernames = []
+        for i in range(self.BUILDER_COUNT):
+            name = f'builder{i:03}'
+            bldr = mock.Mock(name=name)
+            bldr.name = name
+            bldr.config.workernames = [f'worker{i:03}']
+            self.botmaster.builders[name] = bldr
+            self.buildernames.append(name)
+
+    @async_to_deferred
+    async def dispatch(self, concurrency: int) -> list[float]:
+        self.master.config.build_distribution_concurrency = concurrency
+        brd = buildrequestdistributor.BuildRequestDistributor(self.botmaster)
+        brd.parent = self.botmaster  # type: ignore[assignment]
+        await brd.startService()
+
+        started_at: list[float] = []
+        start = self.reactor.seconds()
+
+        async def maybeStartBuildsOnBuilder(bldr: Builder) -> None:
+            started_at.append(self.reactor.seconds() - start)
+            index = int(bldr.name[len('builder') :])  # type: ignore[index]
+            delay = self.SLOW_START_TIME if index % self.SLOW_EVERY == 0 else self.START_TIME
+            d: defer.Deferred[None] = defer.Deferred()
+            self.reactor.callLater(delay, d.callback, None)
+            await d
+
+        brd._maybeStartBuildsOnBuilder = maybeStartBuildsOnBuilder  # type: ignore[method-assign]
+
+        await brd.maybeStartBuildsOn(self.buildernames)
+        while brd.active:
+            self.reactor.advance(self.START_TIME)
+        await brd._waitForFinish()
+        await brd.stopService()
+        return sorted(started_at)
+
+    @async_to_deferred
+    async def test_dispatch_latency(self) -> None:
+        for concurrency in self.CONCURRENCIES:
+            wall_start = time.perf_counter()
+            latencies = await self.dispatch(concurrency)
+            wall = time.perf_counter() - wall_start
+            assert len(latencies) == self.BUILDER_COUNT
+            self.report(
+                'dispatch latency',
+                builders=self.BUILDER_COUNT,
+                concurrency=concurrency,
+                p50_s=latencies[len(latencies) // 2],
+                p95_s=latencies[len(latencies) * 95 // 100],
+                max_s=latencies[-1],
+                wall_s=wall,
+            )
@@ -0,0 +1,177 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from twisted.internet import defer
+
+from buildbot.process import buildrequestdistributor
+from buildbot.process.builder import Builder
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import benchmark
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class BuildChooserFetch(TestReactorMixin, benchmark.BenchmarkTestCase):
+    REQUEST_COUNTS = [100, 1000, 10000]
+
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        super().setUp()
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantData=True, wantDb=True)
+        self.botmaster = mock.Mock(name='botmaster')
+        self.botmaster.master = self.master
+        self.brd = buildrequestdistributor.BuildRequestDistributor(self.botmaster)
+        self.brd.parent = self.botmaster  # type: ignore[assignment]
+        yield self.brd.startService()
+        self.addCleanup(self.brd.stopService)
+
+        self.bldr = mock.Mock(name='bldr')
+        self.bldr.getBuilderId = lambda: 77
+        self.bldr.config.nextWorker = None
+        self.bldr.config.nextBuild = None
+        self.bldr.getAvailableWorkers = lambda: []
+
+        yield self.master.db.insert_test_data([
+            fakedb.Master(id=fakedb.FakeDBConnector.MASTER_ID),
+            fakedb.Builder(id=77, name='A'),
+            fakedb.SourceStamp(id=21),
+            fakedb.Buildset(id=11),
+            fakedb.BuildsetSourceStamp(sourcestampid=21, buildsetid=11),
+        ])
+        self.request_count = 0
+
+    @defer.inlineCallbacks
+    def add_requests(self, count: int) -> InlineCallbacksType[None]:
+        yield self.master.db.insert_test_data([
+            fakedb.BuildRequest(id=100 + i, buildsetid=11, builderid=77)
+            for i in range(self.request_count, count)
+        ])
+        self.request_count = count
+
+    def fetch(self, indexed: bool) -> None:
+        # the db and the data API complete synchronously in tests
+        bc = self.brd.createBuildChooser(self.bldr, self.master)
+        if not indexed:
+            bc.pending_buildrequests = None
+        bc._fetchUnclaimedBrdicts()
+        assert bc.unclaimedBrdicts is not None
+        assert len(bc.unclaimedBrdicts) == self.request_count
+
+    @defer.inlineCallbacks
+    def test_fetch_unclaimed(self) -> InlineCallbacksType[None]:
+        for count in self.REQUEST_COUNTS:
+            yield self.add_requests(count)
+            assert self.brd.pending_buildrequests is not None
+            self.brd.pending_buildrequests.invalidate(77)
+
+            indexed = self.measure(lambda: self.fetch(indexed=True))
+            db = self.measure(lambda: self.fetch(indexed=False))
+            self.report(
+                'fetch unclaimed',
+                requests=count,
+                indexed_ms=indexed * 1e3,
+                db_ms=db * 1e3,
+                speedup=db / indexed,
+            )
+
+
+class SortBuilders(TestReactorMixin, benchmark.BenchmarkTestCase):
+    BUILDER_COUNTS = [10, 100, 500]
+
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        super().setUp()
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantData=True, wantDb=True)
+        self.botmaster = mock.Mock(name='botmaster')
+        self.botmaster.master = self.master
+        self.brd = buildrequestdistributor.BuildRequestDistributor(self.botmaster)
+        self.brd.parent = self.botmaster  # type: ignore[assignment]
+        yield self.brd.startService()
+        self.addCleanup(self.brd.stopService)
+
+        yield self.master.db.insert_test_data([
+            fakedb.Master(id=fakedb.FakeDBConnector.MASTER_ID),
+            fakedb.SourceStamp(id=21),
+            fakedb.Buildset(id=11),
+            fakedb.BuildsetSourceStamp(sourcestampid=21, buildsetid=11),
+        ])
+        self.builders: list[Builder] = []
+
+    @defer.inlineCallbacks
+    def add_builders(self, count: int) -> InlineCallbacksType[None]:
+        rows: list = []
+        for i in range(len(self.builders), count):
+            bldr = Builder(f'builder{i}')
+            bldr.master = self.master
+            bldr._builderid = 1000 + i  # type: ignore[assignment]
+            self.builders.append(bldr)
+            rows.append(fakedb.Builder(id=1000 + i, name=bldr.name))
+            rows.extend(
+                fakedb.BuildRequest(
+                    buildsetid=11, builderid=1000 + i, priority=j % 7, submitted_at=j
+                )
+                for j in range(5)
+            )
+        yield self.master.db.insert_test_data(rows)
+
+    def sort_per_builder(self) -> None:
+        # the way builders were sorted before the summary query was added:
+        # two queries per builder
+        keys = {}
+        for bldr in self.builders:
+            # the db and the data API complete synchronously in tests
+            priority: int | None = bldr.get_highest_priority().result  # type: ignore[assignment]
+            time: datetime | None = bldr.getOldestRequestTime().result  # type: ignore[assignment]
+            keys[bldr.name] = (
+                -priority if priority is not None else math.inf,
+                time.timestamp() if time is not None else math.inf,
+                bldr.name,
+            )
+        sorted(self.builders, key=lambda b: keys[b.name])
+
+    def sort(self, cached: bool) -> None:
+        assert self.brd.pending_buildrequests is not None
+        if not cached:
+            self.brd.pending_buildrequests._invalidate_summary()
+        self.brd._defaultSorter(self.master, self.builders[:])
+
+    @defer.inlineCallbacks
+    def test_sort_builders(self) -> InlineCallbacksType[None]:
+        for count in self.BUILDER_COUNTS:
+            yield self.add_builders(count)
+            per_builder = self.measure(self.sort_per_builder)
+            uncached = self.measure(lambda: self.sort(cached=False))
+            cached = self.measure(lambda: self.sort(cached=True))
+            self.report(
+                'sort builders',
+                builders=count,
+                per_builder_ms=per_builder * 1e3,
+                summary_ms=uncached * 1e3,
+                cached_ms=cached * 1e3,
+                speedup=per_builder / uncached,
+            )
@@ -0,0 +1,123 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import TYPE_CHECKING
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.changes import gitpoller
+from buildbot.test.util import benchmark
+from buildbot.test.util import changesource
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+def make_repository(path: str, commit_count: int) -> list[str]:
+    """
+    Create a repository with a linear history of commit_count commits, each changing a few
+    files, and return the hashes of the commits, oldest first.
+    """
+    git_bin = shutil.which('git')
+    if git_bin is None:
+        raise unittest.SkipTest("Can't find git binary")
+
+    subprocess.check_call([git_bin, 'init', '--quiet', '--initial-branch=main', path])
+
+    # fast-import creates thousands of commits in a fraction of a second
+    stream = []
+    for i in range(commit_count):
+        message = f'Commit {i}\n\nChange a few files of module {i % 17}.\n'.encode()
+        stream.append(b'commit refs/heads/main\n')
+        stream.append(f'mark :{i + 1}\n'.encode())
+        stream.append(
+            f'author user{i % 5} <user{i % 5}@example.com> {1717855200 + i} +0000\n'.encode()
+        )
+        stream.append(
+            f'committer committer <committer@example.com> {1717855200 + i} +0000\n'.encode()
+        )
+        stream.append(f'data {len(message)}\n'.encode() + message)
+        for j in range(3):
+            content = f'{i} {j}\n'.encode()
+            stream.append(f'M 644 inline module{i % 17}/file{j}.txt\n'.encode())
+            stream.append(f'data {len(content)}\n'.encode() + content)
+        stream.append(b'\n')
+    stream.append(b'checkpoint\n')
+
+    subprocess.run(
+        [git_bin, 'fast-import', '--quiet'], input=b''.join(stream), cwd=path, check=True
+    )
+    output = subprocess.check_output([git_bin, 'log', '--format=%H', '--reverse', 'main'], cwd=path)
+    return output.decode().split()
+
+
+class GitPollerCommitMetadata(changesource.ChangeSourceMixin, benchmark.BenchmarkTestCase):
+    COMMIT_COUNTS = [10, 100, 2000]
+
+    # the per-commit mode runs thousands of git processes
+    timeout = 600
+
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        super().setUp()
+        yield self.setUpChangeSource(want_real_reactor=True)
+        yield self.master.startService()
+        self.addCleanup(self.master.stopService)
+
+        self.repo_path = tempfile.mkdtemp(prefix='GitPollerCommitMetadata_', dir=os.getcwd())
+        self.addCleanup(shutil.rmtree, self.repo_path, ignore_errors=True)
+        self.revisions = make_repository(self.repo_path, max(self.COMMIT_COUNTS) + 1)
+
+        self.poller = yield self.attachChangeSource(
+            gitpoller.GitPoller(self.repo_path, branches=['main'], workdir=self.repo_path)
+        )
+
+    @async_to_deferred
+    async def process_changes(self, batch_commit_metadata: bool, count: int) -> float:
+        self.master.data.updates.changesAdded = []
+        self.poller.batch_commit_metadata = batch_commit_metadata
+        self.poller.lastRev = {'main': self.revisions[-count - 1]}
+
+        start = time.perf_counter()
+        await self.poller._process_changes(self.revisions[-1], 'main')
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(self.master.data.updates.changesAdded), count)
+        return elapsed
+
+    @async_to_deferred
+    async def test_process_changes(self) -> None:
+        for count in self.COMMIT_COUNTS:
+            per_commit = await self.process_changes(False, count)
+            per_commit_changes = self.master.data.updates.changesAdded
+            batched = await self.process_changes(True, count)
+            self.assertEqual(self.master.data.updates.changesAdded, per_commit_changes)
+
+            self.report(
+                'per-commit vs batched',
+                commits=count,
+                per_commit_s=per_commit,
+                batched_s=batched,
+                speedup=per_commit / batched,
+            )
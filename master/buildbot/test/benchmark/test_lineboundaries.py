@@ -0,0 +1,60 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from buildbot.test.util import benchmark
+from buildbot.util import lineboundaries
+
+
+class LineBoundaryFinderAppend(benchmark.BenchmarkTestCase):
+    # number of characters fed to the finder in each case
+    SIZES = [10000, 100000, 1000000]
+
+    def feed(self, chunks: list[str]) -> None:
+        lbf = lineboundaries.LineBoundaryFinder()
+        for chunk in chunks:
+            lbf.append(chunk)
+        lbf.flush()
+
+    def run_case(self, name: str, chunk: str, size: int) -> None:
+        chunks = [chunk] * (size // len(chunk))
+        elapsed = self.measure(lambda: self.feed(chunks))
+        self.report(name, chars=size, chunks=len(chunks), ns_per_char=elapsed / size * 1e9)
+
+    def test_long_line_small_chunks(self) -> None:
+        # a line without newline, received a few bytes at a time
+        for size in self.SIZES:
+            self.run_case('long line', 'abcdefgh', size)
+
+    def test_progress_bar_cr(self) -> None:
+        # a progress bar redrawn with carriage returns, one update per chunk
+        for size in self.SIZES:
+            self.run_case('progress bar \\r', ' 42%\r', size)
+
+    def test_progress_bar_backspace(self) -> None:
+        # a progress bar redrawn with backspaces, one character per chunk
+        for size in self.SIZES:
+            self.run_case('progress bar \\b', '\x08', size)
+
+    def test_escape_sequence_split(self) -> None:
+        # cursor control sequences split between chunks
+        for size in self.SIZES:
+            self.run_case('split escape', 'xx\033[1;', size)
+
+    def test_short_lines(self) -> None:
+        # the common case, for reference
+        for size in self.SIZES:
+            self.run_case('short lines', 'some output of a compiler\n' * 40, size)
@@ -0,0 +1,110 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import random
+
+from twisted.trial import unittest
+
+from buildbot.db import compression
+from buildbot.db.logs import LogsConnectorComponent
+from buildbot.test.util import benchmark
+
+
+def make_build_log(seed: int) -> bytes:
+    # a log similar to the ones of a C project build: compiler invocations
+    # with a few warnings, followed by the result of a test suite
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(3000):
+        module = rnd.randint(0, 40)
+        lines.append(
+            f"[{i + 1}/3000] gcc -O2 -g -Wall -Wextra -Isrc/include -Ibuild/gen "
+            f"-c src/module{module}/file{rnd.randint(0, 200)}.c -o build/module{module}.o"
+        )
+        if rnd.random() < 0.05:
+            lines.append(
+                f"src/module{module}/file{rnd.randint(0, 200)}.c:{rnd.randint(1, 2000)}:"
+                f"{rnd.randint(1, 80)}: warning: unused variable 'tmp{rnd.randint(0, 9)}' "
+                "[-Wunused-variable]"
+            )
+    for i in range(2000):
+        result = 'ok' if rnd.random() < 0.98 else 'FAILED'
+        lines.append(
+            f"test_module{rnd.randint(0, 40)}.TestCase{rnd.randint(0, 30)}"
+            f".test_case_{rnd.randint(0, 100)} ... {result} ({rnd.random():.3f}s)"
+        )
+    return '\n'.join(lines).encode()
+
+
+def split_chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[pos : pos + size] for pos in range(0, len(data), size)]
+
+
+class LogChunksDictionaryCompression(benchmark.BenchmarkTestCase):
+    # size of the chunks written by appendLog depends on how fast the output
+    # of the steps arrives, the biggest ones are written by compressLog
+    CHUNK_SIZES = [1024, 4096, 16384, LogsConnectorComponent.MAX_CHUNK_SIZE]
+    TRAINING_BUILDS = 5
+
+    def setUp(self) -> None:
+        super().setUp()
+        if not compression.ZStdDictCompressor.available:
+            raise unittest.SkipTest("zstandard not installed")
+        self.addCleanup(compression.ZStdDictCompressor.clear_dictionaries)
+
+    def train(self, dict_id: int) -> None:
+        connector = LogsConnectorComponent
+        samples: list[bytes] = []
+        for seed in range(self.TRAINING_BUILDS):
+            samples.extend(split_chunks(make_build_log(seed), connector.DICTIONARY_SAMPLE_SIZE))
+        content = compression.ZStdDictCompressor.train_dictionary(
+            dict_id, samples, connector.DICTIONARY_SIZE
+        )
+        compression.ZStdDictCompressor.add_dictionary(dict_id, content)
+
+    def test_compressed_size(self) -> None:
+        dict_id = compression.ZStdDictCompressor.DICTIONARY_ID_OFFSET
+        self.train(dict_id)
+        log = make_build_log(self.TRAINING_BUILDS)
+
+        for chunk_size in self.CHUNK_SIZES:
+            chunks = split_chunks(log, chunk_size)
+
+            def compress(dict_id: int, chunks: list[bytes] = chunks) -> list[bytes]:
+                return [compression.ZStdDictCompressor.dumps(c, dict_id) for c in chunks]
+
+            def decompress(compressed: list[bytes]) -> None:
+                for c in compressed:
+                    compression.ZStdDictCompressor.read(c)
+
+            plain = compress(0)
+            with_dict = compress(dict_id)
+            plain_size = sum(len(c) for c in plain)
+            dict_size = sum(len(c) for c in with_dict)
+
+            self.report(
+                'zstd vs zstd_dict',
+                chunk_size=chunk_size,
+                raw_bytes=len(log),
+                zstd_bytes=plain_size,
+                zstd_dict_bytes=dict_size,
+                size_reduction=plain_size / dict_size,
+                zstd_compress_ms=self.measure(lambda: compress(0)) * 1e3,
+                zstd_dict_compress_ms=self.measure(lambda: compress(dict_id)) * 1e3,
+                zstd_read_ms=self.measure(lambda p=plain: decompress(p)) * 1e3,  # type: ignore[misc]
+                zstd_dict_read_ms=self.measure(lambda d=with_dict: decompress(d)) * 1e3,  # type: ignore[misc]
+            )
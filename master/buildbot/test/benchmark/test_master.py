@@ -0,0 +1,282 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+from typing import Any
+
+from twisted.internet import defer
+
+from buildbot.config import BuilderConfig
+from buildbot.data import resultspec
+from buildbot.process.buildstep import BuildStep
+from buildbot.process.factory import BuildFactory
+from buildbot.process.results import SUCCESS
+from buildbot.schedulers.forcesched import ForceScheduler
+from buildbot.test.util import benchmark
+from buildbot.util.twisted import async_to_deferred
+from buildbot.www import ws
+
+if TYPE_CHECKING:
+    from buildbot.mq.base import QueueRef
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class NoopStep(BuildStep):
+    def run(self) -> defer.Deferred[int]:
+        return defer.succeed(SUCCESS)
+
+
+class LogIngestionStep(BuildStep):
+    """
+    Writes a log the way a worker streams the output of a command, in updates of several lines,
+    and records how long each update takes to be ingested.
+    """
+
+    def __init__(
+        self, line_count: int, lines_per_update: int, latencies: list[float], **kwargs: Any
+    ) -> None:
+        super().__init__(**kwargs)
+        self.line_count = line_count
+        self.lines_per_update = lines_per_update
+        self.latencies = latencies
+
+    @defer.inlineCallbacks
+    def run(self) -> InlineCallbacksType[int]:
+        log = yield self.addLog('stdio')
+        for start in range(0, self.line_count, self.lines_per_update):
+            end = min(start + self.lines_per_update, self.line_count)
+            update = ''.join(
+                f'[{i:08}] compiling src/module{i % 97}/file{i}.c -Wall -O2\n'
+                for i in range(start, end)
+            )
+            update_start = time.perf_counter()
+            yield log.addStdout(update)
+            self.latencies.append(time.perf_counter() - update_start)
+        yield log.finish()
+        return SUCCESS
+
+
+class MasterHotPaths(benchmark.MasterBenchmarkTestCase):
+    BUILDER_COUNT = 20
+    BUILD_COUNT = 200
+
+    LOG_BUILD_COUNT = 4
+    LOG_LINE_COUNT = 50000
+    LOG_LINES_PER_UPDATE = 100
+
+    QUERY_COUNT = 200
+
+    WS_CLIENT_COUNT = 200
+    WS_MESSAGE_COUNT = 200
+
+    @async_to_deferred
+    async def setup_builders(self, factory: BuildFactory) -> list[int]:
+        names = [f'builder{i}' for i in range(self.BUILDER_COUNT)]
+        await self.setup_master(
+            {
+                'builders': [
+                    BuilderConfig(name=name, workernames=[f'worker{i}'], factory=factory)
+                    for i, name in enumerate(names)
+                ],
+                'schedulers': [ForceScheduler(name='force', builderNames=names)],
+                # every submitted request must produce its own build
+                'collapseRequests': False,
+            },
+            worker_count=self.BUILDER_COUNT,
+        )
+        return [await self.master.data.updates.findBuilderId(name) for name in names]
+
+    @async_to_deferred
+    async def run_builds(self, builderids: list[int], count: int) -> dict[str, float]:
+        """
+        Submit count buildsets, distributed across the builders, and wait for all the builds
+        to finish.  Return the dispatch metrics.
+        """
+        submitted_at: dict[int, float] = {}
+        started_at: dict[int, float] = {}
+        finished_at: list[float] = []
+
+        def on_new(key: tuple[str, ...], build: dict[str, Any]) -> None:
+            started_at[build['buildrequestid']] = time.perf_counter()
+
+        def on_finished(key: tuple[str, ...], build: dict[str, Any]) -> None:
+            finished_at.append(time.perf_counter())
+
+        consumers: list[QueueRef] = [
+            await self.master.mq.startConsuming(on_new, ('builds', None, 'new')),
+            await self.master.mq.startConsuming(on_finished, ('builds', None, 'finished')),
+        ]
+
+        start = time.perf_counter()
+        for i in range(count):
+            _, brids = await self.master.data.updates.addBuildset(
+                waited_for=False,
+                builderids=[builderids[i % len(builderids)]],
+                sourcestamps=[
+                    {
+                        'codebase': '',
+                        'repository': '',
+                        'branch': None,
+                        'revision': None,
+                        'project': '',
+                    },
+                ],
+            )
+            for brid in brids.values():
+                submitted_at[brid] = time.perf_counter()
+        submit_time = time.perf_counter() - start
+
+        await self.wait_for(lambda: len(finished_at) >= count, timeout=300)
+        elapsed = max(finished_at) - start
+
+        for consumer in consumers:
+            consumer.stopConsuming()
+
+        latencies = [started_at[brid] - submitted_at[brid] for brid in submitted_at]
+        return {
+            'builds_per_s': count / elapsed,
+            'submit_per_s': count / submit_time,
+            **{f'dispatch_{k}': v for k, v in benchmark.latency_stats(latencies).items()},
+        }
+
+    @async_to_deferred
+    async def test_build_dispatch(self) -> None:
+        builderids = await self.setup_builders(BuildFactory([NoopStep()]))
+        metrics = await self.run_builds(builderids, self.BUILD_COUNT)
+        self.report_metrics('build dispatch', **metrics)
+
+    @async_to_deferred
+    async def test_log_ingestion(self) -> None:
+        latencies: list[float] = []
+        builderids = await self.setup_builders(
+            BuildFactory([
+                LogIngestionStep(
+                    line_count=self.LOG_LINE_COUNT,
+                    lines_per_update=self.LOG_LINES_PER_UPDATE,
+                    latencies=latencies,
+                )
+            ])
+        )
+
+        start = time.perf_counter()
+        await self.run_builds(builderids[: self.LOG_BUILD_COUNT], self.LOG_BUILD_COUNT)
+        elapsed = time.perf_counter() - start
+
+        line_count = self.LOG_BUILD_COUNT * self.LOG_LINE_COUNT
+        num_lines = 0
+        for build in await self.master.data.get(('builds',)):
+            for step in await self.master.data.get(('builds', build['buildid'], 'steps')):
+                logs = await self.master.data.get(('steps', step['stepid'], 'logs'))
+                num_lines += sum(l['num_lines'] for l in logs)
+        self.assertEqual(num_lines, line_count)
+
+        self.report_metrics(
+            'log ingestion',
+            lines_per_s=line_count / elapsed,
+            **{f'update_{k}': v for k, v in benchmark.latency_stats(latencies).items()},
+        )
+
+    @async_to_deferred
+    async def test_data_api_queries(self) -> None:
+        builderids = await self.setup_builders(BuildFactory([NoopStep(), NoopStep()]))
+        await self.run_builds(builderids, self.BUILD_COUNT)
+
+        queries = [
+            (
+                'builds',
+                ('builds',),
+                resultspec.ResultSpec(order=['-buildid'], limit=50),
+            ),
+            (
+                'builder_builds',
+                ('builders', builderids[0], 'builds'),
+                resultspec.ResultSpec(
+                    filters=[resultspec.Filter('results', 'eq', [SUCCESS])], order=['-number']
+                ),
+            ),
+            (
+                'build_steps',
+                ('builds', 1, 'steps'),
+                resultspec.ResultSpec(),
+            ),
+            (
+                'buildrequests',
+                ('buildrequests',),
+                resultspec.ResultSpec(
+                    filters=[resultspec.Filter('complete', 'eq', [True])],
+                    order=['-buildrequestid'],
+                    limit=50,
+                ),
+            ),
+        ]
+
+        for name, path, spec in queries:
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(self.QUERY_COUNT):
+                query_start = time.perf_counter()
+                await self.master.data.get_with_resultspec(path, spec)
+                latencies.append(time.perf_counter() - query_start)
+            elapsed = time.perf_counter() - start
+
+            self.report_metrics(
+                f'data API {name}',
+                queries_per_s=self.QUERY_COUNT / elapsed,
+                **benchmark.latency_stats(latencies),
+            )
+
+    @async_to_deferred
+    async def test_websocket_fan_out(self) -> None:
+        builderids = await self.setup_builders(BuildFactory([NoopStep()]))
+        await self.run_builds(builderids, self.BUILDER_COUNT)
+        builds = await self.master.data.get(('builds',))
+
+        received: list[int] = []
+
+        def send_message(payload: bytes, *args: Any, **kwargs: Any) -> None:
+            received.append(len(payload))
+
+        resource = ws.WsResource(self.master)
+        clients = []
+        for i in range(self.WS_CLIENT_COUNT):
+            proto = resource._factory.buildProtocol(f'client{i}')
+            proto.sendMessage = send_message
+            await proto.onMessage(
+                f'{{"cmd": "startConsuming", "path": "builds/*/*", "_id": {i}}}'.encode(), False
+            )
+            clients.append(proto)
+        received.clear()
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(self.WS_MESSAGE_COUNT):
+            build = builds[i % len(builds)]
+            message_start = time.perf_counter()
+            self.master.mq.produce(('builds', str(build['buildid']), 'updated'), build)
+            latencies.append(time.perf_counter() - message_start)
+        await self.wait_for(lambda: len(received) >= self.WS_CLIENT_COUNT * self.WS_MESSAGE_COUNT)
+        elapsed = time.perf_counter() - start
+
+        for proto in clients:
+            proto.connectionLost(None)
+
+        self.report_metrics(
+            'websocket fan-out',
+            deliveries_per_s=len(received) / elapsed,
+            **{f'message_{k}': v for k, v in benchmark.latency_stats(latencies).items()},
+        )
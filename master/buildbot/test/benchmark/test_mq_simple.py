@@ -0,0 +1,55 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from buildbot.mq import simple
+from buildbot.test.util import benchmark
+from buildbot.util import tuplematch
+
+
+class SimpleMQProduce(benchmark.BenchmarkTestCase):
+    SUBSCRIBER_COUNTS = [10, 100, 1000, 10000]
+
+    def make_mq(self, subscribers: int) -> simple.SimpleMQ:
+        mq = simple.SimpleMQ()
+        # this mimics websocket clients and reporters watching individual builds,
+        # plus a few consumers interested in every build
+        for i in range(subscribers):
+            mq.startConsuming(lambda key, data: None, ('builds', str(i), None))
+        for _ in range(5):
+            mq.startConsuming(lambda key, data: None, ('builds', None, 'finished'))
+        return mq
+
+    def test_produce(self) -> None:
+        key = ('builds', '1', 'finished')
+        for count in self.SUBSCRIBER_COUNTS:
+            mq = self.make_mq(count)
+
+            def linear_scan(mq: simple.SimpleMQ = mq) -> None:
+                # the way consumers were matched before the index was added
+                for qref in mq.qrefs:
+                    if tuplematch.matchTuple(key, qref.filter):
+                        mq.invokeQref(qref, key, {})
+
+            indexed = self.measure(lambda mq=mq: mq.produce(key, {}))  # type: ignore[misc]
+            linear = self.measure(linear_scan)
+            self.report(
+                'produce',
+                subscribers=count,
+                indexed_us=indexed * 1e6,
+                linear_us=linear * 1e6,
+                speedup=linear / indexed,
+            )
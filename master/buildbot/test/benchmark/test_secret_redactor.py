@@ -0,0 +1,81 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import random
+import string
+
+from buildbot.secrets.redactor import SecretRedactor
+from buildbot.test.util import benchmark
+
+
+def replace_secrets(secrets: dict[str, str], text: str) -> str:
+    # the previous implementation of Properties.cleanupTextFromSecrets
+    for k in sorted(secrets, key=len, reverse=True):
+        text = text.replace(k, secrets[k])
+    return text
+
+
+def make_secrets(count: int) -> dict[str, str]:
+    rnd = random.Random(count)
+    alphabet = string.ascii_letters + string.digits
+    return {
+        ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(16, 40))): f'<secret{i}>'
+        for i in range(count)
+    }
+
+
+def make_output(size: int, secrets: list[str]) -> str:
+    # compiler output, with a secret every 50 lines
+    lines = []
+    length = 0
+    i = 0
+    while length < size:
+        line = f"[{i}] gcc -O2 -Wall -c src/module/file{i}.c -o build/file{i}.o\n"
+        if secrets and i % 50 == 49:
+            line = f"curl -u user:{secrets[i % len(secrets)]} https://example.com\n"
+        lines.append(line)
+        length += len(line)
+        i += 1
+    return ''.join(lines)
+
+
+class SecretRedaction(benchmark.BenchmarkTestCase):
+    SECRET_COUNTS = [1, 10, 50, 200]
+    # size of the updates received from the workers: a single line, or the
+    # output buffered by the worker
+    UPDATE_SIZES = [80, 4096, 65536]
+
+    def test_redact(self) -> None:
+        for count in self.SECRET_COUNTS:
+            secrets = make_secrets(count)
+            redactor = SecretRedactor()
+            for value, replacement in secrets.items():
+                redactor.add(value, replacement)
+
+            for size in self.UPDATE_SIZES:
+                text = make_output(size, list(secrets))
+                self.assertEqual(redactor.redact(text), replace_secrets(secrets, text))
+                stream = redactor.stream()
+
+                self.report(
+                    'replace vs redactor',
+                    secrets=count,
+                    update_size=len(text),
+                    replace_us=self.measure(lambda: replace_secrets(secrets, text)) * 1e6,  # noqa: B023
+                    redact_us=self.measure(lambda: redactor.redact(text)) * 1e6,  # noqa: B023
+                    stream_us=self.measure(lambda: stream.append(text)) * 1e6,  # noqa: B023
+                )
@@ -27,6 +27,7 @@ from twisted.internet import reactor
 
 from buildbot.config.master import DBConfig as MasterDBConfig
 from buildbot.config.master import MasterConfig
+from buildbot.schedulers.dispatcher import ChangeDispatcher
 from buildbot.secrets.manager import SecretManager
 from buildbot.test import fakedb
 from buildbot.test.fake import bworkermanager
@@ -38,6 +39,7 @@ from buildbot.test.fake.botmaster import FakeBotMaster
 from buildbot.test.fake.machine import FakeMachineManager
 from buildbot.test.fake.secrets import FakeSecretStorage
 from buildbot.test.util.db import resolve_test_db_url
+from buildbot.util import lru
 from buildbot.util import service
 from buildbot.util.twisted import async_to_deferred
 
@@ -72,6 +74,12 @@ class FakeCaches:
     def get_cache(self, name: str, miss_fn: Any) -> FakeCache:
         return FakeCache(name, miss_fn)
 
+    def get_sized_cache(
+        self, name: str, size_fn: Any, default_max_size: int, group_fn: Any = None
+    ) -> lru.SizedLRUCache[Any, Any]:
+        # nothing fits in a cache of size 0
+        return lru.SizedLRUCache(size_fn, 0, group_fn=group_fn)
+
 
 class FakeBuilder:
     def __init__(self, master: Any = None, buildername: str = "Builder") -> None:
@@ -127,6 +135,7 @@ class FakeMaster(service.MasterService):
         self.machine_manager = FakeMachineManager()
         self.machine_manager.setServiceParent(self)
         self.log_rotation = FakeLogRotation()
+        self.change_dispatcher = ChangeDispatcher(self)
         self.db = mock.Mock()
         self.next_objectid = 0
         self.config_version = 0
@@ -0,0 +1,75 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import io
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+
+class FakeS3Client:
+    """
+    In-memory stand-in for the subset of the boto3 S3 client API used by
+    S3LogStorage.
+    """
+
+    def __init__(self, page_size: int = 1000) -> None:
+        self.page_size = page_size
+        self.buckets: dict[str, dict[str, bytes]] = {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict[str, Any]:
+        self.buckets.setdefault(Bucket, {})[Key] = bytes(Body)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        try:
+            data = self.buckets.get(Bucket, {})[Key]
+        except KeyError as e:
+            raise ClientError(
+                {'Error': {'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'}},
+                'GetObject',
+            ) from e
+        return {'Body': io.BytesIO(data)}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = '',
+        MaxKeys: int = 1000,
+        ContinuationToken: str | None = None,
+    ) -> dict[str, Any]:
+        keys = sorted(k for k in self.buckets.get(Bucket, {}) if k.startswith(Prefix))
+        if ContinuationToken is not None:
+            keys = [k for k in keys if k > ContinuationToken]
+        page = keys[: min(MaxKeys, self.page_size)]
+        res: dict[str, Any] = {
+            'Contents': [{'Key': k, 'Size': len(self.buckets[Bucket][k])} for k in page],
+            'IsTruncated': len(page) < len(keys),
+        }
+        if res['IsTruncated']:
+            res['NextContinuationToken'] = page[-1]
+        return res
+
+    def delete_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        self.buckets.get(Bucket, {}).pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict[str, Any]) -> dict[str, Any]:
+        bucket = self.buckets.get(Bucket, {})
+        for obj in Delete['Objects']:
+            bucket.pop(obj['Key'], None)
+        return {}
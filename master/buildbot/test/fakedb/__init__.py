@@ -42,6 +42,8 @@ from .codebases import CodebaseCommit
 from .connector import FakeDBConnector
 from .logs import Log
 from .logs import LogChunk
+from .logs import LogChunkDictionary
+from .logs import LogSearchPosting
 from .masters import Master
 from .projects import Project
 from .schedulers import Scheduler
@@ -89,6 +91,8 @@ __all__ = [
     'FakeDBConnector',
     'Log',
     'LogChunk',
+    'LogChunkDictionary',
+    'LogSearchPosting',
     'Master',
     'Object',
     'ObjectState',
@@ -53,6 +53,8 @@ from .codebases import CodebaseBranch
 from .codebases import CodebaseCommit
 from .logs import Log
 from .logs import LogChunk
+from .logs import LogChunkDictionary
+from .logs import LogSearchPosting
 from .masters import Master
 from .projects import Project
 from .schedulers import Scheduler
@@ -526,6 +528,40 @@ class FakeDBConnector(DBConnector):
             self._thd_post_insert(conn, self.model.logchunks)
         return non_matched_rows
 
+    def _thd_maybe_insert_log_chunk_dictionary(
+        self, conn: sa.engine.Connection, rows: list[Row]
+    ) -> list[Row]:
+        matched_rows, non_matched_rows = self._match_rows(rows, LogChunkDictionary)
+        for row in matched_rows:
+            conn.execute(
+                self.model.logchunk_dictionaries.insert(),
+                [
+                    {
+                        'id': row.id,
+                        'builderid': row.builderid,
+                        'log_name': row.log_name,
+                        'created_at': row.created_at,
+                        'content': row.content,
+                    }
+                ],
+            )
+        if matched_rows:
+            self._thd_post_insert(conn, self.model.logchunk_dictionaries)
+        return non_matched_rows
+
+    def _thd_maybe_insert_log_search_posting(
+        self, conn: sa.engine.Connection, rows: list[Row]
+    ) -> list[Row]:
+        matched_rows, non_matched_rows = self._match_rows(rows, LogSearchPosting)
+        for row in matched_rows:
+            conn.execute(
+                self.model.log_search_postings.insert(),
+                [{'logid': row.logid, 'block': row.block, 'term': row.term}],
+            )
+        if matched_rows:
+            self._thd_post_insert(conn, self.model.log_search_postings)
+        return non_matched_rows
+
     def _thd_maybe_insert_master(self, conn: sa.engine.Connection, rows: list[Row]) -> list[Row]:
         matched_rows, non_matched_rows = self._match_rows(rows, Master)
         for row in matched_rows:
@@ -1025,6 +1061,8 @@ class FakeDBConnector(DBConnector):
             remaining = self._thd_maybe_insert_changesource_master(conn, remaining)
             remaining = self._thd_maybe_insert_log(conn, remaining)
             remaining = self._thd_maybe_insert_log_chunk(conn, remaining)
+            remaining = self._thd_maybe_insert_log_chunk_dictionary(conn, remaining)
+            remaining = self._thd_maybe_insert_log_search_posting(conn, remaining)
             remaining = self._thd_maybe_insert_scheduler(conn, remaining)
             remaining = self._thd_maybe_insert_scheduler_change(conn, remaining)
             remaining = self._thd_maybe_insert_scheduler_master(conn, remaining)
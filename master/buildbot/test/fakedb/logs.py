@@ -67,3 +67,42 @@ class LogChunk(Row):
             content=content,
             compressed=compressed,
         )
+
+
+class LogChunkDictionary(Row):
+    table = "logchunk_dictionaries"
+
+    id_column = 'id'
+    binary_columns = ('content',)
+
+    def __init__(
+        self,
+        id: int | None = None,
+        builderid: int | None = None,
+        log_name: str = 'stdio',
+        created_at: int = 0,
+        content: bytes | None = None,
+    ) -> None:
+        super().__init__(
+            id=id,
+            builderid=builderid,
+            log_name=log_name,
+            created_at=created_at,
+            content=content,
+        )
+
+
+class LogSearchPosting(Row):
+    table = "log_search_postings"
+
+    def __init__(
+        self,
+        logid: int | None = None,
+        block: int = 0,
+        term: int = 0,
+    ) -> None:
+        super().__init__(
+            logid=logid,
+            block=block,
+            term=term,
+        )
@@ -138,6 +138,7 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.util.lineboundaries.LineBoundaryFinder',
             'buildbot.util.lru.AsyncLRUCache',
             'buildbot.util.lru.LRUCache',
+            'buildbot.util.lru.SizedLRUCache',
             'buildbot.util.maildir.MaildirService',
             'buildbot.util.maildir.NoSuchMaildir',
             'buildbot.util.netstrings.NetstringParser',
@@ -170,6 +171,7 @@ class TestSetupPyEntryPoints(unittest.TestCase):
             'buildbot.util.subscription.SubscriptionPoint',
             'buildbot.util.test_result_submitter.TestResultInfo',
             'buildbot.util.test_result_submitter.TestResultSubmitter',
+            'buildbot.util.tuplematch.TupleMatchIndex',
             "buildbot.util.watchdog.Watchdog",
             "buildbot.util.twisted.ThreadPool",
         }
@@ -212,6 +214,8 @@ class TestSetupPyEntryPoints(unittest.TestCase):
         known_not_exported = {
             'buildbot.secrets.manager.SecretManager',
             'buildbot.secrets.providers.base.SecretProviderBase',
+            'buildbot.secrets.redactor.SecretRedactor',
+            'buildbot.secrets.redactor.SecretRedactorStream',
             'buildbot.secrets.secret.SecretDetails',
             'buildbot.secrets.providers.vault_hvac.VaultAuthenticator',
         }
@@ -23,6 +23,8 @@ from buildbot.test.steps import _check_env_is_expected
 from buildbot.util import runprocess
 
 if TYPE_CHECKING:
+    from typing import Callable
+
     from twisted.internet.interfaces import IReactorProcess
     from twisted.internet.interfaces import IReactorTime
     from twisted.trial import unittest
@@ -51,7 +53,7 @@ class MasterRunProcessMixin(_MasterRunProcessMixinBase):
         command: list[str],
         workdir: str | None = None,
         env: dict[str, str] | None = None,
-        collect_stdout: bool = True,
+        collect_stdout: bool | Callable[[bytes], None] = True,
         collect_stderr: bool = True,
         stderr_is_error: bool = False,
         io_timeout: int = 300,
@@ -72,6 +74,11 @@ class MasterRunProcessMixin(_MasterRunProcessMixinBase):
         if not collect_stderr and stderr_is_error and stderr:
             rc = -1
 
+        if callable(collect_stdout):
+            if stdout:
+                collect_stdout(stdout)
+            collect_stdout = False
+
         if collect_stdout and collect_stderr:
             return defer.succeed((rc, stdout, stderr))
         if collect_stdout:
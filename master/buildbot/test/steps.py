@@ -15,6 +15,8 @@
 
 from __future__ import annotations
 
+import bz2
+import gzip
 import stat
 import tarfile
 from io import BytesIO
@@ -490,7 +492,17 @@ class ExpectUploadDirectory(Expect):
             if out_writers is not None:
                 out_writers.append(writer)
 
-            writer.remote_write(f.getvalue())
+            data = f.getvalue()
+            compress = command.args.get('compress')
+            if compress == 'gz':
+                data = gzip.compress(data)
+            elif compress == 'bz2':
+                data = bz2.compress(data)
+            elif compress == 'zstd':
+                import zstandard  # noqa: PLC0415
+
+                data = zstandard.ZstdCompressor().compress(data)
+            writer.remote_write(data)
             writer.remote_unpack()
 
             if error is not None:
@@ -516,6 +528,7 @@ class ExpectDownloadFile(Expect):
         interrupted: bool = False,
         slavesrc: str | None = None,
         slavedest: str | None = None,
+        digest: str | None = None,
     ) -> None:
         args: dict[str, Any] = {
             'workdir': workdir,
@@ -530,6 +543,8 @@ class ExpectDownloadFile(Expect):
             args['slavedest'] = slavedest
         if workerdest is not None:
             args['workerdest'] = workerdest
+        if digest is not None:
+            args['digest'] = digest
 
         super().__init__('downloadFile', args, interrupted=interrupted)
 
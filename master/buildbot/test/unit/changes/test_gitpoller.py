@@ -1970,6 +1970,340 @@ class TestGitPollerWithCodebase(TestGitPollerBase):
         )
 
 
+def _batched_log_output(*commits: tuple[bytes, ...]) -> bytes:
+    # each commit is (hash, parents, timestamp, author, committer, comments, *files)
+    output = b''
+    for commit in commits:
+        header = commit[: gitpoller.GitLogParser.FIELD_COUNT]
+        files = commit[gitpoller.GitLogParser.FIELD_COUNT :]
+        output += b'\0' + b'\0'.join(header)
+        if files:
+            output += b'\0\n' + b'\0'.join(files)
+        output += b'\0'
+    return output
+
+
+class TestGitPollerBatchCommitMetadata(TestGitPollerBase):
+    def createPoller(self) -> gitpoller.GitPoller:
+        return gitpoller.GitPoller(
+            self.REPOURL,
+            branches=['master'],
+            codebase=Codebase('codebase1', 'project1'),
+            batch_commit_metadata=True,
+        )
+
+    def expect_fetch(self, rev: bytes) -> None:
+        self.expect_commands(
+            ExpectMasterShell(['git', '--version']).stdout(b'git version 1.7.5\n'),
+            ExpectMasterShell(['git', 'init', '--bare', self.POLLER_WORKDIR]),
+            ExpectMasterShell([
+                'git',
+                'ls-remote',
+                '--refs',
+                self.REPOURL,
+                'refs/heads/master',
+            ]).stdout(rev + b'\trefs/heads/master\n'),
+            ExpectMasterShell([
+                'git',
+                'fetch',
+                '--progress',
+                self.REPOURL,
+                '+refs/heads/master:refs/buildbot/' + self.REPOURL_QUOTED + '/heads/master',
+                '--',
+            ]).workdir(self.POLLER_WORKDIR),
+            ExpectMasterShell([
+                'git',
+                'rev-parse',
+                'refs/buildbot/' + self.REPOURL_QUOTED + '/heads/master',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(rev + b'\n'),
+        )
+
+    @defer.inlineCallbacks
+    def test_poll(self) -> InlineCallbacksType[None]:
+        self.expect_fetch(b'4423cdbcbb89c14e50dd5f4152415afd686c5241')
+        self.expect_commands(
+            ExpectMasterShell([
+                'git',
+                'log',
+                '-z',
+                '--first-parent',
+                '-m',
+                '--name-only',
+                '--format=' + gitpoller.GitLogParser.FORMAT,
+                '--ignore-missing',
+                '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                '^fa3ae8ed68e664d4db24798611b352e3c6509930',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(
+                _batched_log_output(
+                    (
+                        b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                        b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                        b'1273258010',
+                        b'by:4423cdbc <by@example.com>',
+                        b'cby:4423cdbc <cby@example.com>',
+                        b'empty\n',
+                    ),
+                    (
+                        b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                        b'fa3ae8ed68e664d4db24798611b352e3c6509930 '
+                        b'0659625c8a684845076a30eeb3a7b3fe12c279b1',
+                        b'1273258009',
+                        b'by:64a5dc2a <by@example.com>',
+                        b'cby:64a5dc2a <cby@example.com>',
+                        b'merge\n\nbody\n',
+                        b'file 1',
+                        '\u00e9/file'.encode(),
+                    ),
+                )
+            ),
+        )
+
+        yield self.set_last_rev({'master': 'fa3ae8ed68e664d4db24798611b352e3c6509930'})
+        self.poller.doPoll.running = True
+        yield self.poller.poll()
+
+        self.assert_all_commands_ran()
+        yield self.assert_last_rev({'master': '4423cdbcbb89c14e50dd5f4152415afd686c5241'})
+
+        self.assertEqual(
+            [
+                (
+                    c['revision'],
+                    c['author'],
+                    c['committer'],
+                    c['files'],
+                    c['comments'],
+                    c['when_timestamp'],
+                )
+                for c in self.master.data.updates.changesAdded
+            ],
+            [
+                (
+                    '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                    'by:64a5dc2a <by@example.com>',
+                    'cby:64a5dc2a <cby@example.com>',
+                    ['file 1', '\u00e9/file'],
+                    'merge\n\nbody',
+                    1273258009,
+                ),
+                (
+                    '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                    'by:4423cdbc <by@example.com>',
+                    'cby:4423cdbc <cby@example.com>',
+                    [],
+                    'empty',
+                    1273258010,
+                ),
+            ],
+        )
+
+    @defer.inlineCallbacks
+    def test_poll_uses_first_parent_of_oldest_commit(self) -> InlineCallbacksType[None]:
+        yield self.master.data.updates.add_commit(
+            codebaseid=1,
+            author='author',
+            committer='committer',
+            comments='comments',
+            when_timestamp=1273258000,
+            revision='fa3ae8ed68e664d4db24798611b352e3c6509930',
+            parent_commitid=None,
+        )
+
+        self.expect_fetch(b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a')
+        self.expect_commands(
+            ExpectMasterShell([
+                'git',
+                'log',
+                '-z',
+                '--first-parent',
+                '-m',
+                '--name-only',
+                '--format=' + gitpoller.GitLogParser.FORMAT,
+                '--ignore-missing',
+                '64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                '^fa3ae8ed68e664d4db24798611b352e3c6509930',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(
+                _batched_log_output((
+                    b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+                    b'fa3ae8ed68e664d4db24798611b352e3c6509930',
+                    b'1273258009',
+                    b'by <by@example.com>',
+                    b'by <by@example.com>',
+                    b'hello\n',
+                    b'README',
+                ))
+            ),
+        )
+
+        yield self.set_last_rev({'master': 'fa3ae8ed68e664d4db24798611b352e3c6509930'})
+        self.poller.doPoll.running = True
+        yield self.poller.poll()
+
+        self.assert_all_commands_ran()
+        commits = yield self.master.data.get(('codebases', 1, 'commits'))
+        self.assertEqual(
+            sorted((c['revision'], c['parent_commitid']) for c in commits),
+            [
+                ('64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a', 1),
+                ('fa3ae8ed68e664d4db24798611b352e3c6509930', None),
+            ],
+        )
+
+    @defer.inlineCallbacks
+    def test_poll_rebuild_push_without_commits(self) -> InlineCallbacksType[None]:
+        self.poller.buildPushesWithNoCommits = True
+        self.poller._codebase_id = None
+        self.expect_fetch(b'fa3ae8ed68e664d4db24798611b352e3c6509930')
+        self.expect_commands(
+            ExpectMasterShell([
+                'git',
+                'log',
+                '-z',
+                '--first-parent',
+                '-m',
+                '--name-only',
+                '--format=' + gitpoller.GitLogParser.FORMAT,
+                '--ignore-missing',
+                'fa3ae8ed68e664d4db24798611b352e3c6509930',
+                '^4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                '^fa3ae8ed68e664d4db24798611b352e3c6509930',
+                '--',
+            ]).workdir(self.POLLER_WORKDIR),
+            ExpectMasterShell([
+                'git',
+                'log',
+                '-z',
+                '--first-parent',
+                '-m',
+                '--name-only',
+                '--format=' + gitpoller.GitLogParser.FORMAT,
+                '--no-walk',
+                'fa3ae8ed68e664d4db24798611b352e3c6509930',
+                '--',
+            ])
+            .workdir(self.POLLER_WORKDIR)
+            .stdout(
+                _batched_log_output((
+                    b'fa3ae8ed68e664d4db24798611b352e3c6509930',
+                    b'0659625c8a684845076a30eeb3a7b3fe12c279b1',
+                    b'1273258009',
+                    b'by <by@example.com>',
+                    b'by <by@example.com>',
+                    b'hello\n',
+                    b'README',
+                ))
+            ),
+        )
+
+        yield self.set_last_rev({
+            'master': '4423cdbcbb89c14e50dd5f4152415afd686c5241',
+            'release': 'fa3ae8ed68e664d4db24798611b352e3c6509930',
+        })
+        self.poller.doPoll.running = True
+        yield self.poller.poll()
+
+        self.assert_all_commands_ran()
+        self.assertEqual(
+            [c['revision'] for c in self.master.data.updates.changesAdded],
+            ['fa3ae8ed68e664d4db24798611b352e3c6509930'],
+        )
+
+
+class TestGitLogParser(unittest.TestCase):
+    OUTPUT = _batched_log_output(
+        (
+            b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+            b'',
+            b'1273258009',
+            b'by <by@example.com>',
+            b'committer <committer@example.com>',
+            b'first\n\nwith body\n',
+            b'a',
+            b'dir/b c',
+        ),
+        (
+            b'64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+            b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+            b'1273258010',
+            b'by <by@example.com>',
+            b'by <by@example.com>',
+            b'empty\n',
+        ),
+    )
+
+    EXPECTED = [
+        gitpoller.GitCommitInfo(
+            revision='4423cdbcbb89c14e50dd5f4152415afd686c5241',
+            parents=[],
+            timestamp=1273258009,
+            author='by <by@example.com>',
+            committer='committer <committer@example.com>',
+            files=['a', 'dir/b c'],
+            comments='first\n\nwith body',
+        ),
+        gitpoller.GitCommitInfo(
+            revision='64a5dc2a4bd4f558b5dd193d47c83c7d7abc9a1a',
+            parents=['4423cdbcbb89c14e50dd5f4152415afd686c5241'],
+            timestamp=1273258010,
+            author='by <by@example.com>',
+            committer='by <by@example.com>',
+            files=[],
+            comments='empty',
+        ),
+    ]
+
+    def test_parse(self) -> None:
+        parser = gitpoller.GitLogParser('utf-8')
+        parser.feed(self.OUTPUT)
+        self.assertEqual(parser.finish(), self.EXPECTED)
+
+    def test_parse_chunked(self) -> None:
+        for chunk_size in [1, 2, 7, 50]:
+            parser = gitpoller.GitLogParser('utf-8')
+            for i in range(0, len(self.OUTPUT), chunk_size):
+                parser.feed(self.OUTPUT[i : i + chunk_size])
+            self.assertEqual(parser.finish(), self.EXPECTED)
+
+    def test_parse_empty(self) -> None:
+        parser = gitpoller.GitLogParser('utf-8')
+        parser.feed(b'')
+        self.assertEqual(parser.finish(), [])
+
+    def test_parse_no_timestamps(self) -> None:
+        parser = gitpoller.GitLogParser('utf-8', usetimestamps=False)
+        parser.feed(self.OUTPUT)
+        self.assertEqual([c.timestamp for c in parser.finish()], [None, None])
+
+    def test_parse_missing_author(self) -> None:
+        parser = gitpoller.GitLogParser('utf-8')
+        parser.feed(
+            _batched_log_output((
+                b'4423cdbcbb89c14e50dd5f4152415afd686c5241',
+                b'',
+                b'1273258009',
+                b'',
+                b'by <by@example.com>',
+                b'first\n',
+            ))
+        )
+        with self.assertRaises(OSError):
+            parser.finish()
+
+    def test_parse_truncated(self) -> None:
+        parser = gitpoller.GitLogParser('utf-8')
+        parser.feed(b'\x004423cdbcbb89c14e50dd5f4152415afd686c5241\x00\x001273258009')
+        with self.assertRaises(ValueError):
+            parser.finish()
+
+
 class TestGitPollerWithSshPrivateKey(TestGitPollerBase):
     def createPoller(self) -> gitpoller.GitPoller:
         return gitpoller.GitPoller(self.REPOURL, branches=['master'], sshPrivateKey='ssh-key')
@@ -2726,3 +3060,8 @@ class TestGitPollerBareRepository(
         self.assertEqual(
             branches, [{'branchid': 1, 'codebaseid': 13, 'name': 'main', 'commitid': 2}]
         )
+
+    @async_to_deferred
+    async def test_poll_from_last_batch_commit_metadata(self) -> None:
+        self.poller.batch_commit_metadata = True
+        await self.test_poll_from_last()
@@ -39,6 +39,7 @@ from buildbot.changes import base as changes_base
 from buildbot.config.errors import capture_config_errors
 from buildbot.config.master import FileLoader
 from buildbot.config.master import loadConfigDict
+from buildbot.db.logstorage import FileLogStorage
 from buildbot.process import factory
 from buildbot.process import properties
 from buildbot.process.codebase import Codebase
@@ -66,11 +67,16 @@ global_defaults = {
     "logCompressionMethod": 'zstd' if HAS_ZSTD else 'gz',
     "logEncoding": 'utf-8',
     "logMaxTailSize": None,
+    "logWriteBufferSize": 64 * 1024,
+    "logWriteBufferDelay": 1.0,
+    "logStorage": None,
+    "logSearchIndex": False,
     "logMaxSize": None,
     "properties": properties.Properties(),
     "collapseRequests": None,
     "prioritizeBuilders": None,
     "select_next_worker": None,
+    "build_distribution_concurrency": 1,
     "protocols": {},
     "multiMaster": False,
     "manhole": None,
@@ -463,12 +469,21 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
     def test_load_global_logCompressionMethod(self) -> None:
         self.do_test_load_global({"logCompressionMethod": 'bz2'}, logCompressionMethod='bz2')
 
+    def test_load_global_logCompressionMethod_zstd_dict(self) -> None:
+        if not HAS_ZSTD:
+            raise unittest.SkipTest("zstandard not installed, skip the test")
+        self.do_test_load_global(
+            {"logCompressionMethod": 'zstd_dict'}, logCompressionMethod='zstd_dict'
+        )
+
     def test_load_global_logCompressionMethod_invalid(self) -> None:
         with capture_config_errors() as errors:
             self.cfg.load_global(self.filename, {'logCompressionMethod': 'foo'})
 
         self.assertConfigError(
-            errors, "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br' or 'zstd'"
+            errors,
+            "c['logCompressionMethod'] must be 'raw', 'bz2', 'gz', 'lz4', 'br', 'zstd' "
+            "or 'zstd_dict'",
         )
 
     def test_load_global_codebaseGenerator(self) -> None:
@@ -536,6 +551,57 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
 
         self.assertConfigError(errors, "must be a callable")
 
+    def test_load_global_logWriteBufferSize(self) -> None:
+        self.do_test_load_global({"logWriteBufferSize": 0}, logWriteBufferSize=0)
+
+    def test_load_global_logWriteBufferSize_invalid(self) -> None:
+        for value in (-1, "8", None):
+            with capture_config_errors() as errors:
+                self.cfg.load_global(self.filename, {"logWriteBufferSize": value})
+
+            self.assertConfigError(errors, "must be a non-negative integer")
+
+    def test_load_global_logWriteBufferDelay(self) -> None:
+        self.do_test_load_global({"logWriteBufferDelay": 0.25}, logWriteBufferDelay=0.25)
+
+    def test_load_global_logWriteBufferDelay_invalid(self) -> None:
+        for value in (-1, "1", None):
+            with capture_config_errors() as errors:
+                self.cfg.load_global(self.filename, {"logWriteBufferDelay": value})
+
+            self.assertConfigError(errors, "must be a non-negative number")
+
+    def test_load_global_logStorage(self) -> None:
+        storage = FileLogStorage('logs')
+        self.do_test_load_global({"logStorage": storage}, logStorage=storage)
+
+    def test_load_global_logStorage_invalid(self) -> None:
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {"logStorage": "logs"})
+
+        self.assertConfigError(errors, "must be a LogStorage instance")
+
+    def test_load_global_logSearchIndex(self) -> None:
+        self.do_test_load_global({"logSearchIndex": True}, logSearchIndex=True)
+
+    def test_load_global_logSearchIndex_invalid(self) -> None:
+        with capture_config_errors() as errors:
+            self.cfg.load_global(self.filename, {"logSearchIndex": "yes"})
+
+        self.assertConfigError(errors, "must be a boolean")
+
+    def test_load_global_build_distribution_concurrency(self) -> None:
+        self.do_test_load_global(
+            {"build_distribution_concurrency": 8}, build_distribution_concurrency=8
+        )
+
+    def test_load_global_build_distribution_concurrency_invalid(self) -> None:
+        for value in (0, "8"):
+            with capture_config_errors() as errors:
+                self.cfg.load_global(self.filename, {"build_distribution_concurrency": value})
+
+            self.assertConfigError(errors, "must be a positive integer")
+
     def test_load_global_protocols_str(self) -> None:
         self.do_test_load_global(
             {"protocols": {'pb': {'port': 'udp:123'}}}, protocols={'pb': {'port': 'udp:123'}}
@@ -1014,6 +1080,13 @@ class MasterConfig_loaders(ConfigErrorsMixin, unittest.TestCase):
 
         self.assertConfigError(errors, 'Invalid www["cookie_expiration_time"]')
 
+    def test_load_www_rest_cache_invalid(self) -> None:
+        for rest_cache in (True, {'max_age': 10, 'foo': 1}):
+            with capture_config_errors() as errors:
+                self.cfg.load_www(self.filename, {'www': {"rest_cache": rest_cache}})
+
+            self.assertConfigError(errors, 'Invalid www["rest_cache"]')
+
     def test_load_www_unknown(self) -> None:
         with capture_config_errors() as errors:
             self.cfg.load_www(self.filename, {"www": {"foo": "bar"}})
@@ -345,6 +345,21 @@ class BuildsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
 
         self.assertTrue(any(('reason' in b['properties']) for b in builds))
 
+    @defer.inlineCallbacks
+    def test_properties_loaded_in_bulk(self) -> InlineCallbacksType[None]:
+        getBuildsProperties = mock.Mock(wraps=self.master.db.builds.getBuildsProperties)
+        self.patch(self.master.db.builds, 'getBuildsProperties', getBuildsProperties)
+        getBuildProperties = mock.Mock(wraps=self.master.db.builds.getBuildProperties)
+        self.patch(self.master.db.builds, 'getBuildProperties', getBuildProperties)
+        resultSpec = resultspec.OptimisedResultSpec(
+            properties=[resultspec.Property(b'property', 'eq', ['*'])]
+        )
+        builds = yield self.callGet(('builds',), resultSpec=resultSpec)
+
+        self.assertEqual(len(builds), 4)
+        getBuildsProperties.assert_called_once_with([b['buildid'] for b in builds])
+        getBuildProperties.assert_not_called()
+
     @defer.inlineCallbacks
     def test_get_filter_eq(self) -> InlineCallbacksType[None]:
         resultSpec = resultspec.OptimisedResultSpec(
@@ -0,0 +1,123 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from twisted.trial import unittest
+
+from buildbot.data import exceptions
+from buildbot.data import log_search_hits
+from buildbot.data import resultspec
+from buildbot.test import fakedb
+from buildbot.test.util import endpoint
+from buildbot.util.twisted import async_to_deferred
+
+
+class LogSearchHitsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
+    endpointClass = log_search_hits.LogSearchHitsEndpoint
+    resourceTypeClass = log_search_hits.LogSearchHit
+
+    @async_to_deferred
+    async def setUp(self) -> None:  # type: ignore[override]
+        await self.setUpEndpoint()
+        self.master.config.logSearchIndex = True
+        await self.master.db.insert_test_data([
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Buildset(id=20),
+            fakedb.Builder(id=88, name='b1'),
+            fakedb.Builder(id=89, name='b2'),
+            fakedb.BuildRequest(id=41, buildsetid=20, builderid=88),
+            fakedb.BuildRequest(id=42, buildsetid=20, builderid=89),
+            fakedb.Master(id=88),
+            fakedb.Build(
+                id=30, buildrequestid=41, number=7, masterid=88, builderid=88, workerid=47
+            ),
+            fakedb.Build(
+                id=31, buildrequestid=42, number=1, masterid=88, builderid=89, workerid=47
+            ),
+            fakedb.Step(id=131, number=1, name='step1', buildid=30, started_at=1000),
+            fakedb.Step(id=132, number=1, name='step1', buildid=31, started_at=2000),
+            fakedb.Log(id=60, stepid=131, name='stdio', slug='stdio', type='s'),
+            fakedb.Log(id=61, stepid=132, name='stdio', slug='stdio', type='s'),
+        ])
+        await self.master.db.logs.appendLog(60, 'obuilding\nesegfault at 0 ip 1\n')
+        await self.master.db.logs.appendLog(61, 'esegfault at 7 ip 2\n')
+        await self.master.db.logs.finishLog(60)
+        await self.master.db.logs.finishLog(61)
+
+    @async_to_deferred
+    async def test_get(self) -> None:
+        hits = await self.callGet(
+            ('logs', 'search'),
+            resultSpec=resultspec.ResultSpec(
+                filters=[resultspec.Filter('q', 'eq', ['segfault at'])]
+            ),
+        )
+        for hit in hits:
+            self.validateData(hit)
+        self.assertEqual(
+            hits,
+            [
+                {
+                    'q': 'segfault at',
+                    'logid': 61,
+                    'stepid': 132,
+                    'buildid': 31,
+                    'builderid': 89,
+                    'started_at': 2000,
+                    'line': 0,
+                    'snippet': 'segfault at 7 ip 2',
+                },
+                {
+                    'q': 'segfault at',
+                    'logid': 60,
+                    'stepid': 131,
+                    'buildid': 30,
+                    'builderid': 88,
+                    'started_at': 1000,
+                    'line': 1,
+                    'snippet': 'segfault at 0 ip 1',
+                },
+            ],
+        )
+
+    @async_to_deferred
+    async def test_get_filters(self) -> None:
+        for filters, expected in [
+            ([resultspec.Filter('builderid', 'eq', [88])], [60]),
+            ([resultspec.Filter('started_at', 'ge', [1500])], [61]),
+        ]:
+            rspec = resultspec.ResultSpec(
+                filters=[resultspec.Filter('q', 'eq', ['segfault']), *filters]
+            )
+            hits = await self.callGet(('logs', 'search'), resultSpec=rspec)
+            self.assertEqual([hit['logid'] for hit in hits], expected)
+            self.assertEqual(rspec.filters, [])
+
+    @async_to_deferred
+    async def test_get_limit(self) -> None:
+        rspec = resultspec.ResultSpec(filters=[resultspec.Filter('q', 'eq', ['segfault'])], limit=1)
+        hits = await self.callGet(('logs', 'search'), resultSpec=rspec)
+        self.assertEqual([hit['logid'] for hit in hits], [61])
+
+    @async_to_deferred
+    async def test_get_invalid_query(self) -> None:
+        with self.assertRaises(exceptions.InvalidQueryParameter):
+            await self.callGet(('logs', 'search'))
+        with self.assertRaises(exceptions.InvalidQueryParameter):
+            await self.callGet(
+                ('logs', 'search'),
+                resultSpec=resultspec.ResultSpec(filters=[resultspec.Filter('q', 'eq', ['at'])]),
+            )
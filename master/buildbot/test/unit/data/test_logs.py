@@ -23,6 +23,7 @@ from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.data import logs
+from buildbot.data import resultspec
 from buildbot.db.logs import LogSlugExistsError
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
@@ -155,6 +156,16 @@ class LogsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
 
         self.assertEqual(sorted([b['name'] for b in logs]), ['errors', 'stdio'])
 
+    @defer.inlineCallbacks
+    def test_get_stepid_resultspec_pushed_down(self) -> InlineCallbacksType[None]:
+        resultSpec = resultspec.ResultSpec(
+            filters=[resultspec.Filter('type', 'in', ['s', 't'])], order=['-logid'], limit=1
+        )
+        logs = yield self.callGet(('steps', 50, 'logs'), resultSpec=resultSpec)
+
+        self.assertEqual([b['logid'] for b in logs], [61])
+        self.assertResultSpecConsumed(resultSpec)
+
     @defer.inlineCallbacks
     def test_get_stepid_empty(self) -> InlineCallbacksType[None]:
         logs = yield self.callGet(('steps', 52, 'logs'))
@@ -151,32 +151,25 @@ class Properties(interfaces.InterfaceTests, TestReactorMixin, unittest.TestCase)
             fakedb.Build(id=1234, builderid=1, buildrequestid=5, masterid=3, workerid=42),
         ])
 
-        self.master.db.builds.setBuildProperty = mock.Mock(
-            wraps=self.master.db.builds.setBuildProperty
+        self.master.db.builds.setBuildProperties = mock.Mock(
+            wraps=self.master.db.builds.setBuildProperties
         )
         props = processProperties.fromDict({"a": (1, 't'), "b": (['abc', 9], 't')})
         yield self.rtype.setBuildProperties(1234, props)
-        setBuildPropertiesCalls = sorted(self.master.db.builds.setBuildProperty.mock_calls)
-        self.assertEqual(
-            setBuildPropertiesCalls,
-            [mock.call(1234, 'a', 1, 't'), mock.call(1234, 'b', ['abc', 9], 't')],
+        self.master.db.builds.setBuildProperties.assert_called_once_with(
+            1234, {'a': (1, 't'), 'b': (['abc', 9], 't')}
         )
         self.master.mq.assertProductions([
             (('builds', '1234', 'properties', 'update'), {'a': (1, 't'), 'b': (['abc', 9], 't')}),
         ])
-        # sync without changes: no db write
-        self.master.db.builds.setBuildProperty.reset_mock()
+        # sync without changes: no event
         self.master.mq.clearProductions()
         yield self.rtype.setBuildProperties(1234, props)
-        self.master.db.builds.setBuildProperty.assert_not_called()
         self.master.mq.assertProductions([])
 
-        # sync with one changes: one db write
+        # sync with one changes: only the change is sent
         props.setProperty('b', 2, 'step')
-        self.master.db.builds.setBuildProperty.reset_mock()
         yield self.rtype.setBuildProperties(1234, props)
-
-        self.master.db.builds.setBuildProperty.assert_called_with(1234, 'b', 2, 'step')
         self.master.mq.assertProductions([
             (('builds', '1234', 'properties', 'update'), {'b': (2, 'step')})
         ])
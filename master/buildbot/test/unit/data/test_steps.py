@@ -21,6 +21,7 @@ from typing import TYPE_CHECKING
 from twisted.internet import defer
 from twisted.trial import unittest
 
+from buildbot.data import resultspec
 from buildbot.data import steps
 from buildbot.db.steps import StepModel
 from buildbot.db.steps import UrlModel
@@ -214,6 +215,29 @@ class StepsEndpoint(endpoint.EndpointMixin, unittest.TestCase):
 
         self.assertEqual([s['number'] for s in steps], [0, 1, 2])
 
+    @defer.inlineCallbacks
+    def test_get_resultspec_pushed_down(self) -> InlineCallbacksType[None]:
+        resultSpec = resultspec.ResultSpec(
+            filters=[
+                resultspec.Filter('complete', 'eq', [True]),
+                resultspec.Filter('results', 'ne', [2]),
+            ],
+            order=['-number'],
+            limit=5,
+        )
+        steps = yield self.callGet(('builds', 30, 'steps'), resultSpec=resultSpec)
+
+        self.assertEqual([s['stepid'] for s in steps], [70])
+        self.assertResultSpecConsumed(resultSpec)
+
+    @defer.inlineCallbacks
+    def test_get_resultspec_order_and_pagination(self) -> InlineCallbacksType[None]:
+        resultSpec = resultspec.ResultSpec(order=['-number'], limit=2, offset=0)
+        steps = yield self.callGet(('builds', 30, 'steps'), resultSpec=resultSpec)
+
+        self.assertEqual([s['number'] for s in steps], [2, 1])
+        self.assertResultSpecConsumed(resultSpec)
+
 
 class Step(TestReactorMixin, interfaces.InterfaceTests, unittest.TestCase):
     @defer.inlineCallbacks
@@ -291,6 +291,32 @@ class WorkersEndpoint(endpoint.EndpointMixin, unittest.TestCase):
         self.validateData(worker)
         self.assertEqual(worker['paused'], True)
 
+    @defer.inlineCallbacks
+    def test_get_paginated(self) -> InlineCallbacksType[None]:
+        # worker 2 is configured on three builders, which must not count
+        # against the limit
+        resultSpec = resultspec.ResultSpec(order=['-workerid'], limit=1, offset=0)
+        workers = yield self.callGet(('workers',), resultSpec=resultSpec)
+
+        for b in workers:
+            self.validateData(b)
+            b['configured_on'] = sorted(b['configured_on'], key=configuredOnKey)
+        self.assertEqual(workers, [w2()])
+        self.assertResultSpecConsumed(resultSpec)
+
+    @defer.inlineCallbacks
+    def test_get_masterid_filter_name(self) -> InlineCallbacksType[None]:
+        resultSpec = resultspec.ResultSpec(filters=[resultspec.Filter('name', 'eq', ['linux'])])
+        workers = yield self.callGet(('masters', '14', 'workers'), resultSpec=resultSpec)
+
+        for b in workers:
+            b['configured_on'] = sorted(b['configured_on'], key=configuredOnKey)
+        self.assertEqual(
+            sorted(workers, key=configuredOnKey),
+            sorted([w1(masterid=14)], key=configuredOnKey),
+        )
+        self.assertResultSpecConsumed(resultSpec)
+
 
 class Worker(TestReactorMixin, interfaces.InterfaceTests, unittest.TestCase):
     @defer.inlineCallbacks
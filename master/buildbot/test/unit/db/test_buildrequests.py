@@ -362,6 +362,68 @@ class Tests(TestReactorMixin, unittest.TestCase):
     def test_getBuildRequests_no_repository_nor_branch(self) -> Deferred[None]:
         return self.do_test_getBuildRequests_branch_arg(expected=[70, 80, 90])
 
+    @defer.inlineCallbacks
+    def test_get_unclaimed_buildrequests_summary(self) -> InlineCallbacksType[None]:
+        yield self.master.db.insert_test_data([
+            fakedb.BuildRequest(
+                id=50,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID1,
+                priority=5,
+                submitted_at=self.SUBMITTED_AT_EPOCH + 10,
+            ),
+            fakedb.BuildRequest(
+                id=51,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID1,
+                priority=2,
+                submitted_at=self.SUBMITTED_AT_EPOCH,
+            ),
+            # claimed, so neither its priority nor its time count
+            fakedb.BuildRequest(
+                id=52,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID1,
+                priority=20,
+                submitted_at=self.SUBMITTED_AT_EPOCH - 10,
+            ),
+            fakedb.BuildRequestClaim(
+                brid=52, masterid=self.OTHER_MASTER_ID, claimed_at=self.CLAIMED_AT_EPOCH
+            ),
+            fakedb.BuildRequest(
+                id=53,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID2,
+                priority=1,
+                submitted_at=self.SUBMITTED_AT_EPOCH,
+            ),
+            # builder 3 only has a complete request
+            fakedb.BuildRequest(
+                id=54,
+                buildsetid=self.BSID,
+                builderid=self.BLDRID3,
+                complete=1,
+                complete_at=self.COMPLETE_AT_EPOCH,
+            ),
+        ])
+        summary = yield self.db.buildrequests.get_unclaimed_buildrequests_summary()
+
+        self.assertEqual(
+            summary,
+            {
+                self.BLDRID1: buildrequests.UnclaimedBuildRequestsSummaryModel(
+                    builderid=self.BLDRID1,
+                    highest_priority=5,
+                    oldest_submitted_at=self.SUBMITTED_AT,
+                ),
+                self.BLDRID2: buildrequests.UnclaimedBuildRequestsSummaryModel(
+                    builderid=self.BLDRID2,
+                    highest_priority=1,
+                    oldest_submitted_at=self.SUBMITTED_AT,
+                ),
+            },
+        )
+
     def failWithExpFailure(self, exc: Exception, expfailure: type[Exception] | None = None) -> None:
         if not expfailure:
             raise exc
@@ -438,6 +438,28 @@ class Tests(TestReactorMixin, unittest.TestCase):
             },
         )
 
+    @defer.inlineCallbacks
+    def test_getBuildsProperties(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(50, 'prop', 42, 'test')
+        yield self.db.builds.setBuildProperty(50, 'prop2', 'x', 'test2')
+        yield self.db.builds.setBuildProperty(52, 'prop', 44, 'test')
+        props = yield self.db.builds.getBuildsProperties([50, 51, 52, 53])
+        self.assertEqual(
+            props,
+            {
+                50: {'prop': (42, 'test'), 'prop2': ('x', 'test2')},
+                51: {},
+                52: {'prop': (44, 'test')},
+                53: {},
+            },
+        )
+
+    @defer.inlineCallbacks
+    def test_getBuildsProperties_empty(self) -> InlineCallbacksType[None]:
+        props = yield self.db.builds.getBuildsProperties([])
+        self.assertEqual(props, {})
+
     @defer.inlineCallbacks
     def testsetandgetProperties(self) -> InlineCallbacksType[None]:
         yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
@@ -466,6 +488,70 @@ class Tests(TestReactorMixin, unittest.TestCase):
         props = yield self.db.builds.getBuildProperties(50)
         self.assertEqual(props, {'prop': (45, 'test_source')})
 
+    @defer.inlineCallbacks
+    def test_setBuildProperties(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(51, 'prop', 1, 'other build')
+        updated = yield self.db.builds.setBuildProperties(
+            50, {'prop': (42, 'test'), 'prop2': ([1, 'a'], 'test')}
+        )
+        self.assertEqual(updated, {'prop': (42, 'test'), 'prop2': ([1, 'a'], 'test')})
+        props = yield self.db.builds.getBuildProperties(50)
+        self.assertEqual(props, {'prop': (42, 'test'), 'prop2': ([1, 'a'], 'test')})
+
+        # only the new and changed properties are written
+        updated = yield self.db.builds.setBuildProperties(
+            50,
+            {
+                'prop': (43, 'test'),
+                'prop2': ([1, 'a'], 'test_source'),
+                'prop3': ('x', 'test'),
+                'prop4': (None, 'test'),
+            },
+        )
+        self.assertEqual(
+            updated,
+            {
+                'prop': (43, 'test'),
+                'prop2': ([1, 'a'], 'test_source'),
+                'prop3': ('x', 'test'),
+                'prop4': (None, 'test'),
+            },
+        )
+        updated = yield self.db.builds.setBuildProperties(
+            50, {'prop': (43, 'test'), 'prop3': ('y', 'test')}
+        )
+        self.assertEqual(updated, {'prop3': ('y', 'test')})
+        props = yield self.db.builds.getBuildProperties(50)
+        self.assertEqual(
+            props,
+            {
+                'prop': (43, 'test'),
+                'prop2': ([1, 'a'], 'test_source'),
+                'prop3': ('y', 'test'),
+                'prop4': (None, 'test'),
+            },
+        )
+        props = yield self.db.builds.getBuildProperties(51)
+        self.assertEqual(props, {'prop': (1, 'other build')})
+
+    @defer.inlineCallbacks
+    def test_setBuildProperties_same_value(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
+        yield self.db.builds.setBuildProperty(50, 'prop', {'a': 1, 'b': [2]}, 'test')
+
+        # the same dict, with its keys in another order, is not written again
+        updated = yield self.db.builds.setBuildProperties(
+            50, {'prop': ({'b': [2], 'a': 1}, 'test')}
+        )
+        self.assertEqual(updated, {})
+
+    @defer.inlineCallbacks
+    def test_setBuildProperties_none(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.backgroundData + self.threeBuilds)
+        updated = yield self.db.builds.setBuildProperties(50, {})
+        self.assertEqual(updated, {})
+
     @defer.inlineCallbacks
     def test_addBuild_existing_race(self) -> InlineCallbacksType[None]:
         self.reactor.advance(TIME1)
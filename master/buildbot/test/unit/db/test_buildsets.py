@@ -151,6 +151,34 @@ class Tests(TestReactorMixin, unittest.TestCase):
         "returns an empty dict even if no such buildset exists"
         return self.do_test_getBuildsetProperties(91, [], {})
 
+    @defer.inlineCallbacks
+    def test_getBuildsetsProperties(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data([
+            fakedb.Buildset(id=91, complete=0, results=-1, submitted_at=0),
+            fakedb.Buildset(id=92, complete=0, results=-1, submitted_at=0),
+            fakedb.Buildset(id=93, complete=0, results=-1, submitted_at=0),
+            fakedb.BuildsetProperty(
+                buildsetid=91, property_name='prop1', property_value='["one", "fake1"]'
+            ),
+            fakedb.BuildsetProperty(
+                buildsetid=91, property_name='prop2', property_value='["two", "fake2"]'
+            ),
+            fakedb.BuildsetProperty(
+                buildsetid=93, property_name='prop1', property_value='["three", "fake3"]'
+            ),
+        ])
+        props = yield self.db.buildsets.getBuildsetsProperties([91, 92, 93, 94])
+
+        self.assertEqual(
+            props,
+            {
+                91: {"prop1": ('one', 'fake1'), "prop2": ('two', 'fake2')},
+                92: {},
+                93: {"prop1": ('three', 'fake3')},
+                94: {},
+            },
+        )
+
     @defer.inlineCallbacks
     def test_getBuildset_incomplete_zero(self) -> InlineCallbacksType[None]:
         yield self.db.insert_test_data([
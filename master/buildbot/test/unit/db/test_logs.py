@@ -16,6 +16,7 @@
 from __future__ import annotations
 
 import base64
+import random
 import textwrap
 from typing import TYPE_CHECKING
 from typing import Any
@@ -250,6 +251,72 @@ class Tests(TestReactorMixin, unittest.TestCase):
         # check line number reversal
         self.assertEqual((yield self.db.logs.getLogLines(201, 6, 3)), '')
 
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache(self) -> InlineCallbacksType[None]:
+        cache = self.db.logs._chunk_cache
+        cache.set_max_size(1024 * 1024)
+        yield self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        yield self.checkTestLogLines()
+        self.assertEqual(sorted(cache.keys()), [(201, 0), (201, 2), (201, 5), (201, 6)])
+
+        # the chunks are not read from the database again
+        misses = cache.misses
+        with mock.patch.object(self.db.logs, '_defer_to_compression_pool') as uncompress:
+            yield self.checkTestLogLines()
+        uncompress.assert_not_called()
+        self.assertEqual(cache.misses, misses)
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_compressLog(self) -> InlineCallbacksType[None]:
+        cache = self.db.logs._chunk_cache
+        cache.set_max_size(1024 * 1024)
+        yield self.db.insert_test_data(self.backgroundData + self.testLogLines)
+
+        yield self.checkTestLogLines()
+        yield self.db.logs.compressLog(201)
+        self.assertEqual(cache.keys(), [])
+        yield self.checkTestLogLines()
+        self.assertEqual(cache.keys(), [(201, 0)])
+
+    @defer.inlineCallbacks
+    def test_getLogLines_chunk_cache_chunks_changed(self) -> InlineCallbacksType[None]:
+        # chunks merged by another master are not invalidated in this cache
+        cache = self.db.logs._chunk_cache
+        cache.set_max_size(1024 * 1024)
+        yield self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+
+        def thd_merge_chunks(conn: sa.engine.Connection) -> None:
+            tbl = self.db.model.logchunks
+            conn.execute(tbl.delete().where(tbl.c.logid == 201))
+            conn.execute(
+                tbl.insert(),
+                {
+                    "logid": 201,
+                    "first_line": 0,
+                    "last_line": 6,
+                    "content": b"line zero\nline 1" + b"x" * 200 + b"\nline TWO\n\n"
+                    b"line 2**2\nanother line\nyet another line",
+                    "compressed": 0,
+                },
+            )
+            conn.commit()
+
+        yield self.db.pool.do(thd_merge_chunks)
+        yield self.checkTestLogLines()
+
+    @defer.inlineCallbacks
+    def test_deleteOldLogChunks_clears_chunk_cache(self) -> InlineCallbacksType[None]:
+        cache = self.db.logs._chunk_cache
+        cache.set_max_size(1024 * 1024)
+        yield self.db.insert_test_data(self.backgroundData + self.testLogLines)
+        yield self.checkTestLogLines()
+
+        yield self.db.logs.deleteOldLogChunks(self.TIMESTAMP_STEP101 + 1)
+        self.assertEqual(cache.keys(), [])
+        self.assertEqual((yield self.db.logs.getLogLines(201, 0, 6)), '')
+
     @defer.inlineCallbacks
     def test_getLogLines_empty(self) -> InlineCallbacksType[None]:
         yield self.db.insert_test_data([
@@ -534,6 +601,164 @@ class Tests(TestReactorMixin, unittest.TestCase):
         self.db.master.config.logCompressionMethod = "br"
         await self._test_compress_big_chunk(compression.BrotliCompressor, 5)
 
+    @async_to_deferred
+    async def test_zstd_dict_compress_big_chunk(self) -> None:
+        if not compression.ZStdDictCompressor.available:
+            raise unittest.SkipTest("zstandard not installed, skip the test")
+
+        # no dictionary was trained yet, plain zstd frames are written
+        self.db.master.config.logCompressionMethod = "zstd_dict"
+        await self._test_compress_big_chunk(compression.ZStdDictCompressor, 6)
+
+    def make_compile_log_chunks(self, logid: int, seed: int) -> list[fakedb.LogChunk]:
+        rnd = random.Random(seed)
+        lines = [
+            f"[{i}/4000] gcc -O2 -Wall -Isrc/include -c src/module{rnd.randint(0, 50)}/"
+            f"file{rnd.randint(0, 1000)}.c -o build/obj{rnd.randint(0, 1000)}.o"
+            for i in range(4000)
+        ]
+        return [
+            fakedb.LogChunk(
+                logid=logid,
+                first_line=first_line,
+                last_line=first_line + 99,
+                compressed=0,
+                content="\n".join(lines[first_line : first_line + 100]),
+            )
+            for first_line in range(0, len(lines), 100)
+        ]
+
+    async def setup_zstd_dict_logs(self) -> None:
+        if not compression.ZStdDictCompressor.available:
+            raise unittest.SkipTest("zstandard not installed, skip the test")
+
+        self.db.master.config.logCompressionMethod = "zstd_dict"
+        await self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.Log(id=201, stepid=101, name='stdio', slug='stdio', num_lines=4000),
+            fakedb.Log(id=202, stepid=102, name='stdio', slug='stdio', num_lines=4000),
+            *self.make_compile_log_chunks(201, 1),
+            *self.make_compile_log_chunks(202, 2),
+        ])
+
+    def get_dictionaries(self) -> Deferred[list[tuple[int, int, str, int]]]:
+        def thd(conn: sa.Connection) -> list[tuple[int, int, str, int]]:
+            tbl = self.db.model.logchunk_dictionaries
+            q = sa.select(tbl.c.id, tbl.c.builderid, tbl.c.log_name, tbl.c.created_at)
+            return [tuple(row) for row in conn.execute(q.order_by(tbl.c.id))]
+
+        return self.db.pool.do(thd)
+
+    def get_chunk_dictionary_ids(self, logid: int) -> Deferred[list[tuple[int, int | None]]]:
+        def thd(conn: sa.Connection) -> list[tuple[int, int | None]]:
+            tbl = self.db.model.logchunks
+            q = sa.select(tbl.c.compressed, tbl.c.content).where(tbl.c.logid == logid)
+            return [
+                (
+                    row.compressed,
+                    compression.ZStdDictCompressor.get_dictionary_id(row.content)
+                    if row.compressed == 6
+                    else None,
+                )
+                for row in conn.execute(q.order_by(tbl.c.first_line))
+            ]
+
+        return self.db.pool.do(thd)
+
+    @async_to_deferred
+    async def test_zstd_dict_train_dictionary(self) -> None:
+        await self.setup_zstd_dict_logs()
+        self.reactor.advance(1000)
+        expected_lines = await self.db.logs.getLogLines(202, 0, 3999)
+
+        await self.db.logs.compressLog(202)
+
+        self.assertEqual(await self.get_dictionaries(), [(1, 88, 'stdio', 1000)])
+        dict_id = 1 + compression.ZStdDictCompressor.DICTIONARY_ID_OFFSET
+        self.assertEqual(set(await self.get_chunk_dictionary_ids(202)), {(6, dict_id)})
+
+        # a restarted master loads the dictionary from the database
+        compression.ZStdDictCompressor.clear_dictionaries()
+        self.db.logs._chunk_cache.clear()
+        self.assertEqual(await self.db.logs.getLogLines(202, 0, 3999), expected_lines)
+
+        # new logs of the same builder and name are compressed with the dictionary
+        logid = await self.db.logs.addLog(102, 'stdio', 'stdio2', 's')
+        logid2 = await self.db.logs.addLog(102, 'other', 'other', 's')
+        content = ''.join(f'[{i}/2] gcc -O2 -Wall -c src/module1/file2.c\n' for i in range(3))
+        await self.db.logs.appendLog(logid, content)
+        await self.db.logs.appendLog(logid2, content)
+        self.assertEqual(await self.get_chunk_dictionary_ids(logid), [(6, dict_id)])
+        self.assertEqual(await self.get_chunk_dictionary_ids(logid2), [(6, 0)])
+        self.assertEqual(await self.db.logs.getLogLines(logid, 0, 2), content)
+
+    @async_to_deferred
+    async def test_zstd_dict_not_enough_content(self) -> None:
+        await self.setup_zstd_dict_logs()
+        self.patch(self.db.logs, 'DICTIONARY_MIN_TRAINING_SIZE', 10 * 1024 * 1024)
+        expected_lines = await self.db.logs.getLogLines(202, 0, 3999)
+
+        await self.db.logs.compressLog(202, force=True)
+
+        self.assertEqual(await self.get_dictionaries(), [])
+        self.assertEqual(set(await self.get_chunk_dictionary_ids(202)), {(6, 0)})
+        self.assertEqual(await self.db.logs.getLogLines(202, 0, 3999), expected_lines)
+
+    @async_to_deferred
+    async def test_zstd_dict_new_version(self) -> None:
+        await self.setup_zstd_dict_logs()
+        await self.db.logs.compressLog(201)
+        expected_lines = await self.db.logs.getLogLines(201, 0, 3999)
+
+        # a dictionary is not trained again before it gets old
+        await self.db.logs.compressLog(202)
+        self.assertEqual(len(await self.get_dictionaries()), 1)
+
+        self.reactor.advance(self.db.logs.DICTIONARY_MAX_AGE + 1)
+        await self.db.logs.compressLog(202, force=True)
+        self.assertEqual(
+            await self.get_dictionaries(),
+            [(1, 88, 'stdio', 0), (2, 88, 'stdio', self.db.logs.DICTIONARY_MAX_AGE + 1)],
+        )
+        offset = compression.ZStdDictCompressor.DICTIONARY_ID_OFFSET
+        self.assertEqual(set(await self.get_chunk_dictionary_ids(201)), {(6, 1 + offset)})
+        self.assertEqual(set(await self.get_chunk_dictionary_ids(202)), {(6, 2 + offset)})
+
+        # the chunks compressed with the previous version are still readable
+        compression.ZStdDictCompressor.clear_dictionaries()
+        self.db.logs._chunk_cache.clear()
+        self.assertEqual(await self.db.logs.getLogLines(201, 0, 3999), expected_lines)
+
+    @async_to_deferred
+    async def test_zstd_dict_missing_dictionary(self) -> None:
+        await self.setup_zstd_dict_logs()
+        await self.db.logs.compressLog(202)
+
+        def thd(conn: sa.Connection) -> None:
+            conn.execute(self.db.model.logchunk_dictionaries.delete())
+            conn.commit()
+
+        await self.db.pool.do(thd)
+        compression.ZStdDictCompressor.clear_dictionaries()
+        self.db.logs._chunk_cache.clear()
+        with self.assertRaises(logs.LogCompressionFormatUnavailableError):
+            await self.db.logs.getLogLines(202, 0, 3999)
+
+    @async_to_deferred
+    async def test_deleteOldLogChunks_deletes_replaced_dictionaries(self) -> None:
+        await self.db.insert_test_data([
+            *self.backgroundData,
+            fakedb.LogChunkDictionary(id=1, builderid=88, log_name='stdio', created_at=1000),
+            fakedb.LogChunkDictionary(id=2, builderid=88, log_name='stdio', created_at=2000),
+            fakedb.LogChunkDictionary(id=3, builderid=88, log_name='stdio', created_at=9000),
+            fakedb.LogChunkDictionary(id=4, builderid=88, log_name='other', created_at=1000),
+        ])
+        await self.db.logs.deleteOldLogChunks(2000 + self.db.logs.DICTIONARY_REFRESH_INTERVAL + 1)
+        self.assertEqual(
+            await self.get_dictionaries(),
+            [(2, 88, 'stdio', 2000), (3, 88, 'stdio', 9000), (4, 88, 'other', 1000)],
+        )
+
     @defer.inlineCallbacks
     def do_addLogLines_huge_log(
         self, NUM_CHUNKS: int = 3000, chunk: str = ('xy' * 70 + '\n') * 3
@@ -0,0 +1,180 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from unittest import mock
+
+from twisted.trial import unittest
+
+from buildbot.db import logsearch
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.unit.db import test_logs
+from buildbot.util.twisted import async_to_deferred
+
+
+class Tests(TestReactorMixin, unittest.TestCase):
+    @async_to_deferred
+    async def setUp(self) -> None:  # type: ignore[override]
+        self.setup_test_reactor()
+        self.master = await fakemaster.make_master(self, wantDb=True)
+        self.master.config.logSearchIndex = True
+        self.db = self.master.db
+        await self.db.insert_test_data([
+            *test_logs.Tests.backgroundData,
+            fakedb.Builder(id=89, name='b2'),
+            fakedb.BuildRequest(id=42, buildsetid=20, builderid=89),
+            fakedb.Build(
+                id=31, buildrequestid=42, number=1, masterid=88, builderid=89, workerid=47
+            ),
+            fakedb.Step(id=103, buildid=31, number=1, name='one', started_at=300000),
+        ])
+
+    async def add_log(self, stepid: int, content: str) -> int:
+        logid = await self.db.logs.addLog(stepid, 'stdio', f'stdio{stepid}', 's')
+        await self.db.logs.appendLog(logid, content)
+        await self.db.logs.finishLog(logid)
+        return logid
+
+    async def search(self, query: str, **kwargs: int) -> list[tuple[int, int, str]]:
+        hits = await self.db.logsearch.searchLogs(query, **kwargs)
+        return [(hit.logid, hit.line, hit.snippet) for hit in hits]
+
+    @async_to_deferred
+    async def test_search(self) -> None:
+        logid = await self.add_log(
+            101,
+            'ocompiling\n'
+            'eprogram[1234]: Segfault at 0 ip 00005555\n'
+            'orunning tests\n'
+            'etest[42]: segfault at 7f00 ip 00006666\n',
+        )
+        self.assertEqual(
+            await self.search('segfault at'),
+            [
+                (logid, 1, 'program[1234]: Segfault at 0 ip 00005555'),
+                (logid, 3, 'test[42]: segfault at 7f00 ip 00006666'),
+            ],
+        )
+        self.assertEqual(await self.search('tests'), [(logid, 2, 'running tests')])
+        # the stream of the lines is not part of their content
+        self.assertEqual(
+            await self.search('program'), [(logid, 1, 'program[1234]: Segfault at 0 ip 00005555')]
+        )
+        # the edges of the query match whole words
+        self.assertEqual(await self.search('segfault a'), [])
+        self.assertEqual(await self.search('egfault at'), [])
+        # all words must be in the line, in order
+        self.assertEqual(await self.search('at segfault'), [])
+        self.assertEqual(await self.search('missing'), [])
+
+    @async_to_deferred
+    async def test_search_invalid_query(self) -> None:
+        for query in ['at', '1234 42', ' - ']:
+            with self.assertRaises(logsearch.LogSearchQueryError):
+                await self.search(query)
+
+    @async_to_deferred
+    async def test_search_filters(self) -> None:
+        logid1 = await self.add_log(101, 'osegfault at 1\n')
+        logid2 = await self.add_log(102, 'osegfault at 2\n')
+        logid3 = await self.add_log(103, 'osegfault at 3\n')
+
+        self.assertEqual(
+            [hit[0] for hit in await self.search('segfault')], [logid3, logid2, logid1]
+        )
+        self.assertEqual(
+            [hit[0] for hit in await self.search('segfault', builderid=88)],
+            [
+                logid2,
+                logid1,
+            ],
+        )
+        self.assertEqual(
+            [
+                hit[0]
+                for hit in await self.search('segfault', since=test_logs.Tests.TIMESTAMP_STEP102)
+            ],
+            [logid3, logid2],
+        )
+        self.assertEqual(
+            [hit[0] for hit in await self.search('segfault', limit=2)],
+            [
+                logid3,
+                logid2,
+            ],
+        )
+
+    @async_to_deferred
+    async def test_index_across_appends_and_blocks(self) -> None:
+        self.patch(logsearch.LogSearchConnectorComponent, 'BLOCK_LINES', 4)
+        logid = await self.db.logs.addLog(101, 'stdio', 'stdio', 's')
+        with mock.patch.object(
+            self.db.logsearch, 'indexLines', wraps=self.db.logsearch.indexLines
+        ) as indexLines:
+            for i in range(9):
+                await self.db.logs.appendLog(logid, f'oline {i} common\nowarning {i}\n')
+            # lines are indexed once they complete a block
+            self.assertEqual(indexLines.call_count, 4)
+            hits = await self.search('common')
+            self.assertEqual([line for _, line, _ in hits], list(range(0, 16, 2)))
+
+            # and the remaining lines when the log is finished
+            await self.db.logs.finishLog(logid)
+            self.assertEqual(indexLines.call_count, 5)
+
+        hits = await self.search('common')
+        self.assertEqual([line for _, line, _ in hits], list(range(0, 18, 2)))
+        hits = await self.search('warning 7')
+        self.assertEqual(hits, [(logid, 15, 'warning 7')])
+
+        # words already indexed for a block are not stored again
+        def thd(conn: object) -> list[tuple[int, int]]:
+            tbl = self.db.model.log_search_postings
+            q = tbl.select().where(tbl.c.logid == logid)
+            return [(row.block, row.term) for row in conn.execute(q)]  # type: ignore[attr-defined]
+
+        postings = await self.db.pool.do(thd)
+        self.assertEqual(len(postings), len(set(postings)))
+        self.assertEqual(sorted({block for block, _ in postings}), [0, 1, 2, 3, 4])
+
+    @async_to_deferred
+    async def test_snippet(self) -> None:
+        self.patch(logsearch.LogSearchConnectorComponent, 'SNIPPET_CONTEXT', 5)
+        logid = await self.add_log(101, 'o' + 'a' * 20 + ' segfault at ' + 'b' * 20 + '\n')
+        self.assertEqual(await self.search('segfault at'), [(logid, 0, 'aaaa segfault at bbbb')])
+
+    @async_to_deferred
+    async def test_not_indexed_when_disabled(self) -> None:
+        self.master.config.logSearchIndex = False
+        await self.add_log(101, 'osegfault at 1\n')
+        self.assertEqual(await self.search('segfault'), [])
+
+    @async_to_deferred
+    async def test_pruned_with_old_logs(self) -> None:
+        logid1 = await self.add_log(101, 'osegfault at 1\n')
+        logid2 = await self.add_log(102, 'osegfault at 2\n')
+
+        await self.db.logs.deleteOldLogChunks(test_logs.Tests.TIMESTAMP_STEP102)
+
+        self.assertEqual([hit[0] for hit in await self.search('segfault')], [logid2])
+
+        def thd(conn: object) -> set[int]:
+            tbl = self.db.model.log_search_postings
+            return {row.logid for row in conn.execute(tbl.select())}  # type: ignore[attr-defined]
+
+        self.assertNotIn(logid1, await self.db.pool.do(thd))
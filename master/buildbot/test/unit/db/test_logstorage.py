@@ -0,0 +1,318 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+from typing import Any
+from unittest import mock
+
+import sqlalchemy as sa
+from twisted.trial import unittest
+
+from buildbot.db.logstorage import FileLogStorage
+from buildbot.db.logstorage import S3LogStorage
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.fake.s3 import FakeS3Client
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from buildbot.db.logstorage import LogStorage
+
+
+class LogStorageTestsMixin(TestReactorMixin):
+    TIMESTAMP_STEP101 = 100000
+    TIMESTAMP_STEP102 = 200000
+
+    def make_storage(self) -> LogStorage:
+        raise NotImplementedError
+
+    @async_to_deferred
+    async def setUp(self) -> None:  # type: ignore[override]
+        self.setup_test_reactor()
+        self.master = await fakemaster.make_master(self, wantDb=True)
+        self.db = self.master.db
+        self.master.config.logCompressionMethod = 'gz'
+        self.storage = self.make_storage()
+        self.master.config.logStorage = self.storage
+
+        await self.db.insert_test_data([
+            fakedb.Worker(id=47, name='linux'),
+            fakedb.Buildset(id=20),
+            fakedb.Builder(id=88, name='b1'),
+            fakedb.BuildRequest(id=41, buildsetid=20, builderid=88),
+            fakedb.Master(id=88),
+            fakedb.Build(
+                id=30, buildrequestid=41, number=7, masterid=88, builderid=88, workerid=47
+            ),
+            fakedb.Step(
+                id=101, buildid=30, number=1, name='one', started_at=self.TIMESTAMP_STEP101
+            ),
+            fakedb.Step(
+                id=102, buildid=30, number=2, name='two', started_at=self.TIMESTAMP_STEP102
+            ),
+        ])
+
+    async def count_logchunks(self) -> int:
+        def thd(conn: sa.engine.Connection) -> int:
+            tbl = self.db.model.logchunks
+            return conn.execute(sa.select(sa.func.count(tbl.c.logid))).scalar_one()
+
+        return await self.db.pool.do(thd)
+
+    async def add_log(self, stepid: int = 101, name: str = 'stdio') -> int:
+        return await self.db.logs.addLog(stepid=stepid, name=name, slug=name, type='s')
+
+    async def append_lines(self, logid: int, lines: list[str], batch: int) -> None:
+        for i in range(0, len(lines), batch):
+            await self.db.logs.appendLog(logid, ''.join(lines[i : i + batch]))
+
+    async def check_lines(self, logid: int, lines: list[str]) -> None:
+        step = max(1, len(lines) // 20)
+        for first_line in range(0, len(lines), step):
+            for last_line in range(first_line, len(lines) + 1, step):
+                self.assertEqual(
+                    await self.db.logs.getLogLines(logid, first_line, last_line),
+                    ''.join(lines[first_line : last_line + 1]),
+                    f'lines {first_line}-{last_line}',
+                )
+        log_lines = [line async for line in self.db.logs.iter_log_lines(logid)]
+        self.assertEqual(log_lines, lines)
+
+    @async_to_deferred
+    async def test_append_lines(self) -> None:
+        logid = await self.add_log()
+        lines = [f'line {i} \N{SNOWMAN}\n' for i in range(20)]
+
+        self.assertEqual(await self.db.logs.appendLog(logid, ''.join(lines[:3])), (0, 2))
+        self.assertEqual(await self.db.logs.appendLog(logid, lines[3]), (3, 3))
+        await self.append_lines(logid, lines[4:], 3)
+
+        log = await self.db.logs.getLog(logid)
+        assert log is not None
+        self.assertEqual(log.num_lines, 20)
+        self.assertEqual(await self.count_logchunks(), 0)
+        await self.check_lines(logid, lines)
+
+    @async_to_deferred
+    async def test_storage_thread_pool(self) -> None:
+        logid = await self.add_log()
+        await self.db.logs.appendLog(logid, 'line\n')
+
+        # blocking operations do not wait for the log compression threads
+        self.assertIs(self.storage._threadpool, self.db.logs._log_storage_pool)
+        self.assertIsNot(self.storage._threadpool, self.db.logs._compression_pool)
+
+    @async_to_deferred
+    async def test_compress_log(self) -> None:
+        logid = await self.add_log()
+        lines = [f'some repetitive output {i % 3}\n' for i in range(300)]
+        await self.append_lines(logid, lines, 7)
+
+        bytes_saved = await self.db.logs.compressLog(logid)
+        self.assertGreater(bytes_saved, 0)
+        await self.check_lines(logid, lines)
+
+        # nothing left to compress
+        self.assertEqual(await self.db.logs.compressLog(logid), 0)
+
+        # lines appended after compression are stored as well
+        await self.db.logs.appendLog(logid, 'more\n')
+        self.assertEqual(await self.db.logs.getLogLines(logid, 299, 300), lines[-1] + 'more\n')
+
+    @async_to_deferred
+    async def test_delete_old_log_chunks(self) -> None:
+        old_logid = await self.add_log(stepid=101)
+        new_logid = await self.add_log(stepid=102)
+        await self.db.logs.appendLog(old_logid, 'old\n')
+        await self.db.logs.appendLog(new_logid, 'new\n')
+
+        deleted = await self.db.logs.deleteOldLogChunks(
+            (self.TIMESTAMP_STEP101 + self.TIMESTAMP_STEP102) // 2
+        )
+        # only the deleted chunks of the logchunks table are counted
+        self.assertEqual(deleted, 0)
+
+        old_log = await self.db.logs.getLog(old_logid)
+        assert old_log is not None
+        self.assertEqual(old_log.type, 'd')
+        self.assertFalse(await self.storage.has_log(old_logid))
+        self.assertEqual(await self.db.logs.getLogLines(old_logid, 0, 0), '')
+        self.assertEqual(await self.db.logs.getLogLines(new_logid, 0, 0), 'new\n')
+
+    @async_to_deferred
+    async def test_long_lines(self) -> None:
+        logid = await self.add_log()
+        await self.db.logs.appendLog(logid, 'x' * 70000 + '\nshort\n')
+        self.assertEqual(
+            await self.db.logs.getLogLines(logid, 0, 1),
+            'x' * (self.db.logs.MAX_CHUNK_SIZE - 1) + '\nshort\n',
+        )
+
+    @async_to_deferred
+    async def test_append_failure(self) -> None:
+        logid = await self.add_log()
+        await self.db.logs.appendLog(logid, 'one\n')
+
+        # the lines are stored, but the number of lines of the log is not updated
+        do = self.db.pool.do
+
+        def failing_do(f: Any, *args: Any, **kwargs: Any) -> Any:
+            if f.__name__ == '_thd_update_num_lines':
+                raise RuntimeError('database is gone')
+            return do(f, *args, **kwargs)
+
+        with mock.patch.object(self.db.pool, 'do', failing_do):
+            with self.assertRaises(RuntimeError):
+                await self.db.logs.appendLog(logid, 'lost\n')
+
+        await self.db.logs.appendLog(logid, 'two\nthree\n')
+        await self.check_lines(logid, ['one\n', 'two\n', 'three\n'])
+
+    @async_to_deferred
+    async def test_has_log_cached(self) -> None:
+        self.db.logs._log_in_storage.set_max_size(10)
+        has_log_calls = 0
+        has_log = self.storage.has_log
+
+        async def counting_has_log(logid: int) -> bool:
+            nonlocal has_log_calls
+            has_log_calls += 1
+            return await has_log(logid)
+
+        self.storage.has_log = counting_has_log  # type: ignore[method-assign]
+        logid = await self.add_log()
+        await self.append_lines(logid, ['one\n', 'two\n', 'three\n'], 1)
+        self.assertEqual(await self.db.logs.getLogLines(logid, 0, 2), 'one\ntwo\nthree\n')
+        self.assertEqual(has_log_calls, 0)
+
+        self.master.config.logStorage = None
+        db_logid = await self.add_log(name='db')
+        await self.db.logs.appendLog(db_logid, 'in the database\n')
+        self.master.config.logStorage = self.storage
+        await self.append_lines(db_logid, ['one\n', 'two\n'], 1)
+        self.assertEqual(has_log_calls, 1)
+
+    @async_to_deferred
+    async def test_log_started_in_database(self) -> None:
+        self.master.config.logStorage = None
+        logid = await self.add_log()
+        await self.db.logs.appendLog(logid, 'in the database\n')
+
+        # the log keeps being stored in the database
+        self.master.config.logStorage = self.storage
+        await self.db.logs.appendLog(logid, 'still in the database\n')
+        self.assertFalse(await self.storage.has_log(logid))
+        self.assertEqual(await self.count_logchunks(), 2)
+        self.assertEqual(
+            await self.db.logs.getLogLines(logid, 0, 1),
+            'in the database\nstill in the database\n',
+        )
+
+
+class TestFileLogStorage(LogStorageTestsMixin, unittest.TestCase):
+    def make_storage(self) -> LogStorage:
+        return FileLogStorage('logs', segment_size=100)
+
+    @async_to_deferred
+    async def test_segments(self) -> None:
+        logid = await self.add_log()
+        lines = [f'line {i}\n' for i in range(50)]
+        await self.append_lines(logid, lines, 4)
+
+        log_dir = os.path.join(self.master.basedir, 'logs', '0', str(logid))
+        segments = sorted(f for f in os.listdir(log_dir) if f.endswith('.seg'))
+        self.assertEqual(segments, ['0.seg', '16.seg', '32.seg', '48.seg'])
+
+        await self.db.logs.compressLog(logid)
+        self.assertEqual(
+            sorted(os.listdir(log_dir)),
+            # the last segment is too small to be worth compressing
+            ['0.seg.gz', '16.seg.gz', '32.seg.gz', '48.seg', 'index'],
+        )
+        await self.check_lines(logid, lines)
+
+    @async_to_deferred
+    async def test_unindexed_lines(self) -> None:
+        logid = await self.add_log()
+        await self.db.logs.appendLog(logid, 'one\ntwo\n')
+
+        # lines written to the segment by an append which failed before
+        # indexing them are dropped
+        log_dir = os.path.join(self.master.basedir, 'logs', '0', str(logid))
+        with open(os.path.join(log_dir, '0.seg'), 'ab') as f:
+            f.write(b'lost\n')
+        with open(os.path.join(log_dir, 'index'), 'ab') as f:
+            f.write(b'partial')
+
+        await self.db.logs.appendLog(logid, 'three\n')
+        await self.check_lines(logid, ['one\n', 'two\n', 'three\n'])
+        with open(os.path.join(log_dir, '0.seg'), 'rb') as f:
+            self.assertEqual(f.read(), b'one\ntwo\nthree\n')
+
+
+class TestS3LogStorage(LogStorageTestsMixin, unittest.TestCase):
+    def make_storage(self) -> LogStorage:
+        self.client = FakeS3Client(page_size=5)
+        self.s3_storage = S3LogStorage('bucket', segment_size=100, client=self.client)
+        return self.s3_storage
+
+    @async_to_deferred
+    async def test_objects(self) -> None:
+        logid = await self.add_log()
+        lines = [f'line {i}\n' for i in range(50)]
+        await self.append_lines(logid, lines, 4)
+        self.assertEqual(len(self.client.buckets['bucket']), 13)
+        self.assertIn(f'logs/{logid}/0000000004-0000000007', self.client.buckets['bucket'])
+
+        await self.db.logs.compressLog(logid)
+        self.assertEqual(
+            sorted(self.client.buckets['bucket']),
+            [
+                f'logs/{logid}/0000000000-0000000011.gz',
+                f'logs/{logid}/0000000012-0000000023.gz',
+                f'logs/{logid}/0000000024-0000000035.gz',
+                f'logs/{logid}/0000000036-0000000047.gz',
+                f'logs/{logid}/0000000048-0000000049',
+            ],
+        )
+        await self.check_lines(logid, lines)
+
+    @async_to_deferred
+    async def test_objects_merged_while_reading(self) -> None:
+        logid = await self.add_log()
+        lines = [f'line {i}\n' for i in range(10)]
+        await self.append_lines(logid, lines, 2)
+
+        get_object = self.client.get_object
+        compressed = False
+
+        def get_object_and_compress(**kwargs: str) -> dict:
+            nonlocal compressed
+            if not compressed and kwargs['Key'].endswith('0000000002-0000000003'):
+                compressed = True
+                self.s3_storage.segment_size = 1000
+                self.reactor.callLater(0, self.db.logs.compressLog, logid)
+                self.reactor.advance(0)
+            return get_object(**kwargs)
+
+        self.client.get_object = get_object_and_compress  # type: ignore[method-assign,assignment]
+        self.assertEqual(await self.db.logs.getLogLines(logid, 0, 9), ''.join(lines))
+        self.assertEqual(
+            list(self.client.buckets['bucket']), [f'logs/{logid}/0000000000-0000000009.gz']
+        )
@@ -21,6 +21,8 @@ from typing import TYPE_CHECKING
 from twisted.internet import defer
 from twisted.trial import unittest
 
+from buildbot.data import resultspec
+from buildbot.data.workers import workers_field_map
 from buildbot.db import workers
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
@@ -679,6 +681,44 @@ class Tests(TestReactorMixin, querylog.SqliteMaxVariableMixin, unittest.TestCase
             ],
         )
 
+    @defer.inlineCallbacks
+    def test_getWorkers_paginated(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.baseRows + self.multipleMasters)
+        resultSpec = resultspec.ResultSpec(order=['-name'], limit=1, offset=0)
+        resultSpec.fieldMapping = workers_field_map
+        workerdicts = yield self.db.workers.getWorkers(resultSpec=resultSpec)
+
+        # a worker configured on several builders counts once against the limit
+        self.assertEqual([w.name for w in workerdicts], ['zero'])
+        self.assertEqual(len(workerdicts[0].configured_on), 3)
+        self.assertEqual((workerdicts.offset, workerdicts.total, workerdicts.limit), (0, 2, 1))
+
+    @defer.inlineCallbacks
+    def test_getWorkers_paginated_unordered(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data([
+            *self.baseRows,
+            *self.multipleMasters,
+            fakedb.Worker(id=29, name='extra'),
+        ])
+        names: list[str] = []
+        for offset in range(3):
+            resultSpec = resultspec.ResultSpec(limit=1, offset=offset)
+            resultSpec.fieldMapping = workers_field_map
+            workerdicts = yield self.db.workers.getWorkers(resultSpec=resultSpec)
+            names.extend(w.name for w in workerdicts)
+
+        # pages follow the worker ids
+        self.assertEqual(names, ['extra', 'zero', 'one'])
+
+    @defer.inlineCallbacks
+    def test_getWorkers_ordered(self) -> InlineCallbacksType[None]:
+        yield self.db.insert_test_data(self.baseRows + self.multipleMasters)
+        resultSpec = resultspec.ResultSpec(order=['name'])
+        resultSpec.fieldMapping = workers_field_map
+        workerdicts = yield self.db.workers.getWorkers(resultSpec=resultSpec)
+        self.assertEqual([w.name for w in workerdicts], ['one', 'zero'])
+        self.assertEqual([len(w.configured_on) for w in workerdicts], [2, 3])
+
     @defer.inlineCallbacks
     def test_workerConnected_existing(self) -> InlineCallbacksType[None]:
         yield self.db.insert_test_data(self.baseRows + self.worker1_rows)
@@ -0,0 +1,86 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import sqlalchemy as sa
+from twisted.trial import unittest
+
+from buildbot.test.util import migration
+from buildbot.util import sautils
+
+if TYPE_CHECKING:
+    from twisted.internet import defer
+
+
+class Migration(migration.MigrateTestMixin, unittest.TestCase):
+    def setUp(self) -> defer.Deferred[None]:  # type: ignore[override]
+        return self.setUpMigrateTest()
+
+    def create_tables_thd(self, conn: sa.future.engine.Connection) -> None:
+        metadata = sa.MetaData()
+        metadata.bind = conn  # type: ignore[attr-defined]
+
+        builders = sautils.Table(
+            'builders',
+            metadata,
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.Text, nullable=False),
+            sa.Column('name_hash', sa.String(40), nullable=False),
+        )
+        builders.create(bind=conn)
+
+        conn.execute(builders.insert(), [{"id": 3, "name": "b1", "name_hash": "h1"}])
+        conn.commit()
+
+    def test_update(self) -> defer.Deferred[None]:
+        def setup_thd(conn: sa.future.engine.Connection) -> None:
+            self.create_tables_thd(conn)
+
+        def verify_thd(conn: sa.future.engine.Connection) -> None:
+            metadata = sa.MetaData()
+            metadata.bind = conn  # type: ignore[attr-defined]
+
+            dictionaries = sautils.Table('logchunk_dictionaries', metadata, autoload_with=conn)
+            conn.execute(
+                dictionaries.insert(),
+                [
+                    {
+                        "id": 1,
+                        "builderid": 3,
+                        "log_name": "stdio",
+                        "created_at": 1700000000,
+                        "content": b"\x37\xa4\x30\xec",
+                    }
+                ],
+            )
+            q = sa.select(
+                dictionaries.c.id,
+                dictionaries.c.builderid,
+                dictionaries.c.log_name,
+                dictionaries.c.created_at,
+                dictionaries.c.content,
+            )
+            self.assertEqual(
+                conn.execute(q).fetchall(), [(1, 3, "stdio", 1700000000, b"\x37\xa4\x30\xec")]
+            )
+
+            insp = sa.inspect(conn)
+            index_names = [item['name'] for item in insp.get_indexes('logchunk_dictionaries')]
+            self.assertIn('logchunk_dictionaries_builderid', index_names)
+
+        return self.do_test_migration('067', '068', setup_thd, verify_thd)
@@ -0,0 +1,86 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import sqlalchemy as sa
+from twisted.trial import unittest
+
+from buildbot.test.util import migration
+from buildbot.util import sautils
+
+if TYPE_CHECKING:
+    from twisted.internet import defer
+
+
+class Migration(migration.MigrateTestMixin, unittest.TestCase):
+    def setUp(self) -> defer.Deferred[None]:  # type: ignore[override]
+        return self.setUpMigrateTest()
+
+    def create_tables_thd(self, conn: sa.future.engine.Connection) -> None:
+        metadata = sa.MetaData()
+        metadata.bind = conn  # type: ignore[attr-defined]
+
+        # stepid foreign key is removed for the purposes of the test
+        logs = sautils.Table(
+            'logs',
+            metadata,
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.Text, nullable=False),
+            sa.Column('slug', sa.String(50), nullable=False),
+            sa.Column('stepid', sa.Integer, nullable=False),
+            sa.Column('complete', sa.SmallInteger, nullable=False),
+            sa.Column('num_lines', sa.Integer, nullable=False),
+            sa.Column('type', sa.String(1), nullable=False),
+        )
+        logs.create(bind=conn)
+
+        conn.execute(
+            logs.insert(),
+            [
+                {
+                    "id": 12,
+                    "name": "stdio",
+                    "slug": "stdio",
+                    "stepid": 3,
+                    "complete": 1,
+                    "num_lines": 10,
+                    "type": "s",
+                }
+            ],
+        )
+        conn.commit()
+
+    def test_update(self) -> defer.Deferred[None]:
+        def setup_thd(conn: sa.future.engine.Connection) -> None:
+            self.create_tables_thd(conn)
+
+        def verify_thd(conn: sa.future.engine.Connection) -> None:
+            metadata = sa.MetaData()
+            metadata.bind = conn  # type: ignore[attr-defined]
+
+            postings = sautils.Table('log_search_postings', metadata, autoload_with=conn)
+            conn.execute(postings.insert(), [{"logid": 12, "block": 0, "term": 1234}])
+            q = sa.select(postings.c.logid, postings.c.block, postings.c.term)
+            self.assertEqual(conn.execute(q).fetchall(), [(12, 0, 1234)])
+
+            insp = sa.inspect(conn)
+            index_names = [item['name'] for item in insp.get_indexes('log_search_postings')]
+            self.assertIn('log_search_postings_term', index_names)
+            self.assertIn('log_search_postings_logid', index_names)
+
+        return self.do_test_migration('068', '069', setup_thd, verify_thd)
@@ -15,6 +15,7 @@
 
 from __future__ import annotations
 
+import json
 import random
 from typing import TYPE_CHECKING
 from typing import Any
@@ -29,10 +30,12 @@ from buildbot import config
 from buildbot.db import buildrequests
 from buildbot.process import buildrequestdistributor
 from buildbot.process import factory
+from buildbot.process.buildrequest import BuildRequest
 from buildbot.test import fakedb
 from buildbot.test.fake import fakemaster
 from buildbot.test.reactor import TestReactorMixin
 from buildbot.util import epoch2datetime
+from buildbot.util import toJson
 from buildbot.util.eventual import fireEventually
 from buildbot.util.twisted import async_to_deferred
 
@@ -42,7 +45,6 @@ if TYPE_CHECKING:
     from buildbot.config.builder import BuilderConfig
     from buildbot.master import BuildMaster
     from buildbot.process.builder import Builder
-    from buildbot.process.buildrequest import BuildRequest
     from buildbot.process.workerforbuilder import AbstractWorkerForBuilder
     from buildbot.test.fakedb.row import Row
     from buildbot.util.twisted import InlineCallbacksType
@@ -295,6 +297,170 @@ class Test(TestBRDBase):
         self.assertEqual(self.maybeStartBuildsOnBuilder_calls, ['bldr1'])
         self.checkAllCleanedUp()
 
+    def useSlow_maybeStartBuildsOnBuilder(self, durations: dict[str, float]) -> None:
+        # records when each builder starts and finishes, taking the given
+        # time (default 1s) to look for builds
+        self.builder_events: list[tuple[float, str, str]] = []
+
+        async def maybeStartBuildsOnBuilder(bldr: Builder) -> None:
+            assert bldr.name is not None
+            self.builder_events.append((self.reactor.seconds(), 'start', bldr.name))
+            d: defer.Deferred[None] = defer.Deferred()
+            self.reactor.callLater(durations.get(bldr.name, 1), d.callback, None)
+            await d
+            self.builder_events.append((self.reactor.seconds(), 'end', bldr.name))
+
+        self.brd._maybeStartBuildsOnBuilder = maybeStartBuildsOnBuilder  # type: ignore[method-assign]
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent(self) -> None:
+        self.master.config.build_distribution_concurrency = 2
+        self.useSlow_maybeStartBuildsOnBuilder({'bldr1': 10})
+        self.addBuilders(['bldr1', 'bldr2', 'bldr3', 'bldr4'])
+        for i, name in enumerate(['bldr1', 'bldr2', 'bldr3', 'bldr4']):
+            self.builders[name].config.workernames = [f'worker{i}']
+
+        await self.brd.maybeStartBuildsOn(['bldr1', 'bldr2', 'bldr3', 'bldr4'])
+        self.reactor.pump([1] * 10)
+        await self.brd._waitForFinish()
+
+        # bldr1 is slow, but only occupies one of the two slots
+        self.assertEqual(
+            self.builder_events,
+            [
+                (0, 'start', 'bldr1'),
+                (0, 'start', 'bldr2'),
+                (1, 'end', 'bldr2'),
+                (1, 'start', 'bldr3'),
+                (2, 'end', 'bldr3'),
+                (2, 'start', 'bldr4'),
+                (3, 'end', 'bldr4'),
+                (10, 'end', 'bldr1'),
+            ],
+        )
+        self.checkAllCleanedUp()
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent_shared_workers(self) -> None:
+        self.master.config.build_distribution_concurrency = 3
+        self.useSlow_maybeStartBuildsOnBuilder({})
+        self.addBuilders(['bldr1', 'bldr2', 'bldr3'])
+        self.builders['bldr1'].config.workernames = ['worker1', 'worker2']
+        self.builders['bldr2'].config.workernames = ['worker3']
+        self.builders['bldr3'].config.workernames = ['worker2']
+
+        await self.brd.maybeStartBuildsOn(['bldr1', 'bldr2', 'bldr3'])
+        self.reactor.pump([1] * 2)
+        await self.brd._waitForFinish()
+
+        # bldr3 shares worker2 with bldr1, so it waits for it
+        self.assertEqual(
+            self.builder_events,
+            [
+                (0, 'start', 'bldr1'),
+                (0, 'start', 'bldr2'),
+                (1, 'end', 'bldr1'),
+                (1, 'start', 'bldr3'),
+                (1, 'end', 'bldr2'),
+                (2, 'end', 'bldr3'),
+            ],
+        )
+        self.checkAllCleanedUp()
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent_new_pending(self) -> None:
+        self.master.config.build_distribution_concurrency = 2
+        self.useSlow_maybeStartBuildsOnBuilder({'bldr1': 10})
+        self.addBuilders(['bldr1', 'bldr2', 'bldr3'])
+        for i, name in enumerate(['bldr1', 'bldr2', 'bldr3']):
+            self.builders[name].config.workernames = [f'worker{i}']
+
+        await self.brd.maybeStartBuildsOn(['bldr1', 'bldr2'])
+        self.reactor.pump([1] * 2)
+        await self.brd.maybeStartBuildsOn(['bldr3'])
+        self.reactor.pump([1] * 10)
+        await self.brd._waitForFinish()
+
+        # bldr3 does not wait for the slow bldr1 to finish
+        self.assertEqual(
+            self.builder_events,
+            [
+                (0, 'start', 'bldr1'),
+                (0, 'start', 'bldr2'),
+                (1, 'end', 'bldr2'),
+                (2, 'start', 'bldr3'),
+                (3, 'end', 'bldr3'),
+                (10, 'end', 'bldr1'),
+            ],
+        )
+        self.checkAllCleanedUp()
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent_running_again(self) -> None:
+        self.master.config.build_distribution_concurrency = 2
+        self.useSlow_maybeStartBuildsOnBuilder({})
+        self.addBuilders(['bldr1'])
+        self.builders['bldr1'].config.workernames = ['worker1']
+
+        await self.brd.maybeStartBuildsOn(['bldr1'])
+        await self.brd.maybeStartBuildsOn(['bldr1'])
+        self.reactor.pump([1] * 2)
+        await self.brd._waitForFinish()
+
+        # a builder is not examined twice at the same time
+        self.assertEqual(
+            self.builder_events,
+            [
+                (0, 'start', 'bldr1'),
+                (1, 'end', 'bldr1'),
+                (1, 'start', 'bldr1'),
+                (2, 'end', 'bldr1'),
+            ],
+        )
+        self.checkAllCleanedUp()
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent_shared_workers_immediate(self) -> None:
+        self.master.config.build_distribution_concurrency = 2
+        self.addBuilders(['bldr1', 'bldr2'])
+        for name in ['bldr1', 'bldr2']:
+            self.builders[name].config.workernames = ['worker1']
+        calls = []
+
+        async def maybeStartBuildsOnBuilder(bldr: Builder) -> None:
+            calls.append(bldr.name)
+
+        self.brd._maybeStartBuildsOnBuilder = maybeStartBuildsOnBuilder  # type: ignore[method-assign]
+
+        await self.brd.maybeStartBuildsOn(['bldr1', 'bldr2'])
+        await self.brd._waitForFinish()
+
+        # bldr2 waits for bldr1, which finishes right away
+        self.assertEqual(calls, ['bldr1', 'bldr2'])
+        self.checkAllCleanedUp()
+
+    @async_to_deferred
+    async def test_maybeStartBuildsOn_concurrent_exception(self) -> None:
+        self.master.config.build_distribution_concurrency = 2
+        self.addBuilders(['bldr1', 'bldr2'])
+        for i, name in enumerate(['bldr1', 'bldr2']):
+            self.builders[name].config.workernames = [f'worker{i}']
+        calls = []
+
+        async def maybeStartBuildsOnBuilder(bldr: Builder) -> None:
+            calls.append(bldr.name)
+            if bldr.name == 'bldr1':
+                raise RuntimeError("oh noes")
+
+        self.brd._maybeStartBuildsOnBuilder = maybeStartBuildsOnBuilder  # type: ignore[method-assign]
+
+        await self.brd.maybeStartBuildsOn(['bldr1', 'bldr2'])
+        await self.brd._waitForFinish()
+
+        self.assertEqual(calls, ['bldr1', 'bldr2'])
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+        self.checkAllCleanedUp()
+
     @defer.inlineCallbacks
     def do_test_sortBuilders(
         self,
@@ -302,24 +468,25 @@ class Test(TestBRDBase):
         oldestRequestTimes: dict[str, int | None],
         highestPriorities: dict[str, int | None],
         expected: list[str],
-        returnDeferred: bool = False,
     ) -> InlineCallbacksType[None]:
         self.useMock_maybeStartBuildsOnBuilder()
-        self.addBuilders(list(oldestRequestTimes))
+        yield self.addBuilders(list(oldestRequestTimes))
         self.master.config.prioritizeBuilders = prioritizeBuilders
 
-        def mklambda(t: int | None) -> Callable[[], Any]:  # work around variable-binding issues
-            if returnDeferred:
-                return lambda: defer.succeed(t)
-            return lambda: t
-
+        rows: list[Row] = [fakedb.Buildset(id=11, reason='because')]
         for n, t in oldestRequestTimes.items():
-            if t is not None:
-                t = epoch2datetime(t)  # type: ignore[assignment]
-            self.builders[n].getOldestRequestTime = mklambda(t)
-
-        for n, t in highestPriorities.items():
-            self.builders[n].get_highest_priority = mklambda(t)
+            priority = highestPriorities[n]
+            # builders without a time nor a priority have no pending request
+            if t is not None and priority is not None:
+                rows.append(
+                    fakedb.BuildRequest(
+                        buildsetid=11,
+                        builderid=self.builders[n].getBuilderId(),
+                        priority=priority,
+                        submitted_at=t,
+                    )
+                )
+        yield self.master.db.insert_test_data(rows)
 
         result = yield self.brd._sortBuilders(list(oldestRequestTimes))
 
@@ -334,14 +501,47 @@ class Test(TestBRDBase):
             ['bldr2', 'bldr1', 'bldr3'],
         )
 
-    def test_sortBuilders_default_asyn(self) -> defer.Deferred[None]:
-        return self.do_test_sortBuilders(
-            None,  # use the default sort
-            {"bldr1": 777, "bldr2": 999, "bldr3": 888},
-            {"bldr1": 10, "bldr2": 15, "bldr3": 5},
-            ['bldr2', 'bldr1', 'bldr3'],
-            returnDeferred=True,
+    @defer.inlineCallbacks
+    def test_sortBuilders_default_summary_cached(self) -> InlineCallbacksType[None]:
+        self.useMock_maybeStartBuildsOnBuilder()
+        yield self.addBuilders(['bldr1', 'bldr2'])
+        self.master.config.prioritizeBuilders = None
+        yield self.master.db.insert_test_data([
+            fakedb.Buildset(id=11, reason='because'),
+            fakedb.BuildRequest(
+                id=10, buildsetid=11, builderid=self.builders['bldr2'].getBuilderId(), priority=5
+            ),
+        ])
+        get_summary = mock.Mock(
+            wraps=self.master.db.buildrequests.get_unclaimed_buildrequests_summary
         )
+        self.patch(self.master.db.buildrequests, 'get_unclaimed_buildrequests_summary', get_summary)
+
+        # the builders are sorted with a single query, which is reused as
+        # long as no build request changes state
+        result = yield self.brd._sortBuilders(['bldr1', 'bldr2'])
+        self.assertEqual(result, ['bldr2', 'bldr1'])
+        result = yield self.brd._sortBuilders(['bldr1', 'bldr2'])
+        self.assertEqual(result, ['bldr2', 'bldr1'])
+        self.assertEqual(get_summary.call_count, 1)
+
+        yield self.master.db.insert_test_data([
+            fakedb.BuildRequest(
+                id=11, buildsetid=11, builderid=self.builders['bldr1'].getBuilderId(), priority=7
+            ),
+        ])
+        self.brd.pending_buildrequests._buildrequest_event(  # type: ignore[union-attr]
+            ('buildrequests', '11', 'new'),
+            {
+                'buildrequestid': 11,
+                'builderid': self.builders['bldr1'].getBuilderId(),
+                'claimed': False,
+                'complete': False,
+            },
+        )
+        result = yield self.brd._sortBuilders(['bldr1', 'bldr2'])
+        self.assertEqual(result, ['bldr1', 'bldr2'])
+        self.assertEqual(get_summary.call_count, 2)
 
     def test_sortBuilders_default_None(self) -> defer.Deferred[None]:
         return self.do_test_sortBuilders(
@@ -991,3 +1191,142 @@ class TestMaybeStartBuilds(TestBRDBase):
         result = self.do_test_nextBuild(nextBuild)
         self.assertEqual(1, len(self.flushLoggedErrors(RuntimeError)))
         return result
+
+
+class TestPendingBuildRequests(TestBRDBase):
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        yield super().setUp()
+        yield self.master.db.insert_test_data([
+            *self.base_rows,
+            fakedb.BuildRequest(id=11, buildsetid=11, builderid=77),
+            fakedb.BuildRequest(id=10, buildsetid=11, builderid=77),
+        ])
+        # the message validator does not know the data API buildrequest format
+        self.master.mq.verifyMessages = False
+        assert self.brd.pending_buildrequests is not None
+        self.pending = self.brd.pending_buildrequests
+        self.get_calls = 0
+        data_get = self.master.data.get
+
+        def counting_get(*args: Any, **kwargs: Any) -> defer.Deferred[Any]:
+            self.get_calls += 1
+            return data_get(*args, **kwargs)
+
+        self.patch(self.master.data, 'get', counting_get)
+
+    @async_to_deferred
+    async def get_brids(self) -> list[int]:
+        brdicts = await self.pending.get_unclaimed_brdicts(77)
+        return [brd['buildrequestid'] for brd in brdicts]
+
+    @async_to_deferred
+    async def send_event(self, brid: int, event: str, **changes: Any) -> None:
+        msg = await self.master.data.get(('buildrequests', brid))
+        msg.update(changes)
+        self.master.mq.callConsumer(('buildrequests', str(brid), event), msg)
+        await self.master.mq.wait_consumed()
+
+    @async_to_deferred
+    async def test_fetched_once(self) -> None:
+        self.assertEqual(await self.get_brids(), [10, 11])
+        self.assertEqual(await self.get_brids(), [10, 11])
+        self.assertEqual(self.get_calls, 1)
+
+    @async_to_deferred
+    async def test_events(self) -> None:
+        await self.get_brids()
+        await self.master.db.insert_test_data([
+            fakedb.BuildRequest(id=12, buildsetid=11, builderid=77),
+        ])
+
+        await self.send_event(12, 'new')
+        self.assertEqual(await self.get_brids(), [10, 11, 12])
+
+        await self.send_event(10, 'claimed', claimed=True)
+        self.assertEqual(await self.get_brids(), [11, 12])
+
+        await self.send_event(10, 'unclaimed')
+        self.assertEqual(await self.get_brids(), [10, 11, 12])
+
+        await self.send_event(11, 'complete', claimed=True, complete=True)
+        self.assertEqual(await self.get_brids(), [10, 12])
+
+        self.assertEqual(self.get_calls, 1 + 4)  # initial fetch, plus one per send_event
+
+    @async_to_deferred
+    async def test_events_serialized_by_wamp(self) -> None:
+        await self.get_brids()
+        await self.master.db.insert_test_data([
+            fakedb.BuildRequest(id=12, buildsetid=11, builderid=77, submitted_at=1300305712),
+        ])
+        msg = await self.master.data.get(('buildrequests', 12))
+        # as sent by WampMQ
+        msg = json.loads(json.dumps(msg, default=toJson))
+        self.assertEqual(msg['submitted_at'], 1300305712)
+        self.master.mq.callConsumer(('buildrequests', '12', 'new'), msg)
+        await self.master.mq.wait_consumed()
+
+        brdicts = await self.pending.get_unclaimed_brdicts(77)
+        self.assertEqual(brdicts[2]['submitted_at'], epoch2datetime(1300305712))
+        model = buildrequests.BuildRequestModel(
+            buildrequestid=12,
+            buildsetid=11,
+            builderid=77,
+            buildername='A',
+            submitted_at=brdicts[2]['submitted_at'],
+        )
+        breq = await BuildRequest.fromBrdict(self.master, model)
+        self.assertEqual(breq.submitted_at, 1300305712)
+
+    @async_to_deferred
+    async def test_events_for_unknown_builder_ignored(self) -> None:
+        await self.send_event(10, 'claimed', claimed=True)
+        self.assertEqual(await self.get_brids(), [10, 11])
+
+    @async_to_deferred
+    async def test_events_during_fetch_replayed(self) -> None:
+        data_get = self.master.data.get
+        msg = await data_get(('buildrequests', 10))
+        msg['claimed'] = True
+
+        async def get_with_event(*args: Any, **kwargs: Any) -> Any:
+            result = await data_get(*args, **kwargs)
+            self.master.mq.callConsumer(('buildrequests', '10', 'claimed'), msg)
+            return result
+
+        self.patch(
+            self.master.data, 'get', lambda *a, **kw: defer.ensureDeferred(get_with_event(*a, **kw))
+        )
+        self.assertEqual(await self.get_brids(), [11])
+
+    @async_to_deferred
+    async def test_resync_after_interval(self) -> None:
+        await self.get_brids()
+        await self.master.db.insert_test_data([
+            fakedb.BuildRequest(id=12, buildsetid=11, builderid=77),
+        ])
+        self.assertEqual(await self.get_brids(), [10, 11])
+
+        self.reactor.advance(self.pending.resync_interval)
+        self.assertEqual(await self.get_brids(), [10, 11, 12])
+        self.assertEqual(self.get_calls, 2)
+
+    @async_to_deferred
+    async def test_invalidate(self) -> None:
+        await self.get_brids()
+        await self.master.db.buildrequests.claimBuildRequests([10])
+        self.pending.invalidate(77)
+        self.assertEqual(await self.get_brids(), [11])
+
+    @async_to_deferred
+    async def test_remove(self) -> None:
+        await self.get_brids()
+        self.pending.remove(77, [11])
+        self.assertEqual(await self.get_brids(), [10])
+
+    @async_to_deferred
+    async def test_stop_service(self) -> None:
+        await self.brd.stopService()
+        self.assertIsNone(self.brd.pending_buildrequests)
+        self.assertEqual(self.master.mq.qrefs, [])
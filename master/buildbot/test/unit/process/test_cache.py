@@ -58,3 +58,20 @@ class CacheManager(unittest.TestCase):
         metric = self.caches.get_metrics()['foo']
         for k in 'hits', 'refhits', 'misses', 'max_size':
             self.assertIn(k, metric)
+
+    @defer.inlineCallbacks
+    def test_get_sized_cache(self) -> InlineCallbacksType[None]:
+        foo_cache = self.caches.get_sized_cache("foo", len, 100)
+        self.assertIdentical(self.caches.get_sized_cache("foo", len, 100), foo_cache)
+        self.assertEqual(foo_cache.max_size, 100)
+
+        yield self.caches.reconfigServiceWithBuildbotConfig(self.make_config(foo=5))
+        self.assertEqual(foo_cache.max_size, 5)
+        yield self.caches.reconfigServiceWithBuildbotConfig(self.make_config())
+        self.assertEqual(foo_cache.max_size, 100)
+
+    def test_get_metrics_sized_cache(self) -> None:
+        self.caches.get_sized_cache("foo", len, 100)
+        metric = self.caches.get_metrics()['foo']
+        for k in 'hits', 'misses', 'size', 'max_size':
+            self.assertIn(k, metric)
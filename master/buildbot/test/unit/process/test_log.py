@@ -249,6 +249,117 @@ class Tests(TestReactorMixin, unittest.TestCase):
         )
         self.assertEqual(log_content['content'], 'oout1\neerr2\noout2 out3\neerr3\n')
 
+    def spy_appendLog(self) -> list[str]:
+        appended: list[str] = []
+        appendLog = self.master.data.updates.appendLog
+
+        def spy(logid: int, content: str) -> defer.Deferred[None]:
+            appended.append(content)
+            return appendLog(logid, content)
+
+        self.patch(self.master.data.updates, 'appendLog', spy)
+        return appended
+
+    @defer.inlineCallbacks
+    def test_write_buffer_coalesces_lines(self) -> InlineCallbacksType[None]:
+        _log = yield self.makeLog('s')
+        appended = self.spy_appendLog()
+
+        for i in range(10):
+            yield _log.addStdout(f'line {i}\n')
+        self.assertEqual(appended, [])
+
+        self.reactor.advance(self.master.config.logWriteBufferDelay)
+        self.assertEqual(appended, [''.join(f'oline {i}\n' for i in range(10))])
+
+        log_data = yield self.master.data.get(('logs', _log.logid))
+        self.assertEqual(log_data['num_lines'], 10)
+
+    @defer.inlineCallbacks
+    def test_write_buffer_size_limit(self) -> InlineCallbacksType[None]:
+        self.master.config.logWriteBufferSize = 10
+        _log = yield self.makeLog('t')
+        appended = self.spy_appendLog()
+
+        yield _log.addContent('12345\n')
+        self.assertEqual(appended, [])
+        yield _log.addContent('67890\n')
+        self.assertEqual(appended, ['12345\n67890\n'])
+
+        # the timer of the flushed lines was cancelled
+        self.reactor.advance(self.master.config.logWriteBufferDelay)
+        self.assertEqual(appended, ['12345\n67890\n'])
+
+    @defer.inlineCallbacks
+    def test_write_buffer_disabled(self) -> InlineCallbacksType[None]:
+        self.master.config.logWriteBufferSize = 0
+        _log = yield self.makeLog('t')
+        appended = self.spy_appendLog()
+
+        yield _log.addContent('hello\n')
+        yield _log.addContent('world\n')
+        self.assertEqual(appended, ['hello\n', 'world\n'])
+
+    @defer.inlineCallbacks
+    def test_write_buffer_read_unflushed(self) -> InlineCallbacksType[None]:
+        _log = yield self.makeLog('t')
+        appended = self.spy_appendLog()
+
+        yield _log.addContent('hello\nworld\n')
+        self.assertEqual(appended, [])
+
+        log_content = yield self.master.data.get(('logs', _log.logid, 'contents'))
+        self.assertEqual(log_content['content'], 'hello\nworld\n')
+        self.assertEqual(appended, ['hello\nworld\n'])
+
+        yield _log.addContent('again\n')
+        raw = yield self.master.data.get(('logs', _log.logid, 'raw'))
+        self.assertEqual(raw['raw'], 'hello\nworld\nagain\n')
+
+    @defer.inlineCallbacks
+    def test_write_buffer_finish(self) -> InlineCallbacksType[None]:
+        _log = yield self.makeLog('t')
+        appended = self.spy_appendLog()
+
+        yield _log.addContent('hello\n')
+        yield _log.finish()
+        self.assertEqual(appended, ['hello\n'])
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+        log_data = yield self.master.data.get(('logs', _log.logid))
+        self.assertTrue(log_data['complete'])
+        self.assertEqual(log_data['num_lines'], 1)
+
+    def fail_appendLog(self) -> None:
+        def appendLog(logid: int, content: str) -> defer.Deferred[None]:
+            return defer.fail(RuntimeError('DB has gone away'))
+
+        self.patch(self.master.data.updates, 'appendLog', appendLog)
+
+    @defer.inlineCallbacks
+    def test_write_buffer_timer_failure_raised_by_next_add(self) -> InlineCallbacksType[None]:
+        _log = yield self.makeLog('s')
+        self.fail_appendLog()
+
+        yield _log.addStdout('hello\n')
+        self.reactor.advance(self.master.config.logWriteBufferDelay)
+
+        with self.assertRaisesRegex(RuntimeError, 'DB has gone away'):
+            yield _log.addStdout('world\n')
+        # the failure is only reported once
+        yield _log.addStdout('again\n')
+
+    @defer.inlineCallbacks
+    def test_write_buffer_timer_failure_raised_by_finish(self) -> InlineCallbacksType[None]:
+        _log = yield self.makeLog('t')
+        self.fail_appendLog()
+
+        yield _log.addContent('hello\n')
+        self.reactor.advance(self.master.config.logWriteBufferDelay)
+
+        with self.assertRaisesRegex(RuntimeError, 'DB has gone away'):
+            yield _log.finish()
+
     @defer.inlineCallbacks
     def test_unyielded_finish(self) -> InlineCallbacksType[None]:
         _log = yield self.makeLog('s')
@@ -23,6 +23,7 @@ from unittest import skipIf
 
 from twisted.internet import defer
 from twisted.internet import task
+from twisted.python import log
 from twisted.trial import unittest
 
 from buildbot.process import metrics
@@ -260,3 +261,144 @@ class TestReports(unittest.TestCase):
 
         self.assertEqual("WARN alarm_foo: Uh oh", handler.report())
         self.assertEqual({"alarms": {"alarm_foo": ("WARN", "Uh oh")}}, handler.asDict())
+
+
+class TestMetricEventWithoutObserver(unittest.TestCase):
+    def test_log_skipped_when_no_observer_enabled(self) -> None:
+        self.patch(metrics.MetricLogObserver, 'enabled_count', 0)
+        events: list[dict[str, Any]] = []
+        log.addObserver(events.append)
+        self.addCleanup(log.removeObserver, events.append)
+
+        metrics.MetricCountEvent.log('num_widgets', 1)
+        self.assertEqual(events, [])
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = metrics.MetricsRegistry()
+
+    def test_counter(self) -> None:
+        c = self.registry.counter('widgets_total', 'Number of widgets')
+        c.inc()
+        c.inc(2)
+        self.assertEqual(
+            self.registry.expose(),
+            '# HELP widgets_total Number of widgets\n'
+            '# TYPE widgets_total counter\n'
+            'widgets_total 3\n',
+        )
+
+    def test_counter_negative_increment(self) -> None:
+        c = self.registry.counter('widgets_total', 'Number of widgets')
+        with self.assertRaises(ValueError):
+            c.inc(-1)
+
+    def test_gauge(self) -> None:
+        g = self.registry.gauge('queue_length', 'Length of the queue')
+        g.inc(5)
+        g.dec(2)
+        self.assertEqual(g.labels().value, 3)
+        g.set(0.5)
+        self.assertIn('queue_length 0.5\n', self.registry.expose())
+
+    def test_labels(self) -> None:
+        c = self.registry.counter('messages_total', 'Messages', ['kind'])
+        c.labels('builds').inc()
+        c.labels('changes').inc(4)
+        c.labels('builds').inc()
+        self.assertEqual(
+            self.registry.expose(),
+            '# HELP messages_total Messages\n'
+            '# TYPE messages_total counter\n'
+            'messages_total{kind="builds"} 2\n'
+            'messages_total{kind="changes"} 4\n',
+        )
+
+    def test_labels_escaped(self) -> None:
+        c = self.registry.counter('messages_total', 'Messages', ['kind'])
+        c.labels('a"b\\c\nd').inc()
+        self.assertIn('messages_total{kind="a\\"b\\\\c\\nd"} 1\n', self.registry.expose())
+
+    def test_labels_wrong_count(self) -> None:
+        c = self.registry.counter('messages_total', 'Messages', ['kind'])
+        with self.assertRaises(ValueError):
+            c.labels('a', 'b')
+        with self.assertRaises(ValueError):
+            c.inc()
+
+    def test_invalid_names(self) -> None:
+        with self.assertRaises(ValueError):
+            self.registry.counter('bad-name', 'doc')
+        with self.assertRaises(ValueError):
+            self.registry.counter('good_name', 'doc', ['bad-label'])
+        with self.assertRaises(ValueError):
+            self.registry.histogram('good_name', 'doc', ['le'])
+
+    def test_histogram(self) -> None:
+        h = self.registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1, 10))
+        for v in (0.05, 0.1, 0.5, 2, 20):
+            h.observe(v)
+        self.assertEqual(h.labels().count, 5)
+        self.assertEqual(
+            self.registry.expose(),
+            '# HELP latency_seconds Latency\n'
+            '# TYPE latency_seconds histogram\n'
+            'latency_seconds_bucket{le="0.1"} 2\n'
+            'latency_seconds_bucket{le="1"} 3\n'
+            'latency_seconds_bucket{le="10"} 4\n'
+            'latency_seconds_bucket{le="+Inf"} 5\n'
+            'latency_seconds_sum 22.65\n'
+            'latency_seconds_count 5\n',
+        )
+
+    def test_histogram_labels(self) -> None:
+        h = self.registry.histogram('latency_seconds', 'Latency', ['op'], buckets=(1,))
+        h.labels('read').observe(0.5)
+        self.assertEqual(
+            self.registry.expose().splitlines()[2:],
+            [
+                'latency_seconds_bucket{op="read",le="1"} 1',
+                'latency_seconds_bucket{op="read",le="+Inf"} 1',
+                'latency_seconds_sum{op="read"} 0.5',
+                'latency_seconds_count{op="read"} 1',
+            ],
+        )
+
+    def test_histogram_time(self) -> None:
+        h = self.registry.histogram('latency_seconds', 'Latency')
+        with h.time():
+            pass
+        self.assertEqual(h.labels().count, 1)
+
+    def test_histogram_unsorted_buckets(self) -> None:
+        with self.assertRaises(ValueError):
+            self.registry.histogram('latency_seconds', 'Latency', buckets=(1, 0.5))
+
+    def test_get_or_create(self) -> None:
+        c = self.registry.counter('widgets_total', 'Number of widgets')
+        self.assertIs(self.registry.counter('widgets_total', 'Number of widgets'), c)
+        self.assertIs(self.registry.get('widgets_total'), c)
+
+    def test_conflicting_registration(self) -> None:
+        self.registry.counter('widgets_total', 'Number of widgets')
+        with self.assertRaises(ValueError):
+            self.registry.gauge('widgets_total', 'Number of widgets')
+        with self.assertRaises(ValueError):
+            self.registry.counter('widgets_total', 'Number of widgets', ['kind'])
+        self.registry.histogram('latency_seconds', 'Latency', buckets=(1,))
+        with self.assertRaises(ValueError):
+            self.registry.histogram('latency_seconds', 'Latency', buckets=(2,))
+
+    def test_unregister(self) -> None:
+        self.registry.counter('widgets_total', 'Number of widgets')
+        self.registry.unregister('widgets_total')
+        self.assertIsNone(self.registry.get('widgets_total'))
+        self.assertEqual(self.registry.expose(), '')
+
+    def test_metrics_sorted_by_name(self) -> None:
+        self.registry.counter('b_total', 'b')
+        self.registry.counter('a_total', 'a')
+        lines = self.registry.expose().splitlines()
+        self.assertEqual(lines[0], '# HELP a_total a')
+        self.assertEqual(lines[3], '# HELP b_total b')
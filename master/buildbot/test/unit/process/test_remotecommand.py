@@ -19,8 +19,10 @@ from typing import TYPE_CHECKING
 from typing import Any
 from unittest import mock
 
+from twisted.internet import defer
 from twisted.trial import unittest
 
+from buildbot.process import properties
 from buildbot.process import remotecommand
 from buildbot.test.fake import logfile
 from buildbot.test.util import interfaces
@@ -31,12 +33,12 @@ if TYPE_CHECKING:
     from collections.abc import Awaitable
     from collections.abc import Callable
 
-    from twisted.internet import defer
     from twisted.python.failure import Failure
 
     from buildbot.process.buildstep import BuildStep
     from buildbot.process.log import Log
     from buildbot.process.log import StreamLog
+    from buildbot.util.twisted import InlineCallbacksType
     from buildbot.worker.protocols.base import Connection
 
 
@@ -214,6 +216,40 @@ class Tests(interfaces.InterfaceTests, unittest.TestCase):
         self.assertEqual(cmd.args['usePTY'], 'slave-config')
 
 
+class TestSecretsRedaction(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cmd = remotecommand.RemoteCommand('ping', {}, collectStdout=True)
+        self.cmd.step = mock.Mock()
+        self.properties = properties.Properties()
+        self.cmd.step.build.properties = self.properties
+        self.log = logfile.FakeLogFile('stdio')
+        self.cmd.useLog(self.log)  # type: ignore[arg-type]
+
+    @defer.inlineCallbacks
+    def test_secret_redacted(self) -> InlineCallbacksType[None]:
+        self.properties.useSecret('bar', 'foo')
+        yield self.cmd.remoteUpdate('stdout', 'echo bar\n', False)
+        yield self.cmd.remoteUpdate('header', 'bar\n', False)
+        self.assertEqual(self.log.stdout, 'echo <foo>\n')
+        self.assertEqual(self.log.header, '<foo>\n')
+
+    @defer.inlineCallbacks
+    def test_secret_split_between_updates(self) -> InlineCallbacksType[None]:
+        self.properties.useSecret('first\nsecond', 'key')
+        yield self.cmd.remoteUpdate('stdout', 'a\nfirst\n', False)
+        self.assertEqual(self.log.stdout, 'a\n')
+        yield self.cmd.remoteUpdate('stdout', 'second\nb\n', False)
+        self.assertEqual(self.log.stdout, 'a\n<key>\nb\n')
+        self.assertEqual(self.cmd.stdout, 'a\n<key>\nb\n')
+
+    @defer.inlineCallbacks
+    def test_kept_lines_flushed_on_complete(self) -> InlineCallbacksType[None]:
+        self.properties.useSecret('first\nsecond', 'key')
+        yield self.cmd.remoteUpdate('stdout', 'a\nfirst\n', False)
+        yield self.cmd.remoteComplete(None)
+        self.assertEqual(self.log.stdout, 'a\nfirst\n')
+
+
 class TestWorkerTransition(unittest.TestCase):
     def test_RemoteShellCommand_usePTY(self) -> None:
         with assertNotProducesWarnings(DeprecatedApiWarning):
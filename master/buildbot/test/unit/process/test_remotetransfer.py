@@ -16,14 +16,24 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
 import os
+import shutil
 import stat
+import tarfile
 import tempfile
+from typing import Any
+from typing import Literal
+from typing import cast
 from unittest.mock import Mock
 
+from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot.process import remotetransfer
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.util import twisted as util_twisted
 
 
 # Test buildbot.steps.remotetransfer.FileWriter class.
@@ -67,6 +77,248 @@ class TestFileWriter(unittest.TestCase):
         mockedFdopen.assert_called_once_with(7, 'wb')
 
 
+class QueuedThreadPool:
+    # runs the jobs only when asked to, to observe what waits for the disk
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.jobs: list[tuple[Any, ...]] = []
+        self.running = False
+
+    def start(self) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def callInThreadWithCallback(self, onResult: Any, func: Any, *args: Any) -> None:
+        self.jobs.append((onResult, func, args))
+
+    def run_jobs(self) -> None:
+        while self.jobs:
+            onResult, func, args = self.jobs.pop(0)
+            try:
+                result = func(*args)
+            except Exception:
+                onResult(False, defer.Failure())
+            else:
+                onResult(True, result)
+
+
+class TestFileWriterIO(TestReactorMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        self.setup_test_reactor()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.destfile = os.path.join(self.tmpdir, 'sub', 'file')
+
+    def read_dest(self) -> bytes:
+        with open(self.destfile, 'rb') as f:
+            return f.read()
+
+    @defer.inlineCallbacks
+    def test_write_close_utime(self) -> defer.Generator[Any, Any, None]:
+        writer = remotetransfer.FileWriter(self.destfile, None, 0o640, reactor=self.reactor)
+        yield writer.remote_write(b'some ')
+        yield writer.remote_write('data')
+        yield writer.remote_close()
+        yield writer.remote_utime((1000, 2000))
+        yield writer.cancel()
+
+        self.assertEqual(self.read_dest(), b'some data')
+        self.assertEqual(stat.S_IMODE(os.stat(self.destfile).st_mode), 0o640)
+        self.assertEqual(os.stat(self.destfile).st_mtime, 2000)
+        self.assertEqual(os.listdir(os.path.dirname(self.destfile)), ['file'])
+
+    @defer.inlineCallbacks
+    def test_maxsize(self) -> defer.Generator[Any, Any, None]:
+        writer = remotetransfer.FileWriter(self.destfile, 6, None, reactor=self.reactor)
+        yield writer.remote_write(b'1234')
+        yield writer.remote_write(b'5678')
+        yield writer.remote_close()
+        self.assertEqual(self.read_dest(), b'123456')
+
+    def test_writes_wait_when_too_much_in_flight(self) -> None:
+        self.patch(util_twisted, 'ThreadPool', QueuedThreadPool)
+        self.patch(remotetransfer.FileWriter, 'MAX_IN_FLIGHT', 10)
+        writer = remotetransfer.FileWriter(self.destfile, None, None, reactor=self.reactor)
+
+        self.assertTrue(writer.remote_write(b'123456').called)
+        d = writer.remote_write(b'7890ab')
+        self.assertFalse(d.called)
+        pool = writer._io._pool
+        assert isinstance(pool, QueuedThreadPool)
+        self.assertTrue(pool.running)
+
+        pool.run_jobs()
+        self.assertTrue(d.called)
+        d = writer.remote_close()
+        pool.run_jobs()
+        self.assertTrue(d.called)
+        self.assertFalse(pool.running)
+        self.assertEqual(self.read_dest(), b'1234567890ab')
+
+    @defer.inlineCallbacks
+    def test_error_fails_following_operations(self) -> defer.Generator[Any, Any, None]:
+        writer = remotetransfer.FileWriter(self.destfile, None, None, reactor=self.reactor)
+        yield writer.remote_write(b'data')
+        with self.assertRaises(FileNotFoundError):
+            yield writer.remote_utime((1000, 2000))
+        with self.assertRaises(FileNotFoundError):
+            yield writer.remote_close()
+
+        # cleanup still happens
+        yield writer.cancel()
+        self.assertEqual(os.listdir(os.path.dirname(self.destfile)), [])
+
+
+class TestDirectoryWriter(TestReactorMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        self.setup_test_reactor()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.destroot = os.path.join(self.tmpdir, 'dest')
+
+    def make_archive(
+        self,
+        members: dict[str, bytes | None],
+        compress: str | None = None,
+        format: int = tarfile.DEFAULT_FORMAT,
+    ) -> bytes:
+        f = io.BytesIO()
+        tar_compress = compress if compress != 'zstd' else None
+        mode = cast("Literal['w|', 'w|gz', 'w|bz2']", 'w|' + (tar_compress or ''))
+        with tarfile.open(fileobj=f, mode=mode, format=format) as archive:
+            for name, content in members.items():
+                info = tarfile.TarInfo(name)
+                info.mtime = 1000
+                if content is None:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o750
+                    archive.addfile(info)
+                else:
+                    info.size = len(content)
+                    archive.addfile(info, io.BytesIO(content))
+        if compress == 'zstd':
+            return remotetransfer.zstandard.ZstdCompressor().compress(f.getvalue())
+        return f.getvalue()
+
+    def read_dest(self, name: str) -> bytes:
+        with open(os.path.join(self.destroot, name), 'rb') as f:
+            return f.read()
+
+    @defer.inlineCallbacks
+    def write_archive(
+        self, writer: remotetransfer.DirectoryWriter, data: bytes, chunk_size: int = 100
+    ) -> defer.Generator[Any, Any, None]:
+        for i in range(0, len(data), chunk_size):
+            yield writer.remote_write(data[i : i + chunk_size])
+
+    @defer.inlineCallbacks
+    def check_unpack_streams(self, compress: str | None) -> defer.Generator[Any, Any, None]:
+        content = os.urandom(3000)
+        data = self.make_archive({'dir': None, 'dir/file': content, 'empty': b''}, compress)
+        writer = remotetransfer.DirectoryWriter(
+            self.destroot, None, compress, 0o600, reactor=self.reactor
+        )
+
+        yield self.write_archive(writer, data[:-16])
+        if compress not in ('bz2', 'zstd'):
+            # the members are extracted before the end of the archive is
+            # received; bz2 and zstd only decompress complete blocks
+            self.assertEqual(self.read_dest('dir/file'), content)
+            self.assertEqual(self.read_dest('empty'), b'')
+
+        yield self.write_archive(writer, data[-16:])
+        yield writer.remote_unpack()
+        yield writer.cancel()
+
+        self.assertEqual(self.read_dest('dir/file'), content)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'dir/file')).st_mtime, 1000)
+        self.assertEqual(os.stat(os.path.join(self.destroot, 'dir')).st_mtime, 1000)
+
+    def test_unpack_streams(self) -> defer.Deferred[None]:
+        return self.check_unpack_streams(None)
+
+    def test_unpack_streams_gz(self) -> defer.Deferred[None]:
+        return self.check_unpack_streams('gz')
+
+    def test_unpack_streams_bz2(self) -> defer.Deferred[None]:
+        return self.check_unpack_streams('bz2')
+
+    def test_unpack_streams_zstd(self) -> defer.Deferred[None]:
+        if remotetransfer.zstandard is None:
+            raise unittest.SkipTest("zstandard is not installed")
+        return self.check_unpack_streams('zstd')
+
+    @defer.inlineCallbacks
+    def test_unpack_extended_headers(self) -> defer.Generator[Any, Any, None]:
+        name = 'd' * 120 + '/' + 'f' * 120
+        for format in (tarfile.GNU_FORMAT, tarfile.PAX_FORMAT):
+            shutil.rmtree(self.destroot, ignore_errors=True)
+            data = self.make_archive({name: b'content'}, format=format)
+            writer = remotetransfer.DirectoryWriter(
+                self.destroot, None, None, 0o600, reactor=self.reactor
+            )
+            yield self.write_archive(writer, data, chunk_size=7)
+            yield writer.remote_unpack()
+            self.assertEqual(self.read_dest(name), b'content')
+
+    @defer.inlineCallbacks
+    def test_truncated_archive(self) -> defer.Generator[Any, Any, None]:
+        data = self.make_archive({'file': os.urandom(3000)}, 'gz')
+        writer = remotetransfer.DirectoryWriter(
+            self.destroot, None, 'gz', 0o600, reactor=self.reactor
+        )
+        yield self.write_archive(writer, data[: len(data) // 2])
+        with self.assertRaises(tarfile.ReadError):
+            yield writer.remote_unpack()
+
+        yield writer.cancel()
+        self.assertFalse(os.path.exists(self.destroot))
+
+    @defer.inlineCallbacks
+    def test_member_outside_destination(self) -> defer.Generator[Any, Any, None]:
+        if not hasattr(tarfile, 'data_filter'):
+            raise unittest.SkipTest('tarfile does not support extraction filters')
+        data = self.make_archive({'file': b'ok', '../outside': b'evil'})
+        writer = remotetransfer.DirectoryWriter(
+            self.destroot, None, None, 0o600, reactor=self.reactor
+        )
+        yield self.write_archive(writer, data)
+        with self.assertRaises(tarfile.OutsideDestinationError):
+            yield writer.remote_unpack()
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, 'outside')))
+
+        yield writer.purge()
+        self.assertFalse(os.path.exists(self.destroot))
+
+
+class TestFileDigest(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+
+    def write(self, data: bytes, mtime: int) -> None:
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_digest(self) -> None:
+        self.write(b'content', 1000)
+        self.assertEqual(
+            remotetransfer.file_digest(self.path), hashlib.sha256(b'content').hexdigest()
+        )
+
+    def test_digest_changed_file(self) -> None:
+        self.write(b'content', 1000)
+        remotetransfer.file_digest(self.path)
+        self.write(b'other content', 2000)
+        self.assertEqual(
+            remotetransfer.file_digest(self.path), hashlib.sha256(b'other content').hexdigest()
+        )
+
+
 class TestStringFileWriter(unittest.TestCase):
     def testBasic(self) -> None:
         sfw = remotetransfer.StringFileWriter()
@@ -0,0 +1,147 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from typing import Any
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.changes.filter import ChangeFilter
+from buildbot.test import fakedb
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+
+if TYPE_CHECKING:
+    from buildbot.changes.changes import Change
+    from buildbot.schedulers.dispatcher import ChangeConsumer
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class TestChangeDispatcher(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantMq=True, wantDb=True)
+        yield self.master.db.insert_test_data([
+            fakedb.SourceStamp(id=1),
+            fakedb.Change(
+                changeid=13, sourcestampid=1, branch='main', repository='repo', project='proj'
+            ),
+            fakedb.Change(
+                changeid=14, sourcestampid=1, branch='dev', repository='other', project='other'
+            ),
+        ])
+        self.dispatcher = self.master.change_dispatcher
+        self.received: list[tuple[str, int | None]] = []
+
+    def start_consuming(
+        self, name: str, change_filter: Any = None
+    ) -> defer.Deferred[ChangeConsumer]:
+        def callback(change: Change) -> None:
+            self.received.append((name, change.number))
+
+        return self.dispatcher.startConsuming(callback, change_filter)
+
+    @defer.inlineCallbacks
+    def send_change(self, changeid: int) -> InlineCallbacksType[None]:
+        for qref in self.master.mq.qrefs:
+            if qref.filter == ('changes', None, 'new'):
+                yield qref.callback(('changes', str(changeid), 'new'), {'changeid': changeid})
+
+    @defer.inlineCallbacks
+    def test_dispatch(self) -> InlineCallbacksType[None]:
+        yield self.start_consuming('all')
+        yield self.start_consuming('main', ChangeFilter(branch='main'))
+        yield self.start_consuming('main_or_dev', ChangeFilter(branch=['main', 'dev']))
+        yield self.start_consuming('repo', ChangeFilter(repository='repo', branch_re='^ma'))
+        yield self.start_consuming('project_fn', ChangeFilter(project_fn=lambda p: p == 'proj'))
+        yield self.start_consuming('mock', mock.Mock(filter_change=lambda c: c.branch == 'dev'))
+        # a single consumer of the changes for all the schedulers
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+        yield self.send_change(13)
+        self.assertEqual(
+            self.received,
+            [('all', 13), ('main', 13), ('main_or_dev', 13), ('repo', 13), ('project_fn', 13)],
+        )
+
+        self.received = []
+        yield self.send_change(14)
+        self.assertEqual(self.received, [('all', 14), ('main_or_dev', 14), ('mock', 14)])
+
+    @defer.inlineCallbacks
+    def test_change_loaded_once(self) -> InlineCallbacksType[None]:
+        for i in range(10):
+            yield self.start_consuming(f'sched{i}', ChangeFilter(branch='main'))
+        self.master.db.changes.getChange = mock.Mock(wraps=self.master.db.changes.getChange)
+
+        yield self.send_change(13)
+        self.assertEqual(len(self.received), 10)
+        self.master.db.changes.getChange.assert_called_once_with(13)
+
+    @defer.inlineCallbacks
+    def test_filter_not_evaluated_for_other_values(self) -> InlineCallbacksType[None]:
+        change_filter = ChangeFilter(branch='main', filter_fn=mock.Mock(return_value=True))
+        yield self.start_consuming('main', change_filter)
+
+        yield self.send_change(14)
+        change_filter.filter_fn.assert_not_called()  # type: ignore[union-attr]
+        yield self.send_change(13)
+        change_filter.filter_fn.assert_called_once()  # type: ignore[union-attr]
+        self.assertEqual(self.received, [('main', 13)])
+
+    @defer.inlineCallbacks
+    def test_stop_consuming(self) -> InlineCallbacksType[None]:
+        consumer1 = yield self.start_consuming('all')
+        consumer2 = yield self.start_consuming('main', ChangeFilter(branch='main'))
+        consumer1.stopConsuming()
+
+        yield self.send_change(13)
+        self.assertEqual(self.received, [('main', 13)])
+
+        # the changes are not consumed anymore once no scheduler needs them
+        consumer2.stopConsuming()
+        consumer2.stopConsuming()
+        self.assertEqual(self.master.mq.qrefs, [])
+
+        yield self.start_consuming('main', ChangeFilter(branch='main'))
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+    @defer.inlineCallbacks
+    def test_repeated_filter_values(self) -> InlineCallbacksType[None]:
+        consumer = yield self.start_consuming('main', ChangeFilter(branch=['main', 'main']))
+
+        # the change is dispatched once
+        yield self.send_change(13)
+        self.assertEqual(self.received, [('main', 13)])
+
+        consumer.stopConsuming()
+        self.assertEqual(self.master.mq.qrefs, [])
+
+    @defer.inlineCallbacks
+    def test_failing_consumer(self) -> InlineCallbacksType[None]:
+        def fail(change: Change) -> None:
+            raise RuntimeError('oh noes')
+
+        yield self.dispatcher.startConsuming(fail, ChangeFilter(branch='main'))
+        yield self.start_consuming('main', ChangeFilter(branch='main'))
+
+        yield self.send_change(13)
+        self.assertEqual(self.received, [('main', 13)])
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
@@ -161,9 +161,9 @@ class TestCleanupDbRealDb(
                 # ok.. lz4 is not installed, don't fail
                 lengths["lz4"] = 40
                 continue
-            if mode == "zstd" and not HAS_ZSTD:
+            if mode in ("zstd", "zstd_dict") and not HAS_ZSTD:
                 # zstandard is not installed, don't fail
-                lengths["zstd"] = 20
+                lengths[mode] = 20
                 continue
             if mode == "br" and not HAS_BROTLI:
                 # brotli is not installed, don't fail
@@ -196,6 +196,8 @@ class TestCleanupDbRealDb(
                 'lz4': 40,
                 'gz': 31,
                 'zstd': 20,
+                # not enough content to train a dictionary, plain zstd is used
+                'zstd_dict': 20,
                 'br': 14,
             },
         )
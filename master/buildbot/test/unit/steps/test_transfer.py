@@ -15,17 +15,20 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import shutil
 import tempfile
 from typing import TYPE_CHECKING
+from typing import Any
 from unittest.mock import Mock
 
 from twisted.internet import defer
 from twisted.trial import unittest
 
 from buildbot import config
+from buildbot.interfaces import WorkerSetupError
 from buildbot.process import remotetransfer
 from buildbot.process.properties import Interpolate
 from buildbot.process.results import CANCELLED
@@ -345,6 +348,55 @@ class TestDirectoryUpload(TestBuildStepMixin, TestReactorMixin, unittest.TestCas
         d = self.run_step()
         return d
 
+    def test_init_compress(self) -> None:
+        with self.assertRaises(config.ConfigErrors):
+            transfer.DirectoryUpload(workersrc="srcdir", masterdest=self.destdir, compress='xz')
+
+    def test_init_compress_zstd_not_installed(self) -> None:
+        self.patch(remotetransfer, 'zstandard', None)
+        with self.assertRaises(config.ConfigErrors):
+            transfer.DirectoryUpload(workersrc="srcdir", masterdest=self.destdir, compress='zstd')
+
+    @defer.inlineCallbacks
+    def test_zstd(self) -> InlineCallbacksType[None]:
+        if remotetransfer.zstandard is None:
+            raise unittest.SkipTest("zstandard is not installed")
+        self.setup_step(
+            transfer.DirectoryUpload(workersrc="srcdir", masterdest=self.destdir, compress='zstd')
+        )
+
+        self.expect_commands(
+            ExpectUploadDirectory(
+                workersrc='srcdir',
+                workdir='wkdir',
+                blocksize=16384,
+                compress='zstd',
+                maxsize=None,
+                writer=ExpectRemoteRef(remotetransfer.DirectoryWriter),
+            )
+            .upload_tar_file('fake.tar', {"test": "Hello world!"})
+            .exit(0)
+        )
+
+        self.expect_outcome(result=SUCCESS, state_string="uploading srcdir")
+        yield self.run_step()
+
+        self.assertTrue(os.path.isfile(os.path.join(self.destdir, "test")))
+
+    @defer.inlineCallbacks
+    def test_zstd_old_worker(self) -> InlineCallbacksType[None]:
+        if remotetransfer.zstandard is None:
+            raise unittest.SkipTest("zstandard is not installed")
+        self.setup_build(worker_version={'*': '3.3'})
+        self.setup_step(
+            transfer.DirectoryUpload(workersrc="srcdir", masterdest=self.destdir, compress='zstd')
+        )
+
+        self.expect_outcome(result=EXCEPTION)
+        yield self.run_step()
+
+        self.assertEqual(len(self.flushLoggedErrors(WorkerSetupError)), 1)
+
     def testWorker2_16(self) -> defer.Deferred[None]:
         self.setup_build(worker_version={'*': '2.16'})
         self.setup_step(
@@ -918,6 +970,116 @@ class TestMultipleFileUpload(TestBuildStepMixin, TestReactorMixin, unittest.Test
             ((SUCCESS, ['srcfile', 'srcdir'], self.destdir), {}),
         )
 
+    @defer.inlineCallbacks
+    def test_throughput_header(self) -> InlineCallbacksType[None]:
+        step = self.setup_step(
+            transfer.MultipleFileUpload(workersrcs=["srcfile"], masterdest=self.destdir)
+        )
+
+        self.expect_commands(
+            ExpectStat(file="srcfile", workdir='wkdir').stat_file().exit(0),
+            ExpectUploadFile(
+                workersrc="srcfile",
+                workdir='wkdir',
+                blocksize=16384,
+                maxsize=None,
+                keepstamp=False,
+                writer=ExpectRemoteRef(remotetransfer.FileWriter),
+            )
+            .upload_string("Hello world!\n")
+            .exit(0),
+        )
+
+        self.expect_outcome(result=SUCCESS, state_string="uploading 1 file")
+        yield self.run_step()
+
+        self.assertIn("uploaded 1 of 1 files, 13 bytes\n", step.logs['stdio'].header)  # type: ignore[attr-defined]
+
+    def setup_concurrent_step(self, sources: list[str]) -> tuple[Any, dict[str, Any]]:
+        uploads: dict[str, defer.Deferred[int]] = {}
+
+        class CustomStep(transfer.MultipleFileUpload):
+            uploadDone = Mock(return_value=None)
+            allUploadsDone = Mock(return_value=None)
+
+            def startUpload(self, source: str, destdir: str) -> defer.Deferred[int]:
+                uploads[source] = defer.Deferred()
+                return uploads[source]
+
+        step = self.setup_step(
+            CustomStep(workersrcs=sources, masterdest=self.destdir, max_concurrent_uploads=2)
+        )
+        self.expect_commands()
+        return step, uploads
+
+    @defer.inlineCallbacks
+    def test_concurrent_uploads(self) -> InlineCallbacksType[None]:
+        step, uploads = self.setup_concurrent_step(["a", "b", "c"])
+        self.expect_outcome(result=SUCCESS, state_string="uploading 3 files")
+        d = self.run_step()
+
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        self.reactor.advance(2)
+        uploads["b"].callback(SUCCESS)
+        self.assertEqual(sorted(uploads), ["a", "b", "c"])
+        uploads["a"].callback(SUCCESS)
+        uploads["c"].callback(SUCCESS)
+        yield d
+
+        self.assertEqual(step.allUploadsDone.call_count, 1)
+        self.assertEqual(
+            step.allUploadsDone.call_args_list[0],
+            ((SUCCESS, ["a", "b", "c"], self.destdir), {}),
+        )
+        self.assertEqual(
+            step.logs['stdio'].header,
+            "uploaded 3 of 3 files, 0 bytes in 2.00 seconds (0 bytes/s)\n",
+        )
+
+    @defer.inlineCallbacks
+    def test_concurrent_uploads_failure(self) -> InlineCallbacksType[None]:
+        step, uploads = self.setup_concurrent_step(["a", "b", "c"])
+        self.expect_outcome(result=FAILURE, state_string="uploading 3 files (failure)")
+        d = self.run_step()
+
+        uploads["a"].callback(FAILURE)
+        # the upload that is already running is completed, but no new one is started
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        self.assertEqual(step.allUploadsDone.call_count, 0)
+        uploads["b"].callback(SUCCESS)
+        yield d
+
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        self.assertEqual(
+            step.allUploadsDone.call_args_list[0],
+            ((FAILURE, ["a", "b", "c"], self.destdir), {}),
+        )
+
+    @defer.inlineCallbacks
+    def test_concurrent_uploads_interrupted(self) -> InlineCallbacksType[None]:
+        step, uploads = self.setup_concurrent_step(["a", "b", "c"])
+        self.expect_outcome(result=CANCELLED, state_string="uploading 3 files (cancelled)")
+        d = self.run_step()
+
+        yield step.interrupt('stop it')
+        # the running uploads are completed, but no new one is started
+        uploads["a"].callback(SUCCESS)
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        uploads["b"].callback(SUCCESS)
+        yield d
+
+        self.assertEqual(sorted(uploads), ["a", "b"])
+        self.assertEqual(
+            step.allUploadsDone.call_args_list[0],
+            ((CANCELLED, ["a", "b", "c"], self.destdir), {}),
+        )
+
+    def test_max_concurrent_uploads_invalid(self) -> None:
+        with self.assertRaisesRegex(
+            config.ConfigErrors, 'max_concurrent_uploads must be a positive integer'
+        ):
+            transfer.MultipleFileUpload(["srcfile"], self.destdir, max_concurrent_uploads=0)
+
     def test_init_workersrcs_keyword(self) -> None:
         step = transfer.MultipleFileUpload(workersrcs=['srcfile'], masterdest='dstfile')
 
@@ -1028,6 +1190,65 @@ class TestFileDownload(TestBuildStepMixin, TestReactorMixin, unittest.TestCase):
         contents = contents[:1000]
         self.assertEqual(b''.join(read), contents)
 
+    @defer.inlineCallbacks
+    def test_use_worker_cache(self) -> InlineCallbacksType[None]:
+        master_file = __file__
+        self.setup_step(
+            transfer.FileDownload(
+                mastersrc=master_file, workerdest=self.destfile, use_worker_cache=True
+            )
+        )
+
+        with open(master_file, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        self.expect_commands(
+            ExpectDownloadFile(
+                workerdest=self.destfile,
+                workdir='wkdir',
+                blocksize=16384,
+                maxsize=None,
+                mode=None,
+                reader=ExpectRemoteRef(remotetransfer.FileReader),
+                digest=digest,
+            )
+            .download_string(lambda data: None)
+            .exit(0)
+        )
+
+        self.expect_outcome(
+            result=SUCCESS, state_string=f"downloading to {os.path.basename(self.destfile)}"
+        )
+        yield self.run_step()
+
+    @defer.inlineCallbacks
+    def test_use_worker_cache_old_worker(self) -> InlineCallbacksType[None]:
+        master_file = __file__
+        self.setup_build(worker_version={'*': '3.4'})
+        self.setup_step(
+            transfer.FileDownload(
+                mastersrc=master_file, workerdest=self.destfile, use_worker_cache=True
+            )
+        )
+
+        self.expect_commands(
+            ExpectDownloadFile(
+                workerdest=self.destfile,
+                workdir='wkdir',
+                blocksize=16384,
+                maxsize=None,
+                mode=None,
+                reader=ExpectRemoteRef(remotetransfer.FileReader),
+            )
+            .download_string(lambda data: None)
+            .exit(0)
+        )
+
+        self.expect_outcome(
+            result=SUCCESS, state_string=f"downloading to {os.path.basename(self.destfile)}"
+        )
+        yield self.run_step()
+
     @defer.inlineCallbacks
     def test_no_file(self) -> InlineCallbacksType[None]:
         self.setup_step(
@@ -1117,6 +1338,24 @@ class TestStringDownload(TestBuildStepMixin, TestReactorMixin, unittest.TestCase
 
         self.assertEqual(b''.join(read), b"Hello World")
 
+    def test_use_worker_cache(self) -> defer.Deferred[None]:
+        self.setup_step(transfer.StringDownload("Hello World", "hello.txt", use_worker_cache=True))
+
+        self.expect_commands(
+            ExpectDownloadFile(
+                workerdest="hello.txt",
+                workdir='wkdir',
+                blocksize=16384,
+                maxsize=None,
+                mode=None,
+                reader=ExpectRemoteRef(remotetransfer.StringFileReader),
+                digest=hashlib.sha256(b"Hello World").hexdigest(),
+            ).exit(0)
+        )
+
+        self.expect_outcome(result=SUCCESS, state_string="downloading to hello.txt")
+        return self.run_step()
+
     def testFailure(self) -> defer.Deferred[None]:
         self.setup_step(transfer.StringDownload("Hello World", "hello.txt"))
 
@@ -90,3 +90,35 @@ class SimpleMQ(TestReactorMixin, unittest.TestCase):
         self.assertFalse(d.called)
         d1.callback(None)
         self.assertTrue(d.called)
+
+    @defer.inlineCallbacks
+    def test_forward_data_in_subscription_order(self) -> InlineCallbacksType[None]:
+        calls = []
+        yield self.mq.startConsuming(lambda k, d: calls.append(1), ('a', None))
+        yield self.mq.startConsuming(lambda k, d: calls.append(2), ('a', 'b'))
+        yield self.mq.startConsuming(lambda k, d: calls.append(3), (None, 'b'))
+        yield self.mq.startConsuming(lambda k, d: calls.append(4), ('a', 'c'))
+        yield self.mq.produce(('a', 'b'), 'foo')  # type: ignore[func-returns-value,arg-type]
+        self.assertEqual(calls, [1, 2, 3])
+
+    @defer.inlineCallbacks
+    def test_stop_consuming(self) -> InlineCallbacksType[None]:
+        callback = mock.Mock()
+        qref = yield self.mq.startConsuming(callback, ('a', None))
+        qref.stopConsuming()
+        # stopping twice is harmless
+        qref.stopConsuming()
+        yield self.mq.produce(('a', 'b'), 'foo')  # type: ignore[func-returns-value,arg-type]
+        callback.assert_not_called()
+        self.assertEqual(self.mq.qrefs, [])
+
+    @defer.inlineCallbacks
+    def test_persistent_queue(self) -> InlineCallbacksType[None]:
+        callback = mock.Mock()
+        qref = yield self.mq.startConsuming(callback, ('a', None), persistent_name='p')
+        qref.stopConsuming()
+        yield self.mq.produce(('a', 'b'), 'foo')  # type: ignore[func-returns-value,arg-type]
+        callback.assert_not_called()
+
+        yield self.mq.startConsuming(callback, ('a', None), persistent_name='p')
+        callback.assert_called_once_with(('a', 'b'), 'foo')
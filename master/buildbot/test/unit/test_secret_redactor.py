@@ -0,0 +1,118 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from twisted.trial import unittest
+
+from buildbot.secrets.redactor import SecretRedactor
+
+
+class TestSecretRedactor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redactor = SecretRedactor()
+
+    def test_no_secret(self) -> None:
+        text = 'some text'
+        self.assertIs(self.redactor.redact(text), text)
+
+    def test_redact(self) -> None:
+        self.redactor.add('bar', '<foo>')
+        self.redactor.add('barrandom', '<other>')
+        self.assertEqual(self.redactor.redact('echo bar barrandom bar'), 'echo <foo> <other> <foo>')
+        self.assertEqual(len(self.redactor), 2)
+
+    def test_redact_not_found(self) -> None:
+        self.redactor.add('bar', '<foo>')
+        text = 'some text'
+        self.assertIs(self.redactor.redact(text), text)
+
+    def test_redact_replacement_not_redacted(self) -> None:
+        self.redactor.add('foo', '<foo>')
+        self.redactor.add('oo>', '<other>')
+        self.assertEqual(self.redactor.redact('foo>'), '<foo><other>')
+        self.assertEqual(self.redactor.redact('foo '), '<foo> ')
+
+    def test_redact_overlapping(self) -> None:
+        self.redactor.add('abcd', '<long>')
+        self.redactor.add('xab', '<short>')
+        # no part of any secret is left
+        self.assertEqual(self.redactor.redact('1xabcd2'), '1<short><long>2')
+
+    def test_redact_repeated(self) -> None:
+        self.redactor.add('aa', '<a>')
+        self.assertEqual(self.redactor.redact('aaaaa'), '<a><a><a><a>')
+
+    def test_redact_filtered(self) -> None:
+        secrets = [f'{i:02}-secret-value' for i in range(40)]
+        for i, secret in enumerate(secrets):
+            self.redactor.add(secret, f'<{i}>')
+        self.redactor.add('short', '<short>')
+        # the secrets are filtered
+        self.assertEqual(self.redactor.redact('nothing here'), 'nothing here')
+        self.assertTrue(self.redactor._sampling_step)
+
+        for i, secret in enumerate(secrets):
+            for prefix in ('', 'a', 'abc', 'x' * 50):
+                self.assertEqual(
+                    self.redactor.redact(f'{prefix}{secret} short {secret}'),
+                    f'{prefix}<{i}> <short> <{i}>',
+                )
+
+        self.redactor.add('another-secret-value', '<another>')
+        self.assertEqual(self.redactor.redact('x another-secret-value'), 'x <another>')
+
+    def test_add_updates_replacement(self) -> None:
+        self.redactor.add('bar', '<foo>')
+        self.redactor.add('bar', '<other>')
+        self.assertEqual(self.redactor.redact('bar'), '<other>')
+
+
+class TestSecretRedactorStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redactor = SecretRedactor()
+        self.stream = self.redactor.stream()
+
+    def test_no_secret(self) -> None:
+        self.assertEqual(self.stream.append('abc\n'), 'abc\n')
+        self.assertEqual(self.stream.flush(), '')
+
+    def test_whole_lines(self) -> None:
+        self.redactor.add('secret', '<s>')
+        self.assertEqual(self.stream.append('a secret\nsec'), 'a <s>\n')
+        self.assertEqual(self.stream.append('ret\n'), '<s>\n')
+        self.assertEqual(self.stream.flush(), '')
+
+    def test_multiline_secret(self) -> None:
+        self.redactor.add('-----BEGIN KEY-----\nxyz\n-----END KEY-----', '<key>')
+        self.assertEqual(self.stream.append('line 1\n-----BEGIN KEY-----\n'), 'line 1\n')
+        self.assertEqual(self.stream.append('xyz\n'), '')
+        self.assertEqual(self.stream.append('-----END KEY-----\nline 2\n'), '<key>\nline 2\n')
+
+    def test_multiline_secret_not_completed(self) -> None:
+        self.redactor.add('abc\ndef', '<s>')
+        self.assertEqual(self.stream.append('1\nabc\n'), '1\n')
+        self.assertEqual(self.stream.append('xyz\n'), 'abc\nxyz\n')
+
+    def test_secret_in_kept_line_redacted(self) -> None:
+        self.redactor.add('abc\ndef', '<s>')
+        self.redactor.add('pass', '<p>')
+        self.assertEqual(self.stream.append('pass abc\n'), '')
+        self.assertEqual(self.stream.flush(), '<p> abc\n')
+
+    def test_secret_added_later(self) -> None:
+        self.assertEqual(self.stream.append('secret\n'), 'secret\n')
+        self.redactor.add('secret', '<s>')
+        self.assertEqual(self.stream.append('secret\n'), '<s>\n')
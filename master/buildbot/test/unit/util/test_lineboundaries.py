@@ -149,6 +149,33 @@ class TestLineBoundaryFinder(unittest.TestCase):
         res = [e for e in res if e is not None]
         self.assertEqual(res, [('12' * 2048 + '\n') * 16])
 
+    def test_long_complete_line(self) -> None:
+        """long lines are split even when they are complete"""
+        res = self.lbf.append('12' * 3000 + '\nabc\n')
+        self.assertEqual(res, '12' * 2048 + '\n' + '12' * 952 + '\nabc\n')
+
+    def test_split_escape_sequence(self) -> None:
+        """terminal control sequences split across chunks are converted"""
+        res = self.lbf.append('abc\033[')
+        self.assertEqual(res, None)
+
+        res = self.lbf.append('2Jdef\n')
+        self.assertEqual(res, 'abc\ndef\n')
+
+    def test_progress_bar_in_small_chunks(self) -> None:
+        """each update of a progress bar sent separately becomes a line"""
+        res = []
+        for percent in range(0, 101, 10):
+            res.append(self.lbf.append(f'{percent}%'))
+            res.append(self.lbf.append('\r'))
+        res.append(self.lbf.append('done'))
+        res.append(self.lbf.flush())
+        res = [e for e in res if e is not None]
+        self.assertEqual(
+            ''.join(res),  # type: ignore[arg-type]
+            ''.join(f'{percent}%\n' for percent in range(0, 101, 10)) + 'done\n',
+        )
+
     def test_empty_flush(self) -> None:
         res = self.lbf.flush()
         self.assertEqual(res, None)
@@ -602,3 +602,67 @@ class AsyncLRUCacheTest(unittest.TestCase):
         self.assertEqual((yield self.lru.get('p')), short('p'))
         self.lru.put('p', set(['P2P2']))
         self.assertEqual((yield self.lru.get('p')), set(['P2P2']))
+
+
+class SizedLRUCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lru: lru.SizedLRUCache[str, str] = lru.SizedLRUCache(len, 10)
+
+    def test_get_put(self) -> None:
+        self.assertEqual(self.lru.get('a'), None)
+        self.lru.put('a', 'aaa')
+        self.assertEqual(self.lru.get('a'), 'aaa')
+        self.assertEqual((self.lru.hits, self.lru.misses, self.lru.size), (1, 1, 3))
+
+    def test_put_replaces(self) -> None:
+        self.lru.put('a', 'aaa')
+        self.lru.put('a', 'a')
+        self.assertEqual(self.lru.get('a'), 'a')
+        self.assertEqual(self.lru.size, 1)
+
+    def test_lru_expulsion(self) -> None:
+        self.lru.put('a', 'aaaa')
+        self.lru.put('b', 'bbbb')
+        self.lru.get('a')
+        self.lru.put('c', 'cccc')
+        self.assertEqual(self.lru.keys(), ['a', 'c'])
+        self.assertEqual(self.lru.size, 8)
+
+    def test_put_too_big(self) -> None:
+        self.lru.put('a', 'aaaa')
+        self.lru.put('b', 'b' * 11)
+        self.assertEqual(self.lru.keys(), ['a'])
+
+    def test_pop_clear(self) -> None:
+        self.lru.put('a', 'aaaa')
+        self.lru.put('b', 'bbbb')
+        self.lru.pop('a')
+        self.lru.pop('missing')
+        self.assertEqual((self.lru.keys(), self.lru.size), (['b'], 4))
+        self.lru.clear()
+        self.assertEqual((self.lru.keys(), self.lru.size), ([], 0))
+
+    def test_set_max_size(self) -> None:
+        for k in 'abc':
+            self.lru.put(k, k * 3)
+        self.lru.set_max_size(5)
+        self.assertEqual((self.lru.keys(), self.lru.size), (['c'], 3))
+
+    def test_pop_group(self) -> None:
+        grouped: lru.SizedLRUCache[str, str] = lru.SizedLRUCache(len, 10, group_fn=lambda k: k[0])
+        grouped.put('a1', 'aa')
+        grouped.put('b1', 'bb')
+        grouped.put('a2', 'aa')
+        grouped.pop_group('a')
+        grouped.pop_group('missing')
+        self.assertEqual((grouped.keys(), grouped.size), (['b1'], 2))
+        self.assertEqual(grouped.groups, {'b': {'b1'}})
+
+    def test_groups_follow_expulsion(self) -> None:
+        grouped: lru.SizedLRUCache[str, str] = lru.SizedLRUCache(len, 4, group_fn=lambda k: k[0])
+        grouped.put('a1', 'aa')
+        grouped.put('a2', 'aa')
+        grouped.put('b1', 'bb')
+        grouped.pop('a2')
+        self.assertEqual(grouped.keys(), ['b1'])
+        self.assertEqual(grouped.groups, {'b': {'b1'}})
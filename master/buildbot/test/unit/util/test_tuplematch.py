@@ -31,3 +31,58 @@ class MatchTuple(tuplematching.TupleMatchingMixin, unittest.TestCase):
         should_match_string = 'should match' if shouldMatch else "shouldn't match"
         msg = f"{routingKey!r} {should_match_string} {filter!r}"
         self.assertEqual(shouldMatch, result, msg)
+
+
+class TupleMatchIndexMatch(tuplematching.TupleMatchingMixin, unittest.TestCase):
+    def do_test_match(  # type: ignore[override]
+        self, routingKey: tuple[str, ...], shouldMatch: bool, filter: tuple[str | None, ...]
+    ) -> None:
+        index: tuplematch.TupleMatchIndex[str] = tuplematch.TupleMatchIndex()
+        index.add(filter, 'value')
+        result = index.match(routingKey)
+        should_match_string = 'should match' if shouldMatch else "shouldn't match"
+        msg = f"{routingKey!r} {should_match_string} {filter!r}"
+        self.assertEqual(['value'] if shouldMatch else [], result, msg)
+
+
+class TupleMatchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index: tuplematch.TupleMatchIndex[str] = tuplematch.TupleMatchIndex()
+
+    def test_match_keeps_insertion_order(self) -> None:
+        self.index.add(('a', None, 'c'), 'first')
+        self.index.add(('a', 'b', 'c'), 'second')
+        self.index.add((None, None, None), 'third')
+        self.index.add(('a', None, 'c'), 'fourth')
+        self.index.add(('a', 'x', 'c'), 'other')
+        self.assertEqual(self.index.match(('a', 'b', 'c')), ['first', 'second', 'third', 'fourth'])
+
+    def test_add_twice(self) -> None:
+        self.index.add(('a', 'b'), 'value')
+        self.index.add(('a', 'b'), 'value')
+        self.assertEqual(self.index.match(('a', 'b')), ['value'])
+        self.assertEqual(len(self.index), 1)
+
+    def test_remove(self) -> None:
+        self.index.add(('a', 'b'), 'v1')
+        self.index.add(('a', None), 'v2')
+        self.assertTrue(self.index.remove(('a', 'b'), 'v1'))
+        self.assertEqual(self.index.match(('a', 'b')), ['v2'])
+        self.assertTrue(self.index.remove(('a', None), 'v2'))
+        self.assertEqual(self.index.match(('a', 'b')), [])
+        self.assertEqual(len(self.index), 0)
+        # all branches are pruned once empty
+        self.assertEqual(self.index._roots, {})
+
+    def test_remove_missing(self) -> None:
+        self.index.add(('a', 'b'), 'v1')
+        self.assertFalse(self.index.remove(('a', 'b'), 'v2'))
+        self.assertFalse(self.index.remove(('a', 'c'), 'v1'))
+        self.assertFalse(self.index.remove(('a',), 'v1'))
+        self.assertEqual(self.index.match(('a', 'b')), ['v1'])
+
+    def test_remove_keeps_other_branches(self) -> None:
+        self.index.add(('a', 'b', 'c'), 'v1')
+        self.index.add(('a', 'b', 'd'), 'v2')
+        self.index.remove(('a', 'b', 'c'), 'v1')
+        self.assertEqual(self.index.match(('a', 'b', 'd')), ['v2'])
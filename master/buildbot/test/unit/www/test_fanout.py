@@ -0,0 +1,180 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import Any
+from unittest import mock
+
+from twisted.trial import unittest
+
+from buildbot.www import fanout
+
+
+class TestMessageEncoder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.make_frame = mock.Mock(side_effect=lambda key, data: fanout.encode_json([key, data]))
+        self.encoder = fanout.MessageEncoder(self.make_frame)
+
+    def test_encode(self) -> None:
+        self.assertEqual(
+            self.encoder.encode(('builds', '1', 'new'), {'buildid': 1}),
+            b'[["builds","1","new"],{"buildid":1}]',
+        )
+
+    def test_encode_once_for_same_message(self) -> None:
+        key = ('builds', '1', 'new')
+        data = {'buildid': 1}
+        frames = {self.encoder.encode(key, data) for _ in range(10)}
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(self.make_frame.call_count, 1)
+
+    def test_encode_equal_but_distinct_messages(self) -> None:
+        key = ('builds', '1', 'update')
+        self.encoder.encode(key, {'buildid': 1})
+        self.encoder.encode(key, {'buildid': 1})
+        self.assertEqual(self.make_frame.call_count, 2)
+
+    def test_encode_same_message_other_key(self) -> None:
+        data = {'buildid': 1}
+        self.encoder.encode(('builds', '1', 'new'), data)
+        frame = self.encoder.encode(('builds', '1', 'started'), data)
+        self.assertEqual(frame, b'[["builds","1","started"],{"buildid":1}]')
+        self.assertEqual(self.make_frame.call_count, 2)
+
+
+class TestCoalesceKey(unittest.TestCase):
+    def test_full_state_event(self) -> None:
+        key = ('builds', '1', 'update')
+        self.assertEqual(fanout.coalesce_key(key), key)
+        self.assertEqual(fanout.coalesce_key(['builds', '1', 'update']), key)
+        step_key = ('builds', '1', 'steps', '2', 'updated')
+        self.assertEqual(fanout.coalesce_key(step_key), step_key)
+
+    def test_delta_event(self) -> None:
+        self.assertIsNone(fanout.coalesce_key(('builds', '1', 'properties', 'update')))
+
+    def test_other_events(self) -> None:
+        for key in [
+            ('builders', '1', 'started'),
+            ('stats-yieldMetricsValue', 'stats-yield-data'),
+            ('buildrequests', '1', 'claimed'),
+            ('builds', '1', 'new'),
+            ('update',),
+        ]:
+            self.assertIsNone(fanout.coalesce_key(key))
+
+
+class TestClientQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.written: list[bytes] = []
+        self.overflows = 0
+        self.queue = fanout.ClientQueue(self.written.append, self.on_overflow, max_pending=4)
+
+    def on_overflow(self) -> None:
+        self.overflows += 1
+
+    def test_write_immediately(self) -> None:
+        self.queue.push(b'a', coalesce_key='k')
+        self.queue.push(b'b', coalesce_key='k')
+        self.assertEqual(self.written, [b'a', b'b'])
+
+    def test_queue_while_paused(self) -> None:
+        self.queue.pauseProducing()
+        self.queue.push(b'a')
+        self.queue.push(b'b')
+        self.assertEqual(self.written, [])
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [b'a', b'b'])
+
+    def test_coalesce_while_paused(self) -> None:
+        self.queue.pauseProducing()
+        self.queue.push(b'step 1', coalesce_key=('steps', '1', 'update'))
+        self.queue.push(b'build 1', coalesce_key=('builds', '1', 'update'))
+        self.queue.push(b'step 1 again', coalesce_key=('steps', '1', 'update'))
+        self.queue.push(b'ack')
+        self.queue.push(b'ack')
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [b'build 1', b'step 1 again', b'ack', b'ack'])
+
+    def test_pause_during_flush(self) -> None:
+        def write(payload: bytes) -> None:
+            self.written.append(payload)
+            self.queue.pauseProducing()
+
+        self.queue._write = write
+        self.queue.pauseProducing()
+        self.queue.push(b'a')
+        self.queue.push(b'b')
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [b'a'])
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [b'a', b'b'])
+
+    def test_overflow(self) -> None:
+        self.queue.pauseProducing()
+        for i in range(5):
+            self.queue.push(str(i).encode(), coalesce_key=i)
+        self.assertEqual(self.overflows, 1)
+        self.assertEqual(len(self.queue.pending), 0)
+
+        # nothing is delivered or queued after the overflow
+        self.queue.push(b'late')
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [])
+        self.assertEqual(self.overflows, 1)
+
+    def test_coalesced_messages_do_not_overflow(self) -> None:
+        self.queue.pauseProducing()
+        for i in range(100):
+            self.queue.push(str(i).encode(), coalesce_key='k')
+        self.assertEqual(self.overflows, 0)
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [b'99'])
+
+    def test_stop(self) -> None:
+        self.queue.pauseProducing()
+        self.queue.push(b'a')
+        self.queue.stopProducing()
+        self.queue.push(b'b')
+        self.queue.resumeProducing()
+        self.assertEqual(self.written, [])
+
+
+class FakeTransport:
+    def __init__(self, producer: Any = None) -> None:
+        self.producer = producer
+
+    def registerProducer(self, producer: Any, streaming: bool) -> None:
+        if self.producer is not None:
+            raise RuntimeError("Cannot register producer, already registered")
+        self.producer = producer
+
+    def unregisterProducer(self) -> None:
+        self.producer = None
+
+
+class TestRegisterClientQueue(unittest.TestCase):
+    def test_register(self) -> None:
+        transport = FakeTransport()
+        queue = fanout.ClientQueue(mock.Mock(), mock.Mock())
+        fanout.register_client_queue(transport, queue)
+        self.assertIs(transport.producer, queue)
+
+    def test_register_replaces_http_channel(self) -> None:
+        transport = FakeTransport(producer=mock.Mock())
+        queue = fanout.ClientQueue(mock.Mock(), mock.Mock())
+        fanout.register_client_queue(transport, queue)
+        self.assertIs(transport.producer, queue)
@@ -0,0 +1,58 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.process import metrics
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.test.util import www
+from buildbot.www import metrics as www_metrics
+
+if TYPE_CHECKING:
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class TestMetricsResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        self.setup_test_reactor()
+
+    @defer.inlineCallbacks
+    def test_render(self) -> InlineCallbacksType[None]:
+        master = yield self.make_master(url='h:/a/b/')
+        registry = metrics.MetricsRegistry()
+        registry.counter('widgets_total', 'Number of widgets').inc(2)
+        rsrc = www_metrics.MetricsResource(master, registry)
+
+        res = yield self.render_resource(rsrc, b'/metrics')
+        self.assertEqual(
+            res,
+            b'# HELP widgets_total Number of widgets\n'
+            b'# TYPE widgets_total counter\n'
+            b'widgets_total 2\n',
+        )
+        self.assertRequest(
+            contentType=b'text/plain; version=0.0.4; charset=utf-8', responseCode=200
+        )
+
+    @defer.inlineCallbacks
+    def test_default_registry(self) -> InlineCallbacksType[None]:
+        master = yield self.make_master(url='h:/a/b/')
+        rsrc = www_metrics.MetricsResource(master)
+        self.assertIs(rsrc.registry, metrics.registry)
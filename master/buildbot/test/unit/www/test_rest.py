@@ -400,6 +400,58 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin, unittest.TestCase)
         yield self.render_resource(self.rsrc, b'/test')
         self.assertRestCollection(typeName='tests', items=list(endpoint.testData.values()), total=8)
 
+    @defer.inlineCallbacks
+    def test_api_collection_without_orjson(self) -> InlineCallbacksType[None]:
+        self.patch(rest, 'orjson', None)
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertRestCollection(typeName='tests', items=list(endpoint.testData.values()), total=8)
+        self.assertEqual(int(self.request.headers[b'content-length'][0]), len(self.request.written))
+
+    @defer.inlineCallbacks
+    def test_api_collection_encoders_match(self) -> InlineCallbacksType[None]:
+        if rest.orjson is None:
+            raise unittest.SkipTest("orjson is not installed")
+        for accept in (None, b'application/json'):
+            with_orjson = yield self.render_resource(self.rsrc, b'/test', accept=accept)
+            with mock.patch.object(rest, 'orjson', None):
+                without_orjson = yield self.render_resource(self.rsrc, b'/test', accept=accept)
+            self.assertEqual(json.loads(with_orjson), json.loads(without_orjson))
+
+    @defer.inlineCallbacks
+    def test_api_collection_streaming(self) -> InlineCallbacksType[None]:
+        self.master.config.www['json_streaming'] = True
+        self.rsrc.reconfigResource(self.master.config)
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertRestCollection(typeName='tests', items=list(endpoint.testData.values()), total=8)
+        self.assertNotIn(b'content-length', self.request.headers)
+
+    @defer.inlineCallbacks
+    def test_api_head_streaming(self) -> InlineCallbacksType[None]:
+        self.master.config.www['json_streaming'] = True
+        self.rsrc.reconfigResource(self.master.config)
+        head = yield self.render_resource(self.rsrc, b'/test', method=b'HEAD')
+        self.assertEqual(head, b'')
+        self.assertNotIn(b'content-length', self.request.headers)
+
+    def test_encode_json_data_orjson_fallback(self) -> None:
+        request = self.make_request(b'/test')
+        encoder = json.encoder.JSONEncoder(sort_keys=True)
+        # orjson refuses non-str keys and integers wider than 64 bits
+        data = {'a': {'1': 2**70}}
+        self.assertEqual(
+            bytes(self.rsrc._encode_json_data(request, encoder, data)),  # type: ignore[arg-type]
+            b'{"a": {"1": 1180591620717411303424}}',
+        )
+
+    def test_encode_json_data_finished_request(self) -> None:
+        request = self.make_request(b'/test')
+        request.finished = True
+        self.patch(rest, 'orjson', None)
+        encoder = json.encoder.JSONEncoder(sort_keys=True)
+        self.assertIsNone(
+            self.rsrc._encode_json_data(request, encoder, {'a': 1})  # type: ignore[arg-type]
+        )
+
     @defer.inlineCallbacks
     def do_test_api_collection_pagination(
         self, query: bytes, ids: list[int], links: dict[str, str]
@@ -784,6 +836,103 @@ class V2RootResource_REST(TestReactorMixin, www.WwwTestMixin, unittest.TestCase)
         self.assertEqual(got, exp)
 
 
+class V2RootResource_REST_cache(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        self.setup_test_reactor()
+        self.master = yield self.make_master(url='h:/')
+        self.master.config.www['rest_cache'] = {'resources': ['tests'], 'max_age': 10}
+        self.master.data._scanModule(endpoint)
+        self.master.data.rtypes.test.eventPaths = ['tests/{testid}']
+        self.master.mq.verifyMessages = False
+        self.rsrc = rest.V2RootResource(self.master)
+        self.rsrc.reconfigResource(self.master.config)
+
+        def allow(*args: Any, **kw: Any) -> None:
+            return
+
+        self.master.www.assertUserAllowed = allow
+
+        self.get_calls = 0
+        original_get = endpoint.TestsEndpoint.get
+
+        def get(ep: endpoint.TestsEndpoint, resultSpec: Any, kwargs: Any) -> Any:
+            self.get_calls += 1
+            return original_get(ep, resultSpec, kwargs)
+
+        self.patch(endpoint.TestsEndpoint, 'get', get)
+
+    @defer.inlineCallbacks
+    def test_etag(self) -> InlineCallbacksType[None]:
+        self.master.config.www.pop('rest_cache')
+        self.rsrc.reconfigResource(self.master.config)
+
+        body = yield self.render_resource(self.rsrc, b'/test')
+        etag = self.request.headers[b'etag'][0]
+
+        body = yield self.render_resource(
+            self.rsrc, b'/test', extraHeaders={b'if-none-match': b'W/' + etag}
+        )
+        self.assertEqual(body, b'')
+        self.assertEqual(self.request.responseCode, 304)
+        self.assertEqual(self.request.headers[b'etag'], [etag])
+
+        body = yield self.render_resource(
+            self.rsrc, b'/test', extraHeaders={b'if-none-match': b'"other"'}
+        )
+        self.assertEqual(self.request.responseCode, 200)
+        self.assertEqual(json.loads(body)['meta'], {'total': 8})
+        # without cache, the endpoint is called each time
+        self.assertEqual(self.get_calls, 3)
+
+    @defer.inlineCallbacks
+    def test_cache_hit(self) -> InlineCallbacksType[None]:
+        first = yield self.render_resource(self.rsrc, b'/test')
+        etag = self.request.headers[b'etag']
+        second = yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(first, second)
+        self.assertEqual(self.request.headers[b'etag'], etag)
+        self.assertEqual(self.request.headers[b'content-type'], [b'text/plain; charset=utf-8'])
+        self.assertEqual(self.get_calls, 1)
+
+    @defer.inlineCallbacks
+    def test_cache_key(self) -> InlineCallbacksType[None]:
+        yield self.render_resource(self.rsrc, b'/test')
+        yield self.render_resource(self.rsrc, b'/test', accept=b'application/json')
+        yield self.render_resource(self.rsrc, b'/test?limit=2')
+        self.assertEqual(self.get_calls, 3)
+
+    @defer.inlineCallbacks
+    def test_cache_invalidated_by_event(self) -> InlineCallbacksType[None]:
+        yield self.render_resource(self.rsrc, b'/test')
+        self.master.mq.callConsumer(('tests', '13', 'updated'), {'testid': 13})
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(self.get_calls, 2)
+
+    @defer.inlineCallbacks
+    def test_cache_expires(self) -> InlineCallbacksType[None]:
+        yield self.render_resource(self.rsrc, b'/test')
+        self.reactor.advance(11)
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(self.get_calls, 2)
+
+    @defer.inlineCallbacks
+    def test_cache_other_resources(self) -> InlineCallbacksType[None]:
+        self.master.config.www['rest_cache'] = {'resources': ['builders']}
+        self.rsrc.reconfigResource(self.master.config)
+        yield self.render_resource(self.rsrc, b'/test')
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(self.get_calls, 2)
+
+    @defer.inlineCallbacks
+    def test_reconfig_stops_consuming(self) -> InlineCallbacksType[None]:
+        yield self.render_resource(self.rsrc, b'/test')
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+        self.master.config.www.pop('rest_cache')
+        self.rsrc.reconfigResource(self.master.config)
+        self.assertEqual(self.master.mq.qrefs, [])
+
+
 class V2RootResource_JSONRPC2(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
     @defer.inlineCallbacks
     def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
@@ -0,0 +1,103 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from buildbot.test.fake import fakemaster
+from buildbot.test.reactor import TestReactorMixin
+from buildbot.www import rest_cache
+
+if TYPE_CHECKING:
+    from buildbot.util.twisted import InlineCallbacksType
+
+
+class EtagMatches(unittest.TestCase):
+    def test_no_header(self) -> None:
+        self.assertFalse(rest_cache.etag_matches(None, b'"abc"'))
+
+    def test_matches(self) -> None:
+        self.assertTrue(rest_cache.etag_matches(b'"abc"', b'"abc"'))
+        self.assertTrue(rest_cache.etag_matches(b'W/"abc"', b'"abc"'))
+        self.assertTrue(rest_cache.etag_matches(b'"xyz", "abc"', b'"abc"'))
+        self.assertTrue(rest_cache.etag_matches(b'*', b'"abc"'))
+
+    def test_does_not_match(self) -> None:
+        self.assertFalse(rest_cache.etag_matches(b'"xyz"', b'"abc"'))
+        self.assertFalse(rest_cache.etag_matches(b'abc', b'"abc"'))
+
+    def test_compute_etag(self) -> None:
+        etag = rest_cache.compute_etag(b'body')
+        self.assertTrue(etag.startswith(b'"') and etag.endswith(b'"'))
+        self.assertEqual(etag, rest_cache.compute_etag(bytearray(b'body')))
+        self.assertNotEqual(etag, rest_cache.compute_etag(b'other'))
+
+
+class ResponseCache(TestReactorMixin, unittest.TestCase):
+    @defer.inlineCallbacks
+    def setUp(self) -> InlineCallbacksType[None]:  # type: ignore[override]
+        self.setup_test_reactor()
+        self.master = yield fakemaster.make_master(self, wantMq=True)
+        self.master.mq.verifyMessages = False
+        self.cache = rest_cache.ResponseCache(self.master, resources=['builders'], size=2)
+        self.rtype = mock.Mock(plural='builders', eventPaths=['builders/{builderid}'])
+
+    def test_subscribes_on_first_use(self) -> None:
+        self.assertEqual(self.cache.get_generation(self.rtype), 0)
+        self.assertEqual([q.filter for q in self.master.mq.qrefs], [('builders', None, None)])
+        self.cache.get_generation(self.rtype)
+        self.assertEqual(len(self.master.mq.qrefs), 1)
+
+    def test_put_get(self) -> None:
+        generation = self.cache.get_generation(self.rtype)
+        assert generation is not None
+        self.cache.put('k', self.rtype, generation, b'body', b'"etag"')
+        entry = self.cache.get('k')
+        assert entry is not None
+        self.assertEqual((entry.body, entry.etag), (b'body', b'"etag"'))
+        self.assertIsNone(self.cache.get('other'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_put_after_event_is_ignored(self) -> None:
+        generation = self.cache.get_generation(self.rtype)
+        assert generation is not None
+        # an event arrives while the response is being computed
+        self.master.mq.callConsumer(('builders', '1', 'started'), {})
+        self.cache.put('k', self.rtype, generation, b'body', b'"etag"')
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_evicts_least_recently_used(self) -> None:
+        generation = self.cache.get_generation(self.rtype)
+        assert generation is not None
+        self.cache.put('k1', self.rtype, generation, b'1', b'"1"')
+        self.cache.put('k2', self.rtype, generation, b'2', b'"2"')
+        self.cache.get('k1')
+        self.cache.put('k3', self.rtype, generation, b'3', b'"3"')
+        self.assertIsNotNone(self.cache.get('k1'))
+        self.assertIsNone(self.cache.get('k2'))
+        self.assertIsNotNone(self.cache.get('k3'))
+
+    def test_stop(self) -> None:
+        generation = self.cache.get_generation(self.rtype)
+        assert generation is not None
+        self.cache.put('k', self.rtype, generation, b'body', b'"etag"')
+        self.cache.stop()
+        self.assertEqual(self.master.mq.qrefs, [])
+        self.assertIsNone(self.cache.get('k'))
@@ -34,6 +34,7 @@ from buildbot.test.unit.www import test_hooks_base
 from buildbot.test.util import www
 from buildbot.www import auth
 from buildbot.www import change_hook
+from buildbot.www import metrics as www_metrics
 from buildbot.www import resource
 from buildbot.www import rest
 from buildbot.www import service
@@ -157,6 +158,17 @@ class Test(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
         req = mock.Mock()
         self.assertIsInstance(root.getChildWithDefault(b'api', req), rest.RestRootResource)
 
+    def test_setupSiteWithMetrics(self) -> None:
+        self.svc.setupSite(self.makeConfig(metrics_endpoint=True))
+        site = self.svc.site
+        assert site is not None
+
+        root = site.resource
+        req = mock.Mock()
+        self.assertIsInstance(
+            root.getChildWithDefault(b'metrics', req), www_metrics.MetricsResource
+        )
+
     def test_setupSiteWithProtectedHook(self) -> None:
         checker = InMemoryUsernamePasswordDatabaseDontUse()
         checker.addUser("guest", "password")  # type: ignore[arg-type]
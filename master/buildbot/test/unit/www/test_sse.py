@@ -19,6 +19,7 @@ import datetime
 import json
 from typing import TYPE_CHECKING
 from typing import Any
+from unittest import mock
 
 from twisted.internet import defer
 from twisted.trial import unittest
@@ -29,6 +30,7 @@ from buildbot.test.util import www
 from buildbot.util import bytes2unicode
 from buildbot.util import datetime2epoch
 from buildbot.util import unicode2bytes
+from buildbot.www import fanout
 from buildbot.www import sse
 
 if TYPE_CHECKING:
@@ -54,6 +56,37 @@ class EventResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
         self.assertReceivesChangeNewMessage(self.request)
         self.assertEqual(self.request.finished, False)
 
+    def test_listen_registers_producer(self) -> None:
+        self.render_resource(self.sse, b'/listen/changes/*/*')
+        self.assertIsInstance(self.request.producer, fanout.ClientQueue)
+
+    def test_listen_coalesce_while_paused(self) -> None:
+        self.render_resource(self.sse, b'/listen/builds/*/*')
+        self.readUUID(self.request)
+        self.master.mq.verifyMessages = False
+        self.request.producer.pauseProducing()
+        self.master.mq.callConsumer(("builds", "1", "update"), {"buildid": 1, "state_string": "a"})
+        self.master.mq.callConsumer(("builds", "1", "update"), {"buildid": 1, "state_string": "b"})
+        self.assertEqual(self.request.written, b'')
+        self.request.producer.resumeProducing()
+        kw = self.readEvent(self.request)
+        self.assertEqual(kw[b"event"], b"event")
+        # only the latest state of the build is sent
+        self.assertEqual(json.loads(kw[b"data"])["message"]["state_string"], "b")
+        self.assertEqual(self.request.written, b'')
+
+    def test_listen_drop_lagging_client(self) -> None:
+        self.render_resource(self.sse, b'/listen/changes/*/*')
+        self.readUUID(self.request)
+        self.request.transport = mock.Mock()
+        self.request.producer.max_pending = 1
+        self.request.producer.pauseProducing()
+        for changeid in ("500", "501"):
+            self.master.mq.callConsumer(
+                ("changes", changeid, "new"), test_changes.Change.changeEvent
+            )
+        self.request.transport.abortConnection.assert_called_once_with()
+
     def test_listen_add_then_close(self) -> None:
         self.render_resource(self.sse, b'/listen')
         request = self.request
@@ -114,6 +114,94 @@ class WsResource(TestReactorMixin, www.WwwTestMixin, unittest.TestCase):
             self.proto.sendMessage, {"k": "builds/1/new", "m": {"buildid": 1}}
         )
 
+    def test_startConsuming_encodes_once(self) -> None:
+        other = self.ws._factory.buildProtocol("other")
+        other.sendMessage = mock.Mock(spec=other.sendMessage)
+        for i, proto in enumerate([self.proto, other]):
+            proto.onMessage(
+                json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": i}), False
+            )
+        self.master.mq.verifyMessages = False
+        make_frame = mock.Mock(wraps=ws.make_event_frame)
+        self.ws._factory.encoder.make_frame = make_frame
+        self.master.mq.callConsumer(("builds", "1", "new"), {"buildid": 1})
+        self.assertEqual(make_frame.call_count, 1)
+        self.assertEqual(self.proto.sendMessage.call_args, other.sendMessage.call_args)
+        self.assert_called_with_json(other.sendMessage, {"k": "builds/1/new", "m": {"buildid": 1}})
+
+    def test_startConsuming_coalesce_while_paused(self) -> None:
+        self.proto.onMessage(
+            json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": 1}), False
+        )
+        self.master.mq.verifyMessages = False
+        self.proto.sendMessage.reset_mock()
+        self.proto.outbox.pauseProducing()
+        self.master.mq.callConsumer(("builds", "1", "update"), {"buildid": 1, "n": 1})
+        self.master.mq.callConsumer(("builds", "2", "update"), {"buildid": 2, "n": 1})
+        self.master.mq.callConsumer(("builds", "1", "update"), {"buildid": 1, "n": 2})
+        self.assertEqual(self.proto.sendMessage.call_count, 0)
+
+        self.proto.outbox.resumeProducing()
+        self.assertEqual(
+            [json.loads(c[0][0]) for c in self.proto.sendMessage.call_args_list],
+            [
+                {"k": "builds/2/update", "m": {"buildid": 2, "n": 1}},
+                {"k": "builds/1/update", "m": {"buildid": 1, "n": 2}},
+            ],
+        )
+
+    def test_startConsuming_properties_update_while_paused(self) -> None:
+        self.proto.onMessage(
+            json.dumps({"cmd": 'startConsuming', "path": 'builds/1/properties/*', "_id": 1}),
+            False,
+        )
+        self.master.mq.verifyMessages = False
+        self.proto.sendMessage.reset_mock()
+        self.proto.outbox.pauseProducing()
+        key = ("builds", "1", "properties", "update")
+        self.master.mq.callConsumer(key, {"a": [1, "src"]})
+        self.master.mq.callConsumer(key, {"b": [2, "src"]})
+
+        # updates only carry the changed properties, they are all delivered
+        self.proto.outbox.resumeProducing()
+        self.assertEqual(
+            [json.loads(c[0][0]) for c in self.proto.sendMessage.call_args_list],
+            [
+                {"k": "builds/1/properties/update", "m": {"a": [1, "src"]}},
+                {"k": "builds/1/properties/update", "m": {"b": [2, "src"]}},
+            ],
+        )
+
+    def test_startConsuming_builder_started_while_paused(self) -> None:
+        self.proto.onMessage(
+            json.dumps({"cmd": 'startConsuming', "path": 'builders/1/*', "_id": 1}), False
+        )
+        self.master.mq.verifyMessages = False
+        self.proto.sendMessage.reset_mock()
+        self.proto.outbox.pauseProducing()
+        key = ("builders", "1", "started")
+        self.master.mq.callConsumer(key, {"builderid": 1, "masterid": 10})
+        self.master.mq.callConsumer(key, {"builderid": 1, "masterid": 11})
+
+        # each master starting the builder is delivered
+        self.proto.outbox.resumeProducing()
+        self.assertEqual(
+            [json.loads(c[0][0])["m"] for c in self.proto.sendMessage.call_args_list],
+            [{"builderid": 1, "masterid": 10}, {"builderid": 1, "masterid": 11}],
+        )
+
+    def test_startConsuming_drop_lagging_client(self) -> None:
+        self.proto.onMessage(
+            json.dumps({"cmd": 'startConsuming', "path": 'builds/*/*', "_id": 1}), False
+        )
+        self.master.mq.verifyMessages = False
+        self.proto.dropConnection = mock.Mock()
+        self.proto.outbox.max_pending = 2
+        self.proto.outbox.pauseProducing()
+        for i in range(3):
+            self.master.mq.callConsumer(("builds", str(i), "new"), {"buildid": i})
+        self.proto.dropConnection.assert_called_once_with(abort=True)
+
     def test_startConsumingBadPath(self) -> None:
         self.proto.onMessage(json.dumps({"cmd": 'startConsuming', "path": {}, "_id": 1}), False)
         self.assert_called_with_json(
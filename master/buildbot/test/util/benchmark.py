@@ -0,0 +1,187 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import cast
+
+from twisted.internet import reactor
+from twisted.internet import task
+from twisted.python import log
+from twisted.trial import unittest
+
+from buildbot.test.fake.worker import WorkerController
+from buildbot.test.util.integration import TestedMaster
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from twisted.internet.interfaces import IReactorTime
+
+    from buildbot.master import BuildMaster
+
+# results of the benchmarks reporting metrics, as stored by ``BUILDBOT_BENCHMARK_UPDATE_BASELINE``
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark', 'baseline.json'
+)
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    """
+    Base class for benchmarks.  These do not run during normal runs of the
+    Buildbot tests, unless ``BUILDBOT_BENCHMARK`` is defined.
+    """
+
+    # minimum time spent measuring each case, in seconds
+    BENCHMARK_TIME = 0.5
+
+    def setUp(self) -> None:
+        if 'BUILDBOT_BENCHMARK' not in os.environ:
+            raise unittest.SkipTest("benchmarks only run when BUILDBOT_BENCHMARK is set")
+
+    def measure(self, fn: Callable[[], Any]) -> float:
+        """
+        Call C{fn} repeatedly for at least C{BENCHMARK_TIME} seconds, and return
+        the average time of a single call, in seconds.
+        """
+        fn()  # warm up
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.BENCHMARK_TIME:
+                return elapsed / number
+            number *= 2
+
+    def report(self, name: str, **values: Any) -> None:
+        """
+        Report the result of a benchmark case, both to the test log and to the
+        console.
+        """
+        fields = ' '.join(f'{k}={_format_value(v)}' for k, v in values.items())
+        msg = f'{self.id()}: {name}: {fields}'
+        log.msg(msg)
+        sys.__stdout__.write(msg + '\n')  # type: ignore[union-attr]
+
+    def report_metrics(self, name: str, **metrics: float) -> None:
+        """
+        Report the metrics of a benchmark case along with their relative change from the stored
+        baseline.  If ``BUILDBOT_BENCHMARK_UPDATE_BASELINE`` is defined, the metrics replace the
+        baseline instead.
+        """
+        key = f'{self.id()}: {name}'
+        baseline = load_baseline()
+
+        values: dict[str, Any] = {}
+        for k, v in metrics.items():
+            values[k] = v
+            base = baseline.get(key, {}).get(k)
+            if base:
+                values[k + '_change'] = f'{(v - base) / base:+.0%}'
+
+        if 'BUILDBOT_BENCHMARK_UPDATE_BASELINE' in os.environ:
+            baseline[key] = {k: round(v, 6) for k, v in metrics.items()}
+            with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(baseline, f, indent=4, sort_keys=True)
+                f.write('\n')
+
+        self.report(name, **values)
+
+
+class MasterBenchmarkTestCase(BenchmarkTestCase):
+    """
+    Base class for benchmarks driving a real ``BuildMaster`` on the real reactor, with a SQLite
+    database and fake workers connected through the null protocol.
+    """
+
+    # benchmarks with many builds take longer than the default trial timeout
+    timeout = 600
+
+    master: BuildMaster
+
+    @async_to_deferred
+    async def setup_master(self, config_dict: dict[str, Any], worker_count: int) -> None:
+        """
+        Start a master with the given configuration, completed with ``worker_count`` workers
+        named ``worker<n>``, and wait for all the workers to be attached to their builders.
+        """
+        # the workers are not expected to go missing, and their timer would outlive the master
+        self.workers = [
+            WorkerController(self, f'worker{i}', missing_timeout=0) for i in range(worker_count)
+        ]
+
+        basedir = self.mktemp()
+        config_dict = {
+            'workers': [w.worker for w in self.workers],
+            'protocols': {'null': {}},
+            'db_url': 'sqlite:///' + os.path.abspath(os.path.join(basedir, 'state.sqlite')),
+            **config_dict,
+        }
+        tested_master = TestedMaster()
+        self.master = await tested_master.create_master(self, reactor, config_dict, basedir)
+
+        for w in self.workers:
+            await w.connect_worker()
+
+        def workers_attached() -> bool:
+            return all(b.workers for b in self.master.botmaster.builders.values())
+
+        await self.wait_for(workers_attached)
+
+    @async_to_deferred
+    async def wait_for(self, predicate: Callable[[], bool], timeout: float = 60) -> None:
+        """
+        Wait until C{predicate} returns true, checking it periodically.
+        """
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise RuntimeError('timed out waiting for the master')
+            await task.deferLater(cast("IReactorTime", reactor), 0.01, lambda: None)
+
+
+def load_baseline() -> dict[str, dict[str, float]]:
+    try:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def latency_stats(latencies: list[float]) -> dict[str, float]:
+    """
+    Summarize a list of latencies, in seconds, as their median, 95th percentile and maximum,
+    in milliseconds.
+    """
+    ordered = sorted(latencies)
+    return {
+        'p50_ms': ordered[len(ordered) // 2] * 1e3,
+        'p95_ms': ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)] * 1e3,
+        'max_ms': ordered[-1] * 1e3,
+    }
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f'{value:.3g}'
+    return str(value)
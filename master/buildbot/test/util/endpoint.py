@@ -14,6 +14,7 @@
 # Copyright Buildbot Team Members
 from __future__ import annotations
 
+import os
 from typing import TYPE_CHECKING
 from typing import Any
 
@@ -93,10 +94,28 @@ class EndpointMixin(TestReactorMixin, interfaces.InterfaceTests):
 
         if self.ep.kind == base.EndpointKind.COLLECTION:
             self.assertIsInstance(rv, (list, base.ListResult))
+            if rv and os.environ.get('BUILDBOT_TEST_RESULTSPEC_PUSHDOWN'):
+                self.assertResultSpecConsumed(resultSpec)
         else:
             self.assertIsInstance(rv, (dict, type(None)))
         return rv
 
+    def assertResultSpecConsumed(self, resultSpec: resultspec.ResultSpec) -> None:
+        # fail if the endpoint left filtering, ordering or pagination to be
+        # done in Python by ResultSpec.apply instead of pushing it to the db
+        leftover = []
+        if resultSpec.filters:
+            leftover.append(f"filters {resultSpec.filters!r}")
+        if resultSpec.order:
+            leftover.append(f"order {resultSpec.order!r}")
+        if resultSpec.limit is not None or resultSpec.offset is not None:
+            leftover.append(f"limit {resultSpec.limit!r} / offset {resultSpec.offset!r}")
+        if leftover:
+            self.fail(
+                f"{type(self.ep).__name__} falls back to in-Python result spec handling for "
+                + ", ".join(leftover)
+            )
+
     def callControl(
         self, action: str, args: dict[str, Any], path: tuple[str | int, ...]
     ) -> defer.Deferred[Any]:
@@ -68,6 +68,8 @@ class FakeRequest:
 
     session: Any = None
     content: Any = None
+    producer: Any = None
+    transport: Any = None
 
     def __init__(self, path: bytes | None = None) -> None:
         # from twisted.web.http.Request. Used to detect connection dropped
@@ -141,6 +143,13 @@ class FakeRequest:
     def getSession(self) -> Any:
         return self.session
 
+    def registerProducer(self, producer: Any, streaming: bool) -> None:
+        assert self.producer is None
+        self.producer = producer
+
+    def unregisterProducer(self) -> None:
+        self.producer = None
+
 
 class RequiresWwwMixin:
     # mix this into a TestCase to skip if buildbot-www is not installed
@@ -24,7 +24,7 @@ log = Logger()
 
 
 class LineBoundaryFinder:
-    __slots__ = ['partialLine', 'warned']
+    __slots__ = ['_chunks', '_partial_length', '_unscanned', 'warned']
     # split at reasonable line length.
     # too big lines will fill master's memory, and slow down the UI too much.
     MAX_LINELENGTH = 4096
@@ -33,53 +33,94 @@ class LineBoundaryFinder:
     # we also convert cursor control sequence to newlines
     # and ugly \b+ (use of backspace to implement progress bar)
     newline_re = re.compile(r'(\r\n|\r(?=.)|\033\[u|\033\[[0-9]+;[0-9]+[Hf]|\033\[2J|\x08+)')
+    # a newline sequence may be split between two appended chunks, so the end
+    # of the partial line is kept unconverted, and scanned again along with
+    # the next chunk.  This bounds the length of that tail, so that each
+    # character is only scanned a constant number of times.
+    MAX_UNSCANNED = 32
 
     def __init__(self, callback: Any = None) -> None:
-        self.partialLine: str | None = None
+        # converted text of the current partial line, and its length
+        self._chunks: list[str] = []
+        self._partial_length = 0
+        # raw text at the end of the partial line, not converted yet
+        self._unscanned = ''
         self.warned: bool = False
 
-    def adjust_line(self, text: str) -> str | None:
-        if self.partialLine:
-            if len(self.partialLine) > self.MAX_LINELENGTH:
-                if not self.warned:
-                    # Unfortunately we cannot give more hint as per which log that is
-                    log.warn(
-                        "Splitting long line: {line_start} {length} "
-                        "(not warning anymore for this log)",
-                        line_start=self.partialLine[:30],
-                        length=len(self.partialLine),
-                    )
-                    self.warned = True
-                # switch the variables, and return previous _partialLine_,
-                # split every MAX_LINELENGTH plus a trailing \n
-                self.partialLine, text = text, self.partialLine
-                ret = []
-                while len(text) > self.MAX_LINELENGTH:
-                    ret.append(text[: self.MAX_LINELENGTH])
-                    text = text[self.MAX_LINELENGTH :]
-                ret.append(text)
-                result = "\n".join(ret) + "\n"
-                return result
-            text = self.partialLine + text
-            self.partialLine = None
-        text = self.newline_re.sub('\n', text)
-        if text:
-            if text[-1] != '\n':
-                i = text.rfind('\n')
-                if i >= 0:
-                    i = i + 1
-                    self.partialLine = text[i:]
-                    text = text[:i]
-                else:
-                    self.partialLine = text
-                    return None
+    def _split_long_lines(self, text: str) -> str:
+        # text is made of complete lines, each ended by a newline
+        lines = text.split('\n')
+        longest = max(lines, key=len)
+        if len(longest) <= self.MAX_LINELENGTH:
             return text
-        return None
+        if not self.warned:
+            # Unfortunately we cannot give more hint as per which log that is
+            log.warn(
+                "Splitting long line: {line_start} {length} (not warning anymore for this log)",
+                line_start=longest[:30],
+                length=len(longest),
+            )
+            self.warned = True
+        # split every MAX_LINELENGTH, each part ended by a newline
+        pieces: list[str] = []
+        for line in lines:
+            if len(line) > self.MAX_LINELENGTH:
+                pieces.extend(
+                    line[i : i + self.MAX_LINELENGTH]
+                    for i in range(0, len(line), self.MAX_LINELENGTH)
+                )
+            else:
+                pieces.append(line)
+        return '\n'.join(pieces)
+
+    def adjust_line(self, text: str) -> str | None:
+        unscanned = self._unscanned
+        partial_length = self._partial_length + len(unscanned)
+        if unscanned:
+            text = unscanned + text
+        converted = self.newline_re.sub('\n', text)
+        i = converted.rfind('\n')
+        # nothing was converted after the last newline, so the end of the
+        # converted text is also the end of the raw text
+        tail = len(converted) - i - 1
+        if tail:
+            tail = min(tail, self.MAX_UNSCANNED)
+            self._unscanned = text[-tail:]
+            converted = converted[:-tail]
+        elif unscanned:
+            self._unscanned = ''
+
+        if i < 0:
+            if partial_length > self.MAX_LINELENGTH:
+                # the partial line is already too long: return it, and start a
+                # new partial line with the new text
+                head = min(len(unscanned), len(converted))
+                self._chunks.append(converted[:head])
+                lines = ''.join(self._chunks) + '\n'
+                converted = converted[head:]
+            elif converted:
+                self._chunks.append(converted)
+                self._partial_length += len(converted)
+                return None
+            else:
+                return None
+        else:
+            lines = converted[: i + 1]
+            converted = converted[i + 1 :]
+            if self._chunks:
+                self._chunks.append(lines)
+                lines = ''.join(self._chunks)
+
+        self._chunks = [converted] if converted else []
+        self._partial_length = len(converted)
+        if len(lines) > self.MAX_LINELENGTH + 1:
+            return self._split_long_lines(lines)
+        return lines
 
     def append(self, text: str) -> str | None:
         return self.adjust_line(text)
 
     def flush(self) -> str | None:
-        if self.partialLine is not None:
+        if self._partial_length or self._unscanned:
             return self.append('\n')
         return None
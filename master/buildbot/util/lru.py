@@ -15,6 +15,7 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from collections import defaultdict
 from collections import deque
 from itertools import filterfalse
@@ -29,6 +30,8 @@ from twisted.internet import defer
 from twisted.python import log
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+
     from twisted.internet.defer import Deferred
     from twisted.python.failure import Failure
     from typing_extensions import Concatenate
@@ -257,5 +260,98 @@ class AsyncLRUCache(LRUCache[_KT, _KV]):
         return d
 
 
+class SizedLRUCache(Generic[_KT, _KV]):
+    """
+    A least-recently-used cache bounded by the total size of its values, as
+    computed by C{size_fn}, rather than by their number.
+
+    Unlike L{LRUCache}, values are not looked up through weak references, so
+    this cache can hold objects such as strings, and it has no miss function:
+    callers C{get} a value and C{put} it themselves on a miss.
+
+    If C{group_fn} is given, the keys are indexed by the group it returns for
+    them, so that all the values of a group can be dropped with L{pop_group}
+    without scanning the whole cache.
+    """
+
+    __slots__ = ('entries', 'group_fn', 'groups', 'hits', 'max_size', 'misses', 'size', 'size_fn')
+
+    def __init__(
+        self,
+        size_fn: Callable[[_KV], int],
+        max_size: int,
+        group_fn: Callable[[_KT], Hashable] | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.size_fn = size_fn
+        self.group_fn = group_fn
+        self.entries: OrderedDict[_KT, tuple[_KV, int]] = OrderedDict()
+        self.groups: dict[Hashable, set[_KT]] = {}
+        self.hits = self.misses = 0
+
+    def get(self, key: _KT) -> _KV | None:
+        try:
+            value, _ = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: _KT, value: _KV) -> None:
+        self.pop(key)
+        value_size = self.size_fn(value)
+        if value_size > self.max_size:
+            # would evict everything else, and itself
+            return
+        self.entries[key] = (value, value_size)
+        self.size += value_size
+        if self.group_fn is not None:
+            self.groups.setdefault(self.group_fn(key), set()).add(key)
+        self._purge()
+
+    def pop(self, key: _KT) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+            self._remove_from_group(key)
+
+    def pop_group(self, group: Hashable) -> None:
+        for key in self.groups.pop(group, ()):
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.groups.clear()
+        self.size = 0
+
+    def keys(self) -> list[_KT]:
+        return list(self.entries)
+
+    def set_max_size(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._purge()
+
+    def _purge(self) -> None:
+        while self.size > self.max_size:
+            key, (_, value_size) = self.entries.popitem(last=False)
+            self.size -= value_size
+            self._remove_from_group(key)
+
+    def _remove_from_group(self, key: _KT) -> None:
+        if self.group_fn is None:
+            return
+        group = self.group_fn(key)
+        keys = self.groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.groups[group]
+
+
 # for tests
 inv_failed = False
@@ -15,6 +15,9 @@
 
 from __future__ import annotations
 
+from typing import Generic
+from typing import TypeVar
+
 
 def matchTuple(routingKey: tuple[str, ...], filter: tuple[str | None, ...]) -> bool:
     if len(filter) != len(routingKey):
@@ -23,3 +26,101 @@ def matchTuple(routingKey: tuple[str, ...], filter: tuple[str | None, ...]) -> b
         if f is not None and f != k:
             return False
     return True
+
+
+_T = TypeVar('_T')
+
+
+class _IndexNode(Generic[_T]):
+    __slots__ = ['children', 'values']
+
+    def __init__(self) -> None:
+        # children are keyed by the filter segment; None is the wildcard branch
+        self.children: dict[str | None, _IndexNode[_T]] = {}
+        # values are mapped to their insertion sequence number
+        self.values: dict[_T, int] = {}
+
+
+class TupleMatchIndex(Generic[_T]):
+    """
+    An index of values keyed by filter tuples, as accepted by L{matchTuple}.
+
+    Filters are stored in a trie keyed on their segments, with a separate
+    branch for wildcard (C{None}) segments, so looking up the values matching
+    a routing key only visits the branches that can match it, rather than every
+    registered filter.  Values are returned in the order they were added.
+    """
+
+    def __init__(self) -> None:
+        self._roots: dict[int, _IndexNode[_T]] = {}
+        self._seq = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, filter: tuple[str | None, ...], value: _T) -> None:
+        node = self._roots.get(len(filter))
+        if node is None:
+            node = self._roots[len(filter)] = _IndexNode()
+        for segment in filter:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _IndexNode()
+            node = child
+        if value not in node.values:
+            self._seq += 1
+            node.values[value] = self._seq
+            self._len += 1
+
+    def remove(self, filter: tuple[str | None, ...], value: _T) -> bool:
+        node = self._roots.get(len(filter))
+        if node is None:
+            return False
+        path: list[tuple[_IndexNode[_T], str | None]] = []
+        for segment in filter:
+            child = node.children.get(segment)
+            if child is None:
+                return False
+            path.append((node, segment))
+            node = child
+        if node.values.pop(value, None) is None:
+            return False
+        self._len -= 1
+
+        # prune the branches that no longer lead to any value
+        for parent, segment in reversed(path):
+            if node.values or node.children:
+                break
+            del parent.children[segment]
+            node = parent
+        else:
+            if not node.values and not node.children:
+                del self._roots[len(filter)]
+        return True
+
+    def match(self, routingKey: tuple[str, ...]) -> list[_T]:
+        root = self._roots.get(len(routingKey))
+        if root is None:
+            return []
+        nodes = [root]
+        for segment in routingKey:
+            next_nodes = []
+            for node in nodes:
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                child = node.children.get(None)
+                if child is not None:
+                    next_nodes.append(child)
+            if not next_nodes:
+                return []
+            nodes = next_nodes
+
+        if len(nodes) == 1:
+            return list(nodes[0].values)
+        matches: list[tuple[int, _T]] = []
+        for node in nodes:
+            matches.extend((seq, value) for value, seq in node.values.items())
+        matches.sort(key=lambda m: m[0])
+        return [value for _, value in matches]
@@ -0,0 +1,196 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+"""
+Helpers shared by the websocket and server-sent events resources to deliver
+message queue events to many web clients.
+
+The same message is delivered to every client consuming it, so its JSON
+encoding is cached and reused by all the clients.  Each client gets a ClientQueue, registered as
+a push producer of its transport: while the transport is paused, messages are
+queued, and a newer message with the same routing key replaces the queued one,
+as it carries the complete state of the same resource.  A client that falls
+too far behind is disconnected, and resynchronizes when reconnecting.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import Any
+
+from twisted.internet.interfaces import IPushProducer
+from zope.interface import implementer
+
+from buildbot.process import metrics
+from buildbot.util import toJson
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Hashable
+    from collections.abc import Sequence
+
+_encoded_counter = metrics.registry.counter(
+    'buildbot_www_messages_encoded_total',
+    'Number of message queue events encoded for web clients',
+)
+_coalesced_counter = metrics.registry.counter(
+    'buildbot_www_messages_coalesced_total',
+    'Number of queued web client messages replaced by a newer state of the same resource',
+)
+_dropped_clients_counter = metrics.registry.counter(
+    'buildbot_www_clients_dropped_total',
+    'Number of web clients disconnected because they fell too far behind',
+)
+
+
+# events whose messages carry the whole state of their resource, as
+# (resource, event): a newer message of such an event supersedes the queued
+# one. Other messages only carry a change, such as the new properties of a
+# build, or are specific to a master or a transition, and are all delivered.
+FULL_STATE_EVENTS = frozenset({
+    ('builders', 'update'),
+    ('builds', 'update'),
+    ('steps', 'updated'),
+    ('logs', 'append'),
+    ('workers', 'state_updated'),
+    ('schedulers', 'updated'),
+})
+
+
+def coalesce_key(key: Sequence[str]) -> Hashable | None:
+    """
+    Returns the coalescing key of the messages of the given event, or None if
+    they must all be delivered because they are not the whole state of their
+    resource.
+    """
+    if len(key) < 3 or (key[-3], key[-1]) not in FULL_STATE_EVENTS:
+        return None
+    return tuple(key)
+
+
+def encode_json(data: Any) -> bytes:
+    return json.dumps(data, default=toJson, separators=(",", ":")).encode()
+
+
+class MessageEncoder:
+    """
+    Encodes message queue events into protocol frames, once for all the
+    consumers receiving the same event.
+
+    The message queue hands the same message object to every consumer of an
+    event, one after the other, so remembering the last encoded message is
+    enough.
+    """
+
+    def __init__(self, make_frame: Callable[[Sequence[str], Any], bytes]) -> None:
+        self.make_frame = make_frame
+        self._last_key: Sequence[str] | None = None
+        self._last_data: Any = None
+        self._last_frame = b''
+
+    def encode(self, key: Sequence[str], data: Any) -> bytes:
+        if data is self._last_data and key == self._last_key:
+            return self._last_frame
+        frame = self.make_frame(key, data)
+        _encoded_counter.inc()
+        # keep a reference to data, so that its identity is not reused
+        self._last_key = key
+        self._last_data = data
+        self._last_frame = frame
+        return frame
+
+
+@implementer(IPushProducer)
+class ClientQueue:
+    """
+    Outgoing messages of a single web client.
+
+    Messages are written as soon as they are pushed, unless the transport
+    asked to pause.  Messages pushed with a coalescing key replace any queued
+    message with the same key.  If more than ``max_pending`` messages are
+    queued, the queue is discarded and ``on_overflow`` is called, which is
+    expected to disconnect the client.
+    """
+
+    MAX_PENDING = 1000
+
+    def __init__(
+        self,
+        write: Callable[[bytes], Any],
+        on_overflow: Callable[[], Any],
+        max_pending: int | None = None,
+    ) -> None:
+        self._write = write
+        self._on_overflow = on_overflow
+        self.max_pending = max_pending if max_pending is not None else self.MAX_PENDING
+        self.paused = False
+        self.stopped = False
+        # queued messages, keyed by their coalescing key, or by a unique
+        # object for messages that cannot be coalesced
+        self.pending: OrderedDict[Any, bytes] = OrderedDict()
+
+    def push(self, payload: bytes, coalesce_key: Hashable | None = None) -> None:
+        if self.stopped:
+            return
+        if not self.paused and not self.pending:
+            self._write(payload)
+            return
+
+        key: Any = coalesce_key if coalesce_key is not None else object()
+        if key in self.pending:
+            # move the newer state at the end, after the messages that were
+            # queued after the superseded one
+            del self.pending[key]
+            _coalesced_counter.inc()
+        self.pending[key] = payload
+
+        if len(self.pending) > self.max_pending:
+            self.stopped = True
+            self.pending.clear()
+            _dropped_clients_counter.inc()
+            self._on_overflow()
+            return
+
+        if not self.paused:
+            self._flush()
+
+    def _flush(self) -> None:
+        # writing may pause us again synchronously
+        while self.pending and not self.paused and not self.stopped:
+            _, payload = self.pending.popitem(last=False)
+            self._write(payload)
+
+    def pauseProducing(self) -> None:
+        self.paused = True
+
+    def resumeProducing(self) -> None:
+        self.paused = False
+        self._flush()
+
+    def stopProducing(self) -> None:
+        self.stopped = True
+        self.pending.clear()
+
+
+def register_client_queue(transport: Any, queue: ClientQueue) -> None:
+    """Register queue as the push producer of a transport taken over from twisted.web"""
+    try:
+        transport.registerProducer(queue, True)
+    except RuntimeError:
+        # the HTTP channel that handled the request is still registered,
+        # but it does not use the transport anymore
+        transport.unregisterProducer()
+        transport.registerProducer(queue, True)
@@ -0,0 +1,44 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from buildbot.process import metrics
+from buildbot.www import resource
+
+if TYPE_CHECKING:
+    from twisted.web import server
+
+    from buildbot.master import BuildMaster
+
+
+class MetricsResource(resource.Resource):
+    """Exposes the metrics registry in the Prometheus text exposition format"""
+
+    isLeaf = True
+    content_type = b'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(
+        self, master: BuildMaster, registry: metrics.MetricsRegistry | None = None
+    ) -> None:
+        super().__init__(master)
+        self.registry = registry if registry is not None else metrics.registry
+
+    def render_GET(self, request: server.Request) -> bytes:
+        request.setHeader(b'content-type', self.content_type)
+        request.setHeader(b'cache-control', b'no-cache')
+        return self.registry.expose().encode('utf-8')
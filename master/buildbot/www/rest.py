@@ -44,6 +44,9 @@ from buildbot.www import resource
 from buildbot.www.authz import Forbidden
 from buildbot.www.encoding import BrotliEncoderFactory
 from buildbot.www.encoding import ZstandardEncoderFactory
+from buildbot.www.rest_cache import ResponseCache
+from buildbot.www.rest_cache import compute_etag
+from buildbot.www.rest_cache import etag_matches
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -57,6 +60,11 @@ if TYPE_CHECKING:
     from buildbot.master import BuildMaster
     from buildbot.util.twisted import InlineCallbacksType
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 
 class BadJsonRpc2(Exception):
     def __init__(self, message: str, jsonrpccode: int) -> None:
@@ -151,6 +159,8 @@ class V2RootResource(resource.Resource):
     # enable reconfigResource calls
     needsReconfig = True
 
+    response_cache: ResponseCache | None = None
+
     @defer.inlineCallbacks
     def getEndpoint(
         self, request: server.Request, method: str, params: dict[str, Any]
@@ -351,6 +361,22 @@ class V2RootResource(resource.Resource):
                 return
             request.write(unicode2bytes(chunk))
 
+    def _set_json_headers(self, request: server.Request, compact: bool) -> None:
+        # set up the content type; if the request accepts text/html or
+        # text/plain, the JSON is rendered in a readable, multiline format.
+        if compact:
+            request.setHeader(b"content-type", b'application/json; charset=utf-8')
+        else:
+            request.setHeader(b"content-type", b'text/plain; charset=utf-8')
+
+        # set up caching
+        if self.cache_seconds:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            expires = now + datetime.timedelta(seconds=self.cache_seconds)
+            expiresBytes = unicode2bytes(expires.strftime("%a, %d %b %Y %H:%M:%S GMT"))
+            request.setHeader(b"Expires", expiresBytes)
+            request.setHeader(b"Pragma", b"no-cache")
+
     @defer.inlineCallbacks
     def renderRest(self, request: server.Request) -> InlineCallbacksType[None]:
         def writeError(
@@ -366,6 +392,23 @@ class V2RootResource(resource.Resource):
                 yield defer.Deferred.fromCoroutine(self._render_raw(request, ep, rspec, kwargs))
                 return
 
+            compact = b'application/json' in (request.getHeader(b'accept') or b'')
+
+            cache_key = None
+            cache_generation = None
+            if (
+                self.response_cache is not None
+                and not self.json_streaming
+                and self.response_cache.is_cacheable(ep)
+            ):
+                cache_key = self.response_cache.make_key(request, compact)
+                entry = self.response_cache.get(cache_key)
+                if entry is not None:
+                    self._set_json_headers(request, compact)
+                    yield self._write_json_body(request, entry.body, entry.etag)
+                    return
+                cache_generation = self.response_cache.get_generation(ep.rtype)
+
             data = yield ep.get(rspec, kwargs)
             if data is None:
                 self._write_not_found_rest_error(request, ep, rspec=rspec, kwargs=kwargs)
@@ -396,24 +439,7 @@ class V2RootResource(resource.Resource):
             typeName = ep.rtype.plural
             data = {typeName: data, 'meta': meta}
 
-            # set up the content type and formatting options; if the request
-            # accepts text/html or text/plain, the JSON will be rendered in a
-            # readable, multiline format.
-
-            if b'application/json' in (request.getHeader(b'accept') or b''):
-                compact = True
-                request.setHeader(b"content-type", b'application/json; charset=utf-8')
-            else:
-                compact = False
-                request.setHeader(b"content-type", b'text/plain; charset=utf-8')
-
-            # set up caching
-            if self.cache_seconds:
-                now = datetime.datetime.now(datetime.timezone.utc)
-                expires = now + datetime.timedelta(seconds=self.cache_seconds)
-                expiresBytes = unicode2bytes(expires.strftime("%a, %d %b %Y %H:%M:%S GMT"))
-                request.setHeader(b"Expires", expiresBytes)
-                request.setHeader(b"Pragma", b"no-cache")
+            self._set_json_headers(request, compact)
 
             # filter out blanks if necessary and render the data
             encoder = json.encoder.JSONEncoder(default=toJson, sort_keys=True)
@@ -423,14 +449,33 @@ class V2RootResource(resource.Resource):
                 encoder.indent = 2
 
             _reactor = cast("IReactorThreads", self.master.reactor)
-            yield threads.deferToThreadPool(
+            if self.json_streaming:
+                yield threads.deferToThreadPool(
+                    _reactor,
+                    _reactor.getThreadPool(),
+                    self._stream_json_data,
+                    request,
+                    encoder,
+                    data,
+                )
+                return
+
+            encoded = yield threads.deferToThreadPool(
                 _reactor,
                 _reactor.getThreadPool(),
-                self._write_json_data,
+                self._encode_json_body,
                 request,
                 encoder,
                 data,
             )
+            if encoded is None:
+                return
+            body, etag = encoded
+
+            if self.response_cache is not None and cache_generation is not None:
+                self.response_cache.put(cache_key, ep.rtype, cache_generation, body, etag)
+
+            yield self._write_json_body(request, body, etag)
 
     def reconfigResource(self, new_config: Any) -> None:
         # buildbotURL may contain reverse proxy path, Origin header is just
@@ -446,6 +491,14 @@ class V2RootResource(resource.Resource):
         # and copy some other flags
         self.debug = new_config.www.get('debug')
         self.cache_seconds = new_config.www.get('json_cache_seconds', 0)
+        self.json_streaming = new_config.www.get('json_streaming', False)
+
+        if self.response_cache is not None:
+            self.response_cache.stop()
+            self.response_cache = None
+        rest_cache = new_config.www.get('rest_cache')
+        if rest_cache is not None:
+            self.response_cache = ResponseCache(self.master, **rest_cache)
 
     def render(self, request: server.Request) -> int:
         def writeError(msg: str | bytes, errcode: int = 400) -> None:
@@ -507,33 +560,98 @@ class V2RootResource(resource.Resource):
 
         return res
 
-    def _write_json_data(
+    def _encode_json_data(
+        self,
+        request: server.Request,
+        encoder: json.encoder.JSONEncoder,
+        data: Any,
+    ) -> bytes | bytearray | None:
+        # returns None if the request was finished while encoding
+        if orjson is not None:
+            option = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if encoder.indent is not None:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(data, default=toJson, option=option)
+            except orjson.JSONEncodeError:
+                # orjson is stricter than json (e.g. about non-str keys, or
+                # integers not fitting in 64 bits), so fall back to the latter
+                pass
+
+        buffer = bytearray()
+        for chunk in encoder.iterencode(data):
+            if _is_request_finished(request):
+                return None
+            buffer += unicode2bytes(chunk)
+        return buffer
+
+    def _encode_json_body(
+        self,
+        request: server.Request,
+        encoder: json.encoder.JSONEncoder,
+        data: Any,
+    ) -> tuple[bytes | bytearray, bytes] | None:
+        # runs in a thread; returns the body and its ETag, or None if the
+        # request was finished while encoding
+        body = self._encode_json_data(request, encoder, data)
+        if body is None:
+            return None
+        return body, compute_etag(body)
+
+    @defer.inlineCallbacks
+    def _write_json_body(
+        self, request: server.Request, body: bytes | bytearray, etag: bytes
+    ) -> InlineCallbacksType[None]:
+        if _is_request_finished(request):
+            return
+        request.setHeader(b"etag", etag)
+        if etag_matches(request.getHeader(b"if-none-match"), etag):
+            request.setResponseCode(304)
+            return
+
+        request.setHeader(b"content-length", unicode2bytes(str(len(body))))
+        if request.method != b"HEAD":
+            _reactor = cast("IReactorThreads", self.master.reactor)
+            yield threads.deferToThreadPool(
+                _reactor,
+                _reactor.getThreadPool(),
+                self._write_json_batches,
+                request,
+                body,
+            )
+
+    def _write_json_batches(self, request: server.Request, body: bytes | bytearray) -> None:
+        _reactor = cast("IReactorThreads", self.master.reactor)
+        for offset in range(0, len(body), _JSON_WRITE_BATCH_SIZE):
+            if _is_request_finished(request):
+                return
+            threads.blockingCallFromThread(
+                _reactor, request.write, bytes(body[offset : offset + _JSON_WRITE_BATCH_SIZE])
+            )
+
+    def _stream_json_data(
         self,
         request: server.Request,
         encoder: json.encoder.JSONEncoder,
         data: Any,
     ) -> None:
+        # No content-length is set, so the response uses chunked transfer encoding
+        # and batches are written as soon as they are encoded.
+        if request.method == b"HEAD":
+            return
         _reactor = cast("IReactorThreads", self.master.reactor)
 
-        content_length = 0
+        buffer = bytearray()
         for chunk in encoder.iterencode(data):
             if _is_request_finished(request):
                 return
-            content_length += len(unicode2bytes(chunk))
-        request.setHeader(b"content-length", unicode2bytes(str(content_length)))
-
-        if request.method != b"HEAD":
-            buffer = bytearray()
-            for chunk in encoder.iterencode(data):
-                if _is_request_finished(request):
-                    return
-                buffer += unicode2bytes(chunk)
-                if len(buffer) >= _JSON_WRITE_BATCH_SIZE:
-                    threads.blockingCallFromThread(_reactor, request.write, bytes(buffer))
-                    buffer.clear()
-
-            if buffer and not _is_request_finished(request):
+            buffer += unicode2bytes(chunk)
+            if len(buffer) >= _JSON_WRITE_BATCH_SIZE:
                 threads.blockingCallFromThread(_reactor, request.write, bytes(buffer))
+                buffer.clear()
+
+        if buffer and not _is_request_finished(request):
+            threads.blockingCallFromThread(_reactor, request.write, bytes(buffer))
 
 
 RestRootResource.addApiVersion(2, V2RootResource)
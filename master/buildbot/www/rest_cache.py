@@ -0,0 +1,194 @@
+# This file is part of Buildbot.  Buildbot is free software: you can
+# redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, version 2.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc., 51
+# Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+# Copyright Buildbot Team Members
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+
+from twisted.python import log
+
+from buildbot.data.base import EndpointKind
+from buildbot.util.twisted import async_to_deferred
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from twisted.web import server
+
+    from buildbot.data.base import Endpoint
+    from buildbot.data.base import ResourceType
+    from buildbot.master import BuildMaster
+    from buildbot.mq.base import QueueRef
+
+DEFAULT_RESOURCES = ('builders', 'workers', 'masters')
+DEFAULT_MAX_AGE = 60
+DEFAULT_SIZE = 100
+
+
+def compute_etag(body: bytes | bytearray) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode('ascii') + b'"'
+
+
+def etag_matches(if_none_match: bytes | None, etag: bytes) -> bool:
+    """
+    Check whether the value of an If-None-Match header matches the given
+    (strong) ETag. As per RFC 9110, weak comparison is used.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(b','):
+        candidate = candidate.strip()
+        if candidate == b'*':
+            return True
+        if candidate.startswith(b'W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+@dataclass
+class _CacheEntry:
+    resource: str
+    body: bytes | bytearray
+    etag: bytes
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    A cache of rendered JSON responses of the REST API, for a selected set of
+    resource types.
+
+    All entries of a resource type are dropped whenever an event about it is
+    produced on the message queue, as described by the
+    C{eventPathPatterns} of the resource type.  As not every change produces
+    an event, entries also expire after C{max_age} seconds.
+    """
+
+    def __init__(
+        self,
+        master: BuildMaster,
+        resources: Any = DEFAULT_RESOURCES,
+        max_age: float = DEFAULT_MAX_AGE,
+        size: int = DEFAULT_SIZE,
+    ) -> None:
+        self.master = master
+        self.resources = set(resources)
+        self.max_age = max_age
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        # the generation of a resource type is bumped on each of its events, so
+        # that responses computed while an event arrived are not cached
+        self._generations: dict[str, int] = {}
+        self._qrefs: dict[str, list[QueueRef]] = {}
+
+    def is_cacheable(self, ep: Endpoint) -> bool:
+        return (
+            ep.kind in (EndpointKind.SINGLE, EndpointKind.COLLECTION)
+            and ep.rtype.plural in self.resources
+            and bool(ep.rtype.eventPaths)
+        )
+
+    def make_key(self, request: server.Request, compact: bool) -> Hashable:
+        assert request.postpath is not None
+        args: dict[bytes, list[bytes]] = request.args or {}
+        return (
+            tuple(request.postpath),
+            tuple(sorted((k, tuple(v)) for k, v in args.items())),
+            compact,
+        )
+
+    def get_generation(self, rtype: ResourceType) -> int | None:
+        """
+        Return the current generation of the given resource type, or None if
+        responses for it can't be cached yet, because the message queue
+        subscriptions are not set up.
+        """
+        name = rtype.plural
+        assert name is not None
+        if name not in self._qrefs:
+            self._qrefs[name] = []
+            self._subscribe(rtype).addErrback(
+                log.err, f'while subscribing to events of {name} for the REST cache'
+            )
+        return self._generations.get(name)
+
+    @async_to_deferred
+    async def _subscribe(self, rtype: ResourceType) -> None:
+        name = rtype.plural
+        assert name is not None
+        for path in rtype.eventPaths:
+            # event paths are like 'builders/{builderid}', followed by the event name
+            filter = (*(None if p.startswith('{') else p for p in path.split('/')), None)
+            qref = await self.master.mq.startConsuming(
+                lambda key, msg: self.invalidate(name), filter
+            )
+            self._qrefs[name].append(qref)
+        self._generations[name] = 0
+
+    def get(self, key: Hashable) -> _CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self.master.reactor.seconds():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        rtype: ResourceType,
+        generation: int,
+        body: bytes | bytearray,
+        etag: bytes,
+    ) -> None:
+        name = rtype.plural
+        assert name is not None
+        if self._generations.get(name) != generation:
+            return
+        self._entries[key] = _CacheEntry(
+            resource=name,
+            body=body,
+            etag=etag,
+            expires_at=self.master.reactor.seconds() + self.max_age,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        self._generations[name] = self._generations.get(name, 0) + 1
+        for key in [k for k, e in self._entries.items() if e.resource == name]:
+            del self._entries[key]
+
+    def stop(self) -> None:
+        for qrefs in self._qrefs.values():
+            for qref in qrefs:
+                qref.stopConsuming()
+        self._qrefs = {}
+        self._generations = {}
+        self._entries.clear()
@@ -48,6 +48,7 @@ from buildbot.www import auth
 from buildbot.www import avatar
 from buildbot.www import change_hook
 from buildbot.www import config as wwwconfig
+from buildbot.www import metrics
 from buildbot.www import resource as buildbot_resource
 from buildbot.www import rest
 from buildbot.www import sse
@@ -329,6 +330,10 @@ class WWWService(service.ReconfigurableServiceMixin, service.AsyncMultiService):
         # /sse
         root.putChild(b'sse', sse.EventResource(self.master))
 
+        # /metrics
+        if new_config.www.get('metrics_endpoint'):
+            root.putChild(b'metrics', metrics.MetricsResource(self.master))
+
         # /change_hook
         resource_obj: resource.IResource = change_hook.ChangeHookResource(master=self.master)
 
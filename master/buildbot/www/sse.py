@@ -15,10 +15,10 @@
 
 from __future__ import annotations
 
-import json
 import uuid
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import cast
 
 from twisted.python import log
 from twisted.web import resource
@@ -26,20 +26,37 @@ from twisted.web import server
 
 from buildbot.data.exceptions import InvalidPathError
 from buildbot.util import bytes2unicode
-from buildbot.util import toJson
 from buildbot.util import unicode2bytes
+from buildbot.www import fanout
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from twisted.internet.interfaces import ITCPTransport
+
     from buildbot.master import BuildMaster
     from buildbot.mq.base import QueueRef
 
 
+def make_event_frame(event: Sequence[str], data: Any) -> bytes:
+    key = [bytes2unicode(e) for e in event]
+    msg = {"key": key, "message": data}
+    return b"event: event\ndata: " + fanout.encode_json(msg) + b"\n\n"
+
+
 class Consumer:
     qrefs: dict[bytes, QueueRef]
 
-    def __init__(self, request: server.Request):
+    def __init__(self, request: server.Request, encoder: fanout.MessageEncoder):
         self.request = request
+        self.encoder = encoder
         self.qrefs = {}
+        self.outbox = fanout.ClientQueue(request.write, self._drop_lagging_client)
+        request.registerProducer(self.outbox, True)
+
+    def _drop_lagging_client(self) -> None:
+        log.msg("dropping event stream client that fell too far behind")
+        cast("ITCPTransport", self.request.transport).abortConnection()
 
     def stopConsuming(self, key: bytes | None = None) -> None:
         if key is not None:
@@ -49,13 +66,8 @@ class Consumer:
                 qref.stopConsuming()
             self.qrefs = {}
 
-    def onMessage(self, event: list[str], data: Any) -> None:
-        request = self.request
-        key = [bytes2unicode(e) for e in event]
-        msg = {"key": key, "message": data}
-        request.write(b"event: " + b"event" + b"\n")
-        request.write(b"data: " + unicode2bytes(json.dumps(msg, default=toJson)) + b"\n")
-        request.write(b"\n")
+    def onMessage(self, event: tuple[str, ...], data: Any) -> None:
+        self.outbox.push(self.encoder.encode(event, data), coalesce_key=fanout.coalesce_key(event))
 
     def registerQref(self, path: bytes, qref: QueueRef) -> None:
         self.qrefs[path] = qref
@@ -70,6 +82,7 @@ class EventResource(resource.Resource):
 
         self.master = master
         self.consumers = {}
+        self.encoder = fanout.MessageEncoder(make_event_frame)
 
     def decodePath(self, path: list[bytes]) -> list[bytes | None]:
         return [None if p == b'*' else p for p in path]
@@ -94,7 +107,7 @@ class EventResource(resource.Resource):
 
         if command == b"listen":
             cid = unicode2bytes(str(uuid.uuid4()))
-            consumer = Consumer(request)
+            consumer = Consumer(request, self.encoder)
 
         elif command in (b"add", b"remove"):
             if path:
@@ -155,6 +168,7 @@ class EventResource(resource.Resource):
             @d.addBoth
             def onEndRequest(_: Any) -> None:
                 consumer.stopConsuming()
+                consumer.outbox.stopProducing()
                 del self.consumers[cid]
 
             return server.NOT_DONE_YET
@@ -38,8 +38,11 @@ except ImportError:
 from buildbot.util import bytes2unicode
 from buildbot.util import toJson
 from buildbot.www import auth
+from buildbot.www import fanout
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from buildbot.master import BuildMaster
     from buildbot.mq.base import QueueRef
     from buildbot.util.twisted import InlineCallbacksType
@@ -74,18 +77,38 @@ def get_ws_sitepath(path: str) -> list[bytes]:
     return [p.encode('utf-8') for p in parts if p]
 
 
+def make_event_frame(key: Sequence[str], message: Any) -> bytes:
+    # protocol is deliberately concise in size
+    return fanout.encode_json({"k": "/".join(key), "m": message})
+
+
 class WsProtocol(WebSocketServerProtocol):
+    factory: WsProtocolFactory
+
     def __init__(self, master: BuildMaster):
         super().__init__()
         self.master = master
         self.qrefs: dict[str, QueueRef] | None = {}
         self.debug = self.master.config.www.get("debug", False)
+        self.outbox = fanout.ClientQueue(self._write_frame, self._drop_lagging_client)
+
+    def connectionMade(self) -> None:
+        super().connectionMade()
+        fanout.register_client_queue(self.transport, self.outbox)
+
+    def _write_frame(self, payload: bytes) -> None:
+        self.sendMessage(payload)
+
+    def _drop_lagging_client(self) -> None:
+        log.msg("dropping websocket client that fell too far behind", system=self)
+        self.dropConnection(abort=True)
 
     def to_json(self, msg: dict[str, Any]) -> bytes:
         return json.dumps(msg, default=toJson, separators=(",", ":")).encode()
 
     def send_json_message(self, **msg: Any) -> defer.Deferred:
-        return self.sendMessage(self.to_json(msg))
+        self.outbox.push(self.to_json(msg))
+        return defer.succeed(None)
 
     def send_error(self, error: str, code: int, _id: str | None) -> defer.Deferred:
         return self.send_json_message(error=error, code=code, _id=_id)
@@ -146,9 +169,12 @@ class WsProtocol(WebSocketServerProtocol):
             yield self.ack(_id=_id)
             return
 
-        def callback(key: list[str], message: Any) -> defer.Deferred:
-            # protocol is deliberately concise in size
-            return self.send_json_message(k="/".join(key), m=message)
+        def callback(key: tuple[str, ...], message: Any) -> None:
+            # the frame is encoded once for all the clients, and replaces any
+            # queued frame about the same event of the same resource
+            self.outbox.push(
+                self.factory.encoder.encode(key, message), coalesce_key=fanout.coalesce_key(key)
+            )
 
         qref = yield self.master.mq.startConsuming(callback, self.parsePath(path))
 
@@ -186,6 +212,7 @@ class WsProtocol(WebSocketServerProtocol):
                 qref.stopConsuming()
 
         self.qrefs = None  # to be sure we don't add any more
+        self.outbox.stopProducing()
 
     def is_secure(self) -> bool:
         return _HAS_SSL and ISSLTransport.providedBy(self.transport)
@@ -216,6 +243,7 @@ class WsProtocolFactory(WebSocketServerFactory):
         self.master = master
         pingInterval = self.master.config.www.get("ws_ping_interval", 0)
         self.setProtocolOptions(webStatus=False, autoPingInterval=pingInterval)
+        self.encoder: fanout.MessageEncoder = fanout.MessageEncoder(make_event_frame)
 
     def buildProtocol(self, addr: Any) -> WsProtocol:
         p = WsProtocol(self.master)
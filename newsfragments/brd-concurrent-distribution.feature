@@ -0,0 +1 @@
+Added the :bb:cfg:`build_distribution_concurrency` option, which lets the buildmaster look for builds to start on several builders at the same time, so that a builder that is slow to start its builds no longer delays the other builders.
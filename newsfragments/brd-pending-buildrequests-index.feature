@@ -0,0 +1 @@
+The build request distributor now keeps an in-memory index of each builder's unclaimed build requests, kept up to date from buildrequests messages, instead of querying the database every time it looks for a build to start.
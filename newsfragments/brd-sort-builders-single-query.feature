@@ -0,0 +1 @@
+The default builder prioritization now gets the highest priority and the oldest submission time of the unclaimed build requests of all builders with a single database query, cached until a build request changes state, instead of two queries per builder.
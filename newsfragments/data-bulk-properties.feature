@@ -0,0 +1 @@
+The ``/builds`` and ``/buildrequests`` collections now load the requested properties of all builds or buildsets in a single database query.
@@ -0,0 +1 @@
+The ``/steps``, ``/logs`` and ``/workers`` collections of the data API now apply result spec filters, ordering and pagination in the database query instead of in Python.
@@ -0,0 +1 @@
+Build properties are now written to the database in a single transaction, using only the statements needed by the new or changed properties, instead of one or two queries per property.
@@ -0,0 +1 @@
+The worker now creates the archive of a :bb:step:`DirectoryUpload` while it is sent, instead of writing it to a temporary file first, and :bb:step:`DirectoryUpload` and :bb:step:`MultipleFileUpload` accept ``compress='zstd'``.
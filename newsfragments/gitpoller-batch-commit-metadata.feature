@@ -0,0 +1 @@
+Added ``batch_commit_metadata`` option to :bb:chsrc:`GitPoller` to read the metadata of all new commits with a single ``git log`` invocation instead of several git commands per commit.
@@ -0,0 +1 @@
+Decompressed log chunks are now kept in a new ``LogChunks`` cache, bounded by the total size of the cached text, so that logs read repeatedly are not fetched and decompressed from the database each time.
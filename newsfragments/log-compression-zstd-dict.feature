@@ -0,0 +1 @@
+Added the ``zstd_dict`` value to :bb:cfg:`logCompressionMethod`, which compresses log chunks with zstd dictionaries trained per builder and log name on the logs of the latest builds.
@@ -0,0 +1 @@
+Added the :bb:cfg:`logSearchIndex` option which indexes the content of logs as they are written, and the ``/logs/search`` Data API endpoint which searches it, e.g. ``/logs/search?q=segfault%20at&builderid=3``.
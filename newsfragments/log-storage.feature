@@ -0,0 +1 @@
+Added the :bb:cfg:`logStorage` setting, which stores the content of logs outside of the database, either on the file system with ``FileLogStorage``, or in an S3-compatible object store with ``S3LogStorage``.
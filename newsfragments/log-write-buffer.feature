@@ -0,0 +1 @@
+Log lines of build steps are now buffered and written to the database in batches, controlled by the new :bb:cfg:`logWriteBufferSize` and :bb:cfg:`logWriteBufferDelay` settings. This reduces the number of database transactions for steps producing a lot of output.
@@ -0,0 +1 @@
+Added an in-memory registry of counters, gauges and histograms for the master hot paths (database pool, message queue fan-out, build request distribution and log appends), which can be exposed in the Prometheus text format at ``/metrics`` with the new ``metrics_endpoint`` option of ``c['www']``.
@@ -0,0 +1 @@
+The ``SimpleMQ`` message queue now indexes subscriptions by routing key, so producing a message only visits matching consumers.
@@ -0,0 +1 @@
+:bb:step:`MultipleFileUpload` accepts ``max_concurrent_uploads`` to upload several files at the same time, and writes the number of uploaded bytes and the throughput to its ``stdio`` log.
@@ -0,0 +1 @@
+REST API JSON responses now carry an ``ETag`` header, and requests with a matching ``If-None-Match`` header get a ``304 Not Modified`` response. The new ``rest_cache`` option of ``c['www']`` caches responses in memory until an event about the resource type is produced.
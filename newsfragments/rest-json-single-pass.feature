@@ -0,0 +1 @@
+REST API JSON responses are now encoded only once, using ``orjson`` if it is installed. The new ``json_streaming`` option of ``c['www']`` sends responses as they are encoded, using chunked transfer encoding.
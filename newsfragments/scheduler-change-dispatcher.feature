@@ -0,0 +1 @@
+New changes are now loaded once for all the schedulers of a master, and only given to the schedulers whose change filter accepts them; change filters on exact branches, repositories, projects or codebases are looked up in an index instead of being evaluated for each change.
@@ -0,0 +1 @@
+Redacting secrets from the output of the commands is faster when many secrets are used, and secrets split between two updates of a worker, such as multi-line private keys, are now redacted too.
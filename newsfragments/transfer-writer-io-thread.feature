@@ -0,0 +1 @@
+File and directory uploads now write to disk in a thread dedicated to each transfer instead of the master's main thread, and :bb:step:`DirectoryUpload` unpacks the archive while it is received instead of after the transfer.
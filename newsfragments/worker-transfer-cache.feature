@@ -0,0 +1 @@
+:bb:step:`FileDownload` and :bb:step:`StringDownload` accept ``use_worker_cache=True`` to let the worker reuse a cached copy of files it already received instead of transferring them again.
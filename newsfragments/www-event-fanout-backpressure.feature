@@ -0,0 +1 @@
+The websocket and server-sent events endpoints now encode each event once for all clients, queue events for clients that do not read fast enough, replace queued events superseded by a newer state of the same resource, and disconnect clients that fall too far behind.
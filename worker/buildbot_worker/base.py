@@ -66,9 +66,12 @@ class ProtocolCommandBase:
         command: str,
         command_id: str,
         args: dict[str, list[str] | str],
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         self.unicode_encoding = unicode_encoding
         self.worker_basedir = worker_basedir
+        # maximum size of the transfer cache of the worker, None for the default
+        self.transfer_cache_max_size = transfer_cache_max_size
         self.buffer_size = buffer_size
         self.buffer_timeout = buffer_timeout
         self.max_line_length = max_line_length
@@ -224,12 +227,14 @@ class BotBase(service.MultiService):
         basedir: str,
         unicode_encoding: str | None = None,
         delete_leftover_dirs: bool = False,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         service.MultiService.__init__(self)
         self.basedir = basedir
         self.numcpus: int | None = None
         self.unicode_encoding = unicode_encoding or sys.getfilesystemencoding() or 'ascii'
         self.delete_leftover_dirs = delete_leftover_dirs
+        self.transfer_cache_max_size = transfer_cache_max_size
         self.builders: dict[str, WorkerForBuilderBase] = {}
         # Don't send any data until at least buffer_size bytes have been collected
         # or buffer_timeout elapsed
@@ -337,11 +342,15 @@ class WorkerBase(service.MultiService):
         umask: int | None = None,
         unicode_encoding: str | None = None,
         delete_leftover_dirs: bool = False,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         service.MultiService.__init__(self)
         self.name = name
         bot = bot_class(
-            basedir, unicode_encoding=unicode_encoding, delete_leftover_dirs=delete_leftover_dirs
+            basedir,
+            unicode_encoding=unicode_encoding,
+            delete_leftover_dirs=delete_leftover_dirs,
+            transfer_cache_max_size=transfer_cache_max_size,
         )
         bot.setServiceParent(self)
         self.bot = bot
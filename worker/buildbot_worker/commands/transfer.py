@@ -14,24 +14,39 @@
 # Copyright Buildbot Team Members
 from __future__ import annotations
 
+import hashlib
 import os
+import re
+import shutil
 import tarfile
 import tempfile
+import threading
+from collections import deque
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import cast
 
 from twisted.internet import defer
+from twisted.internet import threads
 from twisted.python import log
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
 
 from buildbot_worker.commands.base import Command
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
 if TYPE_CHECKING:
     from io import BufferedIOBase
     from io import BufferedWriter
+    from typing import IO
     from typing import TypeVar
 
     from twisted.internet.defer import Deferred
-    from twisted.python.failure import Failure
+    from twisted.internet.interfaces import IReactorFromThreads
 
     from buildbot_worker.util.twisted import InlineCallbacksType
 
@@ -164,11 +179,18 @@ class WorkerFileUploadCommand(TransferCommand):
         d.addCallbacks(_done, _err)
         return None
 
+    def _is_source_open(self) -> bool:
+        return self.fp is not None
+
+    def _read(self, length: int) -> bytes | Deferred[bytes]:
+        assert self.fp is not None
+        return self.fp.read(length)
+
     @defer.inlineCallbacks
     def _writeBlock(self) -> InlineCallbacksType[bool]:
         """Write a block of data to the remote writer"""
 
-        if self.interrupted or self.fp is None:
+        if self.interrupted or not self._is_source_open():
             if self.debug:
                 self.log_msg('WorkerFileUploadCommand._writeBlock(): end')
             return True
@@ -183,7 +205,7 @@ class WorkerFileUploadCommand(TransferCommand):
                 self.rc = 1
             data = b''
         else:
-            data = self.fp.read(length)
+            data = yield self._read(length)
 
         if self.debug:
             self.log_msg(
@@ -205,10 +227,106 @@ class WorkerFileUploadCommand(TransferCommand):
         return self.protocol_command.protocol_update_upload_file_write(self.writer, data)  # type: ignore[attr-defined]
 
 
+class _ArchiveAborted(Exception):
+    pass
+
+
+class _ArchiveStream:
+    """
+    File-like object that the thread building an archive writes to, and that
+    the upload loop reads from in the reactor thread.
+
+    The archiving thread blocks while max_buffered bytes wait to be sent, so
+    the archive is never stored: it is sent while it is created.
+    """
+
+    def __init__(self, reactor: IReactorFromThreads, max_buffered: int) -> None:
+        self._reactor = reactor
+        self._max_buffered = max_buffered
+        self._cond = threading.Condition()
+        self._chunks: deque[bytes] = deque()
+        self._buffered = 0
+        self._aborted = False
+        self._finished = False
+        self.error: Failure | None = None
+        self._pending_read: tuple[Deferred[bytes], int] | None = None
+
+    def write(self, data: bytes) -> int:
+        # called from the archiving thread
+        with self._cond:
+            while self._buffered >= self._max_buffered and not self._aborted:
+                self._cond.wait()
+            if self._aborted:
+                raise _ArchiveAborted()
+            self._chunks.append(bytes(data))
+            self._buffered += len(data)
+        self._reactor.callFromThread(self._serve_read)
+        return len(data)
+
+    def finish(self, res: None | Failure) -> None:
+        # called once the archiving thread is done; an error ends the archive
+        self._finished = True
+        if isinstance(res, Failure) and not res.check(_ArchiveAborted):
+            self.error = res
+        self._serve_read()
+
+    def abort(self) -> None:
+        with self._cond:
+            self._aborted = True
+            self._chunks.clear()
+            self._buffered = 0
+            self._cond.notify()
+
+    def read(self, size: int) -> Deferred[bytes]:
+        """
+        Return the next size bytes of the archive, or less at its end.
+        """
+        assert self._pending_read is None
+        d: Deferred[bytes] = defer.Deferred()
+        self._pending_read = (d, size)
+        self._serve_read()
+        return d
+
+    def _serve_read(self) -> None:
+        if self._pending_read is None:
+            return
+        d, size = self._pending_read
+        with self._cond:
+            if self._buffered < size and not self._finished:
+                return
+            data = bytearray()
+            while self._chunks and len(data) < size:
+                chunk = self._chunks.popleft()
+                if len(data) + len(chunk) > size:
+                    cut = size - len(data)
+                    self._chunks.appendleft(chunk[cut:])
+                    chunk = chunk[:cut]
+                data += chunk
+            self._buffered -= len(data)
+            self._cond.notify()
+        self._pending_read = None
+        d.callback(bytes(data))
+
+
 class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
+    """
+    Upload a directory from worker to build master, as a tar archive that is
+    created in a thread while it is sent.
+    Arguments:
+
+        - ['path']:      path of the directory to upload
+        - ['writer']:    RemoteReference to a buildbot_worker.protocols.base.FileWriterProxy object
+        - ['maxsize']:   max size (in bytes) of the archive to send
+        - ['blocksize']: max size for each data block
+        - ['compress']:  None, 'gz', 'bz2' or 'zstd'
+    """
+
     debug = False
     requiredArgs = ['path', 'writer', 'blocksize']
 
+    # number of blocks that may be archived ahead of the upload
+    blocks_ahead = 4
+
     # TODO: args: TypedDict
     def setup(self, args: dict[str, Any]) -> None:
         self.path = args['path']
@@ -218,6 +336,7 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         self.compress = args['compress']
         self.stderr: str | None = None
         self.rc = 0
+        self.stream: _ArchiveStream | None = None
 
     def start(self) -> Deferred:
         if self.debug:
@@ -226,37 +345,48 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         if self.debug:
             self.log_msg(f"path: {self.path!r}")
 
-        # Create temporary archive
-        fd, self.tarname = tempfile.mkstemp(prefix='buildbot-transfer-')
-        self.fp = os.fdopen(fd, "rb+")
-        if self.compress == 'bz2':
-            mode = 'w|bz2'
-        elif self.compress == 'gz':
-            mode = 'w|gz'
-        else:
-            mode = 'w'
-
-        with tarfile.TarFile.open(mode=mode, fileobj=self.fp) as archive:  # type: ignore[call-overload]
-            try:
-                archive.add(self.path, '')
-            except OSError as e:
-                # if directory does not exist, bail out with an error
-                self.stderr = f"Cannot read directory '{self.path}' for upload: {e}"
-                self.rc = 1
-                archive.close()  # need to close it before self.finished() runs below
-                d = defer.succeed(False)
-                d.addCallback(self.finished)
-                return d
-
-        # Transfer it
-        self.fp.seek(0)
+        try:
+            # if directory does not exist, bail out with an error
+            os.stat(self.path)
+            if self.compress == 'zstd' and zstandard is None:
+                raise OSError("zstd compression requires the zstandard package")
+        except OSError as e:
+            self.stderr = f"Cannot read directory '{self.path}' for upload: {e}"
+            self.rc = 1
+            d = defer.succeed(False)
+            d.addCallback(self.finished)
+            return d
+
+        # Create the archive while it is transferred
+        self.stream = _ArchiveStream(
+            cast("IReactorFromThreads", self._reactor), self.blocks_ahead * self.blocksize
+        )
+        # the archive is written by a thread of its own, as holding a thread of
+        # the reactor's pool for the whole upload would delay its other users,
+        # such as name resolution
+        pool = ThreadPool(minthreads=0, maxthreads=1, name='buildbot-worker-archive')
+        pool.start()
+        d_archive = threads.deferToThreadPool(
+            cast("IReactorFromThreads", self._reactor), pool, self._write_archive, self.stream
+        )
+        d_archive.addBoth(self.stream.finish)
+        d_archive.addBoth(lambda _: pool.stop())
 
         self.sendStatus([('header', f"sending {self.path}\n")])
 
         d = defer.Deferred()
         self._reactor.callLater(0, self._loop, d)
 
-        def unpack(res: _T) -> Deferred[_T]:
+        def unpack(res: _T) -> _T | Deferred[_T]:
+            assert self.stream is not None
+            if self.stream.error is not None:
+                # the archive is incomplete, do not let the master unpack it
+                self.stderr = (
+                    f"Cannot read directory '{self.path}' for upload: {self.stream.error.value}"
+                )
+                self.rc = 1
+                return res
+
             d1 = self.protocol_command.protocol_update_upload_directory(self.writer)  # type: ignore[attr-defined]
 
             def unpack_err(f: _T) -> _T:
@@ -271,17 +401,146 @@ class WorkerDirectoryUploadCommand(WorkerFileUploadCommand):
         d.addBoth(self.finished)
         return d
 
+    def _write_archive(self, stream: _ArchiveStream) -> None:
+        # runs in a thread
+        fileobj: Any = stream
+        if self.compress == 'zstd':
+            fileobj = zstandard.ZstdCompressor().stream_writer(
+                cast("IO[bytes]", stream), closefd=False
+            )
+            mode = 'w|'
+        elif self.compress == 'bz2':
+            mode = 'w|bz2'
+        elif self.compress == 'gz':
+            mode = 'w|gz'
+        else:
+            mode = 'w|'
+
+        with tarfile.TarFile.open(mode=mode, fileobj=fileobj) as archive:  # type: ignore[call-overload]
+            archive.add(self.path, '')
+        if self.compress == 'zstd':
+            fileobj.close()
+
+    def _is_source_open(self) -> bool:
+        return self.stream is not None
+
+    def _read(self, length: int) -> Deferred[bytes]:
+        assert self.stream is not None
+        return self.stream.read(length)
+
     def finished(self, res: bool | Failure | None) -> bool | Failure | None:
-        assert self.fp is not None
-        self.fp.close()
-        self.fp = None
-        os.remove(self.tarname)
+        if self.stream is not None:
+            # stop the archiving thread if the upload ended early
+            self.stream.abort()
+            self.stream = None
         return TransferCommand.finished(self, res)
 
     def do_protocol_write(self, data: bytes) -> Deferred:
         return self.protocol_command.protocol_update_upload_directory_write(self.writer, data)  # type: ignore[attr-defined]
 
 
+class TransferCache:
+    """
+    Content-addressed store of downloaded files.
+
+    Files are stored under the hex sha256 digest of their content. Using an
+    entry updates its modification time, and the least recently used entries
+    are removed when the cache grows past max_size bytes. Files bigger than
+    max_size are not stored.
+    """
+
+    _digest_re = re.compile(r'[0-9a-f]{64}')
+    _chunk_size = 64 * 1024
+
+    def __init__(self, path: str, max_size: int) -> None:
+        self.path = path
+        self.max_size = max_size
+
+    def _entry(self, digest: str) -> str:
+        if not self._digest_re.fullmatch(digest):
+            raise ValueError(f"invalid digest {digest!r}")
+        return os.path.join(self.path, digest[:2], digest)
+
+    def size(self, digest: str) -> int | None:
+        """
+        Return the size of the cached content, or None if it is not cached.
+        """
+        try:
+            return os.stat(self._entry(digest)).st_size
+        except (OSError, ValueError):
+            return None
+
+    def copy_to(self, digest: str, dest: str, mode: int | None) -> None:
+        """
+        Copy the cached content to dest, replacing it. The content is checked
+        against its digest while copying: an entry that does not match is
+        removed and ValueError is raised.
+        """
+        entry = self._entry(digest)
+        hasher = hashlib.sha256()
+        if mode is None and os.path.isfile(dest):
+            # keep the mode of the file being replaced, as writing to it would
+            mode = os.stat(dest).st_mode & 0o7777
+        tmpname = f'{dest}.{os.urandom(4).hex()}.tmp'
+        # the umask applies to the new file, as for other downloads
+        fd = os.open(
+            tmpname, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666
+        )
+        try:
+            with open(entry, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                for chunk in iter(lambda: src.read(self._chunk_size), b''):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+            if hasher.hexdigest() != digest:
+                self._remove(entry)
+                raise ValueError(f"cache entry {entry!r} does not match its digest")
+            if mode is not None:
+                os.chmod(tmpname, mode)
+            os.replace(tmpname, dest)
+        except BaseException:
+            self._remove(tmpname)
+            raise
+        os.utime(entry)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, src: str, digest: str) -> None:
+        if os.path.getsize(src) > self.max_size:
+            return
+        entry = self._entry(digest)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=self.path, prefix='tmp-')
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmpname)
+            os.replace(tmpname, entry)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
+        self.prune()
+
+    def prune(self) -> None:
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for name in filenames:
+                if self._digest_re.fullmatch(name):
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            # may have been removed by a concurrent download
+            self._remove(path)
+            total -= size
+
+
 class WorkerFileDownloadCommand(TransferCommand):
     """
     Download a file from master to worker
@@ -292,20 +551,32 @@ class WorkerFileDownloadCommand(TransferCommand):
         - ['maxsize']:   max size (in bytes) of file to write
         - ['blocksize']: max size for each data block
         - ['mode']:      access mode for the new file
+        - ['digest']:    hex sha256 digest of the file: if given, the file is
+                         copied from the transfer cache of the worker when
+                         present there, and added to it otherwise
+
+    The size of the transfer cache is the transfer_cache_max_size option of
+    the worker, or cache_max_size; 0 disables the cache.
     """
 
     debug = False
     requiredArgs = ['path', 'reader', 'blocksize']
 
+    # transfer cache, in the worker basedir
+    cache_dirname = 'transfer-cache'
+    cache_max_size = 1024 * 1024 * 1024
+
     def setup(self, args: dict[str, Any]) -> None:
         self.path: str = args['path']
         self.reader = args['reader']
         self.bytes_remaining = args['maxsize']
         self.blocksize = args['blocksize']
         self.mode = args['mode']
+        self.digest: str | None = args.get('digest')
         self.stderr = None
         self.rc = 0
         self.fp: BufferedWriter | None = None
+        self.hasher: Any = None
 
     def start(self) -> Deferred[None]:
         if self.debug:
@@ -315,7 +586,63 @@ class WorkerFileDownloadCommand(TransferCommand):
         if not os.path.exists(dirname):
             os.makedirs(dirname)
 
+        max_size = self.protocol_command.transfer_cache_max_size
+        if max_size is None:
+            max_size = self.cache_max_size
+        if self.digest is not None and max_size > 0:
+            self.cache = TransferCache(
+                os.path.join(self.protocol_command.worker_basedir, self.cache_dirname),
+                max_size,
+            )
+            size = self.cache.size(self.digest)
+            if size is not None and (self.bytes_remaining is None or size <= self.bytes_remaining):
+                d = threads.deferToThread(self.cache.copy_to, self.digest, self.path, self.mode)
+                d.addCallbacks(self._copied_from_cache, self._cache_copy_failed)
+                return d
+            self.hasher = hashlib.sha256()
+
+        return self._download()
+
+    def _copied_from_cache(self, res: None) -> Deferred[None]:
+        self.sendStatus([('header', f"using cached copy of {self.path}\n")])
+        # the content was not read, but the reader must be closed
+        d = self._close_reader(res)
+        d.addBoth(self.finished)
+        return d
+
+    def _cache_copy_failed(self, f: Failure) -> Deferred[None]:
+        log.err(f, 'while copying from the transfer cache')
+        self.hasher = hashlib.sha256()
+        return self._download()
+
+    def _close_reader(self, res: _T) -> Deferred[_T]:
+        # close the file, but pass through any errors from _loop
+        d1 = self.protocol_command.protocol_update_read_file_close(self.reader)  # type: ignore[attr-defined]
+        d1.addErrback(log.err, 'while trying to close reader')
+        d1.addCallback(lambda ignored: res)
+        return d1
+
+    def _store_in_cache(self, res: None) -> None | Deferred[None]:
+        if self.hasher is None or self.rc != 0 or self.interrupted:
+            return res
+        if self.hasher.hexdigest() != self.digest:
+            self.log_msg(f"'{self.path}' does not match its digest, not caching it")
+            return res
+
+        assert self.fp is not None
+        self.fp.close()
+        self.fp = None
+        d = threads.deferToThread(self.cache.store, self.path, self.digest)
+        d.addErrback(log.err, 'while storing the download in the transfer cache')
+        d.addCallback(lambda _: res)
+        return d
+
+    def _download(self) -> Deferred[None]:
         try:
+            if os.path.isfile(self.path) and os.stat(self.path).st_nlink > 1:
+                # writing through a hard link would also change the other
+                # links to the file: replace it instead
+                os.unlink(self.path)
             self.fp = open(self.path, 'wb')
             if self.debug:
                 self.log_msg(f"Opened '{self.path}' for download")
@@ -340,15 +667,8 @@ class WorkerFileDownloadCommand(TransferCommand):
 
         d: defer.Deferred[None] = defer.Deferred()
         self._reactor.callLater(0, self._loop, d)
-
-        def _close(res: _T) -> Deferred[_T]:
-            # close the file, but pass through any errors from _loop
-            d1 = self.protocol_command.protocol_update_read_file_close(self.reader)  # type: ignore[attr-defined]
-            d1.addErrback(log.err, 'while trying to close reader')
-            d1.addCallback(lambda ignored: res)
-            return d1
-
-        d.addBoth(_close)
+        d.addBoth(self._close_reader)
+        d.addCallback(self._store_in_cache)
         d.addBoth(self.finished)
         return d
 
@@ -401,6 +721,8 @@ class WorkerFileDownloadCommand(TransferCommand):
 
         assert self.fp is not None
         self.fp.write(data)
+        if self.hasher is not None:
+            self.hasher.update(data)
         return False
 
     def finished(self, res: bool | Failure | None) -> bool | Failure | None:
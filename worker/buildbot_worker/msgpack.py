@@ -79,6 +79,7 @@ class ProtocolCommandMsgpack(ProtocolCommandBase):
         command_id: str,
         command: str,
         args: dict[str, list[str] | str],
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         ProtocolCommandBase.__init__(
             self,
@@ -94,6 +95,7 @@ class ProtocolCommandMsgpack(ProtocolCommandBase):
             command,
             command_id,
             args,
+            transfer_cache_max_size,
         )
         self.protocol = protocol
 
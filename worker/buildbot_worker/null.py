@@ -42,6 +42,7 @@ class LocalWorker(WorkerBase):
         umask: int | None = None,
         unicode_encoding: str | None = None,
         delete_leftover_dirs: bool = False,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         super().__init__(
             name,
@@ -50,6 +51,7 @@ class LocalWorker(WorkerBase):
             umask=umask,
             unicode_encoding=unicode_encoding,
             delete_leftover_dirs=delete_leftover_dirs,
+            transfer_cache_max_size=transfer_cache_max_size,
         )
 
     @defer.inlineCallbacks
@@ -81,6 +81,7 @@ class ProtocolCommandPb(ProtocolCommandBase):
         command_id: str,
         args: dict[str, list[str] | str],
         command_ref: RemoteReference,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         self.basedir = basedir
         self.command_ref: RemoteReference | None = command_ref
@@ -98,6 +99,7 @@ class ProtocolCommandPb(ProtocolCommandBase):
             command,
             command_id,
             args,
+            transfer_cache_max_size,
         )
 
     def protocol_args_setup(self, command: str, args: dict[str, list[str] | str]) -> None:
@@ -370,6 +372,7 @@ class WorkerForBuilderPbLike(WorkerForBuilderBase):
             command_id,
             args,
             command_ref,
+            self.bot.transfer_cache_max_size,
         )
 
         log.msg(f"(command {command_id}): startCommand:{command}")
@@ -485,12 +488,14 @@ class BotMsgpack(BotBase):
         basedir: str,
         unicode_encoding: None = None,
         delete_leftover_dirs: bool = False,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         BotBase.__init__(
             self,
             basedir,
             unicode_encoding=unicode_encoding,
             delete_leftover_dirs=delete_leftover_dirs,
+            transfer_cache_max_size=transfer_cache_max_size,
         )
         self.protocol_commands: dict[str, ProtocolCommandMsgpack] = {}
 
@@ -551,6 +556,7 @@ class BotMsgpack(BotBase):
             command_id,
             command,
             args,
+            self.transfer_cache_max_size,
         )
 
         self.protocol_commands[command_id] = protocol_command
@@ -728,6 +734,7 @@ class Worker(WorkerBase):
         path: str | None = None,
         delete_leftover_dirs: bool = False,
         proxy_connection_string: str | None = None,
+        transfer_cache_max_size: int | None = None,
     ) -> None:
         assert connection_string is None or (buildmaster_host, port) == (
             None,
@@ -750,6 +757,7 @@ class Worker(WorkerBase):
             umask=umask,
             unicode_encoding=unicode_encoding,
             delete_leftover_dirs=delete_leftover_dirs,
+            transfer_cache_max_size=transfer_cache_max_size,
         )
         if keepalive == 0:
             keepalive = None
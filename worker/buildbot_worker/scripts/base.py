@@ -49,6 +49,7 @@ if TYPE_CHECKING:
             "numcpus": Union[int, str, None],
             "protocol": Literal["pb", "msgpack", "null"],
             "maxretries": Union[int, str, None],
+            "transfer-cache-max-size": Union[int, str, None],
             "connection-string": Union[str, None],
             "proxy-connection-string": Union[str, None],
             # arguments
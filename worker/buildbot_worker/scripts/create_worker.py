@@ -77,6 +77,7 @@ allow_shutdown = %(allow-shutdown)r
 maxretries = %(maxretries)s
 use_tls = %(use-tls)s
 delete_leftover_dirs = %(delete-leftover-dirs)s
+transfer_cache_max_size = %(transfer-cache-max-size)s
 proxy_connection_string = %(proxy-connection-string)r
 protocol = %(protocol)r
 
@@ -85,6 +86,7 @@ s = Worker(buildmaster_host, port, workername, passwd, basedir,
            numcpus=numcpus, allow_shutdown=allow_shutdown,
            maxRetries=maxretries, protocol=protocol, useTls=use_tls,
            delete_leftover_dirs=delete_leftover_dirs,
+           transfer_cache_max_size=transfer_cache_max_size,
            connection_string=connection_string,
            proxy_connection_string=proxy_connection_string)
 s.setServiceParent(application)
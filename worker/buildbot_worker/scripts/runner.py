@@ -122,6 +122,12 @@ class CreateWorkerOptions(MakerBase):
         ["maxdelay", None, 300, "Maximum time between connection attempts"],
         ["maxretries", None, 'None', "Maximum number of retries before worker shutdown"],
         ["numcpus", None, "None", "Number of available cpus to use on a build. "],
+        [
+            "transfer-cache-max-size",
+            None,
+            "None",
+            "Maximum size of the cache of downloaded files, in bytes (0 disables it)",
+        ],
         ["log-size", "s", "10000000", "size at which to rotate twisted log files"],
         [
             "log-count",
@@ -223,7 +229,13 @@ class CreateWorkerOptions(MakerBase):
             except ValueError as e:
                 raise usage.UsageError(f"{argument} parameter needs to be a number") from e
 
-        for argument in ["log-count", "maxretries", "umask", "numcpus"]:
+        for argument in [
+            "log-count",
+            "maxretries",
+            "umask",
+            "numcpus",
+            "transfer-cache-max-size",
+        ]:
             if not re.match(r'^((0o)\d+|0|[1-9]\d*)$', self[argument]) and self[argument] != 'None':
                 raise usage.UsageError(f"{argument} parameter needs to be a number or None")
 
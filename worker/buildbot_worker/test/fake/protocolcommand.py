@@ -36,6 +36,7 @@ class FakeProtocolCommand(ProtocolCommandBase):
         self.updates: list[tuple[str, Any] | str] = []
         self.worker_basedir = basedir
         self.basedir = basedir
+        self.transfer_cache_max_size: int | None = None
 
     def show(self) -> str:
         return pprint.pformat(self.updates)
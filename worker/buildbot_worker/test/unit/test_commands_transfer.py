@@ -14,11 +14,13 @@
 # Copyright Buildbot Team Members
 from __future__ import annotations
 
+import hashlib
 import io
 import os
 import re
 import shutil
 import tarfile
+import threading
 from typing import TYPE_CHECKING
 from typing import cast
 
@@ -31,6 +33,7 @@ from twisted.trial import unittest
 from buildbot_worker.commands import transfer
 from buildbot_worker.test.fake.remote import FakeRemote
 from buildbot_worker.test.util.command import CommandTestMixin
+from buildbot_worker.test.util.compat import skipUnlessPlatformIs
 
 if TYPE_CHECKING:
     from typing import Any
@@ -373,6 +376,155 @@ class TestWorkerDirectoryUpload(CommandTestMixin, unittest.TestCase):
 
     # except bz2 can't operate in stream mode on py24
 
+    @defer.inlineCallbacks
+    def test_simple_zstd(self) -> InlineCallbacksType[None]:
+        if transfer.zstandard is None:
+            raise unittest.SkipTest("zstandard is not installed")
+        self.fakemaster.keep_data = True
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'workdir': 'workdir',
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 512,
+                'compress': 'zstd',
+            },
+        )
+
+        yield self.run_command()
+
+        self.assertUpdates([
+            ('header', f'sending {self.datadir}\n'),
+            'write(s)',
+            'unpack',
+            ('rc', 0),
+        ])
+
+        data = (
+            transfer.zstandard.ZstdDecompressor().decompressobj().decompress(self.fakemaster.data)
+        )
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r") as a:
+            self.assertEqual(sorted(n or '.' for n in a.getnames()), ['.', 'aa', 'bb'])
+
+    @defer.inlineCallbacks
+    def test_zstd_not_available(self) -> InlineCallbacksType[None]:
+        self.patch(transfer, 'zstandard', None)
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'workdir': 'workdir',
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 512,
+                'compress': 'zstd',
+            },
+        )
+
+        yield self.run_command()
+
+        updates = self.get_updates()
+        self.assertEqual(updates[0], ('rc', 1))
+        self.assertIn('zstandard', updates[1][1])
+
+    @defer.inlineCallbacks
+    def test_streams_in_blocks(self) -> InlineCallbacksType[None]:
+        content = os.urandom(100 * 1024)
+        with open(os.path.join(self.datadir, "cc"), mode="wb") as f:
+            f.write(content)
+        self.fakemaster.keep_data = True
+        self.fakemaster.delay_write = True
+        sizes: list[int] = []
+        remote_write = self.fakemaster.remote_write
+
+        def record_write(data: bytes) -> defer.Deferred[None] | None:
+            sizes.append(len(data))
+            return remote_write(data)
+
+        self.fakemaster.remote_write = record_write  # type: ignore[method-assign]
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'workdir': 'workdir',
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 4096,
+                'compress': None,
+            },
+        )
+
+        yield self.run_command()
+
+        # the archive is sent in full blocks, as it is created
+        self.assertEqual(set(sizes[:-1]), {4096})
+        with tarfile.open(fileobj=io.BytesIO(self.fakemaster.data), mode="r") as a:
+            member = a.extractfile('cc')
+            assert member is not None
+            self.assertEqual(member.read(), content)
+
+    @defer.inlineCallbacks
+    def test_archive_thread(self) -> InlineCallbacksType[None]:
+        threads: list[str] = []
+        write_archive = transfer.WorkerDirectoryUploadCommand._write_archive
+
+        def record_thread(
+            command: transfer.WorkerDirectoryUploadCommand, stream: transfer._ArchiveStream
+        ) -> None:
+            threads.append(threading.current_thread().name)
+            write_archive(command, stream)
+
+        self.patch(transfer.WorkerDirectoryUploadCommand, '_write_archive', record_thread)
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'workdir': 'workdir',
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 512,
+                'compress': None,
+            },
+        )
+
+        yield self.run_command()
+
+        # the threads of the reactor's pool are left to its other users
+        self.assertEqual(len(threads), 1)
+        self.assertIn('buildbot-worker-archive', threads[0])
+        self.assertIn(('rc', 0), self.get_updates())
+
+    @defer.inlineCallbacks
+    def test_archive_error(self) -> InlineCallbacksType[None]:
+        def add(archive: tarfile.TarFile, name: str, arcname: str) -> None:
+            archive.addfile(tarfile.TarInfo('aa'), io.BytesIO(b''))
+            raise OSError("read error")
+
+        self.patch(tarfile.TarFile, 'add', add)
+        self.make_command(
+            transfer.WorkerDirectoryUploadCommand,
+            {
+                'workdir': 'workdir',
+                'path': self.datadir,
+                'writer': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 512,
+                'compress': None,
+            },
+        )
+
+        yield self.run_command()
+
+        # the partial archive is not unpacked
+        self.assertUpdates([
+            ('header', f'sending {self.datadir}\n'),
+            'write(s)',
+            ('rc', 1),
+            ('stderr', f"Cannot read directory '{self.datadir}' for upload: read error"),
+        ])
+
     @defer.inlineCallbacks
     def test_out_of_space_unpack(self) -> InlineCallbacksType[None]:
         self.fakemaster.keep_data = True
@@ -435,6 +587,99 @@ class TestWorkerDirectoryUploadNoDir(CommandTestMixin, unittest.TestCase):
         self.assertNotEqual(error_msg, match)
 
 
+class TestTransferCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.basedir = os.path.abspath('test-transfer-cache')
+        if os.path.exists(self.basedir):
+            shutil.rmtree(self.basedir)
+        os.makedirs(self.basedir)
+        self.addCleanup(shutil.rmtree, self.basedir)
+        self.cache = transfer.TransferCache(os.path.join(self.basedir, 'cache'), 100)
+
+    def store(self, content: bytes, mtime: float) -> str:
+        src = os.path.join(self.basedir, 'src')
+        with open(src, 'wb') as f:
+            f.write(content)
+        digest = hashlib.sha256(content).hexdigest()
+        self.cache.store(src, digest)
+        os.utime(self.cache._entry(digest), (mtime, mtime))
+        return digest
+
+    def test_store_copy_to(self) -> None:
+        digest = self.store(b'content', 1000)
+        self.assertEqual(self.cache.size(digest), 7)
+
+        dest = os.path.join(self.basedir, 'dest')
+        self.cache.copy_to(digest, dest, 0o640)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), b'content')
+        if runtime.platformType != 'win32':
+            self.assertEqual(os.stat(dest).st_mode & 0o777, 0o640)
+        # the entry is marked as used
+        self.assertGreater(os.stat(self.cache._entry(digest)).st_mtime, 1000)
+
+    def test_store_too_big(self) -> None:
+        src = os.path.join(self.basedir, 'src')
+        with open(src, 'wb') as f:
+            f.write(b'x' * 101)
+        digest = hashlib.sha256(b'x' * 101).hexdigest()
+        self.cache.store(src, digest)
+        self.assertIsNone(self.cache.size(digest))
+
+    def test_copy_to_repeated(self) -> None:
+        digest = self.store(b'content', 1000)
+        entry = self.cache._entry(digest)
+        entry_mode = os.stat(entry).st_mode
+
+        dest = os.path.join(self.basedir, 'dest')
+        for mode in [0o444, 0o444, 0o444, None, 0o644]:
+            self.cache.copy_to(digest, dest, mode)
+            with open(dest, 'rb') as f:
+                self.assertEqual(f.read(), b'content')
+            if runtime.platformType != 'win32':
+                self.assertFalse(os.path.samefile(dest, entry))
+
+        # no temporary file is left behind, and the entry is unchanged
+        self.assertEqual(sorted(os.listdir(self.basedir)), ['cache', 'dest', 'src'])
+        self.assertEqual(os.stat(entry).st_mode, entry_mode)
+
+    @skipUnlessPlatformIs('posix')
+    def test_copy_to_keeps_mode(self) -> None:
+        digest = self.store(b'content', 1000)
+        dest = os.path.join(self.basedir, 'dest')
+        self.cache.copy_to(digest, dest, 0o600)
+
+        self.cache.copy_to(digest, dest, None)
+        self.assertEqual(os.stat(dest).st_mode & 0o777, 0o600)
+
+    def test_copy_to_corrupted(self) -> None:
+        digest = self.store(b'content', 1000)
+        entry = self.cache._entry(digest)
+        with open(entry, 'wb') as f:
+            f.write(b'other')
+
+        dest = os.path.join(self.basedir, 'dest')
+        with self.assertRaises(ValueError):
+            self.cache.copy_to(digest, dest, None)
+        self.assertFalse(os.path.exists(dest))
+        self.assertIsNone(self.cache.size(digest))
+        self.assertEqual(sorted(os.listdir(self.basedir)), ['cache', 'src'])
+
+    def test_size_unknown_or_invalid(self) -> None:
+        self.assertIsNone(self.cache.size('0' * 64))
+        self.assertIsNone(self.cache.size('../../etc/passwd'))
+
+    def test_prune_least_recently_used(self) -> None:
+        old = self.store(b'a' * 40, 1000)
+        recent = self.store(b'b' * 40, 3000)
+        # storing this one goes past the maximum size
+        latest = self.store(b'c' * 40, 2000)
+
+        self.assertIsNone(self.cache.size(old))
+        self.assertEqual(self.cache.size(recent), 40)
+        self.assertEqual(self.cache.size(latest), 40)
+
+
 class TestDownloadFile(CommandTestMixin, unittest.TestCase):
     def setUp(self) -> None:
         self.setUpCommand()
@@ -450,6 +695,143 @@ class TestDownloadFile(CommandTestMixin, unittest.TestCase):
         if os.path.exists(self.basedir):
             shutil.rmtree(self.basedir)
 
+    def make_digest_command(self, data: bytes, digest: str | None, mode: int | None = None) -> str:
+        self.fakemaster.count_reads = True
+        self.fakemaster.data = data
+        path = os.path.join(self.basedir, 'data')
+        self.make_command(
+            transfer.WorkerFileDownloadCommand,
+            {
+                'path': path,
+                'reader': FakeRemote(self.fakemaster),
+                'maxsize': None,
+                'blocksize': 32,
+                'mode': mode,
+                'digest': digest,
+            },
+        )
+        return path
+
+    def cache_entry(self, digest: str) -> str:
+        return os.path.join(self.basedir, 'transfer-cache', digest[:2], digest)
+
+    @defer.inlineCallbacks
+    def test_digest_not_cached(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        self.make_digest_command(test_data, digest)
+
+        yield self.run_command()
+
+        self.assertUpdates(['read 32', 'read 32', 'read 32', 'close', ('rc', 0)])
+        with open(self.cache_entry(digest), 'rb') as f:
+            self.assertEqual(f.read(), test_data)
+
+    @defer.inlineCallbacks
+    def test_digest_cached(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        os.makedirs(os.path.dirname(self.cache_entry(digest)))
+        with open(self.cache_entry(digest), 'wb') as f:
+            f.write(test_data)
+        path = self.make_digest_command(test_data, digest)
+
+        yield self.run_command()
+
+        # nothing is read from the master
+        self.assertUpdates([('header', f'using cached copy of {path}\n'), 'close', ('rc', 0)])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), test_data)
+
+    @defer.inlineCallbacks
+    def test_digest_cached_corrupted(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        os.makedirs(os.path.dirname(self.cache_entry(digest)))
+        with open(self.cache_entry(digest), 'wb') as f:
+            f.write(b'other')
+        path = self.make_digest_command(test_data, digest)
+
+        yield self.run_command()
+
+        # the entry is downloaded again
+        self.assertEqual(len(self.flushLoggedErrors(ValueError)), 1)
+        self.assertUpdates(['read 32', 'read 32', 'read 32', 'close', ('rc', 0)])
+        for p in [path, self.cache_entry(digest)]:
+            with open(p, 'rb') as f:
+                self.assertEqual(f.read(), test_data)
+
+    @defer.inlineCallbacks
+    def test_digest_cached_mixed_modes(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        for mode in [0o444, 0o444, None, 0o644]:
+            path = self.make_digest_command(test_data, digest, mode)
+            yield self.run_command()
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), test_data)
+
+        # a download without a digest to the same path leaves the entry alone
+        self.make_digest_command(b'other', None)
+        yield self.run_command()
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'other')
+        with open(self.cache_entry(digest), 'rb') as f:
+            self.assertEqual(f.read(), test_data)
+
+    @skipUnlessPlatformIs('posix')
+    @defer.inlineCallbacks
+    def test_hard_link_replaced(self) -> InlineCallbacksType[None]:
+        path = self.make_digest_command(b'1234', None)
+        with open(path, 'wb') as f:
+            f.write(b'old')
+        other = os.path.join(self.basedir, 'other')
+        os.link(path, other)
+
+        yield self.run_command()
+
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'1234')
+        with open(other, 'rb') as f:
+            self.assertEqual(f.read(), b'old')
+
+    @defer.inlineCallbacks
+    def test_digest_cache_max_size(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        self.make_digest_command(test_data, digest)
+        self.protocol_command.transfer_cache_max_size = 50
+
+        yield self.run_command()
+
+        # the file is bigger than the cache
+        self.assertUpdates(['read 32', 'read 32', 'read 32', 'close', ('rc', 0)])
+        self.assertFalse(os.path.exists(self.cache_entry(digest)))
+
+    @defer.inlineCallbacks
+    def test_digest_cache_disabled(self) -> InlineCallbacksType[None]:
+        test_data = b'1234' * 13
+        digest = hashlib.sha256(test_data).hexdigest()
+        self.make_digest_command(test_data, digest)
+        self.protocol_command.transfer_cache_max_size = 0
+
+        yield self.run_command()
+
+        self.assertUpdates(['read 32', 'read 32', 'read 32', 'close', ('rc', 0)])
+        self.assertFalse(os.path.exists(os.path.join(self.basedir, 'transfer-cache')))
+
+    @defer.inlineCallbacks
+    def test_digest_mismatch(self) -> InlineCallbacksType[None]:
+        digest = hashlib.sha256(b'other').hexdigest()
+        path = self.make_digest_command(b'1234', digest)
+
+        yield self.run_command()
+
+        self.assertUpdates(['read 32', 'read 32', 'close', ('rc', 0)])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'1234')
+        self.assertFalse(os.path.exists(self.cache_entry(digest)))
+
     @defer.inlineCallbacks
     def test_simple(self) -> InlineCallbacksType[None]:
         self.fakemaster.count_reads = True  # get actual byte counts
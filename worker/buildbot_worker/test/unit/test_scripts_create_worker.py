@@ -63,6 +63,7 @@ class TestDefaultOptionsMixin:
         "numcpus": None,
         "protocol": "pb",
         "maxretries": None,
+        "transfer-cache-max-size": None,
         "connection-string": None,
         "proxy-connection-string": None,
         # arguments
@@ -137,6 +138,7 @@ class TestMakeTAC(TestDefaultOptionsMixin, unittest.TestCase):
             maxRetries=expected_args["maxretries"],
             useTls=expected_args["use-tls"],
             delete_leftover_dirs=expected_args["delete-leftover-dirs"],
+            transfer_cache_max_size=expected_args["transfer-cache-max-size"],
             connection_string=expected_args["connection-string"],
             proxy_connection_string=expected_args["proxy-connection-string"],
         )
@@ -303,6 +305,7 @@ class TestMakeTAC(TestDefaultOptionsMixin, unittest.TestCase):
         options["numcpus"] = "10"
         options["protocol"] = "null"
         options["maxretries"] = "1"
+        options["transfer-cache-max-size"] = "1000"
         options["proxy-connection-string"] = "TCP:proxy.com:8080"
 
         tac_contents = create_worker._make_tac(options.copy())
@@ -316,11 +319,13 @@ class TestMakeTAC(TestDefaultOptionsMixin, unittest.TestCase):
         self.assertIn("umask = 18", tac_contents)
         self.assertIn("numcpus = 10", tac_contents)
         self.assertIn("maxretries = 1", tac_contents)
+        self.assertIn("transfer_cache_max_size = 1000", tac_contents)
 
         # Check also as arguments used in Worker initialization.
         options["umask"] = 18
         options["numcpus"] = 10
         options["maxretries"] = 1
+        options["transfer-cache-max-size"] = 1000
         self.assert_tac_file_contents(tac_contents, options)
 
     def test_umask_octal_value(self) -> None:
@@ -192,6 +192,7 @@ class TestCreateWorkerOptions(OptionsMixin, unittest.TestCase):
             "--umask=0o22",
             "--maxdelay=3",
             "--numcpus=4",
+            "--transfer-cache-max-size=1000",
             "--log-size=2",
             "--log-count=1",
             "--allow-shutdown=file",
@@ -206,6 +207,7 @@ class TestCreateWorkerOptions(OptionsMixin, unittest.TestCase):
                 "umask": "0o22",
                 "maxdelay": 3,
                 "numcpus": "4",
+                "transfer-cache-max-size": "1000",
                 "log-size": 2,
                 "log-count": "1",
                 "allow-shutdown": "file",
@@ -245,6 +247,12 @@ class TestCreateWorkerOptions(OptionsMixin, unittest.TestCase):
         ):
             self.parse("--numcpus=X", *self.req_args)
 
+    def test_inv_transfer_cache_max_size(self) -> None:
+        with self.assertRaisesRegex(
+            usage.UsageError, "transfer-cache-max-size parameter needs to be a number or None"
+        ):
+            self.parse("--transfer-cache-max-size=1G", *self.req_args)
+
     def test_inv_umask(self) -> None:
         with self.assertRaisesRegex(
             usage.UsageError, "umask parameter needs to be a number or None"
@@ -135,5 +135,29 @@ class LBF(unittest.TestCase):
         self.assertEqual(self.lbf.append('123456789012', 4.0), None)
         self.assertEqual(self.lbf.flush(), ('5123456789012\n', [13], [3.0]))
 
+    def test_very_long_line(self) -> None:
+        """lines longer than several times the limit are split in parts"""
+        self.assertEqual(
+            self.lbf.append('a' * 45, 1.0),
+            ('a' * 19 + '\n' + 'a' * 19 + '\n', [19, 39], [1.0, 1.0]),
+        )
+        self.assertEqual(self.lbf.flush(), ('a' * 7 + '\n', [7], [1.0]))
+
+    def test_long_complete_line(self) -> None:
+        """complete lines longer than the limit are split in parts"""
+        self.assertEqual(
+            self.lbf.append('b' * 40 + '\nc\n', 1.0),
+            (
+                'b' * 19 + '\n' + 'b' * 19 + '\n' + 'bb\nc\n',
+                [19, 39, 42, 44],
+                [1.0, 1.0, 1.0, 1.0],
+            ),
+        )
+
+    def test_split_escape_sequence(self) -> None:
+        """terminal control sequences split across chunks are converted"""
+        self.assertEqual(self.lbf.append('abc\033[', 1.0), None)
+        self.assertEqual(self.lbf.append('2Jdef\n', 2.0), ('abc\ndef\n', [3, 7], [1.0, 2.0]))
+
     def test_empty_flush(self) -> None:
         self.assertEqual(self.lbf.flush(), None)
@@ -29,14 +29,31 @@ LineInfo: TypeAlias = "tuple[str, list[int], list[float]]"
 
 
 class LineBoundaryFinder:
-    __slots__ = ['max_line_length', 'newline_re', 'partial_line', 'time', 'warned']
+    __slots__ = [
+        '_chunks',
+        '_partial_length',
+        '_unscanned',
+        'max_line_length',
+        'newline_re',
+        'time',
+        'warned',
+    ]
+    # a newline sequence may be split between two appended chunks, so the end
+    # of the partial line is kept unconverted, and scanned again along with
+    # the next chunk.  This bounds the length of that tail, so that each
+    # character is only scanned a constant number of times.
+    MAX_UNSCANNED = 32
 
     def __init__(self, max_line_length: int, newline_re: str) -> None:
         # split at reasonable line length.
         # too big lines will fill master's memory, and slow down the UI too much.
         self.max_line_length = max_line_length
         self.newline_re = re.compile(newline_re)
-        self.partial_line = ""
+        # converted text of the current partial line, and its length
+        self._chunks: list[str] = []
+        self._partial_length = 0
+        # raw text at the end of the partial line, not converted yet
+        self._unscanned = ""
         self.warned = False
         self.time: float | None = None
 
@@ -45,72 +62,94 @@ class LineBoundaryFinder:
         # - text: string containing one or more lines
         # - lf_positions: newline position in returned string
         # - line times: times when first line symbol was received
-        had_partial_line = False
-        time_partial_line = None
-        if self.partial_line:
-            had_partial_line = True
-            text = self.partial_line + text
-            assert self.time is not None
-            time_partial_line = self.time
-
-        text = self.newline_re.sub('\n', text)
-
-        lf_positions = self.get_lf_positions(text)
-
-        # lines with appropriate number of symbols and their separators \n
-        ret_lines: list[str] = []
-        ret_indexes: list[int] = []  # ret_indexes is a list of '\n' symbols
-        ret_text_length = -1
-        ret_line_count = 0
-
-        first_position = 0
-        for position in lf_positions:
-            # finds too long lines and splits them, each element in ret_lines will be a line of
-            # appropriate length
-            while position - first_position >= self.max_line_length:
-                line = text[first_position : self.max_line_length - 1] + '\n'
-                ret_lines.append(line)
-                ret_line_count += 1
-                ret_text_length = ret_text_length + len(line)
-                ret_indexes.append(ret_text_length)
-                first_position = first_position + self.max_line_length
-
-            line = text[first_position : (position + 1)]
-            ret_lines.append(line)
-            ret_line_count += 1
-            ret_text_length = ret_text_length + len(line)
-            ret_indexes.append(ret_text_length)
-            first_position = position + 1
-
-        position = len(text)
-        while position - first_position >= self.max_line_length:
-            line = text[first_position : self.max_line_length - 1] + '\n'
-            ret_lines.append(line)
-            ret_text_length = ret_text_length + len(line)
-            ret_indexes.append(ret_text_length)
-            first_position = first_position + self.max_line_length - 1
-
-        if had_partial_line:
-            times = []
-            if ret_line_count > 1:
-                times = [time] * (ret_line_count - 1)
-
-            assert time_partial_line is not None
-            line_times = [time_partial_line, *times]
+        unscanned = self._unscanned
+        had_partial_line = bool(self._partial_length or unscanned)
+        time_partial_line = self.time
+
+        if unscanned:
+            text = unscanned + text
+        converted = self.newline_re.sub('\n', text)
+        i = converted.rfind('\n')
+        # nothing was converted after the last newline, so the end of the
+        # converted text is also the end of the raw text
+        tail = len(converted) - i - 1
+        if tail:
+            tail = min(tail, self.MAX_UNSCANNED)
+            self._unscanned = text[-tail:]
+            converted = converted[:-tail]
+        elif unscanned:
+            self._unscanned = ''
+
+        if i < 0:
+            ret_text = ''
+            if converted:
+                self._chunks.append(converted)
+                self._partial_length += len(converted)
         else:
-            line_times = ret_line_count * [time]
-
-        ret_text = "".join(ret_lines)
-
-        if ret_text != '' or not had_partial_line:
-            self.time = time
-
-        self.partial_line = text[first_position:position]
+            ret_text = converted[: i + 1]
+            converted = converted[i + 1 :]
+            if self._chunks:
+                self._chunks.append(ret_text)
+                ret_text = ''.join(self._chunks)
+            self._chunks = [converted] if converted else []
+            self._partial_length = len(converted)
+            if len(ret_text) > self.max_line_length:
+                ret_text = self._split_long_lines(ret_text)
+
+        if self._partial_length + len(self._unscanned) >= self.max_line_length:
+            ret_text += self._split_partial_line()
 
         if ret_text == '':
+            if not had_partial_line:
+                self.time = time
             return None
 
-        return (ret_text, ret_indexes, line_times)
+        lf_positions = self.get_lf_positions(ret_text)
+        if had_partial_line:
+            assert time_partial_line is not None
+            line_times = [time_partial_line] + [time] * (len(lf_positions) - 1)
+        else:
+            line_times = len(lf_positions) * [time]
+        self.time = time
+
+        return (ret_text, lf_positions, line_times)
+
+    def _split_line(self, line: str) -> list[str]:
+        # each part, plus its newline, fits in max_line_length
+        step = self.max_line_length - 1
+        return [line[i : i + step] for i in range(0, len(line), step)]
+
+    def _split_long_lines(self, text: str) -> str:
+        # text is made of complete lines, each ended by a newline
+        lines = text.split('\n')
+        if len(max(lines, key=len)) < self.max_line_length:
+            return text
+        pieces: list[str] = []
+        for line in lines:
+            if len(line) >= self.max_line_length:
+                pieces.extend(self._split_line(line))
+            else:
+                pieces.append(line)
+        return '\n'.join(pieces)
+
+    def _split_partial_line(self) -> str:
+        # returns the beginning of the partial line, split in lines, as long as
+        # the partial line is too long
+        unscanned_length = len(self._unscanned)
+        length = self._partial_length + unscanned_length
+        if length < self.max_line_length:
+            return ''
+        step = self.max_line_length - 1
+        taken = ((length - self.max_line_length) // step + 1) * step
+        partial = ''.join(self._chunks) + self._unscanned
+        if taken < length - unscanned_length:
+            self._chunks = [partial[taken : length - unscanned_length]]
+            self._partial_length = length - unscanned_length - taken
+        else:
+            self._chunks = []
+            self._partial_length = 0
+            self._unscanned = partial[taken:]
+        return '\n'.join(self._split_line(partial[:taken])) + '\n'
 
     def get_lf_positions(self, text: str) -> list[int]:
         lf_position = 0
@@ -124,7 +163,7 @@ class LineBoundaryFinder:
         return lf_positions
 
     def flush(self) -> LineInfo | None:
-        if self.partial_line != "":
+        if self._partial_length or self._unscanned:
             assert self.time is not None
             return self.append('\n', self.time)
         return None